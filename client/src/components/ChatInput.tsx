@@ -199,6 +199,8 @@ export function ChatInput() {
 
     let fullAssistantContent = ''
     let fullThinkingContent = ''
+    // Set when the server stored the assistant message itself
+    let storedMessageId: string | undefined
     let currentToolCall: { toolName: string; toolInput: Record<string, unknown> } | null = null
 
     try {
@@ -209,6 +211,7 @@ export function ChatInput() {
         body: JSON.stringify({
           message: finalMessage,
           conversationId: convId,
+          conversation_id: convId,
           thread_id: convId,
           extended_thinking: extendedThinkingEnabled,
           temperature: temperature,
@@ -217,10 +220,16 @@ export function ChatInput() {
           model: model,
           permission_mode: permissionMode,
           memory_enabled: memoryEnabled,
+          coalesce: true,
         }),
         signal: abortController.signal,
       })
 
+      if (response.status === 429 || response.status === 503) {
+        // Run was not admitted (per-user limit or full queue)
+        const body = await response.json().catch(() => null)
+        throw new Error(body?.detail || 'The agent is busy, please try again shortly')
+      }
       if (!response.ok) {
         throw new Error(`HTTP error! status: ${response.status}`)
       }
@@ -307,6 +316,7 @@ export function ChatInput() {
                     }
                     break
                   case 'done':
+                    storedMessageId = eventData.message_id
                     updateMessage(messageId, {
                       content: fullAssistantContent,
                       isStreaming: false,
@@ -336,6 +346,35 @@ export function ChatInput() {
                       setPanelOpen(true)
                     }
                     break
+                  case 'artifact_end':
+                    // A code block closed mid-stream; the done event repeats it by id
+                    if (eventData.id && !eventData.discarded) {
+                      addArtifact({
+                        id: eventData.id,
+                        title: eventData.title,
+                        content: eventData.content,
+                        language: eventData.language,
+                        version: 1,
+                        createdAt: new Date().toISOString(),
+                        conversationId: convId,
+                        artifact_type: eventData.artifact_type,
+                      })
+                      setPanelType('artifacts')
+                      setPanelOpen(true)
+                    }
+                    break
+                  case 'context_sources':
+                    if (eventData.sources) {
+                      updateMessage(messageId, { contextSources: eventData.sources })
+                    }
+                    break
+                  case 'suggested_follow_ups':
+                    if (eventData.suggested_follow_ups) {
+                      updateMessage(messageId, {
+                        suggestedFollowUps: eventData.suggested_follow_ups,
+                      })
+                    }
+                    break
                   case 'error':
                     console.error(`Stream error (${model}):`, eventData.error)
                     break
@@ -368,27 +407,31 @@ export function ChatInput() {
         model: model,
       })
 
-      // Persist assistant message to backend
-      try {
-        await api.createMessage(convId, {
-          content: fullAssistantContent,
-          role: 'assistant',
-          thinkingContent: fullThinkingContent || undefined,
-          model: model,
-        })
-      } catch (e) {
-        console.warn('Failed to persist assistant message:', e)
+      // Persist assistant message to backend unless the stream already did
+      if (!storedMessageId) {
+        try {
+          await api.createMessage(convId, {
+            content: fullAssistantContent,
+            role: 'assistant',
+            thinkingContent: fullThinkingContent || undefined,
+            model: model,
+          })
+        } catch (e) {
+          console.warn('Failed to persist assistant message:', e)
+        }
       }
 
-      // Detect artifacts
-      try {
-        const detectedArtifacts = await detectArtifacts(fullAssistantContent, convId)
-        if (detectedArtifacts.length > 0) {
-          setPanelType('artifacts')
-          setPanelOpen(true)
+      // Detect artifacts (a stored turn already delivered its artifacts)
+      if (!storedMessageId) {
+        try {
+          const detectedArtifacts = await detectArtifacts(fullAssistantContent, convId)
+          if (detectedArtifacts.length > 0) {
+            setPanelType('artifacts')
+            setPanelOpen(true)
+          }
+        } catch (e) {
+          console.warn('Failed to detect artifacts:', e)
         }
-      } catch (e) {
-        console.warn('Failed to detect artifacts:', e)
       }
 
     } catch (error: unknown) {
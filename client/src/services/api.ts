@@ -1676,7 +1676,7 @@ class APIService {
     user_id?: string
     time_range?: string
     limit?: number
-    offset?: number
+    cursor?: string
   }): Promise<{
     activities: Array<{
       id: string
@@ -1691,6 +1691,8 @@ class APIService {
     }>
     total: number
     has_more: boolean
+    next_cursor?: string | null
+    prev_cursor?: string | null
   }> {
     const params = new URLSearchParams()
     if (filters?.action_type) params.append('action_type', filters.action_type)
@@ -1698,7 +1700,7 @@ class APIService {
     if (filters?.user_id) params.append('user_id', filters.user_id)
     if (filters?.time_range) params.append('time_range', filters.time_range)
     if (filters?.limit) params.append('limit', filters.limit.toString())
-    if (filters?.offset) params.append('offset', filters.offset.toString())
+    if (filters?.cursor) params.append('cursor', filters.cursor)
 
     const url = `${API_BASE}/activity${params.toString() ? '?' + params.toString() : ''}`
     const response = await fetch(url)
@@ -2,6 +2,14 @@ import { create } from 'zustand'
 import { useRecentItemsStore } from './recentItemsStore'
 import { logActivity } from '../services/api'
 
+export interface ContextSource {
+  file_id: string
+  filename: string
+  chunk_index: number | null  // null when the whole file was included
+  tokens: number
+  score?: number
+}
+
 export interface Message {
   id: string
   conversationId: string
@@ -20,6 +28,7 @@ export interface Message {
   cacheReadTokens?: number
   cacheWriteTokens?: number
   suggestedFollowUps?: string[]  // Suggested follow-up questions
+  contextSources?: ContextSource[]  // Project files or passages included in the prompt
   model?: string  // Model ID that generated this message (for comparison mode)
   comparisonGroup?: string  // Group ID for comparison messages (links multiple assistant messages)
 }
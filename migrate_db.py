@@ -90,6 +90,119 @@ def create_foreign_key(conn, table_name: str, from_col: str, to_table: str, to_c
     return True
 
 
+def _sqlalchemy_engine():
+    """Synchronous SQLAlchemy engine for helpers shared with the application."""
+    from sqlalchemy import create_engine
+
+    return create_engine(f"sqlite:///{DB_PATH}")
+
+
+def create_search_index_tables() -> List[str]:
+    """Create missing FTS5 search tables and triggers, backfilling new ones."""
+    from src.core.search_index import create_search_index
+
+    engine = _sqlalchemy_engine()
+    try:
+        with engine.begin() as conn:
+            created = create_search_index(conn)
+    finally:
+        engine.dispose()
+    for name in created:
+        print(f"  ✓ Created search index: {name}")
+    return created
+
+
+def create_usage_rollup_tables() -> bool:
+    """Create the usage tables and rollup triggers, backfilling empty rollups."""
+    from src.core.usage_rollups import create_usage_rollups
+    from src.models.usage_rollup import UsageRollup
+    from src.models.usage_tracking import UsageTracking
+
+    engine = _sqlalchemy_engine()
+    try:
+        with engine.begin() as conn:
+            UsageTracking.__table__.create(conn, checkfirst=True)
+            UsageRollup.__table__.create(conn, checkfirst=True)
+            backfilled = create_usage_rollups(conn)
+    finally:
+        engine.dispose()
+    if backfilled:
+        print("  ✓ Backfilled usage rollups")
+    return backfilled
+
+
+def create_model_indexes(conn) -> int:
+    """Create composite indexes declared on the models that the database lacks."""
+    import src.models  # noqa: F401 - registers every table on Base.metadata
+    from src.core.database import Base, drop_superseded_indexes
+
+    existing_tables = get_existing_tables(conn)
+    before = {
+        table: get_existing_indexes(conn, table) for table in existing_tables
+    }
+
+    engine = _sqlalchemy_engine()
+    try:
+        with engine.begin() as sa_conn:
+            tables = [t for t in Base.metadata.sorted_tables if t.name in existing_tables]
+            for table in tables:
+                for index in table.indexes:
+                    index.create(sa_conn, checkfirst=True)
+            dropped = drop_superseded_indexes(sa_conn)
+    finally:
+        engine.dispose()
+
+    for index_name in dropped:
+        print(f"  ✓ Dropped superseded index: {index_name}")
+
+    created = 0
+    for table in existing_tables:
+        for index_name in sorted(get_existing_indexes(conn, table) - before[table]):
+            print(f"  ✓ Created index: {index_name} on {table}")
+            created += 1
+    return created + len(dropped)
+
+
+def reindex_search() -> bool:
+    """Rebuild the full-text search index from the base tables."""
+    from src.core.search_index import rebuild_search_index
+
+    if not Path(DB_PATH).exists():
+        print(f"❌ Database not found at {DB_PATH}")
+        return False
+
+    print(f"🔎 Rebuilding search index: {DB_PATH}")
+    engine = _sqlalchemy_engine()
+    try:
+        with engine.begin() as conn:
+            for name, count in rebuild_search_index(conn).items():
+                print(f"  ✓ Rebuilt {name}: {count} rows")
+    finally:
+        engine.dispose()
+    return True
+
+
+def rebuild_rollups() -> bool:
+    """Recompute the daily and monthly usage rollups from usage_tracking."""
+    from src.core.usage_rollups import rebuild_usage_rollups
+    from src.models.usage_rollup import UsageRollup
+
+    if not Path(DB_PATH).exists():
+        print(f"❌ Database not found at {DB_PATH}")
+        return False
+
+    print(f"📊 Rebuilding usage rollups: {DB_PATH}")
+    engine = _sqlalchemy_engine()
+    try:
+        with engine.begin() as conn:
+            UsageRollup.__table__.create(conn, checkfirst=True)
+            for granularity, count in rebuild_usage_rollups(conn).items():
+                print(f"  ✓ Rebuilt {granularity} rollups: {count} rows")
+    finally:
+        engine.dispose()
+    return True
+
+
 def run_migrations() -> bool:
     """Run all database migrations."""
     db_path = Path(DB_PATH)
@@ -196,12 +309,25 @@ def run_migrations() -> bool:
                 ("branch_point_message_id", "VARCHAR(36)"),
                 ("branch_name", "VARCHAR(100)"),
                 ("branch_color", "VARCHAR(20)"),
+                ("inherits_parent_messages", "BOOLEAN DEFAULT 0"),
             ]
             for col_name, col_type in new_cols:
                 if col_name not in cols:
                     if add_column(conn, "conversations", col_name, col_type):
                         migrations_applied += 1
 
+        # Composite indexes declared on the models (see __table_args__)
+        migrations_applied += create_model_indexes(conn)
+
+        # Full-text search index (FTS5 tables + sync triggers), backfilled on creation
+        created = create_search_index_tables()
+        migrations_applied += len(created)
+
+        # Usage tracking and its daily/monthly rollups (tables + sync triggers),
+        # backfilled when empty
+        if create_usage_rollup_tables():
+            migrations_applied += 1
+
         if migrations_applied > 0:
             print(f"\n   Applied {migrations_applied} migration(s)")
         else:
@@ -280,11 +406,17 @@ if __name__ == "__main__":
 
     parser = argparse.ArgumentParser(description="Database migration system")
     parser.add_argument("--verify", action="store_true", help="Verify schema only")
+    parser.add_argument("--reindex", action="store_true", help="Rebuild the full-text search index")
+    parser.add_argument("--rebuild-rollups", action="store_true", help="Recompute the usage rollups")
 
     args = parser.parse_args()
 
     if args.verify:
         success = verify_schema()
+    elif args.reindex:
+        success = reindex_search()
+    elif args.rebuild_rollups:
+        success = rebuild_rollups()
     else:
         success = run_migrations()
 
@@ -0,0 +1,105 @@
+"""Microbenchmark: the original BaseHTTPMiddleware stack vs the pure ASGI middlewares.
+
+Drives a minimal FastAPI app in-process through httpx's ASGI transport and
+reports requests/sec for both stacks. Each request carries a bearer token to
+an endpoint guarded by ``JWTBearer``, like the authenticated API routes.
+
+"before" is the rate limit and session timeout middlewares exactly as they
+were at ``--rev`` (default: the commit before the limiter and middleware
+rewrites), loaded from git: BaseHTTPMiddleware subclasses with the
+deque-based limiter, and JWTBearer decoding the token a second time.
+"after" is the current ASGI middleware stack.
+
+Usage:
+    python scripts/bench_middleware.py [requests] [--rev REV]
+"""
+
+import argparse
+import asyncio
+import subprocess
+import sys
+import time
+import types
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from fastapi import Depends, FastAPI  # noqa: E402
+from httpx import ASGITransport, AsyncClient  # noqa: E402
+
+from src.core.rate_limiter import RateLimitMiddleware  # noqa: E402
+from src.core.session import JWTBearer, session_manager  # noqa: E402
+from src.core.session_middleware import SessionTimeoutMiddleware  # noqa: E402
+
+# Last commit with the BaseHTTPMiddleware versions
+BASELINE_REV = "75affd1"
+
+# Large enough that the limiter never blocks during the run
+LIMITS = {"requests_per_minute": 10**9, "requests_per_hour": 10**9}
+
+
+def load_baseline(path: str, rev: str) -> types.ModuleType:
+    """Import ``path`` as it was at ``rev``."""
+    source = subprocess.run(
+        ["git", "show", f"{rev}:{path}"],
+        cwd=ROOT,
+        check=True,
+        capture_output=True,
+        text=True,
+    ).stdout
+    module = types.ModuleType(f"baseline_{Path(path).stem}")
+    exec(compile(source, f"{rev}:{path}", "exec"), module.__dict__)
+    return module
+
+
+def build_app(baseline_rev: str = "") -> FastAPI:
+    """The benchmark app, with the middlewares of ``baseline_rev`` if given."""
+    app = FastAPI()
+
+    @app.get("/ping")
+    async def ping(token=Depends(JWTBearer())) -> dict:
+        return {"user": token.username}
+
+    if baseline_rev:
+        rate_limiter = load_baseline("src/core/rate_limiter.py", baseline_rev)
+        session_middleware = load_baseline("src/core/session_middleware.py", baseline_rev)
+        app.add_middleware(session_middleware.SessionTimeoutMiddleware)
+        app.add_middleware(rate_limiter.RateLimitMiddleware, **LIMITS)
+    else:
+        app.add_middleware(SessionTimeoutMiddleware)
+        app.add_middleware(RateLimitMiddleware, **LIMITS)
+    return app
+
+
+async def measure(app: FastAPI, token: str, requests: int) -> float:
+    headers = {"Authorization": f"Bearer {token}"}
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://bench") as client:
+        # Warm up
+        for _ in range(50):
+            await client.get("/ping", headers=headers)
+        start = time.perf_counter()
+        for _ in range(requests):
+            response = await client.get("/ping", headers=headers)
+            assert response.status_code == 200, response.text
+        return requests / (time.perf_counter() - start)
+
+
+async def main(requests: int, baseline_rev: str) -> None:
+    token = session_manager.create_session("bench")
+    before = await measure(build_app(baseline_rev), token, requests)
+    after = await measure(build_app(), token, requests)
+    print(f"requests: {requests}")
+    print(f"before ({baseline_rev}, BaseHTTPMiddleware): {before:8.0f} req/s")
+    print(f"after  (pure ASGI):                  {after:8.0f} req/s")
+    print(f"speedup: {after / before:.2f}x")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("requests", nargs="?", type=int, default=2000)
+    parser.add_argument(
+        "--rev", default=BASELINE_REV, help="git revision of the baseline middlewares"
+    )
+    args = parser.parse_args()
+    asyncio.run(main(args.requests, args.rev))
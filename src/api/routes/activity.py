@@ -10,6 +10,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 
 from src.core.database import get_db
 from src.models.activity import ActivityLog
+from src.utils.pagination import SortKey, paginate
 
 router = APIRouter()
 
@@ -46,6 +47,8 @@ class ActivityFeedResponse(BaseModel):
     activities: List[ActivityLogResponse]
     total: int
     has_more: bool
+    next_cursor: Optional[str] = None
+    prev_cursor: Optional[str] = None
 
 
 # ==================== API Endpoints ====================
@@ -78,6 +81,13 @@ async def log_activity(
     return log_entry.to_dict()
 
 
+# Newest first; id breaks ties so cursors are stable
+ACTIVITY_ORDER = (
+    SortKey(ActivityLog.created_at, descending=True),
+    SortKey(ActivityLog.id, descending=True),
+)
+
+
 @router.get("", response_model=ActivityFeedResponse)
 async def get_activity_feed(
     user_id: str = Query(default=None, description="Filter by user ID"),
@@ -85,10 +95,12 @@ async def get_activity_feed(
     resource_type: Optional[str] = Query(None, description="Filter by resource type"),
     time_range: str = Query("7d", description="Time range: 1d, 7d, 30d, all"),
     limit: int = Query(50, ge=1, le=100, description="Number of activities to return"),
-    offset: int = Query(0, ge=0, description="Offset for pagination"),
+    cursor: Optional[str] = Query(None, description="next_cursor or prev_cursor of a previous page"),
+    include_total: bool = Query(False, description="Count every matching activity into total"),
+    offset: int = Query(0, ge=0, description="Offset for pagination (deprecated, use cursor)"),
     db: AsyncSession = Depends(get_db),
 ) -> ActivityFeedResponse:
-    """Get activity feed with optional filters."""
+    """Get activity feed with optional filters, newest first."""
     # Calculate time range
     now = datetime.utcnow()
     time_filters = []
@@ -115,23 +127,17 @@ async def get_activity_feed(
     if resource_type:
         query = query.where(ActivityLog.resource_type == resource_type)
 
-    # Order by newest first
-    query = query.order_by(desc(ActivityLog.created_at))
-
-    # Apply pagination
-    query = query.limit(limit + 1).offset(offset)
-
-    result = await db.execute(query)
-    activities = result.scalars().all()
-
-    has_more = len(activities) > limit
-    if has_more:
-        activities = activities[:limit]
+    page = await paginate(
+        db, query, ACTIVITY_ORDER, limit=limit, cursor=cursor,
+        include_total=include_total, offset=offset,
+    )
 
     return ActivityFeedResponse(
-        activities=[activity.to_dict() for activity in activities],
-        total=len(activities),
-        has_more=has_more,
+        activities=[activity.to_dict() for activity in page.items],
+        total=page.total if page.total is not None else len(page.items),
+        has_more=page.has_more,
+        next_cursor=page.next_cursor,
+        prev_cursor=page.prev_cursor,
     )
 
 
@@ -1,7 +1,5 @@
 """Agent interaction endpoints with DeepAgents integration."""
 
-import json
-import re
 from typing import Optional
 from uuid import UUID, uuid4
 
@@ -13,218 +11,42 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 
 from src.core.config import settings
-from src.core.database import get_db
+from src.core.database import get_db, sibling_session
+from src.core.state_store import state_namespace
 from src.services.agent_service import agent_service
-from src.models.artifact import Artifact
+from src.services.context_service import context_service
+from src.services.memory_retrieval_service import memory_retrieval_service
+from src.services.followup_service import followup_service
+from src.services.run_manager import AgentRun, RunRejected, run_manager
+from src.services.run_persistence import RunPersistence, TokenUsage
 from src.models.conversation import Conversation
 from src.models.memory import Memory
+from src.utils.artifact_detection import CodeFenceParser, extract_code_blocks
 from src.utils.audit import log_agent_invocation, get_request_info
+from src.utils.sse import CoalesceOptions, TokenChunk, coalesce_tokens, sse_json
 from src.utils.content_filter import apply_content_filtering_to_message, should_filter_response
-from anthropic import Anthropic
 
 router = APIRouter()
 
-# Initialize Anthropic client for generating suggested follow-ups
-anthropic_client = None
-
-
-def get_anthropic_client():
-    """Get or create the Anthropic client."""
-    global anthropic_client
-    if anthropic_client is None and settings.anthropic_api_key:
-        anthropic_client = Anthropic(api_key=settings.anthropic_api_key)
-    return anthropic_client
-
-
-async def generate_suggested_followups(response_content: str, user_message: str) -> list[str]:
-    """
-    Generate 3-5 suggested follow-up questions based on the conversation context.
-
-    Uses Claude to analyze the response and suggest relevant follow-up questions.
-    """
-    try:
-        client = get_anthropic_client()
-        if not client:
-            # Return empty list if API key not configured
-            return []
-
-        prompt = f"""Based on this conversation, suggest 3-5 relevant follow-up questions the user might want to ask.
-
-User's question: {user_message}
-
-Assistant's response: {response_content[:2000]}
-
-Guidelines:
-- Generate questions that naturally continue the conversation
-- Questions should be specific and actionable
-- Avoid generic questions like "Can you tell me more?"
-- Each question should be on its own line
-- Return ONLY the questions, no numbering or prefixes
-
-Example format:
-What is the specific implementation detail?
-How does this compare to alternative approaches?
-What are the potential edge cases?
-"""
-
-        response = client.messages.create(
-            model="claude-haiku-4-5-20251001",
-            max_tokens=300,
-            temperature=0.7,
-            messages=[{"role": "user", "content": prompt}]
-        )
-
-        content = response.content[0].text
-        # Parse the response into a list of questions
-        questions = [q.strip() for q in content.split('\n') if q.strip()]
-        # Limit to 5 suggestions
-        return questions[:5]
-
-    except Exception as e:
-        # Don't fail the response if suggestion generation fails
-        print(f"Failed to generate suggested follow-ups: {e}")
-        return []
-
-
-async def get_effective_custom_instructions(
-    conversation_id: Optional[str],
-    db: AsyncSession
-) -> tuple[str, str]:
-    """
-    Get effective custom instructions for a conversation.
-
-    Returns a tuple of (project_instructions, global_instructions).
-    Project instructions take precedence over global instructions.
-    """
-    from src.api.routes.settings import user_settings
-    from sqlalchemy import select
-    from src.models.conversation import Conversation
-    from src.models.project import Project
-
-    global_instructions = user_settings.get("custom_instructions", "")
-    project_instructions = ""
-
-    if conversation_id:
-        # Get conversation to find its project
-        result = await db.execute(
-            select(Conversation).where(Conversation.id == conversation_id)
-        )
-        conversation = result.scalar_one_or_none()
-
-        if conversation and conversation.project_id:
-            # Get project custom instructions
-            result = await db.execute(
-                select(Project).where(Project.id == conversation.project_id)
-            )
-            project = result.scalar_one_or_none()
-
-            if project and project.custom_instructions:
-                project_instructions = project.custom_instructions
-
-    return project_instructions, global_instructions
-
-
-async def get_project_files_content(
-    conversation_id: Optional[str],
-    db: AsyncSession
-) -> str:
-    """
-    Get the content of all files in the project associated with a conversation.
-
-    Returns a formatted string containing file contents for the agent context.
-    """
-    from src.models.project_file import ProjectFile
-
-    if not conversation_id:
-        return ""
-
-    # Get conversation to find its project
-    result = await db.execute(
-        select(Conversation).where(Conversation.id == conversation_id)
-    )
-    conversation = result.scalar_one_or_none()
-
-    if not conversation or not conversation.project_id:
-        return ""
-
-    # Get all files in the project
-    result = await db.execute(
-        select(ProjectFile)
-        .where(ProjectFile.project_id == conversation.project_id)
-        .where(ProjectFile.is_deleted == False)
-        .where(ProjectFile.content != None)
-    )
-    files = result.scalars().all()
-
-    if not files:
-        return ""
-
-    # Format file contents for the agent
-    file_context = "\n\n[PROJECT FILES CONTEXT]\n"
-    file_context += "The following files are available in this project:\n\n"
-
-    for file in files:
-        file_context += f"--- File: {file.original_filename} ---\n"
-        file_context += f"Content:\n{file.content}\n\n"
-
-    file_context += "[END PROJECT FILES CONTEXT]\n\n"
-    return file_context
-
-
-async def get_memory_context(
-    conversation_id: Optional[str],
-    db: AsyncSession
-) -> str:
-    """
-    Get relevant long-term memories for the agent context.
-
-    Returns a formatted string containing memories for the agent context.
-    """
-    from src.api.routes.settings import user_settings
-
-    # Check if memory is enabled
-    if not user_settings.get("memory_enabled", True):
-        return ""
-
-    # Get all active memories
-    result = await db.execute(
-        select(Memory)
-        .where(Memory.is_active == True)
-        .order_by(Memory.created_at.desc())
-    )
-    memories = result.scalars().all()
-
-    if not memories:
-        return ""
-
-    # Format memories for the agent
-    memory_context = "\n\n[LONG-TERM MEMORY CONTEXT]\n"
-    memory_context += "The following are facts and preferences stored in your long-term memory:\n\n"
-
-    for memory in memories:
-        memory_context += f"- [{memory.category.upper()}] {memory.content}\n"
-
-    memory_context += "[END LONG-TERM MEMORY CONTEXT]\n\n"
-    return memory_context
-
 
 async def extract_memories_from_response(
     content: str,
     conversation_id: Optional[str],
-    db: AsyncSession
-) -> list[dict]:
+    persistence: RunPersistence,
+) -> list[Memory]:
     """
-    Extract and store memories from agent response content.
+    Extract memories from agent response content.
 
     This function looks for patterns indicating the agent learned something
-    about the user that should be stored in long-term memory.
+    about the user that should be stored in long-term memory. They are queued
+    on ``persistence`` and stored when it is flushed.
 
-    Returns list of created memories.
+    Returns list of queued memories.
     """
     from src.api.routes.settings import user_settings
 
     # Check if memory is enabled
-    if not user_settings.get("memory_enabled", True):
+    if not await user_settings.aget("memory_enabled", True):
         return []
 
     # Simple pattern matching for memory extraction
@@ -251,146 +73,17 @@ async def extract_memories_from_response(
             if len(memory_content) < 10:
                 continue
 
-            # Create memory
-            memory = Memory(
-                content=memory_content,
+            # Queue memory
+            created_memories.append(persistence.add_memory(
+                memory_content,
                 category="preference",
                 source_conversation_id=conversation_id,
-            )
-
-            db.add(memory)
-            await db.commit()
-            await db.refresh(memory)
-
-            created_memories.append(memory.to_dict())
+            ))
             break  # Only extract one memory per response for now
 
     return created_memories
 
 
-# Artifact detection constants
-LANGUAGE_ALIASES = {
-    "javascript": "js",
-    "typescript": "ts",
-    "python": "py",
-    "java": "java",
-    "cpp": "cpp",
-    "c++": "cpp",
-    "csharp": "cs",
-    "c#": "cs",
-    "go": "go",
-    "rust": "rs",
-    "ruby": "rb",
-    "php": "php",
-    "swift": "swift",
-    "kotlin": "kt",
-    "html": "html",
-    "css": "css",
-    "json": "json",
-    "yaml": "yaml",
-    "markdown": "md",
-    "bash": "bash",
-    "shell": "bash",
-    "sql": "sql",
-    "graphql": "graphql",
-    "xml": "xml",
-}
-
-REACT_PATTERNS = [
-    r"import\s+.*React",
-    r"export\s+default\s+function\s+\w+\([^)]*\)\s*{[^}]*return[^}]*<",
-    r"const\s+\w+\s*=\s*\([^)]*\)\s*=>\s*{[^}]*return[^}]*<",
-    r"function\s+\w+\([^)]*\)\s*{[^}]*return[^}]*<",
-    r"jsx",
-    r"tsx",
-]
-
-
-def detect_language(code: str, language_hint: str = "") -> str:
-    """Detect the programming language of a code block."""
-    if language_hint:
-        normalized = language_hint.lower().strip()
-        return LANGUAGE_ALIASES.get(normalized, normalized)
-
-    for pattern in REACT_PATTERNS:
-        if re.search(pattern, code, re.IGNORECASE):
-            return "React/JSX"
-
-    if "def " in code and ":" in code and "import " not in code:
-        return "python"
-    if "function " in code or "=> " in code or "let " in code or "const " in code:
-        return "javascript"
-    if "public class " in code or "System.out.println" in code:
-        return "java"
-    if "#include " in code or "std::" in code:
-        return "cpp"
-    if "package " in code and "func " in code:
-        return "go"
-
-    return "code"
-
-
-def extract_title_from_code(code: str, language: str) -> str:
-    """Extract a meaningful title from code content."""
-    patterns = [
-        r"function\s+(\w+)",
-        r"const\s+(\w+)\s*=\s*\(",
-        r"export\s+default\s+function\s+(\w+)",
-        r"class\s+(\w+)",
-        r"def\s+(\w+)",
-    ]
-
-    for pattern in patterns:
-        match = re.search(pattern, code)
-        if match:
-            name = match.group(1)
-            if language == "React/JSX" and name[0].islower():
-                name = name[0].upper() + name[1:]
-            return name
-
-    first_line = code.strip().split('\n')[0]
-    if len(first_line) < 50:
-        return first_line.strip().strip('/*#').strip()
-
-    return "Code Artifact"
-
-
-def extract_code_blocks(content: str) -> list[dict]:
-    """Extract code blocks from markdown content."""
-    pattern = r"```(\w+)?\n(.*?)\n```"
-    matches = re.findall(pattern, content, re.DOTALL)
-
-    artifacts = []
-    for language_hint, code in matches:
-        if not code.strip():
-            continue
-
-        language = detect_language(code, language_hint)
-        title = extract_title_from_code(code, language)
-
-        # Auto-detect artifact type from language
-        language_lower = language.lower()
-        if language_lower in ["html", "htm"]:
-            artifact_type = "html"
-        elif language_lower in ["svg"]:
-            artifact_type = "svg"
-        elif language_lower in ["mermaid"]:
-            artifact_type = "mermaid"
-        elif language_lower in ["latex", "tex"]:
-            artifact_type = "latex"
-        else:
-            artifact_type = "code"
-
-        artifacts.append({
-            "content": code,
-            "language": language,
-            "title": title,
-            "artifact_type": artifact_type,
-        })
-
-    return artifacts
-
-
 async def create_artifacts_from_response(
     content: str,
     conversation_id: Optional[str],
@@ -408,30 +101,23 @@ async def create_artifacts_from_response(
     if not artifacts_data:
         return []
 
-    created_artifacts = []
+    persistence = RunPersistence(conversation_id=conversation_id, model="")
+    persistence.add_artifacts(artifacts_data)
+    stored = await persistence.flush(db)
+    return stored["artifacts"]
 
-    for artifact_data in artifacts_data:
-        artifact = Artifact(
-            conversation_id=conversation_id,
-            content=artifact_data["content"],
-            title=artifact_data["title"],
-            language=artifact_data["language"],
-            artifact_type=artifact_data["artifact_type"],
-        )
-
-        db.add(artifact)
-        created_artifacts.append({
-            "id": artifact.id,
-            "title": artifact.title,
-            "content": artifact.content,
-            "language": artifact.language,
-            "artifact_type": artifact.artifact_type,
-            "version": artifact.version,
-            "created_at": artifact.created_at.isoformat() if artifact.created_at else None,
-        })
 
-    await db.commit()
-    return created_artifacts
+def artifact_event(
+    name: str,
+    payload: dict,
+    fences: CodeFenceParser,
+    conversation_id: Optional[str],
+) -> dict:
+    """SSE event for a streamed code block; a closed block gets its artifact id."""
+    if name == "artifact_end" and conversation_id and not payload.get("discarded"):
+        block = fences.blocks[payload["index"]]
+        block["id"] = payload["id"] = str(uuid4())
+    return {"event": name, "data": sse_json(payload)}
 
 
 class AgentRequest(BaseModel):
@@ -457,9 +143,14 @@ class InterruptDecision(BaseModel):
     edited_input: Optional[dict] = None
 
 
-# Thread state storage
-thread_states: dict[str, dict] = {}
-pending_approvals: dict[str, dict] = {}
+# Thread state and pending HITL approvals, shared between workers
+thread_states = state_namespace("agent_thread_states", ttl_seconds=24 * 60 * 60)
+pending_approvals = state_namespace("agent_pending_approvals", ttl_seconds=60 * 60)
+
+
+async def update_thread_state(thread_id: str, **fields) -> None:
+    """Merge fields into a thread's stored state."""
+    await thread_states.amerge(thread_id, fields)
 
 
 @router.post("/invoke")
@@ -488,29 +179,17 @@ async def invoke_agent(
                 "error": "Agent creation failed - check API key configuration",
             }
 
-        # Get effective custom instructions (project overrides global)
-        project_instructions, global_instructions = await get_effective_custom_instructions(
-            str(data.conversation_id) if data.conversation_id else None,
-            db
-        )
-
-        # Get project files content
-        files_content = await get_project_files_content(
+        # Instructions (project overrides global), project files and memories
+        context = await context_service.assemble(
             str(data.conversation_id) if data.conversation_id else None,
-            db
-        )
-
-        # Get long-term memory context
-        memory_content = await get_memory_context(
-            str(data.conversation_id) if data.conversation_id else None,
-            db
+            db,
+            query=data.message,
         )
+        files_content = context.files_content
+        memory_content = context.memory_content
 
         # Use explicitly provided instructions, or fall back to effective instructions
-        effective_instructions = data.custom_instructions
-        if not effective_instructions or not effective_instructions.strip():
-            # Use project instructions if available, otherwise global
-            effective_instructions = project_instructions if project_instructions else global_instructions
+        effective_instructions = context.effective_instructions(data.custom_instructions)
 
         # Prepare message with custom instructions and files content if provided
         message_content = data.message
@@ -535,7 +214,10 @@ async def invoke_agent(
                 "system_prompt_override": data.system_prompt_override,
             }
         }
-        result = agent.invoke({"messages": [HumanMessage(content=message_content)]}, config=config)
+        # The shared checkpointer is async-only, so the graph must run with ainvoke
+        result = await agent.ainvoke(
+            {"messages": [HumanMessage(content=message_content)]}, config=config
+        )
 
         # Extract response from result
         response_message = result.get("messages", [])[-1] if result.get("messages") else AIMessage(content="No response")
@@ -556,6 +238,7 @@ async def invoke_agent(
             "model": data.model,
             "status": "completed",
             "artifacts": created_artifacts,
+            "context_sources": context.sources,
         }
 
     except Exception as e:
@@ -577,6 +260,8 @@ async def stream_agent(
     data = await request.json()
     message = data.get("message", "")
     thread_id = data.get("thread_id") or str(uuid4())
+    # Identifies this generation for resuming with Last-Event-ID
+    run_id = str(uuid4())
     model = data.get("model", "claude-sonnet-4-5-20250929")
     permission_mode = data.get("permission_mode", "default")
     extended_thinking = data.get("extended_thinking", False)
@@ -609,13 +294,13 @@ async def stream_agent(
         # Don't fail the request if audit logging fails
         print(f"Audit logging error: {e}")
 
-    async def event_generator():
+    async def event_generator(db: AsyncSession):
         """Generate SSE events for agent response."""
         try:
             # Start event
             yield {
                 "event": "start",
-                "data": json.dumps({"thread_id": thread_id, "model": model, "temperature": temperature, "max_tokens": max_tokens}),
+                "data": sse_json({"run_id": run_id, "thread_id": thread_id, "model": model, "temperature": temperature, "max_tokens": max_tokens}),
             }
 
             # Get or create agent
@@ -629,39 +314,31 @@ async def stream_agent(
                 # Agent creation failed, return mock response
                 response_text = f"Agent unavailable. This is a mock response to: {message}"
                 for word in response_text.split():
-                    yield {
-                        "event": "message",
-                        "data": json.dumps({"content": word + " "}),
-                    }
+                    yield TokenChunk("message", word + " ")
                 yield {
                     "event": "done",
-                    "data": json.dumps({"thread_id": thread_id, "error": "Agent creation failed"}),
+                    "data": sse_json({"thread_id": thread_id, "error": "Agent creation failed"}),
                 }
                 return
 
-            # Get effective custom instructions (project overrides global)
-            project_instructions, global_instructions = await get_effective_custom_instructions(
+            # Instructions (project overrides global), project files and memories
+            context = await context_service.assemble(
                 str(conversation_id) if conversation_id else None,
-                db
+                db,
+                query=message,
             )
+            files_content = context.files_content
+            memory_content = context.memory_content
 
-            # Get project files content
-            files_content = await get_project_files_content(
-                str(conversation_id) if conversation_id else None,
-                db
-            )
-
-            # Get long-term memory context
-            memory_content = await get_memory_context(
-                str(conversation_id) if conversation_id else None,
-                db
-            )
+            # Tell the client which project files (or passages) the answer can draw on
+            if context.sources:
+                yield {
+                    "event": "context_sources",
+                    "data": sse_json({"sources": context.sources}),
+                }
 
             # Use explicitly provided instructions, or fall back to effective instructions
-            effective_instructions = custom_instructions
-            if not effective_instructions or not effective_instructions.strip():
-                # Use project instructions if available, otherwise global
-                effective_instructions = project_instructions if project_instructions else global_instructions
+            effective_instructions = context.effective_instructions(custom_instructions)
 
             # Stream agent response with extended thinking support
             # Pass temperature, max_tokens, custom_instructions, and system_prompt_override in config for mock agent to use
@@ -672,7 +349,7 @@ async def stream_agent(
                 message_content = f"[System Instructions: {effective_instructions}]\n\n{message}"
 
             # Apply content filtering
-            message_content = apply_content_filtering_to_message(message_content)
+            message_content = await apply_content_filtering_to_message(message_content)
 
             # Add project files context if available
             if files_content:
@@ -694,9 +371,16 @@ async def stream_agent(
                 }
             }
 
-            # Track thinking content and full response for artifact detection
+            # Track thinking content and full response; code blocks are
+            # detected as they stream and become artifacts when they close
             thinking_content = ""
             full_response = ""
+            fences = CodeFenceParser()
+            # The turn's writes, committed together once the stream completes
+            persistence = RunPersistence(
+                conversation_id=str(conversation_id) if conversation_id else None,
+                model=model,
+            )
             last_todos = None
             last_files = None
 
@@ -704,7 +388,7 @@ async def stream_agent(
             if extended_thinking:
                 yield {
                     "event": "thinking",
-                    "data": json.dumps({"status": "thinking"}),
+                    "data": sse_json({"status": "thinking"}),
                 }
 
             try:
@@ -721,10 +405,7 @@ async def stream_agent(
                         content = chunk.content if hasattr(chunk, 'content') else ""
                         if content:
                             thinking_content += content
-                            yield {
-                                "event": "thinking",
-                                "data": json.dumps({"content": content}),
-                            }
+                            yield TokenChunk("thinking", content)
                         continue
 
                     # Stream message content
@@ -733,10 +414,9 @@ async def stream_agent(
                         content = chunk.content if hasattr(chunk, 'content') else ""
                         if content:
                             full_response += content
-                            yield {
-                                "event": "message",
-                                "data": json.dumps({"content": content}),
-                            }
+                            yield TokenChunk("message", content)
+                            for name, payload in fences.feed(content):
+                                yield artifact_event(name, payload, fences, conversation_id)
 
                     # Tool start event
                     elif event_kind == "on_tool_start":
@@ -744,7 +424,7 @@ async def stream_agent(
                         tool_input = event.get("data", {}).get("input", {})
                         yield {
                             "event": "tool_start",
-                            "data": json.dumps({
+                            "data": sse_json({
                                 "tool": tool_name,
                                 "input": tool_input,
                             }),
@@ -755,7 +435,7 @@ async def stream_agent(
                         tool_output = event.get("data", {}).get("output", "")
                         yield {
                             "event": "tool_end",
-                            "data": json.dumps({"output": str(tool_output)[:500]}),  # Limit output size
+                            "data": sse_json({"output": str(tool_output)[:500]}),  # Limit output size
                         }
 
                     # Interrupt event (HITL - Human in the Loop)
@@ -766,16 +446,16 @@ async def stream_agent(
                         reason = event_data.get("reason", "Tool execution requires approval")
 
                         # Store in pending approvals
-                        pending_approvals[thread_id] = {
+                        await pending_approvals.aset(thread_id, {
                             "tool": tool_name,
                             "input": tool_input,
                             "reason": reason,
-                        }
+                        })
 
                         # Emit interrupt event to frontend
                         yield {
                             "event": "interrupt",
-                            "data": json.dumps({
+                            "data": sse_json({
                                 "tool": tool_name,
                                 "input": tool_input,
                                 "reason": reason,
@@ -793,14 +473,15 @@ async def stream_agent(
                         cache_read_tokens = event_data.get("cache_read_tokens", 0)
                         cache_write_tokens = event_data.get("cache_write_tokens", 0)
 
-                        # Store token information in thread state for the done event
-                        thread_states[thread_id] = thread_states.get(thread_id, {})
-                        thread_states[thread_id]["tokens"] = {
-                            "input_tokens": input_tokens,
-                            "output_tokens": output_tokens,
-                            "cache_read_tokens": cache_read_tokens,
-                            "cache_write_tokens": cache_write_tokens,
-                        }
+                        # Record usage for the turn and keep it in thread state
+                        usage = TokenUsage(
+                            input_tokens=input_tokens,
+                            output_tokens=output_tokens,
+                            cache_read_tokens=cache_read_tokens,
+                            cache_write_tokens=cache_write_tokens,
+                        )
+                        persistence.set_usage(usage)
+                        await update_thread_state(thread_id, tokens=usage.to_dict())
 
                     # Handle custom events (e.g., todos from mock agent)
                     elif event_kind == "on_custom_event":
@@ -810,12 +491,11 @@ async def stream_agent(
                             if "todos" in event_data:
                                 todos = event_data["todos"]
                                 # Store in thread state
-                                thread_states[thread_id] = thread_states.get(thread_id, {})
-                                thread_states[thread_id]["todos"] = todos
+                                await update_thread_state(thread_id, todos=todos)
                                 # Emit todos event
                                 yield {
                                     "event": "todos",
-                                    "data": json.dumps({"todos": todos}),
+                                    "data": sse_json({"todos": todos}),
                                 }
                         elif event_name == "subagent_start":
                             # Handle sub-agent delegation start
@@ -824,7 +504,7 @@ async def stream_agent(
                             reason = event_data.get("reason", "")
                             yield {
                                 "event": "subagent_start",
-                                "data": json.dumps({
+                                "data": sse_json({
                                     "subagent": subagent,
                                     "reason": reason,
                                 }),
@@ -836,7 +516,7 @@ async def stream_agent(
                             progress = event_data.get("progress", 0)
                             yield {
                                 "event": "subagent_progress",
-                                "data": json.dumps({
+                                "data": sse_json({
                                     "subagent": subagent,
                                     "progress": progress,
                                 }),
@@ -848,7 +528,7 @@ async def stream_agent(
                             output = event_data.get("output", "")
                             yield {
                                 "event": "subagent_end",
-                                "data": json.dumps({
+                                "data": sse_json({
                                     "subagent": subagent,
                                     "output": output,
                                 }),
@@ -862,18 +542,16 @@ async def stream_agent(
 
                             if memory_content:
                                 try:
-                                    memory = Memory(
-                                        content=memory_content,
+                                    persistence.add_memory(
+                                        memory_content,
                                         category=category,
                                         source_conversation_id=source_conversation_id,
                                     )
-                                    db.add(memory)
-                                    await db.commit()
 
-                                    # Notify frontend of successful save
+                                    # Notify frontend of the save
                                     yield {
                                         "event": "memory_saved",
-                                        "data": json.dumps({
+                                        "data": sse_json({
                                             "content": memory_content,
                                             "category": category,
                                         }),
@@ -888,21 +566,15 @@ async def stream_agent(
 
                             if query:
                                 try:
-                                    # Search memories by content
-                                    result = await db.execute(
-                                        select(Memory)
-                                        .where(Memory.content.ilike(f"%{query}%"))
-                                        .where(Memory.is_active == True)
-                                        .order_by(Memory.created_at.desc())
-                                        .limit(5)
-                                    )
-                                    memories = result.scalars().all()
+                                    # Best-scoring memories for any of the query's terms
+                                    ranked = await memory_retrieval_service.rank(db, query, top_k=5)
+                                    memories = [item.memory for item in ranked]
 
                                     if memories:
                                         # Emit memories to frontend
                                         yield {
                                             "event": "memories",
-                                            "data": json.dumps({
+                                            "data": sse_json({
                                                 "memories": [m.to_dict() for m in memories],
                                             }),
                                         }
@@ -917,7 +589,7 @@ async def stream_agent(
                         last_todos = current_todos
                         yield {
                             "event": "todos",
-                            "data": json.dumps({"todos": current_todos}),
+                            "data": sse_json({"todos": current_todos}),
                         }
 
                 # Check for files in agent state during streaming
@@ -927,7 +599,7 @@ async def stream_agent(
                         last_files = current_files
                         yield {
                             "event": "files",
-                            "data": json.dumps({"files": current_files}),
+                            "data": sse_json({"files": current_files}),
                         }
 
             except Exception as e:
@@ -936,31 +608,24 @@ async def stream_agent(
                 traceback.print_exc()
                 yield {
                     "event": "error",
-                    "data": json.dumps({"error": str(e), "type": "streaming_error"}),
+                    "data": sse_json({"error": str(e), "type": "streaming_error"}),
                 }
                 return
 
-            # Detect and create artifacts from the full response
-            artifacts = []
-            if full_response and conversation_id:
-                try:
-                    artifacts = await create_artifacts_from_response(
-                        full_response,
-                        str(conversation_id),
-                        db
-                    )
-                except Exception as e:
-                    # Don't fail the response if artifact creation fails
-                    print(f"Artifact creation error: {e}")
+            for name, payload in fences.finish():
+                yield artifact_event(name, payload, fences, conversation_id)
 
-            # Extract and store memories from the response
+            # Code blocks detected while streaming become artifacts
+            persistence.add_artifacts(fences.blocks)
+
+            # Extract memories from the response
             extracted_memories = []
             if full_response and conversation_id:
                 try:
                     extracted_memories = await extract_memories_from_response(
                         full_response,
                         str(conversation_id),
-                        db
+                        persistence,
                     )
                 except Exception as e:
                     # Don't fail the response if memory extraction fails
@@ -968,31 +633,29 @@ async def stream_agent(
 
             # Update thread state with todos if agent provided them
             if hasattr(agent, '_thread_state') and 'todos' in agent._thread_state:
-                thread_states[thread_id] = thread_states.get(thread_id, {})
-                thread_states[thread_id]["todos"] = agent._thread_state["todos"]
+                await update_thread_state(thread_id, todos=agent._thread_state["todos"])
                 # Emit final todos update
                 yield {
                     "event": "todos",
-                    "data": json.dumps({"todos": agent._thread_state["todos"]}),
+                    "data": sse_json({"todos": agent._thread_state["todos"]}),
                 }
 
             # Update thread state with files if agent provided them
             if hasattr(agent, '_thread_state') and 'files' in agent._thread_state:
-                thread_states[thread_id] = thread_states.get(thread_id, {})
-                thread_states[thread_id]["files"] = agent._thread_state["files"]
+                await update_thread_state(thread_id, files=agent._thread_state["files"])
                 # Emit final files update
                 yield {
                     "event": "files",
-                    "data": json.dumps({"files": agent._thread_state["files"]}),
+                    "data": sse_json({"files": agent._thread_state["files"]}),
                 }
 
             # Apply content filtering to the final response
-            should_filter, filter_reason = should_filter_response(full_response)
+            should_filter, filter_reason = await should_filter_response(full_response)
             if should_filter:
                 # Yield a filter notification event
                 yield {
                     "event": "content_filtered",
-                    "data": json.dumps({
+                    "data": sse_json({
                         "reason": filter_reason,
                         "original_length": len(full_response),
                     }),
@@ -1000,52 +663,175 @@ async def stream_agent(
                 # Replace the response with a filtered message
                 full_response = f"[Content Filtered: {filter_reason}]"
 
-            # Generate suggested follow-ups
+            # Suggested follow-ups: the local rules are cheap enough to inline,
+            # a model call runs detached and is delivered after the done event
             suggested_followups = []
-            if full_response and message:
+            if full_response and message and not followup_service.uses_model:
                 try:
-                    suggested_followups = await generate_suggested_followups(full_response, message)
+                    suggested_followups = followup_service.local_followups(full_response, message)
                 except Exception as e:
                     # Don't fail the response if suggestion generation fails
                     print(f"Failed to generate suggested follow-ups: {e}")
 
+            # Store the turn in one transaction
+            persistence.set_assistant_message(
+                full_response,
+                thinking_content=thinking_content,
+                suggested_follow_ups=suggested_followups,
+            )
+            stored = {"message_id": None, "artifacts": []}
+            try:
+                stored = await persistence.flush(db)
+            except Exception as e:
+                # Don't fail the response if persistence fails
+                await db.rollback()
+                print(f"Failed to store agent turn: {e}")
+                extracted_memories = []
+
+            followup_task = None
+            if full_response and message and followup_service.uses_model:
+                try:
+                    # Generated suggestions are saved onto the stored message
+                    followup_task = followup_service.schedule(
+                        full_response,
+                        message,
+                        message_id=data.get("assistant_message_id") or stored["message_id"],
+                    )
+                except Exception as e:
+                    print(f"Failed to generate suggested follow-ups: {e}")
+
             # Done event with thinking content and artifacts if available
             done_data = {"thread_id": thread_id}
+            if stored["message_id"]:
+                done_data["message_id"] = stored["message_id"]
             if extended_thinking and thinking_content:
                 done_data["thinking_content"] = thinking_content
-            if artifacts:
-                done_data["artifacts"] = artifacts
+            if stored["artifacts"]:
+                done_data["artifacts"] = stored["artifacts"]
             if extracted_memories:
-                done_data["extracted_memories"] = extracted_memories
+                done_data["extracted_memories"] = [memory.to_dict() for memory in extracted_memories]
             if suggested_followups:
                 done_data["suggested_follow_ups"] = suggested_followups
             # Include files in done event for immediate UI update
             if hasattr(agent, '_thread_state') and 'files' in agent._thread_state:
                 done_data["files"] = agent._thread_state["files"]
-            # Include tokens from thread state if available
-            if thread_id in thread_states and "tokens" in thread_states[thread_id]:
-                done_data.update(thread_states[thread_id]["tokens"])
+            # Include this turn's token usage if the model reported it
+            if persistence.usage is not None:
+                done_data.update(persistence.usage.to_dict())
             yield {
                 "event": "done",
-                "data": json.dumps(done_data),
+                "data": sse_json(done_data),
             }
 
+            if followup_task is not None:
+                try:
+                    suggested_followups = await followup_service.wait_for(followup_task)
+                except Exception as e:
+                    print(f"Failed to generate suggested follow-ups: {e}")
+                    suggested_followups = []
+                if suggested_followups:
+                    yield {
+                        "event": "suggested_follow_ups",
+                        "data": sse_json({
+                            "thread_id": thread_id,
+                            "suggested_follow_ups": suggested_followups,
+                        }),
+                    }
+
         except Exception as e:
             yield {
                 "event": "error",
-                "data": json.dumps({"error": str(e)}),
+                "data": sse_json({"error": str(e)}),
             }
 
-    return EventSourceResponse(event_generator())
+    # Optionally merge token chunks into fewer, larger events
+    coalesce = CoalesceOptions.from_request(
+        data.get("coalesce"),
+        default_enabled=settings.sse_coalesce_default,
+        window_ms=settings.sse_coalesce_window_ms,
+        max_bytes=settings.sse_coalesce_max_bytes,
+    )
+
+    async def run_events():
+        # The run outlives this request, so it gets its own session
+        async with sibling_session(db) as run_db:
+            async for event in coalesce_tokens(event_generator(run_db), coalesce):
+                yield event
+            await run_db.commit()
+
+    try:
+        run = run_manager.start(run_events(), thread_id=thread_id, run_id=run_id, user_id="default")
+    except RunRejected as e:
+        raise HTTPException(
+            status_code=e.status_code,
+            detail=e.detail,
+            headers={"Retry-After": str(e.retry_after)},
+        )
+    return EventSourceResponse(follow_run(run), headers={"X-Run-Id": run_id})
+
+
+async def follow_run(run: AgentRun, after_id: int = 0):
+    """SSE events of a run after ``after_id``, then live ones until it finishes."""
+    async for event in run.log.follow(after_id):
+        yield {"id": str(event["id"]), "event": event["event"], "data": event["data"]}
+
+
+@router.get("/stream/{run_id}")
+async def resume_stream(
+    run_id: str,
+    request: Request,
+    last_event_id: Optional[int] = None,
+) -> EventSourceResponse:
+    """Resume a run's event stream after ``Last-Event-ID`` (header or query)."""
+    run = run_manager.get(run_id)
+    if run is None:
+        raise HTTPException(status_code=404, detail="Run not found")
+
+    if last_event_id is None:
+        header = request.headers.get("last-event-id", "0") or "0"
+        try:
+            last_event_id = int(header)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid Last-Event-ID")
+
+    return EventSourceResponse(follow_run(run, last_event_id), headers={"X-Run-Id": run_id})
+
+
+@router.get("/runs")
+async def list_runs() -> dict:
+    """Queue and worker status plus the runs that are queued or running."""
+    return {
+        "stats": run_manager.stats(),
+        "runs": [run.to_dict() for run in run_manager.active_runs()],
+    }
+
+
+@router.get("/runs/{run_id}")
+async def get_run(run_id: str) -> dict:
+    """Status of a single run."""
+    run = run_manager.get(run_id)
+    if run is None:
+        raise HTTPException(status_code=404, detail="Run not found")
+    return run.to_dict()
+
+
+@router.post("/runs/{run_id}/cancel")
+async def cancel_run(run_id: str) -> dict:
+    """Cancel a queued or running agent run."""
+    run = run_manager.get(run_id)
+    if run is None:
+        raise HTTPException(status_code=404, detail="Run not found")
+    cancelled = await run_manager.cancel(run_id)
+    return {"cancelled": cancelled, **run.to_dict()}
 
 
 @router.get("/pending-approval/{thread_id}")
 async def get_pending_approval(thread_id: str) -> dict:
     """Get pending approval for a thread."""
-    if thread_id not in pending_approvals:
+    approval = await pending_approvals.aget(thread_id)
+    if approval is None:
         return {"thread_id": thread_id, "pending": False}
 
-    approval = pending_approvals[thread_id]
     return {
         "thread_id": thread_id,
         "pending": True,
@@ -1064,10 +850,10 @@ async def handle_interrupt(
     """Handle human-in-the-loop interrupt decisions."""
     thread_id = data.thread_id
 
-    if thread_id not in pending_approvals:
+    approval = await pending_approvals.aget(thread_id)
+    if approval is None:
         raise HTTPException(status_code=404, detail="No pending approval for this thread")
 
-    approval = pending_approvals[thread_id]
     decision = data.decision
 
     if decision not in ["approve", "edit", "reject"]:
@@ -1105,8 +891,8 @@ async def handle_interrupt(
     if decision == "edit" and data.edited_input:
         result["edited_input"] = data.edited_input
 
-    # Clear pending approval
-    del pending_approvals[thread_id]
+    # Clear pending approval (another worker may already have resolved it)
+    await pending_approvals.apop(thread_id)
 
     return result
 
@@ -1114,19 +900,20 @@ async def handle_interrupt(
 @router.get("/state/{thread_id}")
 async def get_agent_state(thread_id: str) -> dict:
     """Get the current state of an agent thread."""
-    if thread_id not in thread_states:
+    state = await thread_states.aget(thread_id)
+    if state is None:
         return {"thread_id": thread_id, "state": None, "message": "Thread not found"}
 
     return {
         "thread_id": thread_id,
-        "state": thread_states[thread_id],
+        "state": state,
     }
 
 
 @router.get("/todos/{thread_id}")
 async def get_todos(thread_id: str) -> dict:
     """Get the todo list for an agent thread."""
-    state = thread_states.get(thread_id, {})
+    state = await thread_states.aget(thread_id, {})
     todos = state.get("todos", [])
 
     return {
@@ -1138,7 +925,7 @@ async def get_todos(thread_id: str) -> dict:
 @router.get("/files/{thread_id}")
 async def get_workspace_files(thread_id: str) -> dict:
     """Get the workspace files for an agent thread."""
-    state = thread_states.get(thread_id, {})
+    state = await thread_states.aget(thread_id, {})
     files = state.get("files", [])
 
     return {
@@ -1150,7 +937,7 @@ async def get_workspace_files(thread_id: str) -> dict:
 @router.get("/subagent-results/{thread_id}")
 async def get_subagent_results(thread_id: str) -> dict:
     """Get the subagent results for an agent thread."""
-    state = thread_states.get(thread_id, {})
+    state = await thread_states.aget(thread_id, {})
     subagent_results = state.get("subagent_results", [])
 
     return {
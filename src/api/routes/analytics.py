@@ -1,20 +1,34 @@
-"""Analytics endpoints for project usage statistics."""
+"""Analytics endpoints for project usage statistics.
+
+Token and request figures come from the daily usage rollups (see
+``src.services.usage_service``); conversation and message counts still come
+from their own tables.
+"""
 
 from typing import Optional
 from datetime import datetime, timedelta
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, func, and_, case
+from sqlalchemy import select, func, case
 from fastapi import APIRouter, Depends, HTTPException
 
 from src.core.database import get_db
-from src.models.usage_tracking import UsageTracking
 from src.models.conversation import Conversation
 from src.models.message import Message
 from src.models.project import Project
+from src.services.usage_service import day_period, usage_service
 
 router = APIRouter()
 
 
+def _prompt_and_completion(usage: dict) -> int:
+    """Input plus output tokens, the "tokens" figure reported by analytics."""
+    return usage["input_tokens"] + usage["output_tokens"]
+
+
+def _period_filters(start_date: datetime, end_date: datetime) -> dict:
+    return {"start": day_period(start_date.date()), "end": day_period(end_date.date())}
+
+
 @router.get("/projects/{project_id}")
 async def get_project_analytics(
     project_id: str,
@@ -36,18 +50,9 @@ async def get_project_analytics(
         raise HTTPException(status_code=404, detail="Project not found")
 
     # Get usage stats
-    usage_result = await db.execute(
-        select(
-            func.count(UsageTracking.id).label('total_requests'),
-            func.sum(UsageTracking.input_tokens).label('total_input_tokens'),
-            func.sum(UsageTracking.output_tokens).label('total_output_tokens'),
-            func.sum(UsageTracking.input_tokens + UsageTracking.output_tokens).label('total_tokens'),
-            func.avg(UsageTracking.input_tokens + UsageTracking.output_tokens).label('avg_tokens_per_request'),
-        )
-        .where(UsageTracking.project_id == project_id)
-        .where(UsageTracking.created_at >= start_date)
-    )
-    usage_stats = usage_result.one()
+    rollup_filters = {**_period_filters(start_date, end_date), "project_id": project_id}
+    usage_stats = await usage_service.totals(db, "day", **rollup_filters)
+    total_tokens = _prompt_and_completion(usage_stats)
 
     # Get conversation stats
     conv_result = await db.execute(
@@ -90,46 +95,25 @@ async def get_project_analytics(
     msg_stats = msg_result.one()
 
     # Get daily usage (for charts)
-    daily_result = await db.execute(
-        select(
-            func.date(UsageTracking.created_at).label('date'),
-            func.count(UsageTracking.id).label('requests'),
-            func.sum(UsageTracking.input_tokens + UsageTracking.output_tokens).label('tokens'),
-        )
-        .where(UsageTracking.project_id == project_id)
-        .where(UsageTracking.created_at >= start_date)
-        .group_by(func.date(UsageTracking.created_at))
-        .order_by(func.date(UsageTracking.created_at))
-    )
     daily_usage = [
         {
-            "date": str(row.date),
-            "requests": row.requests,
-            "tokens": row.tokens or 0,
+            "date": row["period"],
+            "requests": row["requests"],
+            "tokens": _prompt_and_completion(row),
         }
-        for row in daily_result
+        for row in await usage_service.series(db, "day", **rollup_filters)
     ]
 
     # Get model breakdown
-    model_result = await db.execute(
-        select(
-            UsageTracking.model,
-            func.count(UsageTracking.id).label('count'),
-            func.sum(UsageTracking.input_tokens + UsageTracking.output_tokens).label('tokens'),
-        )
-        .where(UsageTracking.project_id == project_id)
-        .where(UsageTracking.created_at >= start_date)
-        .group_by(UsageTracking.model)
-        .order_by(func.sum(UsageTracking.input_tokens + UsageTracking.output_tokens).desc())
-    )
     model_usage = [
         {
-            "model": row.model,
-            "count": row.count,
-            "tokens": row.tokens or 0,
+            "model": row["model"],
+            "count": row["requests"],
+            "tokens": _prompt_and_completion(row),
         }
-        for row in model_result
+        for row in await usage_service.by_model(db, "day", **rollup_filters)
     ]
+    model_usage.sort(key=lambda row: row["tokens"], reverse=True)
 
     return {
         "project_id": project_id,
@@ -140,11 +124,12 @@ async def get_project_analytics(
             "days": days,
         },
         "usage": {
-            "total_requests": usage_stats.total_requests or 0,
-            "total_tokens": usage_stats.total_tokens or 0,
-            "total_input_tokens": usage_stats.total_input_tokens or 0,
-            "total_output_tokens": usage_stats.total_output_tokens or 0,
-            "avg_tokens_per_request": round(usage_stats.avg_tokens_per_request or 0, 2),
+            "total_requests": usage_stats["requests"],
+            "total_tokens": total_tokens,
+            "total_input_tokens": usage_stats["input_tokens"],
+            "total_output_tokens": usage_stats["output_tokens"],
+            "avg_tokens_per_request": round(total_tokens / usage_stats["requests"], 2) if usage_stats["requests"] else 0,
+            "estimated_cost": usage_stats["estimated_cost"],
         },
         "conversations": {
             "total": conv_stats.total_conversations or 0,
@@ -169,26 +154,9 @@ async def get_analytics_overview(
     end_date = datetime.utcnow()
     start_date = end_date - timedelta(days=days)
 
-    # Total usage
-    usage_result = await db.execute(
-        select(
-            func.count(UsageTracking.id).label('total_requests'),
-            func.sum(UsageTracking.input_tokens).label('total_input_tokens'),
-            func.sum(UsageTracking.output_tokens).label('total_output_tokens'),
-            func.sum(UsageTracking.input_tokens + UsageTracking.output_tokens).label('total_tokens'),
-        )
-        .where(UsageTracking.created_at >= start_date)
-    )
-    usage_stats = usage_result.one()
-
-    # Active projects
-    project_result = await db.execute(
-        select(
-            func.count(func.distinct(UsageTracking.project_id)).label('active_projects'),
-        )
-        .where(UsageTracking.created_at >= start_date)
-    )
-    active_projects = project_result.scalar() or 0
+    # Total usage and active projects
+    rollup_filters = _period_filters(start_date, end_date)
+    usage_stats = await usage_service.totals(db, "day", **rollup_filters)
 
     # Total conversations
     conv_result = await db.execute(
@@ -205,27 +173,14 @@ async def get_analytics_overview(
     total_messages = msg_result.scalar() or 0
 
     # Top projects by usage
-    top_projects_result = await db.execute(
-        select(
-            UsageTracking.project_id,
-            Project.name,
-            func.count(UsageTracking.id).label('requests'),
-            func.sum(UsageTracking.input_tokens + UsageTracking.output_tokens).label('tokens'),
-        )
-        .join(Project, Project.id == UsageTracking.project_id)
-        .where(UsageTracking.created_at >= start_date)
-        .group_by(UsageTracking.project_id, Project.name)
-        .order_by(func.sum(UsageTracking.input_tokens + UsageTracking.output_tokens).desc())
-        .limit(10)
-    )
     top_projects = [
         {
-            "project_id": row.project_id,
-            "project_name": row.name,
-            "requests": row.requests,
-            "tokens": row.tokens or 0,
+            "project_id": row["project_id"],
+            "project_name": row["project_name"],
+            "requests": row["requests"],
+            "tokens": _prompt_and_completion(row),
         }
-        for row in top_projects_result
+        for row in await usage_service.by_project(db, "day", limit=10, **rollup_filters)
     ]
 
     return {
@@ -235,9 +190,10 @@ async def get_analytics_overview(
             "days": days,
         },
         "overview": {
-            "total_requests": usage_stats.total_requests or 0,
-            "total_tokens": usage_stats.total_tokens or 0,
-            "active_projects": active_projects,
+            "total_requests": usage_stats["requests"],
+            "total_tokens": _prompt_and_completion(usage_stats),
+            "estimated_cost": usage_stats["estimated_cost"],
+            "active_projects": usage_stats["projects"],
             "total_conversations": total_conversations,
             "total_messages": total_messages,
         },
@@ -255,34 +211,21 @@ async def get_daily_usage(
     end_date = datetime.utcnow()
     start_date = end_date - timedelta(days=days)
 
-    query = select(
-        func.date(UsageTracking.created_at).label('date'),
-        func.count(UsageTracking.id).label('requests'),
-        func.sum(UsageTracking.input_tokens).label('input_tokens'),
-        func.sum(UsageTracking.output_tokens).label('output_tokens'),
-        func.sum(UsageTracking.input_tokens + UsageTracking.output_tokens).label('total_tokens'),
-        func.count(func.distinct(UsageTracking.conversation_id)).label('conversations'),
+    rows = await usage_service.series(
+        db, "day", project_id=project_id, **_period_filters(start_date, end_date)
     )
 
-    if project_id:
-        query = query.where(UsageTracking.project_id == project_id)
-
-    query = query.where(UsageTracking.created_at >= start_date)
-    query = query.group_by(func.date(UsageTracking.created_at))
-    query = query.order_by(func.date(UsageTracking.created_at))
-
-    result = await db.execute(query)
-
     return [
         {
-            "date": str(row.date),
-            "requests": row.requests,
-            "input_tokens": row.input_tokens or 0,
-            "output_tokens": row.output_tokens or 0,
-            "total_tokens": row.total_tokens or 0,
-            "conversations": row.conversations,
+            "date": row["period"],
+            "requests": row["requests"],
+            "input_tokens": row["input_tokens"],
+            "output_tokens": row["output_tokens"],
+            "total_tokens": _prompt_and_completion(row),
+            "conversations": row["conversations"],
+            "estimated_cost": row["estimated_cost"],
         }
-        for row in result
+        for row in rows
     ]
 
 
@@ -296,32 +239,21 @@ async def get_model_usage(
     end_date = datetime.utcnow()
     start_date = end_date - timedelta(days=days)
 
-    query = select(
-        UsageTracking.model,
-        func.count(UsageTracking.id).label('requests'),
-        func.sum(UsageTracking.input_tokens).label('input_tokens'),
-        func.sum(UsageTracking.output_tokens).label('output_tokens'),
-        func.sum(UsageTracking.input_tokens + UsageTracking.output_tokens).label('total_tokens'),
-        func.avg(UsageTracking.input_tokens + UsageTracking.output_tokens).label('avg_tokens'),
+    rows = await usage_service.by_model(
+        db, "day", project_id=project_id, **_period_filters(start_date, end_date)
     )
 
-    if project_id:
-        query = query.where(UsageTracking.project_id == project_id)
-
-    query = query.where(UsageTracking.created_at >= start_date)
-    query = query.group_by(UsageTracking.model)
-    query = query.order_by(func.sum(UsageTracking.input_tokens + UsageTracking.output_tokens).desc())
-
-    result = await db.execute(query)
-
-    return [
+    models = [
         {
-            "model": row.model,
-            "requests": row.requests,
-            "input_tokens": row.input_tokens or 0,
-            "output_tokens": row.output_tokens or 0,
-            "total_tokens": row.total_tokens or 0,
-            "avg_tokens": round(row.avg_tokens or 0, 2),
+            "model": row["model"],
+            "requests": row["requests"],
+            "input_tokens": row["input_tokens"],
+            "output_tokens": row["output_tokens"],
+            "total_tokens": _prompt_and_completion(row),
+            "avg_tokens": round(_prompt_and_completion(row) / row["requests"], 2) if row["requests"] else 0,
+            "estimated_cost": row["estimated_cost"],
         }
-        for row in result
+        for row in rows
     ]
+    models.sort(key=lambda row: row["total_tokens"], reverse=True)
+    return models
@@ -1,7 +1,6 @@
 """Artifact management endpoints."""
 
 import asyncio
-import re
 import subprocess
 import tempfile
 import os
@@ -17,9 +16,18 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from src.core.database import get_db
 from src.models.artifact import Artifact
 from src.models.conversation import Conversation
+from src.utils.artifact_detection import (  # noqa: F401 - re-exported for callers
+    detect_language,
+    detect_many,
+    extract_code_blocks,
+    extract_title_from_code,
+)
 
 router = APIRouter()
 
+# Batches larger than this (in characters) are detected in a worker thread
+BATCH_DETECTION_INLINE_CHARS = 256 * 1024
+
 
 class ArtifactUpdate(BaseModel):
     """Request model for updating an artifact."""
@@ -33,6 +41,11 @@ class ArtifactDetectionRequest(BaseModel):
     conversation_id: Optional[str] = None
 
 
+class ArtifactBatchDetectionRequest(BaseModel):
+    """Request model for detecting artifacts in many contents at once."""
+    contents: list[str]
+
+
 class ArtifactCreate(BaseModel):
     """Request model for creating an artifact."""
     content: str
@@ -41,140 +54,6 @@ class ArtifactCreate(BaseModel):
     conversation_id: Optional[str] = None
 
 
-# Language detection mapping
-LANGUAGE_ALIASES = {
-    "javascript": "js",
-    "typescript": "ts",
-    "python": "py",
-    "java": "java",
-    "cpp": "cpp",
-    "c++": "cpp",
-    "csharp": "cs",
-    "c#": "cs",
-    "go": "go",
-    "rust": "rs",
-    "ruby": "rb",
-    "php": "php",
-    "swift": "swift",
-    "kotlin": "kt",
-    "html": "html",
-    "css": "css",
-    "json": "json",
-    "yaml": "yaml",
-    "markdown": "md",
-    "bash": "bash",
-    "shell": "bash",
-    "sql": "sql",
-    "graphql": "graphql",
-    "xml": "xml",
-}
-
-# React/JSX specific detection
-REACT_PATTERNS = [
-    r"import\s+.*React",
-    r"export\s+default\s+function\s+\w+\([^)]*\)\s*{[^}]*return[^}]*<",
-    r"const\s+\w+\s*=\s*\([^)]*\)\s*=>\s*{[^}]*return[^}]*<",
-    r"function\s+\w+\([^)]*\)\s*{[^}]*return[^}]*<",
-    r"jsx",
-    r"tsx",
-]
-
-
-def detect_language(code: str, language_hint: str = "") -> str:
-    """Detect the programming language of a code block."""
-    # Check for React/JSX patterns first (highest priority)
-    for pattern in REACT_PATTERNS:
-        if re.search(pattern, code, re.IGNORECASE):
-            return "React/JSX"
-
-    # If language hint is provided, use it
-    if language_hint:
-        normalized = language_hint.lower().strip()
-        return LANGUAGE_ALIASES.get(normalized, normalized)
-
-    # Simple heuristics
-    if "def " in code and ":" in code and "import " not in code:
-        return "python"
-    if "function " in code or "=> " in code or "let " in code or "const " in code:
-        return "javascript"
-    if "public class " in code or "System.out.println" in code:
-        return "java"
-    if "#include " in code or "std::" in code:
-        return "cpp"
-    if "package " in code and "func " in code:
-        return "go"
-
-    return "code"
-
-
-def extract_title_from_code(code: str, language: str) -> str:
-    """Extract a meaningful title from code content."""
-    # Look for function/class names
-    patterns = [
-        r"function\s+(\w+)",  # function myFunction() { ... }
-        r"const\s+(\w+)\s*=\s*\(",  # const MyComponent = ({ ... })
-        r"export\s+default\s+function\s+(\w+)",  # export default function MyComponent()
-        r"class\s+(\w+)",  # class MyClass { ... }
-        r"def\s+(\w+)",  # def my_function(): ...
-    ]
-
-    for pattern in patterns:
-        match = re.search(pattern, code)
-        if match:
-            name = match.group(1)
-            # Capitalize for components
-            if language == "React/JSX" and name[0].islower():
-                name = name[0].upper() + name[1:]
-            return name
-
-    # Fallback: extract first line or use generic name
-    first_line = code.strip().split('\n')[0]
-    if len(first_line) < 50:
-        return first_line.strip().strip('/*#').strip()
-
-    return "Code Artifact"
-
-
-def extract_code_blocks(content: str) -> list[dict]:
-    """Extract code blocks from markdown content."""
-    # Pattern to match code blocks with optional language
-    # ```language
-    # code
-    # ```
-    pattern = r"```(\w+)?\n(.*?)\n```"
-    matches = re.findall(pattern, content, re.DOTALL)
-
-    artifacts = []
-    for language_hint, code in matches:
-        if not code.strip():
-            continue
-
-        language = detect_language(code, language_hint)
-        title = extract_title_from_code(code, language)
-
-        # Auto-detect artifact type from language
-        language_lower = language.lower()
-        if language_lower in ["html", "htm"]:
-            artifact_type = "html"
-        elif language_lower in ["svg"]:
-            artifact_type = "svg"
-        elif language_lower in ["mermaid"]:
-            artifact_type = "mermaid"
-        elif language_lower in ["latex", "tex"]:
-            artifact_type = "latex"
-        else:
-            artifact_type = "code"
-
-        artifacts.append({
-            "content": code,
-            "language": language,
-            "title": title,
-            "artifact_type": artifact_type,
-        })
-
-    return artifacts
-
-
 @router.post("/detect")
 async def detect_artifacts(request: ArtifactDetectionRequest) -> list[dict]:
     """Detect code artifacts in content (markdown code blocks)."""
@@ -182,6 +61,17 @@ async def detect_artifacts(request: ArtifactDetectionRequest) -> list[dict]:
     return artifacts
 
 
+@router.post("/detect/batch")
+async def detect_artifacts_batch(request: ArtifactBatchDetectionRequest) -> dict:
+    """Detect code artifacts in many contents; results are in request order."""
+    if sum(len(content) for content in request.contents) > BATCH_DETECTION_INLINE_CHARS:
+        # Large batches are CPU-bound; keep them off the event loop
+        results = await asyncio.to_thread(detect_many, request.contents)
+    else:
+        results = detect_many(request.contents)
+    return {"results": results}
+
+
 @router.post("/create", status_code=status.HTTP_201_CREATED)
 async def create_artifact(data: ArtifactCreate, db: AsyncSession = Depends(get_db)) -> dict:
     """Create a new artifact."""
@@ -397,7 +287,7 @@ async def get_artifact_versions(artifact_id: str, db: AsyncSession = Depends(get
             (Artifact.id == artifact_id)
         )
         .where(Artifact.is_deleted == False)
-        .order_by(Artifact.version)
+        .order_by(Artifact.version, Artifact.created_at)
     )
     versions = result.scalars().all()
 
@@ -8,7 +8,7 @@ from datetime import datetime, timedelta
 
 from src.core.database import get_db
 from src.models.audit_log import AuditLog, AuditActionType
-from src.utils.audit import get_audit_logs
+from src.utils.audit import get_audit_log_page
 
 router = APIRouter()
 
@@ -21,10 +21,12 @@ async def list_audit_logs(
     resource_id: Optional[str] = Query(None, description="Filter by resource ID"),
     tool_name: Optional[str] = Query(None, description="Filter by tool name"),
     limit: int = Query(100, ge=1, le=1000, description="Maximum number of results"),
-    offset: int = Query(0, ge=0, description="Number of results to skip"),
+    cursor: Optional[str] = Query(None, description="next_cursor or prev_cursor of a previous page"),
+    include_total: bool = Query(False, description="Count every matching log into total"),
+    offset: int = Query(0, ge=0, description="Number of results to skip (deprecated, use cursor)"),
     db: AsyncSession = Depends(get_db),
 ) -> dict:
-    """List audit logs with filtering and pagination.
+    """List audit logs with filtering and keyset pagination.
 
     Returns audit trail of user actions for security and compliance monitoring.
     """
@@ -36,7 +38,7 @@ async def list_audit_logs(
         except ValueError:
             return {"logs": [], "count": 0, "limit": limit, "offset": offset}
 
-    logs = await get_audit_logs(
+    page = await get_audit_log_page(
         db=db,
         user_id=user_id,
         action=action_enum,
@@ -44,14 +46,18 @@ async def list_audit_logs(
         resource_id=resource_id,
         tool_name=tool_name,
         limit=limit,
+        cursor=cursor,
+        include_total=include_total,
         offset=offset,
     )
 
     return {
-        "logs": [log.to_dict() for log in logs],
-        "count": len(logs),
+        "logs": [log.to_dict() for log in page.items],
+        "count": len(page.items),
+        "total": page.total,
         "limit": limit,
         "offset": offset,
+        **page.cursors(),
     }
 
 
@@ -117,7 +123,9 @@ async def get_user_audit_logs(
     action: Optional[str] = Query(None, description="Filter by action type"),
     resource_type: Optional[str] = Query(None, description="Filter by resource type"),
     limit: int = Query(100, ge=1, le=1000),
-    offset: int = Query(0, ge=0),
+    cursor: Optional[str] = Query(None, description="next_cursor or prev_cursor of a previous page"),
+    include_total: bool = Query(False, description="Count every matching log into total"),
+    offset: int = Query(0, ge=0, description="Deprecated, use cursor"),
     db: AsyncSession = Depends(get_db),
 ) -> dict:
     """Get audit logs for a specific user.
@@ -131,19 +139,23 @@ async def get_user_audit_logs(
         except ValueError:
             return {"user_id": user_id, "logs": [], "count": 0}
 
-    logs = await get_audit_logs(
+    page = await get_audit_log_page(
         db=db,
         user_id=user_id,
         action=action_enum,
         resource_type=resource_type,
         limit=limit,
+        cursor=cursor,
+        include_total=include_total,
         offset=offset,
     )
 
     return {
         "user_id": user_id,
-        "logs": [log.to_dict() for log in logs],
-        "count": len(logs),
+        "logs": [log.to_dict() for log in page.items],
+        "count": len(page.items),
+        "total": page.total,
+        **page.cursors(),
     }
 
 
@@ -153,7 +165,9 @@ async def get_resource_audit_logs(
     resource_id: str,
     action: Optional[str] = Query(None, description="Filter by action type"),
     limit: int = Query(100, ge=1, le=1000),
-    offset: int = Query(0, ge=0),
+    cursor: Optional[str] = Query(None, description="next_cursor or prev_cursor of a previous page"),
+    include_total: bool = Query(False, description="Count every matching log into total"),
+    offset: int = Query(0, ge=0, description="Deprecated, use cursor"),
     db: AsyncSession = Depends(get_db),
 ) -> dict:
     """Get audit logs for a specific resource.
@@ -167,18 +181,22 @@ async def get_resource_audit_logs(
         except ValueError:
             return {"resource_type": resource_type, "resource_id": resource_id, "logs": [], "count": 0}
 
-    logs = await get_audit_logs(
+    page = await get_audit_log_page(
         db=db,
         action=action_enum,
         resource_type=resource_type,
         resource_id=resource_id,
         limit=limit,
+        cursor=cursor,
+        include_total=include_total,
         offset=offset,
     )
 
     return {
         "resource_type": resource_type,
         "resource_id": resource_id,
-        "logs": [log.to_dict() for log in logs],
-        "count": len(logs),
+        "logs": [log.to_dict() for log in page.items],
+        "count": len(page.items),
+        "total": page.total,
+        **page.cursors(),
     }
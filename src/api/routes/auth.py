@@ -40,7 +40,9 @@ async def login(
         )
 
     # Create full session with both access and refresh tokens
-    session_tokens = session_manager.create_full_session(form_data.username)
+    session_tokens = await session_manager.run(
+        session_manager.create_full_session, form_data.username
+    )
 
     return {
         "access_token": session_tokens["access_token"],
@@ -55,7 +57,7 @@ async def login(
 @router.post("/logout")
 async def logout(token_data: TokenData = Depends(JWTBearer())):
     """User logout endpoint."""
-    session_manager.end_session(token_data.session_id)
+    await session_manager.run(session_manager.end_session, token_data.session_id)
     return {"message": "Logout successful"}
 
 
@@ -72,7 +74,9 @@ async def refresh_token(
     """
     # Mode 2: Refresh using refresh token
     if refresh_token:
-        new_access_token = session_manager.refresh_with_refresh_token(refresh_token)
+        new_access_token = await session_manager.run(
+            session_manager.refresh_with_refresh_token, refresh_token
+        )
         if not new_access_token:
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
@@ -88,10 +92,12 @@ async def refresh_token(
     auth_header = request.headers.get("Authorization", "")
     if auth_header.startswith("Bearer "):
         token = auth_header[7:]  # Remove "Bearer " prefix
-        token_data = session_manager.verify_token(token)
+        token_data = await session_manager.run(session_manager.verify_token, token)
         if token_data:
             if session_manager.should_refresh_token(token_data):
-                new_access_token = session_manager.refresh_token(token_data)
+                new_access_token = await session_manager.run(
+                    session_manager.refresh_token, token_data
+                )
             else:
                 # Token not ready for refresh yet
                 new_access_token = session_manager.create_access_token({
@@ -128,7 +134,9 @@ async def register(
         )
 
     # Create full session for the new "user"
-    session_tokens = session_manager.create_full_session(form_data.username)
+    session_tokens = await session_manager.run(
+        session_manager.create_full_session, form_data.username
+    )
 
     return {
         "access_token": session_tokens["access_token"],
@@ -143,7 +151,9 @@ async def register(
 @router.get("/me")
 async def get_current_user(token_data: TokenData = Depends(JWTBearer())) -> dict:
     """Get current user profile."""
-    session_info = session_manager.get_session_info(token_data.session_id)
+    session_info = await session_manager.run(
+        session_manager.get_session_info, token_data.session_id
+    )
 
     if not session_info:
         raise HTTPException(
@@ -161,7 +171,9 @@ async def get_current_user(token_data: TokenData = Depends(JWTBearer())) -> dict
 @router.get("/session-info")
 async def get_session_info(token_data: TokenData = Depends(JWTBearer())) -> dict:
     """Get detailed session information."""
-    session_info = session_manager.get_session_info(token_data.session_id)
+    session_info = await session_manager.run(
+        session_manager.get_session_info, token_data.session_id
+    )
 
     if not session_info:
         raise HTTPException(
@@ -183,7 +195,9 @@ async def get_session_info(token_data: TokenData = Depends(JWTBearer())) -> dict
 @router.get("/session/status")
 async def check_session_status(token_data: TokenData = Depends(JWTBearer())) -> dict:
     """Check session status and return remaining time."""
-    status_info = session_manager.get_session_status(token_data.session_id)
+    status_info = await session_manager.run(
+        session_manager.get_session_status, token_data.session_id
+    )
 
     if not status_info:
         raise HTTPException(
@@ -197,9 +211,11 @@ async def check_session_status(token_data: TokenData = Depends(JWTBearer())) ->
 @router.post("/session/keep-alive")
 async def keep_alive(token_data: TokenData = Depends(JWTBearer())) -> dict:
     """Keep session alive by updating activity timestamp."""
-    session_manager._update_session_activity(token_data.session_id)
+    await session_manager.run(session_manager._update_session_activity, token_data.session_id)
 
-    session_info = session_manager.get_session_info(token_data.session_id)
+    session_info = await session_manager.run(
+        session_manager.get_session_info, token_data.session_id
+    )
 
     return {
         "message": "Session kept alive",
@@ -212,7 +228,7 @@ async def revoke_all_sessions(token_data: TokenData = Depends(JWTBearer())) -> d
     """Revoke all active sessions for the user."""
     # In a real implementation, this would revoke all sessions for the user
     # For now, we just end the current session
-    session_manager.end_session(token_data.session_id)
+    await session_manager.run(session_manager.end_session, token_data.session_id)
 
     return {
         "message": "Session revoked"
@@ -222,8 +238,9 @@ async def revoke_all_sessions(token_data: TokenData = Depends(JWTBearer())) -> d
 @router.get("/health")
 async def auth_health_check():
     """Authentication system health check."""
+    sessions = await session_manager.sessions.acopy()
     active_sessions = sum(
-        1 for s in session_manager.sessions.values()
+        1 for s in sessions.values()
         if s.get("is_active", False)
     )
     return {
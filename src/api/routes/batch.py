@@ -4,13 +4,10 @@ import json
 from typing import List, Optional, Literal, Any
 from uuid import UUID
 from datetime import datetime
-from pathlib import Path
 import asyncio
-from zipfile import ZipFile
-import io
 
-from fastapi import APIRouter, HTTPException, status, Depends, BackgroundTasks
-from fastapi.responses import Response, FileResponse
+from fastapi import APIRouter, HTTPException, Request, status, Depends, BackgroundTasks
+from fastapi.responses import Response, FileResponse, JSONResponse
 from pydantic import BaseModel, Field
 from sqlalchemy import select, func, distinct
 from sqlalchemy.orm import selectinload
@@ -18,11 +15,19 @@ from sqlalchemy.ext.asyncio import AsyncSession
 
 from src.core.database import get_db
 from src.models import Conversation as ConversationModel, Message as MessageModel, Tag, conversation_tags
+from src.models.background_task import BackgroundTask
 from src.utils.audit import log_audit, get_request_info
 from src.models.audit_log import AuditActionType as AuditAction
+from src.services import export_service
+from src.services.batch_jobs import batch_jobs
+from src.services.batch_service import batch_service
+from src.services.export_store import export_store
 
 router = APIRouter()
 
+# Exports smaller than this are returned inline instead of via a download URL
+INLINE_EXPORT_LIMIT_BYTES = 10 * 1024 * 1024
+
 
 class BatchOperationRequest(BaseModel):
     """Request model for batch operations."""
@@ -69,17 +74,33 @@ class BatchExportResult(BaseModel):
     processing_time_seconds: float
 
 
-@router.post("/api/batch/conversations", response_model=BatchOperationResponse)
+def _queued_response(task: BackgroundTask, operation: str, total_requested: int) -> JSONResponse:
+    """202 for a batch handed to the background workers."""
+    task_id = str(task.id)
+    return JSONResponse(
+        status_code=status.HTTP_202_ACCEPTED,
+        content={
+            "task_id": task_id,
+            "status": task.status.value,
+            "operation": operation,
+            "total_requested": total_requested,
+            "status_url": f"/api/batch/operations/{task_id}",
+            "stream_url": f"/api/tasks/{task_id}/stream",
+        },
+    )
+
+
+@router.post("/batch/conversations", response_model=BatchOperationResponse)
 async def batch_conversation_operations(
     request: BatchOperationRequest,
     background_tasks: BackgroundTasks,
+    http_request: Request,
     db: AsyncSession = Depends(get_db),
 ):
     """
     Perform batch operations on multiple conversations.
 
     Supported operations:
-    - export: Export multiple conversations (returns bundled data)
     - delete: Delete multiple conversations with confirmation
     - archive: Archive multiple conversations
     - unarchive: Unarchive multiple conversations
@@ -87,11 +108,14 @@ async def batch_conversation_operations(
     - unpin: Unpin multiple conversations
     - move: Move multiple conversations to a project
 
-    Returns a summary of the operation including success/failure counts.
+    Each operation runs as one set-based update (see ``batch_service``).
+    Exports go through ``/api/batch/conversations/export``.
+
+    Returns a summary of the operation including success/failure counts, or
+    202 with a ``task_id`` when the batch is large enough to run in the
+    background (see ``batch_jobs``).
     """
     started_at = datetime.now()
-    successful = []
-    failed = []
 
     if not request.conversation_ids:
         raise HTTPException(
@@ -99,102 +123,64 @@ async def batch_conversation_operations(
             detail="At least one conversation ID is required"
         )
 
-    # Verify all conversations exist
-    conversations_query = select(ConversationModel).where(
-        ConversationModel.id.in_(request.conversation_ids)
-    )
-    result = await db.execute(conversations_query)
-    conversations = result.scalars().all()
-    conversation_map = {conv.id: conv for conv in conversations}
-
-    # Find missing conversations
-    missing_ids = set(request.conversation_ids) - set(conversation_map.keys())
-    for missing_id in missing_ids:
-        failed.append((missing_id, "Conversation not found"))
-
-    # Process each conversation based on operation
-    for conv_id in request.conversation_ids:
-        if conv_id not in conversation_map:
-            continue  # Already marked as failed
-
-        conversation = conversation_map[conv_id]
-
-        try:
-            if request.operation == "delete":
-                conversation.is_deleted = True
-                conversation.deleted_at = datetime.now()
-                successful.append(conv_id)
-
-            elif request.operation == "archive":
-                conversation.is_archived = True
-                successful.append(conv_id)
-
-            elif request.operation == "unarchive":
-                conversation.is_archived = False
-                successful.append(conv_id)
-
-            elif request.operation == "pin":
-                conversation.is_pinned = True
-                successful.append(conv_id)
-
-            elif request.operation == "unpin":
-                conversation.is_pinned = False
-                successful.append(conv_id)
-
-            elif request.operation == "move":
-                if request.project_id:
-                    conversation.project_id = str(request.project_id)
-                    successful.append(conv_id)
-                else:
-                    failed.append((conv_id, "Project ID required for move operation"))
-
-        except Exception as e:
-            failed.append((conv_id, str(e)))
-
-    # Commit all changes
-    if successful:
-        await db.commit()
+    if request.operation == "export":
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Use /api/batch/conversations/export to export conversations"
+        )
+
+    if request.operation == "move" and not request.project_id:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Project ID required for move operation"
+        )
+
+    values = {"project_id": str(request.project_id)} if request.operation == "move" else None
+
+    if batch_jobs.runs_in_background(len(request.conversation_ids)):
+        ip_address, user_agent = get_request_info(http_request)
+        task = await batch_jobs.enqueue(
+            db, request.operation, request.conversation_ids, values=values,
+            ip_address=ip_address, user_agent=user_agent,
+        )
+        return _queued_response(task, request.operation, len(request.conversation_ids))
+
+    # One set-based UPDATE for the whole batch; missing ids come back as failures
+    result = await batch_service.update(db, request.operation, request.conversation_ids, values=values)
 
     completed_at = datetime.now()
     processing_time = (completed_at - started_at).total_seconds()
 
-    # Log the batch operation
-    await log_audit(
-        db=db,
-        action=AuditAction.BATCH_OPERATION,
-        resource_type="conversations",
-        details={
-            "operation": request.operation,
-            "total_requested": len(request.conversation_ids),
-            "successful": len(successful),
-            "failed": len(failed)
-        }
-    )
-
     return BatchOperationResponse(
-        success=len(failed) == 0,
+        success=not result.failed,
         operation=request.operation,
-        total_requested=len(request.conversation_ids),
-        total_processed=len(successful) + len(failed),
-        successful=successful,
-        failed=failed,
+        total_requested=len(result.requested),
+        total_processed=len(result.succeeded) + len(result.failed),
+        successful=[UUID(conversation_id) for conversation_id in result.succeeded],
+        failed=[(UUID(conversation_id), error) for conversation_id, error in result.failed],
         started_at=started_at,
         completed_at=completed_at,
         processing_time_seconds=processing_time
     )
 
 
-@router.post("/api/batch/conversations/export", response_model=BatchExportResult)
+@router.post("/batch/conversations/export", response_model=BatchExportResult)
 @router.post("/conversations/batch/export")  # Frontend compatibility
 async def batch_export_conversations(
     request: dict,
-    export_format: Literal["json", "markdown", "csv"] = "json",
+    http_request: Request,
+    export_format: Literal["json", "jsonl", "markdown", "csv", "zip"] = "json",
     db: AsyncSession = Depends(get_db),
 ):
     """
     Export multiple conversations in the specified format.
 
-    Frontend-compatible endpoint that returns blob data.
+    The export is streamed to a file in the ``export_store`` a message at a
+    time. Small JSON exports are returned inline as base64 ``file_data``;
+    everything else is served from ``file_url``. Exports of more than
+    ``settings.batch_async_threshold`` conversations are written by a
+    background worker instead: the response is 202 with a ``task_id`` and the
+    finished task's result carries ``file_url``.
     """
     # Extract conversation_ids from request body
     conversation_ids = request.get("conversation_ids", [])
@@ -204,147 +190,52 @@ async def batch_export_conversations(
             detail="At least one conversation ID is required"
         )
 
-    # Convert string IDs to UUID
+    # Validate ID format (stored IDs are UUID strings)
     try:
-        conversation_ids = [UUID(cid) if isinstance(cid, str) else cid for cid in conversation_ids]
+        conversation_ids = [str(UUID(str(cid))) for cid in conversation_ids]
     except ValueError:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Invalid conversation ID format"
         )
 
+    if batch_jobs.runs_in_background(len(conversation_ids)):
+        ip_address, user_agent = get_request_info(http_request)
+        task = await batch_jobs.enqueue(
+            db, "export", conversation_ids, export_format=export_format,
+            ip_address=ip_address, user_agent=user_agent,
+        )
+        return _queued_response(task, "batch_export", len(conversation_ids))
+
     started_at = datetime.now()
-    successful = []
-    failed = []
-    export_data = []
-
-    # Fetch all conversations with their messages
-    conversations_query = (
-        select(ConversationModel)
-        .options(selectinload(ConversationModel.messages))
-        .where(ConversationModel.id.in_(conversation_ids))
+
+    conversation_map = await export_service.load_conversations(
+        db, conversation_ids, include_deleted=True
     )
-    result = await db.execute(conversations_query)
-    conversations = result.scalars().all()
-    conversation_map = {conv.id: conv for conv in conversations}
-
-    # Find missing conversations
-    missing_ids = set(conversation_ids) - set(conversation_map.keys())
-    for missing_id in missing_ids:
-        failed.append((missing_id, "Conversation not found"))
-
-    # Export each conversation
-    for conv_id in conversation_ids:
-        if conv_id not in conversation_map:
-            continue
-
-        conversation = conversation_map[conv_id]
-
-        try:
-            if export_format == "json":
-                # Export as JSON
-                conv_data = {
-                    "id": str(conversation.id),
-                    "title": conversation.title,
-                    "model": conversation.model,
-                    "created_at": conversation.created_at.isoformat(),
-                    "updated_at": conversation.updated_at.isoformat(),
-                    "messages": [
-                        {
-                            "id": str(msg.id),
-                            "role": msg.role,
-                            "content": msg.content,
-                            "created_at": msg.created_at.isoformat(),
-                            "input_tokens": msg.input_tokens,
-                            "output_tokens": msg.output_tokens
-                        }
-                        for msg in conversation.messages
-                    ]
-                }
-                export_data.append(conv_data)
-                successful.append(conv_id)
-
-            elif export_format == "markdown":
-                # Export as Markdown
-                md_content = f"# {conversation.title}\n\n"
-                md_content += f"**Model:** {conversation.model}\n"
-                md_content += f"**Created:** {conversation.created_at.isoformat()}\n\n"
-                md_content += "---\n\n"
-
-                for msg in conversation.messages:
-                    role = msg.role.capitalize()
-                    md_content += f"## {role}\n\n{msg.content}\n\n"
-
-                export_data.append({
-                    "id": str(conversation.id),
-                    "title": conversation.title,
-                    "content": md_content
-                })
-                successful.append(conv_id)
-
-            elif export_format == "csv":
-                # Export as CSV (messages format)
-                for msg in conversation.messages:
-                    export_data.append({
-                        "conversation_id": str(conversation.id),
-                        "conversation_title": conversation.title,
-                        "message_id": str(msg.id),
-                        "role": msg.role,
-                        "content": msg.content[:1000],  # Truncate long content
-                        "created_at": msg.created_at.isoformat()
-                    })
-                successful.append(conv_id)
-
-        except Exception as e:
-            failed.append((conv_id, str(e)))
+    successful = [UUID(cid) for cid in conversation_ids if cid in conversation_map]
+    failed = [(UUID(cid), "Conversation not found") for cid in conversation_ids if cid not in conversation_map]
+
+    chunks = export_service.stream_batch_export(db, conversation_ids, conversation_map, export_format)
+    filename, filepath = export_store.new_file(export_service.FILE_EXTENSIONS[export_format])
+    data_size = await export_service.write_export_file(filepath, chunks)
 
     completed_at = datetime.now()
     processing_time = (completed_at - started_at).total_seconds()
 
-    # Determine if data should be included directly or via file
-    data_size = len(json.dumps(export_data))
-    include_data = data_size < 10 * 1024 * 1024  # 10MB threshold
-
-    # Create export file if needed
+    # Small JSON exports are included directly (base64 encoded for safety)
     file_url = None
     file_data = None
-
-    if include_data:
-        # Include data in response (base64 encoded for safety)
+    if export_format == "json" and data_size < INLINE_EXPORT_LIMIT_BYTES:
         import base64
-        if export_format == "json":
-            json_str = json.dumps(export_data, indent=2)
-            file_data = base64.b64encode(json_str.encode()).decode()
+        file_data = base64.b64encode(filepath.read_bytes()).decode()
+        filepath.unlink()
     else:
-        # Save to file and return URL
-        export_dir = Path("data/exports")
-        export_dir.mkdir(parents=True, exist_ok=True)
-
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        filename = f"batch_export_{timestamp}.{export_format}"
-        filepath = export_dir / filename
-
-        if export_format == "json":
-            with open(filepath, 'w') as f:
-                json.dump(export_data, f, indent=2)
-        elif export_format == "markdown":
-            with open(filepath, 'w') as f:
-                for item in export_data:
-                    f.write(item['content'])
-                    f.write("\n\n---\n\n")
-        elif export_format == "csv":
-            import csv
-            with open(filepath, 'w', newline='') as f:
-                if export_data:
-                    writer = csv.DictWriter(f, fieldnames=export_data[0].keys())
-                    writer.writeheader()
-                    writer.writerows(export_data)
-
-        file_url = f"/api/batch/exports/{filename}"
+        file_url = export_store.url(filename)
 
     # Log the export
     await log_audit(
         db=db,
+        user_id="default-user",
         action=AuditAction.BATCH_EXPORT,
         resource_type="conversations",
         details={
@@ -372,17 +263,22 @@ async def batch_export_conversations(
     )
 
 
-@router.get("/api/batch/exports/{filename}")
+@router.get("/batch/exports/{filename}")
 async def download_export_file(filename: str):
-    """Download a previously generated export file."""
-    export_path = Path("data/exports") / filename
+    """Download a previously generated export file.
+
+    ``Range`` requests are answered with 206 partial content, so large
+    downloads can be resumed.
+    """
+    export_path = export_store.path(filename)
 
-    if not export_path.exists():
+    if export_path is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Export file not found"
         )
 
+    # FileResponse handles Range / If-Range itself and advertises Accept-Ranges
     return FileResponse(
         path=export_path,
         filename=filename,
@@ -390,17 +286,29 @@ async def download_export_file(filename: str):
     )
 
 
-@router.get("/api/batch/operations/{task_id}")
-async def get_batch_operation_status(task_id: str):
+@router.get("/batch/operations/{task_id}")
+async def get_batch_operation_status(task_id: UUID, db: AsyncSession = Depends(get_db)):
     """
-    Get the status of a batch operation (for long-running operations).
+    Get the status of a batch operation running in the background.
 
-    This is useful for operations that run in the background.
+    ``progress`` is saved as the batch goes; once ``status`` is
+    ``completed`` the ``result`` holds the summary (and ``file_url`` for
+    exports). ``/api/tasks/{task_id}/stream`` streams the same updates.
     """
-    # This would integrate with a background task system
-    # For now, return a placeholder
+    result = await db.execute(
+        select(BackgroundTask)
+        .where(BackgroundTask.id == task_id, BackgroundTask.task_type.startswith("batch_"))
+        .execution_options(populate_existing=True)
+    )
+    task = result.scalar_one_or_none()
+    if task is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Batch operation not found"
+        )
+
     return {
-        "task_id": task_id,
-        "status": "not_implemented",
-        "message": "Background task tracking not yet implemented"
+        "task_id": str(task.id),
+        **task.to_dict(),
+        "stream_url": f"/api/tasks/{task.id}/stream",
     }
@@ -14,6 +14,7 @@ from src.models.checkpoint import Checkpoint
 from src.models.conversation import Conversation
 from src.models.message import Message
 from src.models.artifact import Artifact
+from src.services import message_history
 
 # Router for conversation-specific checkpoint operations (prefixed with /conversations)
 conversation_router = APIRouter()
@@ -95,11 +96,10 @@ async def create_checkpoint(
     if not conversation:
         raise HTTPException(status_code=404, detail="Conversation not found")
 
-    # Get all messages for this conversation
+    # Get all messages for this conversation, including those a branch shares
     messages_result = await db.execute(
-        select(Message)
-        .where(Message.conversation_id == str(conversation_id))
-        .order_by(Message.created_at.asc())
+        message_history.visible_messages(str(conversation_id))
+        .order_by(Message.created_at.asc(), Message.id.asc())
     )
     messages = messages_result.scalars().all()
 
@@ -265,7 +265,7 @@ async def restore_checkpoint(
     current_messages_result = await db.execute(
         select(Message)
         .where(Message.conversation_id == checkpoint.conversation_id)
-        .order_by(Message.created_at.asc())
+        .order_by(Message.created_at.asc(), Message.id.asc())
     )
     current_messages = current_messages_result.scalars().all()
 
@@ -275,6 +275,10 @@ async def restore_checkpoint(
     # Delete messages that came after the checkpoint
     messages_to_delete = [msg for msg in current_messages if msg.id not in checkpoint_message_ids]
 
+    # Branches sharing the deleted messages keep their own copies
+    if messages_to_delete:
+        await message_history.detach_branches(db, messages_to_delete[0])
+
     for msg in messages_to_delete:
         await db.delete(msg)
 
@@ -12,18 +12,42 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 
 from src.core.database import get_db
+from src.core.state_store import state_namespace
 from src.models.conversation import Conversation
 
 router = APIRouter()
 
-# In-memory storage for active collaboration sessions
+# Presence of users in each conversation, shared between workers. Entries of
+# conversations without activity expire, so crashed sockets do not linger.
 # Structure: {conversation_id: {user_id: {cursor: position, name: str, color: str}}}
-active_sessions: Dict[str, Dict[str, dict]] = {}
+active_sessions = state_namespace("collaboration_presence", ttl_seconds=60 * 60)
 
+# Sockets connected to this process (live objects, so they stay local)
 # Structure: {websocket_id: {conversation_id, user_id, cursor, name, color}}
 connected_clients: Dict[str, dict] = {}
 
 
+async def set_presence(conversation_id: str, user_id: str, presence: dict) -> None:
+    """Add or replace a user's presence in a conversation."""
+    await active_sessions.amerge(conversation_id, {user_id: presence})
+
+
+async def update_presence(conversation_id: str, user_id: str, **fields) -> None:
+    """Update fields of a user's presence if the user is still present."""
+    await active_sessions.amerge(conversation_id, fields, within=user_id)
+
+
+async def remove_presence(
+    conversation_id: str, user_id: str, client_id: Optional[str] = None
+) -> None:
+    """Remove a user's presence, optionally only if it belongs to ``client_id``.
+
+    The conversation's entry is dropped with its last user.
+    """
+    only_if = ("client_id", client_id) if client_id is not None else None
+    await active_sessions.aremove_field(conversation_id, user_id, only_if=only_if)
+
+
 class CursorPosition(BaseModel):
     """Cursor position model."""
     x: float
@@ -73,7 +97,7 @@ async def get_active_users(
     if not conversation:
         raise HTTPException(status_code=404, detail="Conversation not found")
 
-    active = active_sessions.get(conversation_id, {})
+    active = await active_sessions.aget(conversation_id, {})
     return [
         UserPresence(
             user_id=user_id,
@@ -123,10 +147,7 @@ async def websocket_collaboration(
     connected_clients[client_id] = session_data
 
     # Add to active sessions
-    if conversation_id not in active_sessions:
-        active_sessions[conversation_id] = {}
-
-    active_sessions[conversation_id][user_id] = session_data
+    await set_presence(conversation_id, user_id, session_data)
 
     # Notify other users that this user joined
     await broadcast_to_conversation(
@@ -142,6 +163,7 @@ async def websocket_collaboration(
     )
 
     # Send current active users to the new user
+    active = await active_sessions.aget(conversation_id, {})
     await websocket.send_json({
         "event_type": "presence",
         "data": {
@@ -153,7 +175,7 @@ async def websocket_collaboration(
                     "cursor": data.get("cursor"),
                     "last_seen": data["last_seen"]
                 }
-                for uid, data in active_sessions[conversation_id].items()
+                for uid, data in active.items()
             ]
         }
     })
@@ -164,13 +186,16 @@ async def websocket_collaboration(
             data = await websocket.receive_json()
             event_type = data.get("event_type")
 
-            # Update last seen
+            # Update last seen, and the cursor position for cursor events
             session_data["last_seen"] = datetime.utcnow().isoformat()
-            active_sessions[conversation_id][user_id]["last_seen"] = session_data["last_seen"]
+            presence = {"last_seen": session_data["last_seen"]}
+            if event_type == "cursor":
+                presence["cursor"] = data.get("data", {})
+            await update_presence(conversation_id, user_id, **presence)
 
             if event_type == "cursor":
                 # Update cursor position
-                cursor_data = data.get("data", {})
+                cursor_data = presence["cursor"]
                 session_data["cursor"] = cursor_data
 
                 # Broadcast cursor update to other users
@@ -225,11 +250,7 @@ async def handle_disconnect(client_id: str, conversation_id: str, user_id: str,
         del connected_clients[client_id]
 
     # Remove from active sessions
-    if conversation_id in active_sessions and user_id in active_sessions[conversation_id]:
-        del active_sessions[conversation_id][user_id]
-        # Clean up empty conversation
-        if not active_sessions[conversation_id]:
-            del active_sessions[conversation_id]
+    await remove_presence(conversation_id, user_id)
 
     # Notify other users that this user left
     await broadcast_to_conversation(
@@ -309,16 +330,13 @@ async def websocket_collaboration_v2(
     connected_clients[client_id] = session_data
 
     # Add to active sessions
-    if conversation_id not in active_sessions:
-        active_sessions[conversation_id] = {}
-
-    active_sessions[conversation_id][user_id] = {
+    await set_presence(conversation_id, user_id, {
         "name": name,
         "color": user_color,
         "cursor": None,
         "last_seen": datetime.utcnow().isoformat(),
         "client_id": client_id
-    }
+    })
 
     # Notify other users that this user joined
     await broadcast_v2(
@@ -335,7 +353,8 @@ async def websocket_collaboration_v2(
 
     # Send current active users to the new user
     active_users = []
-    for uid, data in active_sessions[conversation_id].items():
+    active = await active_sessions.aget(conversation_id, {})
+    for uid, data in active.items():
         active_users.append({
             "user_id": uid,
             "name": data["name"],
@@ -355,17 +374,16 @@ async def websocket_collaboration_v2(
             data = await websocket.receive_json()
             event_type = data.get("event_type")
 
-            # Update last seen
+            # Update last seen, and the cursor position for cursor events
             now = datetime.utcnow().isoformat()
-            if conversation_id in active_sessions and user_id in active_sessions[conversation_id]:
-                active_sessions[conversation_id][user_id]["last_seen"] = now
+            presence = {"last_seen": now}
+            if event_type == "cursor":
+                presence["cursor"] = data.get("data", {})
+            await update_presence(conversation_id, user_id, **presence)
 
             if event_type == "cursor":
                 # Update cursor position
-                cursor_data = data.get("data", {})
-
-                if conversation_id in active_sessions and user_id in active_sessions[conversation_id]:
-                    active_sessions[conversation_id][user_id]["cursor"] = cursor_data
+                cursor_data = presence["cursor"]
 
                 # Broadcast cursor update to other users
                 await broadcast_v2(
@@ -435,15 +453,8 @@ async def handle_disconnect_v2(client_id: str, conversation_id: str, user_id: st
     if client_id in websocket_registry:
         del websocket_registry[client_id]
 
-    # Remove from active sessions
-    if conversation_id in active_sessions and user_id in active_sessions[conversation_id]:
-        # Only remove if this is the same client
-        session = active_sessions[conversation_id][user_id]
-        if session.get("client_id") == client_id:
-            del active_sessions[conversation_id][user_id]
-            # Clean up empty conversation
-            if not active_sessions[conversation_id]:
-                del active_sessions[conversation_id]
+    # Remove from active sessions (only if this is the same client)
+    await remove_presence(conversation_id, user_id, client_id=client_id)
 
     # Notify other users that this user left
     await broadcast_v2(
@@ -11,7 +11,8 @@ from sqlalchemy.orm import selectinload
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from src.core.database import get_db
-from src.models import Comment as CommentModel, SharedConversation as SharedConversationModel, Message as MessageModel
+from src.models import Comment as CommentModel, SharedConversation as SharedConversationModel
+from src.services import message_history
 
 router = APIRouter()
 
@@ -70,12 +71,9 @@ async def create_comment(
         )
 
     # Verify message exists
-    result = await db.execute(
-        select(MessageModel)
-        .where(MessageModel.id == comment.message_id)
-        .where(MessageModel.conversation_id == shared.conversation_id)
+    message = await message_history.get_visible_message(
+        db, shared.conversation_id, comment.message_id
     )
-    message = result.scalar_one_or_none()
 
     if not message:
         raise HTTPException(status_code=404, detail="Message not found")
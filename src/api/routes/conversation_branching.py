@@ -10,7 +10,8 @@ from datetime import datetime
 
 from src.core.database import get_db
 from src.models.conversation import Conversation
-from src.models.message import Message
+from src.services import message_history
+from src.services.branch_graph_service import branch_graph_service
 from src.utils import generate_thread_id
 
 router = APIRouter(tags=["conversation-branching"])
@@ -51,14 +52,10 @@ async def create_conversation_branch(
             detail="Parent conversation not found"
         )
 
-    # Get the branch point message
-    branch_point_message = await db.execute(
-        select(Message).where(
-            Message.id == branch_point_message_id,
-            Message.conversation_id == conversation_id
-        )
+    # Get the branch point message, own or inherited by the parent
+    branch_point_message = await message_history.get_visible_message(
+        db, conversation_id, branch_point_message_id
     )
-    branch_point_message = branch_point_message.scalar_one_or_none()
 
     if not branch_point_message:
         raise HTTPException(
@@ -74,7 +71,8 @@ async def create_conversation_branch(
     if not branch_color:
         branch_color = "#ff6b6b"  # Default red color
 
-    # Create new conversation for the branch
+    # Create new conversation for the branch. Messages up to the branch point
+    # are shared with the parent, not copied.
     new_conversation = Conversation(
         user_id=parent_conversation.user_id,
         title=f"{parent_conversation.title} - {branch_name}",
@@ -84,42 +82,21 @@ async def create_conversation_branch(
         branch_point_message_id=branch_point_message_id,
         branch_name=branch_name,
         branch_color=branch_color,
+        inherits_parent_messages=True,
         thread_id=generate_thread_id(),
         extended_thinking_enabled=parent_conversation.extended_thinking_enabled
     )
 
     db.add(new_conversation)
-    await db.commit()
-    await db.refresh(new_conversation)
-
-    # Copy messages up to the branch point
-    messages_query = await db.execute(
-        select(Message).where(
-            Message.conversation_id == conversation_id,
-            Message.created_at <= branch_point_message.created_at
-        ).order_by(Message.created_at)
+    branch_point_message.is_branch_point = True
+    await db.flush()
+    new_conversation.message_count, new_conversation.token_count = (
+        await message_history.history_totals(db, new_conversation.id)
     )
-    messages_to_copy = messages_query.scalars().all()
-
-    for message in messages_to_copy:
-        new_message = Message(
-            conversation_id=new_conversation.id,
-            role=message.role,
-            content=message.content,
-            input_tokens=message.input_tokens,
-            output_tokens=message.output_tokens,
-            cache_read_tokens=message.cache_read_tokens,
-            cache_write_tokens=message.cache_write_tokens,
-            attachments=message.attachments,
-            tool_calls=message.tool_calls,
-            tool_results=message.tool_results,
-            thinking_content=message.thinking_content,
-            parent_message_id=message.id,
-            is_branch_point=message.id == branch_point_message_id
-        )
-        db.add(new_message)
 
     await db.commit()
+    await db.refresh(new_conversation)
+    branch_graph_service.invalidate(conversation_id)
 
     return {
         "message": "Conversation branch created successfully",
@@ -349,6 +326,7 @@ async def switch_to_branch(
     )
 
     await db.commit()
+    branch_graph_service.invalidate(conversation_id, target_conversation_id)
 
     return {
         "message": "Switched to branch successfully",
@@ -373,78 +351,30 @@ async def get_branch_tree(
     """
     Get the complete branch tree structure for a conversation.
 
-    Returns all branches (direct children) and the root conversation.
+    Returns the root conversation and every level of branches below it,
+    fetched in one query by ``branch_graph_service``.
 
     Args:
         conversation_id: ID of the conversation
         db: Database session
 
     Returns:
-        Branch tree with root and all branches
+        Branch tree with root, all branches and the nested tree
     """
-    # Get the current conversation
-    current_conversation = await db.execute(
-        select(Conversation).where(Conversation.id == conversation_id)
-    )
-    current_conversation = current_conversation.scalar_one_or_none()
+    graph = await branch_graph_service.get_graph(conversation_id, db)
 
-    if not current_conversation:
+    if graph is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Conversation not found"
         )
 
-    # Find the root conversation
-    root = current_conversation
-    while root.parent_conversation_id:
-        root = await db.execute(
-            select(Conversation).where(
-                Conversation.id == root.parent_conversation_id
-            )
-        )
-        root = root.scalar_one_or_none()
-
-    # Get all direct branches from the root
-    branches_query = await db.execute(
-        select(Conversation).where(
-            Conversation.parent_conversation_id == root.id
-        ).order_by(Conversation.created_at)
-    )
-    branches = branches_query.scalars().all()
-
-    # Get all branches (including nested ones)
-    all_branches_query = await db.execute(
-        select(Conversation).where(
-            Conversation.parent_conversation_id.isnot(None)
-        ).order_by(Conversation.created_at)
-    )
-    all_branches = all_branches_query.scalars().all()
-
     return {
-        "root": {
-            "id": root.id,
-            "title": root.title,
-            "model": root.model,
-            "created_at": root.created_at.isoformat() if root.created_at else None
-        },
-        "current_conversation": {
-            "id": current_conversation.id,
-            "title": current_conversation.title,
-            "branch_name": current_conversation.branch_name,
-            "branch_color": current_conversation.branch_color,
-            "parent_conversation_id": current_conversation.parent_conversation_id
-        },
-        "branches": [
-            {
-                "id": b.id,
-                "title": b.title,
-                "branch_name": b.branch_name,
-                "branch_color": b.branch_color,
-                "parent_conversation_id": b.parent_conversation_id,
-                "created_at": b.created_at.isoformat() if b.created_at else None
-            }
-            for b in all_branches
-        ]
+        "root": graph.root,
+        "current_conversation": graph.nodes[conversation_id],
+        "branches": graph.branches(),
+        "tree": graph.nested(),
+        **graph.totals()
     }
 
 
@@ -1,24 +1,28 @@
 """Conversation management endpoints."""
 
-import json
 from typing import Optional
 from uuid import UUID
 from datetime import datetime
 from pathlib import Path
 import os
 
-from fastapi import APIRouter, HTTPException, status, Depends, UploadFile, File, Request
-from fastapi.responses import Response
+from fastapi import APIRouter, HTTPException, status, Depends, UploadFile, File, Request, Response, Query
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel, Field
 from sqlalchemy import select, func, distinct
 from sqlalchemy.orm import selectinload
 from sqlalchemy.ext.asyncio import AsyncSession
 from fastapi import HTTPException
 
-from src.core.database import get_db
+from src.core.database import get_db, get_read_db
 from src.models import Conversation as ConversationModel, Message as MessageModel, Tag, conversation_tags
 from src.utils.audit import log_audit, get_request_info
 from src.models.audit_log import AuditActionType as AuditAction
+from src.services import export_service, message_history
+from src.services.batch_service import BatchResult, batch_service
+from src.services.branch_graph_service import branch_graph_service
+from src.services.export_store import export_store
+from src.utils.pagination import SortKey, paginate, set_page_headers
 
 router = APIRouter()
 
@@ -50,6 +54,8 @@ class BranchConversationRequest(BaseModel):
 
     message_id: Optional[str] = None
     title: Optional[str] = None
+    branch_name: Optional[str] = None
+    branch_color: Optional[str] = None
 
 
 class BatchRequest(BaseModel):
@@ -82,15 +88,28 @@ class ConversationResponse(BaseModel):
     updated_at: str
 
 
+# Most recently updated first; id breaks ties so cursors are stable
+CONVERSATION_ORDER = (
+    SortKey(ConversationModel.updated_at, descending=True),
+    SortKey(ConversationModel.id, descending=True),
+)
+
+
 @router.get("")
 async def list_conversations(
+    response: Response,
     project_id: Optional[UUID] = None,
     archived: bool = False,
-    limit: int = 50,
-    offset: int = 0,
-    db: AsyncSession = Depends(get_db),
+    limit: int = Query(50, ge=1, le=500),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor or X-Prev-Cursor of a previous page"),
+    include_total: bool = Query(False, description="Return the number of matching conversations in X-Total-Count"),
+    offset: int = Query(0, ge=0, description="Deprecated, use cursor"),
+    db: AsyncSession = Depends(get_read_db),
 ) -> list[dict]:
-    """List all conversations."""
+    """List all conversations.
+
+    Keyset paginated: follow the ``X-Next-Cursor``/``X-Prev-Cursor`` headers.
+    """
     query = select(ConversationModel).where(ConversationModel.is_deleted == False)
     query = query.options(selectinload(ConversationModel.tags))
 
@@ -102,10 +121,12 @@ async def list_conversations(
     if project_id:
         query = query.where(ConversationModel.project_id == str(project_id))
 
-    query = query.order_by(ConversationModel.updated_at.desc()).offset(offset).limit(limit)
-
-    result = await db.execute(query)
-    conversations = result.scalars().all()
+    page = await paginate(
+        db, query, CONVERSATION_ORDER, limit=limit, cursor=cursor,
+        include_total=include_total, offset=offset,
+    )
+    set_page_headers(response, page)
+    conversations = page.items
 
     return [
         {
@@ -171,6 +192,120 @@ async def create_conversation(
     }
 
 
+# ==================== BATCH OPERATIONS ====================
+# Declared before the /{conversation_id} routes, which would otherwise match
+# /batch/... with conversation_id="batch"
+
+
+class BatchDeleteResponse(BaseModel):
+    """Response model for batch delete."""
+
+    success_count: int
+    failure_count: int
+    deleted_ids: list[str]
+
+
+def _failure_results(result: BatchResult) -> list[dict]:
+    return [
+        {"conversation_id": conversation_id, "error": "Not found"}
+        for conversation_id, _ in result.failed
+    ]
+
+
+@router.post("/batch/delete", status_code=status.HTTP_200_OK)
+async def batch_delete_conversations(
+    request: BatchRequest,
+    request_http: Request,
+    db: AsyncSession = Depends(get_db),
+) -> BatchDeleteResponse:
+    """Delete multiple conversations in a single batch (soft delete)."""
+    ip_address, user_agent = get_request_info(request_http)
+    result = await batch_service.update(
+        db, "delete", request.conversation_ids, ip_address=ip_address, user_agent=user_agent
+    )
+
+    return BatchDeleteResponse(
+        success_count=len(result.succeeded),
+        failure_count=len(result.failed),
+        deleted_ids=result.succeeded
+    )
+
+
+@router.post("/batch/archive", status_code=status.HTTP_200_OK)
+async def batch_archive_conversations(
+    request: BatchRequest,
+    request_http: Request,
+    db: AsyncSession = Depends(get_db),
+) -> BatchDeleteResponse:
+    """Archive multiple conversations in a single batch."""
+    ip_address, user_agent = get_request_info(request_http)
+    result = await batch_service.update(
+        db, "archive", request.conversation_ids, ip_address=ip_address, user_agent=user_agent
+    )
+
+    return BatchDeleteResponse(
+        success_count=len(result.succeeded),
+        failure_count=len(result.failed),
+        deleted_ids=result.succeeded
+    )
+
+
+@router.post("/batch/duplicate", status_code=status.HTTP_201_CREATED)
+async def batch_duplicate_conversations(
+    request: BatchRequest,
+    request_http: Request,
+    db: AsyncSession = Depends(get_db),
+) -> BatchExportResponse:
+    """Duplicate multiple conversations in a single batch."""
+    ip_address, user_agent = get_request_info(request_http)
+    result = await batch_service.duplicate(
+        db, request.conversation_ids, ip_address=ip_address, user_agent=user_agent
+    )
+
+    results = [
+        {
+            "original_id": original_id,
+            "new_id": result.created[original_id]["id"],
+            "title": result.created[original_id]["title"],
+        }
+        for original_id in result.succeeded
+    ]
+    return BatchExportResponse(
+        success_count=len(result.succeeded),
+        failure_count=len(result.failed),
+        results=results + _failure_results(result)
+    )
+
+
+@router.post("/batch/move", status_code=status.HTTP_200_OK)
+async def batch_move_conversations(
+    request: BatchRequest,
+    request_http: Request,
+    project_id: Optional[str] = None,
+    db: AsyncSession = Depends(get_db),
+) -> BatchExportResponse:
+    """Move multiple conversations to a project in a single batch."""
+    ip_address, user_agent = get_request_info(request_http)
+    result = await batch_service.update(
+        db,
+        "move",
+        request.conversation_ids,
+        values={"project_id": project_id},
+        ip_address=ip_address,
+        user_agent=user_agent,
+    )
+
+    results = [
+        {"conversation_id": conversation_id, "project_id": project_id}
+        for conversation_id in result.succeeded
+    ]
+    return BatchExportResponse(
+        success_count=len(result.succeeded),
+        failure_count=len(result.failed),
+        results=results + _failure_results(result)
+    )
+
+
 @router.get("/{conversation_id}")
 async def get_conversation(
     conversation_id: str,
@@ -288,6 +423,7 @@ async def delete_conversation(
 
     conversation.is_deleted = True
     await db.commit()
+    branch_graph_service.invalidate(conversation.id)
 
     # Audit log
     ip_address, user_agent = get_request_info(request)
@@ -497,176 +633,44 @@ async def move_conversation(
 async def batch_export_conversations(
     request: BatchRequest,
     format: str = "json",
+    entry_format: str = "json",
     db: AsyncSession = Depends(get_db),
-) -> Response:
+) -> StreamingResponse:
     """Export multiple conversations in a single batch.
 
-    Returns a JSON array of exported conversations.
+    Streams a JSON envelope (``results``/``success_count``/``failure_count``),
+    JSON Lines, concatenated markdown, or a zip archive with one entry per
+    conversation (``format=zip``, entries in ``entry_format``).
     """
-    results = []
-    success_count = 0
-    failure_count = 0
-
-    for conversation_id in request.conversation_ids:
-        try:
-            # Get conversation
-            result = await db.execute(
-                select(ConversationModel)
-                .options(selectinload(ConversationModel.tags))
-                .where(ConversationModel.id == conversation_id)
-                .where(ConversationModel.is_deleted == False)
-            )
-            conversation = result.scalar_one_or_none()
-
-            if not conversation:
-                failure_count += 1
-                results.append({"conversation_id": conversation_id, "error": "Not found"})
-                continue
-
-            # Get messages
-            messages_result = await db.execute(
-                select(MessageModel)
-                .where(MessageModel.conversation_id == conversation_id)
-                .order_by(MessageModel.created_at)
-            )
-            messages = messages_result.scalars().all()
-
-            if format.lower() == "json":
-                export_data = {
-                    "id": conversation.id,
-                    "title": conversation.title,
-                    "model": conversation.model,
-                    "created_at": conversation.created_at.isoformat(),
-                    "updated_at": conversation.updated_at.isoformat(),
-                    "messages": [
-                        {
-                            "id": msg.id,
-                            "role": msg.role,
-                            "content": msg.content,
-                            "created_at": msg.created_at.isoformat(),
-                            "edited_at": msg.edited_at.isoformat() if msg.edited_at else None,
-                            "tool_calls": msg.tool_calls,
-                            "tool_results": msg.tool_results,
-                            "thinking_content": msg.thinking_content,
-                            "attachments": msg.attachments,
-                            "input_tokens": msg.input_tokens,
-                            "output_tokens": msg.output_tokens,
-                            "cache_read_tokens": msg.cache_read_tokens,
-                            "cache_write_tokens": msg.cache_write_tokens,
-                        }
-                        for msg in messages
-                    ],
-                    "metadata": {
-                        "message_count": len(messages),
-                        "token_count": conversation.token_count,
-                        "is_archived": conversation.is_archived,
-                        "is_pinned": conversation.is_pinned,
-                    }
-                }
-                results.append(export_data)
-                success_count += 1
-            else:
-                # Markdown format
-                md_lines = [
-                    f"# {conversation.title}",
-                    "",
-                    f"**Model:** {conversation.model}",
-                    f"**Created:** {conversation.created_at.strftime('%Y-%m-%d %H:%M:%S')}",
-                    f"**Updated:** {conversation.updated_at.strftime('%Y-%m-%d %H:%M:%S')}",
-                    f"**Message Count:** {len(messages)}",
-                    "",
-                    "---",
-                    "",
-                ]
-
-                for msg in messages:
-                    if msg.role == "user":
-                        md_lines.append("## 👤 User")
-                    elif msg.role == "assistant":
-                        md_lines.append("## 🤖 Assistant")
-                    elif msg.role == "system":
-                        md_lines.append("## ⚙️ System")
-                    elif msg.role == "tool":
-                        tool_name = "unknown"
-                        if msg.tool_calls and "name" in msg.tool_calls:
-                            tool_name = msg.tool_calls["name"]
-                        md_lines.append(f"## 🔧 Tool: {tool_name}")
-
-                    md_lines.append("")
-                    md_lines.append(msg.content)
-                    md_lines.append("")
-
-                    if msg.thinking_content:
-                        md_lines.append("<details>")
-                        md_lines.append("<summary>Thinking Process</summary>")
-                        md_lines.append("")
-                        md_lines.append(msg.thinking_content)
-                        md_lines.append("")
-                        md_lines.append("</details>")
-                        md_lines.append("")
-
-                    if msg.tool_results:
-                        md_lines.append("**Tool Results:**")
-                        md_lines.append("```json")
-                        md_lines.append(json.dumps(msg.tool_results, indent=2))
-                        md_lines.append("```")
-                        md_lines.append("")
-
-                    if msg.tool_calls:
-                        md_lines.append("**Tool Call:**")
-                        md_lines.append("```json")
-                        md_lines.append(json.dumps(msg.tool_calls, indent=2))
-                        md_lines.append("```")
-                        md_lines.append("")
-
-                    if msg.input_tokens or msg.output_tokens:
-                        total = msg.input_tokens + msg.output_tokens
-                        md_lines.append(f"*Tokens: {msg.input_tokens} in, {msg.output_tokens} out, {total} total*")
-                        md_lines.append("")
-
-                    md_lines.append("---")
-                    md_lines.append("")
-
-                results.append({
-                    "id": conversation.id,
-                    "title": conversation.title,
-                    "markdown": "\n".join(md_lines)
-                })
-                success_count += 1
-
-        except Exception as e:
-            failure_count += 1
-            results.append({"conversation_id": conversation_id, "error": str(e)})
-
-    if format.lower() == "json":
-        # Return combined JSON
-        json_str = json.dumps({
-            "success_count": success_count,
-            "failure_count": failure_count,
-            "results": results
-        }, indent=2, ensure_ascii=False)
-        filename = f"batch_export_{datetime.utcnow().strftime('%Y%m%d_%H%M%S')}.json"
-
-        return Response(
-            content=json_str,
-            media_type="application/json",
-            headers={
-                "Content-Disposition": f'attachment; filename="{filename}"'
-            }
+    export_format = export_service.normalize_format(format)
+    if export_format not in export_service.EXPORT_FORMATS + ("zip",):
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unsupported format: {format}. Supported formats: json, jsonl, markdown, zip"
         )
-    else:
-        # Return combined markdown
-        md_content = "\n\n".join([r.get("markdown", "") for r in results if "markdown" in r])
-        filename = f"batch_export_{datetime.utcnow().strftime('%Y%m%d_%H%M%S')}.md"
-
-        return Response(
-            content=md_content,
-            media_type="text/markdown",
-            headers={
-                "Content-Disposition": f'attachment; filename="{filename}"'
-            }
+    entry_format = export_service.normalize_format(entry_format)
+    if entry_format not in export_service.EXPORT_FORMATS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unsupported entry_format: {entry_format}. Supported: json, jsonl, markdown"
         )
 
+    conversations = await export_service.load_conversations(db, request.conversation_ids)
+    # Release the read transaction before the (possibly long) download starts
+    await db.commit()
+
+    if export_format == "zip":
+        chunks = export_service.stream_zip(db, request.conversation_ids, conversations, entry_format)
+    else:
+        chunks = export_service.stream_batch(db, request.conversation_ids, conversations, export_format)
+
+    filename = export_store.filename(export_service.FILE_EXTENSIONS[export_format])
+    return StreamingResponse(
+        export_service.buffered(chunks),
+        media_type=export_service.MEDIA_TYPES[export_format],
+        headers=export_service.content_disposition(filename),
+    )
+
 
 @router.post("/{conversation_id}/export")
 async def export_conversation(
@@ -674,12 +678,22 @@ async def export_conversation(
     request: Request,
     format: str = "json",
     db: AsyncSession = Depends(get_db),
-) -> Response:
-    """Export a conversation in JSON or Markdown format."""
+) -> StreamingResponse:
+    """Export a conversation in JSON, JSON Lines or Markdown format.
+
+    The export is streamed: messages are paged out of the database and
+    written incrementally, so memory use does not grow with history length.
+    """
+    export_format = export_service.normalize_format(format)
+    if export_format not in export_service.EXPORT_FORMATS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unsupported format: {format}. Supported formats: json, jsonl, markdown"
+        )
+
     # Get conversation
     result = await db.execute(
         select(ConversationModel)
-        .options(selectinload(ConversationModel.tags))
         .where(ConversationModel.id == conversation_id)
         .where(ConversationModel.is_deleted == False)
     )
@@ -688,167 +702,28 @@ async def export_conversation(
     if not conversation:
         raise HTTPException(status_code=404, detail="Conversation not found")
 
-    # Get messages
-    messages_result = await db.execute(
-        select(MessageModel)
-        .where(MessageModel.conversation_id == conversation_id)
-        .order_by(MessageModel.created_at)
+    # Audit log
+    ip_address, user_agent = get_request_info(request)
+    await log_audit(
+        db=db,
+        user_id="default-user",
+        action=AuditAction.CONVERSATION_EXPORT,
+        resource_type="conversation",
+        resource_id=conversation.id,
+        details={"format": export_format},
+        ip_address=ip_address,
+        user_agent=user_agent,
     )
-    messages = messages_result.scalars().all()
-
-    if format.lower() == "json":
-        # Export as JSON
-        export_data = {
-            "id": conversation.id,
-            "title": conversation.title,
-            "model": conversation.model,
-            "created_at": conversation.created_at.isoformat(),
-            "updated_at": conversation.updated_at.isoformat(),
-            "messages": [
-                {
-                    "id": msg.id,
-                    "role": msg.role,
-                    "content": msg.content,
-                    "created_at": msg.created_at.isoformat(),
-                    "edited_at": msg.edited_at.isoformat() if msg.edited_at else None,
-                    "tool_calls": msg.tool_calls,
-                    "tool_results": msg.tool_results,
-                    "thinking_content": msg.thinking_content,
-                    "attachments": msg.attachments,
-                    "input_tokens": msg.input_tokens,
-                    "output_tokens": msg.output_tokens,
-                    "cache_read_tokens": msg.cache_read_tokens,
-                    "cache_write_tokens": msg.cache_write_tokens,
-                }
-                for msg in messages
-            ],
-            "metadata": {
-                "message_count": len(messages),
-                "token_count": conversation.token_count,
-                "is_archived": conversation.is_archived,
-                "is_pinned": conversation.is_pinned,
-            }
-        }
-
-        json_str = json.dumps(export_data, indent=2, ensure_ascii=False)
-        filename = f"{conversation.title.replace(' ', '_').replace('/', '_')}_export.json"
-
-        # Audit log
-        ip_address, user_agent = get_request_info(request)
-        await log_audit(
-            db=db,
-            user_id="default-user",
-            action=AuditAction.CONVERSATION_EXPORT,
-            resource_type="conversation",
-            resource_id=conversation.id,
-            details={"format": "json"},
-            ip_address=ip_address,
-            user_agent=user_agent,
-        )
-
-        return Response(
-            content=json_str,
-            media_type="application/json",
-            headers={
-                "Content-Disposition": f'attachment; filename="{filename}"'
-            }
-        )
-
-    elif format.lower() == "markdown":
-        # Export as Markdown
-        md_lines = [
-            f"# {conversation.title}",
-            "",
-            f"**Model:** {conversation.model}",
-            f"**Created:** {conversation.created_at.strftime('%Y-%m-%d %H:%M:%S')}",
-            f"**Updated:** {conversation.updated_at.strftime('%Y-%m-%d %H:%M:%S')}",
-            f"**Message Count:** {len(messages)}",
-            "",
-            "---",
-            "",
-        ]
-
-        for msg in messages:
-            if msg.role == "user":
-                md_lines.append("## 👤 User")
-            elif msg.role == "assistant":
-                md_lines.append("## 🤖 Assistant")
-            elif msg.role == "system":
-                md_lines.append("## ⚙️ System")
-            elif msg.role == "tool":
-                tool_name = "unknown"
-                if msg.tool_calls and "name" in msg.tool_calls:
-                    tool_name = msg.tool_calls["name"]
-                md_lines.append(f"## 🔧 Tool: {tool_name}")
-
-            md_lines.append("")
-            md_lines.append(msg.content)
-            md_lines.append("")
-
-            # Add thinking content if present
-            if msg.thinking_content:
-                md_lines.append("<details>")
-                md_lines.append("<summary>Thinking Process</summary>")
-                md_lines.append("")
-                md_lines.append(msg.thinking_content)
-                md_lines.append("")
-                md_lines.append("</details>")
-                md_lines.append("")
-
-            # Add tool results if present
-            if msg.tool_results:
-                md_lines.append("**Tool Results:**")
-                md_lines.append("```json")
-                md_lines.append(json.dumps(msg.tool_results, indent=2))
-                md_lines.append("```")
-                md_lines.append("")
-
-            # Add tool calls if present
-            if msg.tool_calls:
-                md_lines.append("**Tool Call:**")
-                md_lines.append("```json")
-                md_lines.append(json.dumps(msg.tool_calls, indent=2))
-                md_lines.append("```")
-                md_lines.append("")
-
-            # Add token info
-            if msg.input_tokens or msg.output_tokens:
-                total = msg.input_tokens + msg.output_tokens
-                md_lines.append(f"*Tokens: {msg.input_tokens} in, {msg.output_tokens} out, {total} total*")
-                md_lines.append("")
-
-            md_lines.append("---")
-            md_lines.append("")
-
-        md_content = "\n".join(md_lines)
-        filename = f"{conversation.title.replace(' ', '_').replace('/', '_')}_export.md"
-
-        # Audit log
-        ip_address, user_agent = get_request_info(request)
-        await log_audit(
-            db=db,
-            user_id="default-user",
-            action=AuditAction.CONVERSATION_EXPORT,
-            resource_type="conversation",
-            resource_id=conversation.id,
-            details={"format": "markdown"},
-            ip_address=ip_address,
-            user_agent=user_agent,
-        )
-
-        return Response(
-            content=md_content,
-            media_type="text/markdown",
-            headers={
-                "Content-Disposition": f'attachment; filename="{filename}"'
-            }
-        )
+    # Commit now so the write lock is not held while the body streams
+    await db.commit()
 
-    else:
-        raise HTTPException(
-            status_code=400,
-            detail=f"Unsupported format: {format}. Supported formats: json, markdown"
-        )
+    return StreamingResponse(
+        export_service.buffered(export_service.stream_conversation(db, conversation, export_format)),
+        media_type=export_service.MEDIA_TYPES[export_format],
+        headers=export_service.content_disposition(
+            export_service.export_filename(conversation.title, export_format)
+        ),
+    )
 
 
 @router.post("/{conversation_id}/branch")
@@ -872,20 +747,20 @@ async def create_branch(
     if not parent_conversation:
         raise HTTPException(status_code=404, detail="Parent conversation not found")
 
-    # Check if the branch point message exists
-    result = await db.execute(
-        select(MessageModel).where(MessageModel.id == data.message_id)
-    )
-    branch_point_message = result.scalar_one_or_none()
+    # The branch point can be any message the parent shows, including ones
+    # it inherits from its own parent
+    branch_point_message = await message_history.get_visible_message(db, conversation_id, data.message_id)
 
     if not branch_point_message:
-        raise HTTPException(status_code=404, detail="Branch point message not found")
-
-    # Validate that the message belongs to this conversation
-    if branch_point_message.conversation_id != conversation_id:
+        result = await db.execute(
+            select(MessageModel.id).where(MessageModel.id == data.message_id)
+        )
+        if result.scalar_one_or_none() is None:
+            raise HTTPException(status_code=404, detail="Branch point message not found")
         raise HTTPException(status_code=400, detail="Branch point message does not belong to this conversation")
 
-    # Create branch conversation
+    # Create branch conversation. It shares the parent's messages up to the
+    # branch point instead of copying them, so only new messages are stored.
     now = datetime.utcnow()
     branch_name = data.branch_name or f"Branch from {parent_conversation.title}"
 
@@ -894,51 +769,26 @@ async def create_branch(
         model=parent_conversation.model,
         project_id=parent_conversation.project_id,
         parent_conversation_id=parent_conversation.id,
-        branch_point_message_id=data.message_id,
+        branch_point_message_id=branch_point_message.id,
         branch_name=branch_name,
         branch_color=data.branch_color,
+        inherits_parent_messages=True,
         created_at=now,
         updated_at=now,
         last_message_at=now,
     )
 
     db.add(branch_conversation)
-    await db.commit()
-    await db.refresh(branch_conversation)
-
-    # Copy messages up to and including the branch point
-    result = await db.execute(
-        select(MessageModel)
-        .where(MessageModel.conversation_id == conversation_id)
-        .where(MessageModel.created_at <= branch_point_message.created_at)
-        .order_by(MessageModel.created_at)
-    )
-    messages_to_copy = result.scalars().all()
-
-    for msg in messages_to_copy:
-        new_message = MessageModel(
-            conversation_id=branch_conversation.id,
-            role=msg.role,
-            content=msg.content,
-            attachments=msg.attachments,
-            tool_calls=msg.tool_calls,
-            tool_results=msg.tool_results,
-            thinking_content=msg.thinking_content,
-            input_tokens=msg.input_tokens,
-            output_tokens=msg.output_tokens,
-            cache_read_tokens=msg.cache_read_tokens,
-            cache_write_tokens=msg.cache_write_tokens,
-            created_at=msg.created_at,
-            edited_at=msg.edited_at,
-        )
-        db.add(new_message)
+    await db.flush()
 
     # Mark the branch point message as a branch point in the original conversation
     branch_point_message.is_branch_point = True
-    branch_conversation.message_count = len(messages_to_copy)
-    branch_conversation.token_count = sum(msg.input_tokens + msg.output_tokens for msg in messages_to_copy)
+    branch_conversation.message_count, branch_conversation.token_count = (
+        await message_history.history_totals(db, branch_conversation.id)
+    )
 
     await db.commit()
+    branch_graph_service.invalidate(conversation_id)
     await db.refresh(branch_conversation)
 
     # Audit log
@@ -975,7 +825,7 @@ async def create_branch(
 @router.get("/{conversation_id}/branches")
 async def list_branches(
     conversation_id: str,
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
 ) -> list[dict]:
     """List all branches for a conversation."""
     result = await db.execute(
@@ -1010,90 +860,22 @@ async def list_branches(
 @router.get("/{conversation_id}/branch-tree")
 async def get_branch_tree(
     conversation_id: str,
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
 ) -> dict:
-    """Get the branch tree structure for a conversation."""
-    # Get the conversation
-    result = await db.execute(
-        select(ConversationModel)
-        .options(selectinload(ConversationModel.tags))
-        .where(ConversationModel.id == conversation_id)
-        .where(ConversationModel.is_deleted == False)
-    )
-    conversation = result.scalar_one_or_none()
-
-    if not conversation:
+    """Get the whole branch tree (root and every level of branches) of a conversation."""
+    graph = await branch_graph_service.get_graph(conversation_id, db)
+    if graph is None:
         raise HTTPException(status_code=404, detail="Conversation not found")
 
-    # Get all related conversations (parent and children)
-    conversations_to_check = [conversation]
-    current = conversation
-
-    # Find root conversation
-    while current.parent_conversation_id:
-        result = await db.execute(
-            select(ConversationModel)
-            .where(ConversationModel.id == current.parent_conversation_id)
-            .where(ConversationModel.is_deleted == False)
-        )
-        parent = result.scalar_one_or_none()
-        if parent:
-            conversations_to_check.append(parent)
-            current = parent
-        else:
-            break
-
-    # Get all branches from all conversations in the tree
-    all_conversations = []
-    for conv in conversations_to_check:
-        # Get branches for this conversation
-        result = await db.execute(
-            select(ConversationModel)
-            .where(ConversationModel.parent_conversation_id == conv.id)
-            .order_by(ConversationModel.created_at)
-        )
-        branches = result.scalars().all()
-        all_conversations.extend(branches)
-
-    # Build tree structure
-    tree = {
-        "root": {
-            "id": current.id,
-            "title": current.title,
-            "model": current.model,
-            "is_archived": current.is_archived,
-            "is_pinned": current.is_pinned,
-            "created_at": current.created_at.isoformat(),
-        },
-        "branches": [
-            {
-                "id": branch.id,
-                "title": branch.title,
-                "model": branch.model,
-                "parent_conversation_id": branch.parent_conversation_id,
-                "branch_point_message_id": branch.branch_point_message_id,
-                "branch_name": branch.branch_name,
-                "branch_color": branch.branch_color,
-                "is_archived": branch.is_archived,
-                "is_pinned": branch.is_pinned,
-                "created_at": branch.created_at.isoformat(),
-                "message_count": branch.message_count,
-                "token_count": branch.token_count,
-            }
-            for branch in all_conversations
-        ],
-        "current_conversation": {
-            "id": conversation.id,
-            "title": conversation.title,
-            "model": conversation.model,
-            "is_archived": conversation.is_archived,
-            "is_pinned": conversation.is_pinned,
-            "created_at": conversation.created_at.isoformat(),
-        }
+    current = graph.nodes[conversation_id]
+    return {
+        "root": graph.root,
+        "branches": graph.branches(),
+        "current_conversation": {**current, "depth": graph.depths.get(conversation_id, 0)},
+        "tree": graph.nested(),
+        **graph.totals(),
     }
 
-    return tree
-
 
 @router.post("/upload-image")
 async def upload_image(
@@ -1256,262 +1038,3 @@ async def filter_conversations_by_tags(
         }
         for conv in conversations
     ]
-
-
-# ==================== BATCH OPERATIONS ====================
-
-
-class BatchDeleteResponse(BaseModel):
-    """Response model for batch delete."""
-
-    success_count: int
-    failure_count: int
-    deleted_ids: list[str]
-
-
-
-
-@router.post("/batch/delete", status_code=status.HTTP_200_OK)
-async def batch_delete_conversations(
-    request: BatchRequest,
-    request_http: Request,
-    db: AsyncSession = Depends(get_db),
-) -> BatchDeleteResponse:
-    """Delete multiple conversations in a single batch (soft delete)."""
-
-    success_count = 0
-    failure_count = 0
-    deleted_ids = []
-
-    for conversation_id in request.conversation_ids:
-        try:
-            result = await db.execute(
-                select(ConversationModel)
-                .where(ConversationModel.id == conversation_id)
-                .where(ConversationModel.is_deleted == False)
-            )
-            conversation = result.scalar_one_or_none()
-
-            if not conversation:
-                failure_count += 1
-                continue
-
-            conversation.is_deleted = True
-            deleted_ids.append(conversation_id)
-            success_count += 1
-
-            # Audit log
-            ip_address, user_agent = get_request_info(request_http)
-            await log_audit(
-                db=db,
-                user_id="default-user",
-                action=AuditAction.CONVERSATION_DELETE,
-                resource_type="conversation",
-                resource_id=conversation.id,
-                details={"title": conversation.title, "batch_operation": True},
-                ip_address=ip_address,
-                user_agent=user_agent,
-            )
-
-        except Exception:
-            failure_count += 1
-
-    await db.commit()
-
-    return BatchDeleteResponse(
-        success_count=success_count,
-        failure_count=failure_count,
-        deleted_ids=deleted_ids
-    )
-
-
-@router.post("/batch/archive", status_code=status.HTTP_200_OK)
-async def batch_archive_conversations(
-    request: BatchRequest,
-    request_http: Request,
-    db: AsyncSession = Depends(get_db),
-) -> BatchDeleteResponse:
-    """Archive multiple conversations in a single batch."""
-
-    success_count = 0
-    failure_count = 0
-    archived_ids = []
-
-    for conversation_id in request.conversation_ids:
-        try:
-            result = await db.execute(
-                select(ConversationModel)
-                .where(ConversationModel.id == conversation_id)
-                .where(ConversationModel.is_deleted == False)
-            )
-            conversation = result.scalar_one_or_none()
-
-            if not conversation:
-                failure_count += 1
-                continue
-
-            conversation.is_archived = True
-            conversation.updated_at = datetime.utcnow()
-            archived_ids.append(conversation_id)
-            success_count += 1
-
-            # Audit log
-            ip_address, user_agent = get_request_info(request_http)
-            await log_audit(
-                db=db,
-                user_id="default-user",
-                action=AuditAction.CONVERSATION_UPDATE,
-                resource_type="conversation",
-                resource_id=conversation.id,
-                details={"is_archived": True, "batch_operation": True},
-                ip_address=ip_address,
-                user_agent=user_agent,
-            )
-
-        except Exception:
-            failure_count += 1
-
-    await db.commit()
-
-    return BatchDeleteResponse(
-        success_count=success_count,
-        failure_count=failure_count,
-        deleted_ids=archived_ids
-    )
-
-
-@router.post("/batch/duplicate", status_code=status.HTTP_201_CREATED)
-async def batch_duplicate_conversations(
-    request: BatchRequest,
-    request_http: Request,
-    db: AsyncSession = Depends(get_db),
-) -> BatchExportResponse:
-    """Duplicate multiple conversations in a single batch."""
-
-    success_count = 0
-    failure_count = 0
-    results = []
-
-    for conversation_id in request.conversation_ids:
-        try:
-            result = await db.execute(
-                select(ConversationModel)
-                .options(selectinload(ConversationModel.tags))
-                .where(ConversationModel.id == conversation_id)
-                .where(ConversationModel.is_deleted == False)
-            )
-            original = result.scalar_one_or_none()
-
-            if not original:
-                failure_count += 1
-                results.append({"conversation_id": conversation_id, "error": "Not found"})
-                continue
-
-            now = datetime.utcnow()
-
-            duplicate = ConversationModel(
-                title=f"{original.title} (Copy)",
-                model=original.model,
-                project_id=original.project_id,
-                created_at=now,
-                updated_at=now,
-                last_message_at=now,
-            )
-
-            db.add(duplicate)
-            await db.flush()  # Get ID before commit
-
-            # Audit log
-            ip_address, user_agent = get_request_info(request_http)
-            await log_audit(
-                db=db,
-                user_id="default-user",
-                action=AuditAction.CONVERSATION_CREATE,
-                resource_type="conversation",
-                resource_id=duplicate.id,
-                details={"title": duplicate.title, "original_id": original.id, "batch_operation": True},
-                ip_address=ip_address,
-                user_agent=user_agent,
-            )
-
-            results.append({
-                "original_id": original.id,
-                "new_id": duplicate.id,
-                "title": duplicate.title
-            })
-            success_count += 1
-
-        except Exception as e:
-            failure_count += 1
-            results.append({"conversation_id": conversation_id, "error": str(e)})
-
-    await db.commit()
-
-    return BatchExportResponse(
-        success_count=success_count,
-        failure_count=failure_count,
-        results=results
-    )
-
-
-@router.post("/batch/move", status_code=status.HTTP_200_OK)
-async def batch_move_conversations(
-    request: BatchRequest,
-    request_http: Request,
-    project_id: Optional[str] = None,
-    db: AsyncSession = Depends(get_db),
-) -> BatchExportResponse:
-    """Move multiple conversations to a project in a single batch."""
-
-    success_count = 0
-    failure_count = 0
-    results = []
-
-    for conversation_id in request.conversation_ids:
-        try:
-            result = await db.execute(
-                select(ConversationModel)
-                .where(ConversationModel.id == conversation_id)
-                .where(ConversationModel.is_deleted == False)
-            )
-            conversation = result.scalar_one_or_none()
-
-            if not conversation:
-                failure_count += 1
-                results.append({"conversation_id": conversation_id, "error": "Not found"})
-                continue
-
-            old_project_id = conversation.project_id
-            conversation.project_id = project_id
-            conversation.updated_at = datetime.utcnow()
-
-            # Audit log
-            ip_address, user_agent = get_request_info(request_http)
-            await log_audit(
-                db=db,
-                user_id="default-user",
-                action=AuditAction.CONVERSATION_UPDATE,
-                resource_type="conversation",
-                resource_id=conversation.id,
-                details={"project_id": {"from": old_project_id, "to": project_id}, "batch_operation": True},
-                ip_address=ip_address,
-                user_agent=user_agent,
-            )
-
-            results.append({
-                "conversation_id": conversation.id,
-                "project_id": project_id
-            })
-            success_count += 1
-
-        except Exception as e:
-            failure_count += 1
-            results.append({"conversation_id": conversation_id, "error": str(e)})
-
-    await db.commit()
-
-    return BatchExportResponse(
-        success_count=success_count,
-        failure_count=failure_count,
-        results=results
-    )
@@ -4,13 +4,14 @@ from typing import Optional
 from uuid import UUID
 from datetime import datetime
 
-from fastapi import APIRouter, HTTPException, status, Depends
+from fastapi import APIRouter, HTTPException, status, Depends, Query, Response
 from pydantic import BaseModel, Field
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from src.core.database import get_db
 from src.models import Folder as FolderModel, FolderItem as FolderItemModel, Conversation as ConversationModel
+from src.utils.pagination import SortKey, paginate, set_page_headers
 
 router = APIRouter()
 
@@ -53,13 +54,28 @@ class FolderResponse(BaseModel):
     updated_at: str
 
 
+FOLDER_ORDER = (
+    SortKey(FolderModel.position),
+    SortKey(FolderModel.created_at),
+    SortKey(FolderModel.id),
+)
+
+
 @router.get("")
 async def list_folders(
+    response: Response,
     parent_folder_id: Optional[UUID] = None,
     archived: bool = False,
+    limit: Optional[int] = Query(None, ge=1, le=500, description="Page size; omit to list everything"),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor or X-Prev-Cursor of a previous page"),
+    include_total: bool = Query(False, description="Return the number of matches in X-Total-Count"),
     db: AsyncSession = Depends(get_db),
 ) -> list[dict]:
-    """List all folders."""
+    """List all folders.
+
+    Keyset paginated when ``limit`` is given: follow the
+    ``X-Next-Cursor``/``X-Prev-Cursor`` headers.
+    """
     query = select(FolderModel).where(FolderModel.is_deleted == False)
 
     if archived:
@@ -73,10 +89,11 @@ async def list_folders(
         # Only get root folders (no parent)
         query = query.where(FolderModel.parent_folder_id == None)
 
-    query = query.order_by(FolderModel.position, FolderModel.created_at)
-
-    result = await db.execute(query)
-    folders = result.scalars().all()
+    page = await paginate(
+        db, query, FOLDER_ORDER, limit=limit, cursor=cursor, include_total=include_total
+    )
+    set_page_headers(response, page)
+    folders = page.items
 
     return [
         {
@@ -4,8 +4,11 @@ from datetime import datetime
 from typing import Any, Dict
 from fastapi import APIRouter
 from sqlalchemy import text
-from src.core.database import async_session_factory
+from src.core.database import async_session_factory, get_pool_metrics
 from src.core.config import settings
+from src.services.agent_service import agent_service
+from src.services.context_service import context_service
+from src.services.run_manager import run_manager
 
 router = APIRouter()
 
@@ -18,7 +21,8 @@ async def check_database() -> Dict[str, Any]:
             await session.execute(text("SELECT 1"))
             return {
                 "status": "healthy",
-                "connected": True
+                "connected": True,
+                "pools": get_pool_metrics()
             }
     except Exception as e:
         return {
@@ -46,7 +50,10 @@ async def check_agent_framework() -> Dict[str, Any]:
             "status": "healthy" if (agent_available and has_api_key) else "degraded",
             "deepagents_available": agent_available,
             "api_key_configured": has_api_key,
-            "default_model": settings.default_model
+            "default_model": settings.default_model,
+            "agent_cache": agent_service.agents.stats(),
+            "context_cache": context_service.stats(),
+            "agent_runs": run_manager.stats(),
         }
     except Exception as e:
         return {
@@ -3,13 +3,14 @@
 from typing import Optional
 from uuid import UUID
 
-from fastapi import APIRouter, HTTPException, status, Depends
+from fastapi import APIRouter, HTTPException, Query, status, Depends
 from pydantic import BaseModel
 from sqlalchemy import select, delete
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from src.core.database import get_db
 from src.models.memory import Memory
+from src.services.memory_retrieval_service import memory_retrieval_service
 
 router = APIRouter()
 
@@ -78,19 +79,17 @@ async def search_memories(
     q: str,
     db: AsyncSession = Depends(get_db),
     active_only: bool = True,
+    limit: int = Query(50, ge=1, le=100),
 ) -> list[dict]:
-    """Search memories by content."""
-    query = select(Memory).where(Memory.content.ilike(f"%{q}%"))
-
-    if active_only:
-        query = query.where(Memory.is_active == True)
-
-    query = query.order_by(Memory.created_at.desc())
-
-    result = await db.execute(query)
-    memories = result.scalars().all()
-
-    return [mem.to_dict() for mem in memories]
+    """Search memories by content, best match first."""
+    ranked = await memory_retrieval_service.rank(
+        db,
+        q,
+        top_k=limit,
+        active_only=active_only,
+        prefix=True,
+    )
+    return [{**item.memory.to_dict(), "score": round(item.score, 4)} for item in ranked]
 
 
 @router.get("/{memory_id}")
@@ -6,15 +6,17 @@ from typing import Optional
 from datetime import datetime
 from uuid import UUID
 
-from fastapi import APIRouter, HTTPException, status, Depends, UploadFile, File
+from fastapi import APIRouter, HTTPException, status, Depends, UploadFile, File, Query, Response
 from fastapi.responses import FileResponse
 from pydantic import BaseModel
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from src.core.database import get_db
+from src.core.database import get_db, get_read_db
 from src.core.config import settings
 from src.models import Message, Conversation
+from src.services import message_history
+from src.utils.pagination import SortKey, paginate, set_page_headers
 
 # Two separate routers for different path patterns
 conversation_messages_router = APIRouter()
@@ -52,29 +54,37 @@ class MessageUpdate(BaseModel):
 
 
 # Conversation-specific message routes (for /api/conversations/{id}/messages)
+# Oldest first, matching ix_messages_conversation_created
+MESSAGE_ORDER = (SortKey(Message.created_at), SortKey(Message.id))
+
+
 @conversation_messages_router.get("/{conversation_id}/messages")
 async def list_messages(
     conversation_id: str,
-    limit: int = 100,
-    offset: int = 0,
-    db: AsyncSession = Depends(get_db),
+    response: Response,
+    limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor or X-Prev-Cursor of a previous page"),
+    include_total: bool = Query(False, description="Return the number of messages in X-Total-Count"),
+    offset: int = Query(0, ge=0, description="Deprecated, use cursor"),
+    db: AsyncSession = Depends(get_read_db),
 ) -> list[dict]:
-    """List messages in a conversation."""
-    query = (
-        select(Message)
-        .where(Message.conversation_id == conversation_id)
-        .order_by(Message.created_at.asc())
-        .offset(offset)
-        .limit(limit)
+    """List messages in a conversation.
+
+    Branches include the parent messages they share up to their branch point.
+    Keyset paginated: follow the ``X-Next-Cursor``/``X-Prev-Cursor`` headers.
+    """
+    query = message_history.visible_messages(conversation_id)
+    page = await paginate(
+        db, query, MESSAGE_ORDER, limit=limit, cursor=cursor,
+        include_total=include_total, offset=offset,
     )
-
-    result = await db.execute(query)
-    messages = result.scalars().all()
+    set_page_headers(response, page)
+    messages = page.items
 
     return [
         {
             "id": msg.id,
-            "conversationId": msg.conversation_id,
+            "conversationId": conversation_id,
             "role": msg.role,
             "content": msg.content,
             "input_tokens": msg.input_tokens,
@@ -199,6 +209,8 @@ async def update_message(
     if not message:
         raise HTTPException(status_code=404, detail="Message not found")
 
+    # Branches sharing this message keep the original
+    await message_history.detach_branches(db, message)
     message.content = data.content
     message.edited_at = datetime.utcnow()
 
@@ -244,6 +256,8 @@ async def delete_message(
     if conversation:
         conversation.message_count = max(0, conversation.message_count - 1)
 
+    # Branches sharing this message keep their own copy
+    await message_history.detach_branches(db, message)
     await db.delete(message)
     await db.commit()
 
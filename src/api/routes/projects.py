@@ -18,6 +18,8 @@ from src.core.database import get_db
 from src.models.project import Project
 from src.models.conversation import Conversation
 from src.models.project_file import ProjectFile
+from src.services.context_service import context_service
+from src.services.retrieval_service import retrieval_service
 
 router = APIRouter()
 
@@ -220,9 +222,11 @@ async def delete_project(
         except Exception:
             pass
         await db.delete(file)
+    await retrieval_service.delete_project_chunks(db, project_id)
 
     await db.delete(project)
     await db.commit()
+    context_service.invalidate_project(project_id)
 
 
 @router.get("/{project_id}/conversations")
@@ -347,8 +351,12 @@ async def upload_project_file(
     )
 
     db.add(project_file)
+    # Chunk the text now so retrieval at request time is only an index lookup
+    await db.flush()
+    await retrieval_service.index_file(db, project_file)
     await db.commit()
     await db.refresh(project_file)
+    context_service.invalidate_project(project_id)
 
     return {
         "id": project_file.id,
@@ -483,4 +491,6 @@ async def delete_project_file(
 
     # Mark as deleted in database
     project_file.is_deleted = True
+    await retrieval_service.delete_file_chunks(db, project_file.id)
     await db.commit()
+    context_service.invalidate_project(project_id)
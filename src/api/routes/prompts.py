@@ -4,13 +4,14 @@ from typing import Optional
 from uuid import UUID
 import json
 
-from fastapi import APIRouter, HTTPException, status, Depends
+from fastapi import APIRouter, HTTPException, status, Depends, Query, Response
 from pydantic import BaseModel
 from sqlalchemy import select, delete, update
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from src.core.database import get_db
 from src.models.prompt import Prompt
+from src.utils.pagination import SortKey, paginate, set_page_headers
 
 router = APIRouter()
 
@@ -36,13 +37,29 @@ class PromptUpdate(BaseModel):
     is_active: Optional[bool] = None
 
 
+# Most used first, then most recent
+PROMPT_ORDER = (
+    SortKey(Prompt.usage_count, descending=True),
+    SortKey(Prompt.created_at, descending=True),
+    SortKey(Prompt.id, descending=True),
+)
+
+
 @router.get("")
 async def list_prompts(
+    response: Response,
     db: AsyncSession = Depends(get_db),
     category: Optional[str] = None,
     active_only: bool = True,
+    limit: Optional[int] = Query(None, ge=1, le=500, description="Page size; omit to list everything"),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor or X-Prev-Cursor of a previous page"),
+    include_total: bool = Query(False, description="Return the number of matches in X-Total-Count"),
 ) -> list[dict]:
-    """List all prompts with optional filtering."""
+    """List all prompts with optional filtering.
+
+    Keyset paginated when ``limit`` is given: follow the
+    ``X-Next-Cursor``/``X-Prev-Cursor`` headers.
+    """
     query = select(Prompt)
 
     if active_only:
@@ -51,13 +68,12 @@ async def list_prompts(
     if category:
         query = query.where(Prompt.category == category)
 
-    # Order by usage count (most used first), then by most recent
-    query = query.order_by(Prompt.usage_count.desc(), Prompt.created_at.desc())
-
-    result = await db.execute(query)
-    prompts = result.scalars().all()
+    page = await paginate(
+        db, query, PROMPT_ORDER, limit=limit, cursor=cursor, include_total=include_total
+    )
+    set_page_headers(response, page)
 
-    return [prompt.to_dict() for prompt in prompts]
+    return [prompt.to_dict() for prompt in page.items]
 
 
 @router.post("", status_code=status.HTTP_201_CREATED)
@@ -1,138 +1,128 @@
-"""Search endpoints."""
+"""Search endpoints.
+
+All endpoints use the FTS5 index (see ``src.services.search_service``) and
+return BM25-ranked results with highlighted snippets. List endpoints accept
+``limit``/``cursor`` and return the cursor for the next page in the
+``X-Next-Cursor`` response header.
+"""
 
 from typing import Optional
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, or_, func
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Query, Response
 
-from src.core.database import get_db
-from src.models.project_file import ProjectFile
-from src.models.conversation import Conversation
-from src.models.message import Message
-from src.models.memory import Memory
+from src.core.database import get_read_db
+from src.services.search_service import SearchPage, search_service
+from src.utils.pagination import NEXT_CURSOR_HEADER
 
 router = APIRouter()
 
 
+def _preview(text: Optional[str], length: int = 200) -> Optional[str]:
+    """Truncate text for result previews."""
+    return text[:length] + "..." if text and len(text) > length else text
+
+
+def _set_next_cursor(response: Response, page: SearchPage) -> None:
+    """Expose the next page cursor without changing list response bodies."""
+    if page.next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = page.next_cursor
+
+
 @router.get("/conversations")
 async def search_conversations(
     q: str,
+    response: Response,
     project_id: Optional[str] = None,
-    db: AsyncSession = Depends(get_db),
+    limit: int = Query(default=20, ge=1, le=100),
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(get_read_db),
 ) -> list[dict]:
     """Search conversations by title and content."""
     if not q or len(q.strip()) < 2:
         return []
 
-    query = (
-        select(Conversation)
-        .where(
-            or_(
-                Conversation.title.ilike(f"%{q}%"),
-                Conversation.id.in_(
-                    select(Message.conversation_id)
-                    .where(Message.content.ilike(f"%{q}%"))
-                )
-            )
-        )
-        .where(Conversation.is_deleted == False)
-        .order_by(Conversation.updated_at.desc())
-        .limit(20)
+    page = await search_service.search_conversations(
+        db, q, project_id=project_id, limit=limit, cursor=cursor
     )
-
-    if project_id:
-        query = query.where(Conversation.project_id == project_id)
-
-    result = await db.execute(query)
-    conversations = result.scalars().all()
+    _set_next_cursor(response, page)
 
     return [
         {
-            "id": conv.id,
-            "title": conv.title,
-            "project_id": conv.project_id,
-            "updated_at": conv.updated_at.isoformat() if conv.updated_at else None,
+            "id": hit.item.id,
+            "title": hit.item.title,
+            "project_id": hit.item.project_id,
+            "updated_at": hit.item.updated_at.isoformat() if hit.item.updated_at else None,
+            "snippet": hit.snippet,
+            "score": hit.score,
         }
-        for conv in conversations
+        for hit in page.hits
     ]
 
 
 @router.get("/messages")
 async def search_messages(
     q: str,
+    response: Response,
     conversation_id: Optional[str] = None,
-    db: AsyncSession = Depends(get_db),
+    limit: int = Query(default=50, ge=1, le=100),
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(get_read_db),
 ) -> list[dict]:
     """Search messages by content."""
     if not q or len(q.strip()) < 2:
         return []
 
-    query = (
-        select(Message)
-        .where(Message.content.ilike(f"%{q}%"))
-        .order_by(Message.created_at.desc())
-        .limit(50)
+    page = await search_service.search_messages(
+        db, q, conversation_id=conversation_id, limit=limit, cursor=cursor
     )
-
-    if conversation_id:
-        query = query.where(Message.conversation_id == conversation_id)
-
-    result = await db.execute(query)
-    messages = result.scalars().all()
+    _set_next_cursor(response, page)
 
     return [
         {
-            "id": msg.id,
-            "conversation_id": msg.conversation_id,
-            "content": msg.content[:200] + "..." if msg.content and len(msg.content) > 200 else msg.content,
-            "role": msg.role,
-            "created_at": msg.created_at.isoformat() if msg.created_at else None,
+            "id": hit.item.id,
+            "conversation_id": hit.item.conversation_id,
+            "content": _preview(hit.item.content),
+            "role": hit.item.role,
+            "created_at": hit.item.created_at.isoformat() if hit.item.created_at else None,
+            "snippet": hit.snippet,
+            "score": hit.score,
         }
-        for msg in messages
+        for hit in page.hits
     ]
 
 
 @router.get("/files")
 async def search_files(
     q: str,
+    response: Response,
     project_id: Optional[str] = None,
-    db: AsyncSession = Depends(get_db),
+    limit: int = Query(default=20, ge=1, le=100),
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(get_read_db),
 ) -> list[dict]:
     """Search files in project knowledge base."""
     if not q or len(q.strip()) < 2:
         return []
 
     # Search in filename and extracted content
-    query = (
-        select(ProjectFile)
-        .where(
-            or_(
-                ProjectFile.filename.ilike(f"%{q}%"),
-                ProjectFile.content.ilike(f"%{q}%"),
-            )
-        )
-        .where(ProjectFile.is_deleted == False)
-        .order_by(ProjectFile.updated_at.desc())
-        .limit(20)
+    page = await search_service.search_files(
+        db, q, project_id=project_id, limit=limit, cursor=cursor
     )
-
-    if project_id:
-        query = query.where(ProjectFile.project_id == project_id)
-
-    result = await db.execute(query)
-    files = result.scalars().all()
+    _set_next_cursor(response, page)
 
     return [
         {
-            "id": f.id,
-            "filename": f.filename,
-            "project_id": f.project_id,
-            "file_size": f.file_size,
-            "content_type": f.content_type,
-            "content_preview": f.content[:200] + "..." if f.content and len(f.content) > 200 else f.content,
-            "created_at": f.created_at.isoformat() if f.created_at else None,
+            "id": hit.item.id,
+            "filename": hit.item.filename,
+            "project_id": hit.item.project_id,
+            "file_size": hit.item.file_size,
+            "content_type": hit.item.content_type,
+            "content_preview": _preview(hit.item.content),
+            "created_at": hit.item.created_at.isoformat() if hit.item.created_at else None,
+            "snippet": hit.snippet,
+            "score": hit.score,
         }
-        for f in files
+        for hit in page.hits
     ]
 
 
@@ -140,60 +130,45 @@ async def search_files(
 async def search_knowledge_base(
     q: str,
     project_id: Optional[str] = None,
-    db: AsyncSession = Depends(get_db),
+    limit: int = Query(default=20, ge=1, le=100),
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(get_read_db),
 ) -> dict:
     """Search project knowledge base (files, documents, and extracted content)."""
     if not q or len(q.strip()) < 2:
         return {"files": [], "total": 0}
 
-    # Search in project files
-    files_query = (
-        select(ProjectFile)
-        .where(
-            or_(
-                ProjectFile.filename.ilike(f"%{q}%"),
-                ProjectFile.content.ilike(f"%{q}%"),
-            )
-        )
-        .where(ProjectFile.is_deleted == False)
+    total = await search_service.count_files(db, q, project_id=project_id)
+    page = await search_service.search_files(
+        db, q, project_id=project_id, limit=limit, cursor=cursor
     )
 
-    if project_id:
-        files_query = files_query.where(ProjectFile.project_id == project_id)
-
-    # Get total count
-    count_query = select(func.count()).select_from(files_query.subquery())
-    total_result = await db.execute(count_query)
-    total = total_result.scalar() or 0
-
-    # Get paginated results
-    files_query = files_query.order_by(ProjectFile.updated_at.desc()).limit(20)
-    files_result = await db.execute(files_query)
-    files = files_result.scalars().all()
-
     return {
         "files": [
             {
-                "id": f.id,
-                "filename": f.filename,
-                "project_id": f.project_id,
-                "file_size": f.file_size,
-                "content_type": f.content_type,
-                "content_preview": f.content[:300] + "..." if f.content and len(f.content) > 300 else f.content,
-                "created_at": f.created_at.isoformat() if f.created_at else None,
-                "updated_at": f.updated_at.isoformat() if f.updated_at else None,
+                "id": hit.item.id,
+                "filename": hit.item.filename,
+                "project_id": hit.item.project_id,
+                "file_size": hit.item.file_size,
+                "content_type": hit.item.content_type,
+                "content_preview": _preview(hit.item.content, 300),
+                "created_at": hit.item.created_at.isoformat() if hit.item.created_at else None,
+                "updated_at": hit.item.updated_at.isoformat() if hit.item.updated_at else None,
+                "snippet": hit.snippet,
+                "score": hit.score,
             }
-            for f in files
+            for hit in page.hits
         ],
         "total": total,
         "query": q,
+        "next_cursor": page.next_cursor,
     }
 
 
 @router.get("/global")
 async def global_search(
     q: str,
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
 ) -> dict:
     """Search across all content types."""
     if not q or len(q.strip()) < 2:
@@ -204,82 +179,50 @@ async def global_search(
             "memories": [],
         }
 
-    # Search conversations
-    conv_result = await db.execute(
-        select(Conversation)
-        .where(Conversation.title.ilike(f"%{q}%"))
-        .where(Conversation.is_deleted == False)
-        .limit(10)
-    )
-    conversations = conv_result.scalars().all()
-
-    # Search messages
-    msg_result = await db.execute(
-        select(Message)
-        .where(Message.content.ilike(f"%{q}%"))
-        .order_by(Message.created_at.desc())
-        .limit(10)
-    )
-    messages = msg_result.scalars().all()
-
-    # Search files
-    file_result = await db.execute(
-        select(ProjectFile)
-        .where(
-            or_(
-                ProjectFile.filename.ilike(f"%{q}%"),
-                ProjectFile.content.ilike(f"%{q}%"),
-            )
-        )
-        .where(ProjectFile.is_deleted == False)
-        .limit(10)
-    )
-    files = file_result.scalars().all()
-
-    # Search memories
-    mem_result = await db.execute(
-        select(Memory)
-        .where(Memory.content.ilike(f"%{q}%"))
-        .where(Memory.is_active == True)
-        .limit(10)
-    )
-    memories = mem_result.scalars().all()
+    conversations = await search_service.search_conversations(db, q, limit=10)
+    messages = await search_service.search_messages(db, q, limit=10)
+    files = await search_service.search_files(db, q, limit=10)
+    memories = await search_service.search_memories(db, q, limit=10)
 
     return {
         "conversations": [
             {
-                "id": c.id,
-                "title": c.title,
-                "project_id": c.project_id,
-                "updated_at": c.updated_at.isoformat() if c.updated_at else None,
+                "id": hit.item.id,
+                "title": hit.item.title,
+                "project_id": hit.item.project_id,
+                "updated_at": hit.item.updated_at.isoformat() if hit.item.updated_at else None,
+                "snippet": hit.snippet,
             }
-            for c in conversations
+            for hit in conversations.hits
         ],
         "messages": [
             {
-                "id": m.id,
-                "conversation_id": m.conversation_id,
-                "content": m.content[:200] + "..." if m.content and len(m.content) > 200 else m.content,
-                "role": m.role,
-                "created_at": m.created_at.isoformat() if m.created_at else None,
+                "id": hit.item.id,
+                "conversation_id": hit.item.conversation_id,
+                "content": _preview(hit.item.content),
+                "role": hit.item.role,
+                "created_at": hit.item.created_at.isoformat() if hit.item.created_at else None,
+                "snippet": hit.snippet,
             }
-            for m in messages
+            for hit in messages.hits
         ],
         "files": [
             {
-                "id": f.id,
-                "filename": f.filename,
-                "project_id": f.project_id,
-                "content_preview": f.content[:200] + "..." if f.content and len(f.content) > 200 else f.content,
+                "id": hit.item.id,
+                "filename": hit.item.filename,
+                "project_id": hit.item.project_id,
+                "content_preview": _preview(hit.item.content),
+                "snippet": hit.snippet,
             }
-            for f in files
+            for hit in files.hits
         ],
         "memories": [
             {
-                "id": m.id,
-                "content": m.content[:200] + "..." if m.content and len(m.content) > 200 else m.content,
-                "category": m.category,
+                "id": hit.item.id,
+                "content": _preview(hit.item.content),
+                "category": hit.item.category,
+                "snippet": hit.snippet,
             }
-            for m in memories
+            for hit in memories.hits
         ],
     }
@@ -11,6 +11,7 @@ from sqlalchemy import select, func, delete
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from src.core.database import get_db
+from src.core.state_store import state_namespace
 from src.models.conversation import Conversation
 from src.models.project import Project
 from src.models.message import Message
@@ -21,6 +22,7 @@ from src.models.checkpoint import Checkpoint
 from src.models.audit_log import AuditActionType, AuditAction
 from src.utils.audit import log_audit, get_request_info
 from src.core.config import settings
+from src.services.export_store import export_store
 
 router = APIRouter()
 
@@ -55,8 +57,8 @@ class CustomInstructionsUpdate(BaseModel):
     instructions: str
 
 
-# In-memory settings storage
-user_settings: dict = {
+# Default settings, stored in the shared state store on first use
+DEFAULT_SETTINGS: dict = {
     "theme": "auto",
     "font_size": 16,
     "font_family": "system-ui",
@@ -78,68 +80,75 @@ user_settings: dict = {
     "relative_time": True,
 }
 
+# Settings are never expired or evicted. Defaults are only inserted where a
+# setting is missing, on first read, so a worker starting up never resets
+# saved settings and importing this module never opens the store.
+user_settings = state_namespace("user_settings", max_entries=0, defaults=DEFAULT_SETTINGS)
+
 
 @router.get("")
 async def get_settings() -> dict:
     """Get current user settings."""
-    return user_settings
+    return await user_settings.acopy()
 
 
 @router.put("")
 async def update_settings(data: SettingsUpdate) -> dict:
     """Update user settings."""
+    changes: dict = {}
     if data.theme is not None:
-        user_settings["theme"] = data.theme
+        changes["theme"] = data.theme
     if data.font_size is not None:
-        user_settings["font_size"] = data.font_size
+        changes["font_size"] = data.font_size
     if data.font_family is not None:
-        user_settings["font_family"] = data.font_family
+        changes["font_family"] = data.font_family
     if data.message_density is not None:
-        user_settings["message_density"] = data.message_density
+        changes["message_density"] = data.message_density
     if data.code_theme is not None:
-        user_settings["code_theme"] = data.code_theme
+        changes["code_theme"] = data.code_theme
     if data.permission_mode is not None:
-        user_settings["permission_mode"] = data.permission_mode
+        changes["permission_mode"] = data.permission_mode
     if data.custom_instructions is not None:
-        user_settings["custom_instructions"] = data.custom_instructions
+        changes["custom_instructions"] = data.custom_instructions
     if data.system_prompt_override is not None:
-        user_settings["system_prompt_override"] = data.system_prompt_override
+        changes["system_prompt_override"] = data.system_prompt_override
     if data.temperature is not None:
-        user_settings["temperature"] = data.temperature
+        changes["temperature"] = data.temperature
     if data.max_tokens is not None:
-        user_settings["max_tokens"] = data.max_tokens
+        changes["max_tokens"] = data.max_tokens
     if data.extended_thinking_enabled is not None:
-        user_settings["extended_thinking_enabled"] = data.extended_thinking_enabled
+        changes["extended_thinking_enabled"] = data.extended_thinking_enabled
     if data.memory_enabled is not None:
-        user_settings["memory_enabled"] = data.memory_enabled
+        changes["memory_enabled"] = data.memory_enabled
     if data.color_blind_mode is not None:
-        user_settings["color_blind_mode"] = data.color_blind_mode
+        changes["color_blind_mode"] = data.color_blind_mode
     if data.content_filter_level is not None:
-        user_settings["content_filter_level"] = data.content_filter_level
+        changes["content_filter_level"] = data.content_filter_level
     if data.content_filter_categories is not None:
-        user_settings["content_filter_categories"] = data.content_filter_categories
+        changes["content_filter_categories"] = data.content_filter_categories
     if data.locale is not None:
-        user_settings["locale"] = data.locale
+        changes["locale"] = data.locale
     if data.time_format is not None:
-        user_settings["time_format"] = data.time_format
+        changes["time_format"] = data.time_format
     if data.date_format is not None:
-        user_settings["date_format"] = data.date_format
+        changes["date_format"] = data.date_format
     if data.relative_time is not None:
-        user_settings["relative_time"] = data.relative_time
+        changes["relative_time"] = data.relative_time
 
-    return user_settings
+    await user_settings.aupdate(changes)
+    return await user_settings.acopy()
 
 
 @router.get("/custom-instructions")
 async def get_custom_instructions() -> dict:
     """Get custom instructions."""
-    return {"instructions": user_settings.get("custom_instructions", "")}
+    return {"instructions": await user_settings.aget("custom_instructions", "")}
 
 
 @router.put("/custom-instructions")
 async def update_custom_instructions(data: CustomInstructionsUpdate) -> dict:
     """Update custom instructions."""
-    user_settings["custom_instructions"] = data.instructions
+    await user_settings.aset("custom_instructions", data.instructions)
     return {"instructions": data.instructions}
 
 
@@ -152,7 +161,7 @@ class SystemPromptUpdate(BaseModel):
 @router.get("/system-prompt")
 async def get_system_prompt() -> dict:
     """Get system prompt override."""
-    return {"prompt": user_settings.get("system_prompt_override", "")}
+    return {"prompt": await user_settings.aget("system_prompt_override", "")}
 
 
 # API Key Management
@@ -221,8 +230,10 @@ async def save_api_key(data: APIKeyRequest) -> dict:
         # 3. Update the settings to use the new key
 
         # For now, we'll simulate saving by updating user_settings
-        user_settings["api_key_saved"] = True
-        user_settings["api_key_preview"] = validation_result.key_preview
+        await user_settings.aupdate({
+            "api_key_saved": True,
+            "api_key_preview": validation_result.key_preview,
+        })
 
         return {
             "message": "API key saved successfully",
@@ -241,8 +252,8 @@ async def get_api_key_status() -> dict:
 
     return {
         "configured": current_key is not None and len(current_key) > 0,
-        "has_saved_key": user_settings.get("api_key_saved", False),
-        "key_preview": user_settings.get("api_key_preview", "No key saved"),
+        "has_saved_key": await user_settings.aget("api_key_saved", False),
+        "key_preview": await user_settings.aget("api_key_preview", "No key saved"),
         "message": "Check your API key configuration"
     }
 
@@ -252,8 +263,7 @@ async def remove_api_key() -> dict:
     """Remove saved API key."""
     try:
         # In a real implementation, this would remove the key from secure storage
-        user_settings["api_key_saved"] = False
-        user_settings["api_key_preview"] = "No key saved"
+        await user_settings.aupdate({"api_key_saved": False, "api_key_preview": "No key saved"})
 
         return {"message": "API key removed successfully"}
     except Exception as e:
@@ -263,7 +273,7 @@ async def remove_api_key() -> dict:
 @router.put("/system-prompt")
 async def update_system_prompt(data: SystemPromptUpdate) -> dict:
     """Update system prompt override."""
-    user_settings["system_prompt_override"] = data.prompt
+    await user_settings.aset("system_prompt_override", data.prompt)
     return {"prompt": data.prompt}
 
 
@@ -274,7 +284,7 @@ async def update_permission_mode(mode: str) -> dict:
     if mode not in valid_modes:
         return {"error": f"Invalid mode. Must be one of: {valid_modes}"}
 
-    user_settings["permission_mode"] = mode
+    await user_settings.aset("permission_mode", mode)
     return {"permission_mode": mode}
 
 
@@ -317,7 +327,7 @@ async def get_effective_custom_instructions(
     Returns both project and global instructions.
     Project instructions override global instructions if both exist.
     """
-    global_instructions = user_settings.get("custom_instructions", "")
+    global_instructions = await user_settings.aget("custom_instructions", "")
     project_instructions = ""
 
     if conversation_id:
@@ -364,8 +374,7 @@ async def refresh_session() -> dict:
     import time
 
     # Update last activity in user settings
-    user_settings["last_activity"] = time.time()
-    user_settings["session_refreshed_at"] = time.time()
+    await user_settings.aupdate({"last_activity": time.time(), "session_refreshed_at": time.time()})
 
     return {
         "status": "success",
@@ -384,8 +393,8 @@ async def get_session_status() -> dict:
     """
     import time
 
-    last_activity = user_settings.get("last_activity", time.time())
-    timeout_minutes = user_settings.get("session_timeout_minutes", 30)
+    last_activity = await user_settings.aget("last_activity", time.time())
+    timeout_minutes = await user_settings.aget("session_timeout_minutes", 30)
 
     return {
         "session_active": True,
@@ -393,7 +402,7 @@ async def get_session_status() -> dict:
         "timeout_minutes": timeout_minutes,
         "settings": {
             "timeout_duration": timeout_minutes,
-            "warning_duration": user_settings.get("session_warning_minutes", 5)
+            "warning_duration": await user_settings.aget("session_warning_minutes", 5)
         }
     }
 
@@ -569,7 +578,7 @@ async def export_all_user_data(
                 }
                 for p in projects
             ],
-            "settings": user_settings.copy(),
+            "settings": await user_settings.acopy(),
         },
     }
 
@@ -587,7 +596,7 @@ async def export_all_user_data(
     )
 
     json_str = json.dumps(export_data, indent=2, ensure_ascii=False)
-    filename = f"user_data_export_{datetime.utcnow().strftime('%Y%m%d_%H%M%S')}.json"
+    filename = export_store.filename("json", prefix="user_data_export")
 
     return Response(
         content=json_str,
@@ -11,6 +11,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 
 from src.core.database import get_db
 from src.models import Conversation as ConversationModel, SharedConversation as SharedConversationModel, Message as MessageModel
+from src.services import message_history
 
 router = APIRouter()
 
@@ -136,9 +137,8 @@ async def view_shared_conversation(
     messages = []
     if shared.access_level in ["read", "comment", "edit"]:
         result = await db.execute(
-            select(MessageModel)
-            .where(MessageModel.conversation_id == shared.conversation_id)
-            .order_by(MessageModel.created_at)
+            message_history.visible_messages(shared.conversation_id)
+            .order_by(MessageModel.created_at, MessageModel.id)
         )
         messages_result = result.scalars().all()
 
@@ -5,7 +5,7 @@ from typing import Optional
 from uuid import UUID
 from datetime import datetime
 
-from fastapi import APIRouter, HTTPException, status, Depends, Request
+from fastapi import APIRouter, HTTPException, status, Depends, Request, Query, Response
 from pydantic import BaseModel, Field
 from sqlalchemy import select, delete, func, distinct
 from sqlalchemy.ext.asyncio import AsyncSession
@@ -14,6 +14,7 @@ from src.core.database import get_db
 from src.models import Tag, Conversation, conversation_tags
 from src.utils.audit import log_audit, get_request_info
 from src.models.audit_log import AuditActionType as AuditAction
+from src.utils.pagination import SortKey, paginate, set_page_headers
 
 router = APIRouter()
 
@@ -38,13 +39,29 @@ class ConversationTagUpdate(BaseModel):
     tag_ids: list[str]
 
 
+# Oldest first, the order tags were created in
+TAG_ORDER = (SortKey(Tag.created_at), SortKey(Tag.id))
+
+
 @router.get("")
 async def list_tags(
+    response: Response,
+    limit: Optional[int] = Query(None, ge=1, le=500, description="Page size; omit to list everything"),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor or X-Prev-Cursor of a previous page"),
+    include_total: bool = Query(False, description="Return the number of matches in X-Total-Count"),
     db: AsyncSession = Depends(get_db),
 ) -> list[dict]:
-    """List all available tags."""
-    result = await db.execute(select(Tag).where(Tag.is_deleted == False))
-    tags = result.scalars().all()
+    """List all available tags.
+
+    Keyset paginated when ``limit`` is given: follow the
+    ``X-Next-Cursor``/``X-Prev-Cursor`` headers.
+    """
+    page = await paginate(
+        db, select(Tag).where(Tag.is_deleted == False), TAG_ORDER,
+        limit=limit, cursor=cursor, include_total=include_total,
+    )
+    set_page_headers(response, page)
+    tags = page.items
 
     return [
         {
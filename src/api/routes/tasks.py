@@ -8,12 +8,13 @@ import json
 from typing import Optional
 from uuid import UUID, uuid4
 
-from fastapi import APIRouter, HTTPException, Request, Depends
+from fastapi import APIRouter, HTTPException, Request, Depends, Query
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, desc
+from sqlalchemy import select
 
 from src.core.database import get_db
 from src.models.background_task import BackgroundTask, TaskStatus
+from src.utils.pagination import SortKey, paginate
 from sse_starlette.sse import EventSourceResponse
 
 router = APIRouter()
@@ -28,24 +29,34 @@ class TaskCreateRequest:
     pass
 
 
+TASK_ORDER = (
+    SortKey(BackgroundTask.created_at, descending=True),
+    SortKey(BackgroundTask.id, descending=True),
+)
+
+
 @router.get("")
 async def list_tasks(
     db: AsyncSession = Depends(get_db),
     status: Optional[str] = None,
-    limit: int = 50,
-    offset: int = 0
+    limit: int = Query(50, ge=1, le=500),
+    cursor: Optional[str] = None,
+    include_total: bool = False,
+    offset: int = Query(0, ge=0),
 ) -> dict:
-    """List background tasks.
+    """List background tasks, newest first.
 
     Query parameters:
     - status: Filter by status (pending, running, completed, failed, cancelled)
     - limit: Maximum number of tasks to return (default: 50)
-    - offset: Number of tasks to skip (default: 0)
+    - cursor: next_cursor or prev_cursor of a previous page
+    - include_total: Count every matching task into "total"
+    - offset: Deprecated, use cursor
 
     Returns:
-        List of background tasks
+        A page of background tasks plus the cursors around it
     """
-    query = select(BackgroundTask).order_by(desc(BackgroundTask.created_at))
+    query = select(BackgroundTask)
 
     if status:
         try:
@@ -54,15 +65,17 @@ async def list_tasks(
         except ValueError:
             raise HTTPException(status_code=400, detail=f"Invalid status: {status}")
 
-    query = query.limit(limit).offset(offset)
-    result = await db.execute(query)
-    tasks = result.scalars().all()
+    page = await paginate(
+        db, query, TASK_ORDER, limit=limit, cursor=cursor,
+        include_total=include_total, offset=offset,
+    )
 
     return {
-        "tasks": [task.to_dict() for task in tasks],
-        "total": len(tasks),
+        "tasks": [task.to_dict() for task in page.items],
+        "total": page.total if page.total is not None else len(page.items),
         "limit": limit,
         "offset": offset,
+        **page.cursors(),
     }
 
 
@@ -171,6 +184,9 @@ async def stream_task_updates(
 ) -> EventSourceResponse:
     """Stream task progress updates via Server-Sent Events.
 
+    Tasks are updated by workers on their own sessions (see ``batch_jobs``),
+    so each poll reloads the row and ends its read transaction.
+
     Returns:
         SSE stream of task updates
     """
@@ -181,9 +197,13 @@ async def stream_task_updates(
         while True:
             # Fetch current task state from database
             result = await db.execute(
-                select(BackgroundTask).where(BackgroundTask.id == task_id)
+                select(BackgroundTask)
+                .where(BackgroundTask.id == task_id)
+                .execution_options(populate_existing=True)
             )
             task = result.scalar_one_or_none()
+            # Don't hold a snapshot of the database between polls
+            await db.commit()
 
             if not task:
                 yield {
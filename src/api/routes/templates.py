@@ -4,7 +4,7 @@ import json
 from typing import Optional
 from uuid import UUID
 
-from fastapi import APIRouter, HTTPException, status, Depends, Request
+from fastapi import APIRouter, HTTPException, status, Depends, Request, Query, Response
 from pydantic import BaseModel, Field
 from sqlalchemy import select, func
 from sqlalchemy.ext.asyncio import AsyncSession
@@ -13,6 +13,7 @@ from src.core.database import get_db
 from src.models import Template as TemplateModel
 from src.utils.audit import log_audit, get_request_info
 from src.models.audit_log import AuditActionType as AuditAction
+from src.utils.pagination import SortKey, paginate, set_page_headers
 
 router = APIRouter()
 
@@ -61,16 +62,30 @@ class TemplateResponse(BaseModel):
     updated_at: str
 
 
+# Most used first, then most recent
+TEMPLATE_ORDER = (
+    SortKey(TemplateModel.usage_count, descending=True),
+    SortKey(TemplateModel.created_at, descending=True),
+    SortKey(TemplateModel.id, descending=True),
+)
+
+
 @router.get("", response_model=list[TemplateResponse])
 async def list_templates(
+    response: Response,
     category: Optional[str] = None,
     is_active: bool = True,
     include_builtin: bool = True,
-    limit: int = 50,
-    offset: int = 0,
+    limit: int = Query(50, ge=1, le=500),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor or X-Prev-Cursor of a previous page"),
+    include_total: bool = Query(False, description="Return the number of matches in X-Total-Count"),
+    offset: int = Query(0, ge=0, description="Deprecated, use cursor"),
     db: AsyncSession = Depends(get_db),
 ) -> list[dict]:
-    """List all templates."""
+    """List all templates.
+
+    Keyset paginated: follow the ``X-Next-Cursor``/``X-Prev-Cursor`` headers.
+    """
     query = select(TemplateModel)
 
     if is_active:
@@ -82,13 +97,13 @@ async def list_templates(
     if category:
         query = query.where(TemplateModel.category == category)
 
-    query = query.order_by(TemplateModel.usage_count.desc(), TemplateModel.created_at.desc())
-    query = query.offset(offset).limit(limit)
-
-    result = await db.execute(query)
-    templates = result.scalars().all()
+    page = await paginate(
+        db, query, TEMPLATE_ORDER, limit=limit, cursor=cursor,
+        include_total=include_total, offset=offset,
+    )
+    set_page_headers(response, page)
 
-    return [template.to_dict() for template in templates]
+    return [template.to_dict() for template in page.items]
 
 
 @router.get("/categories")
@@ -325,9 +340,9 @@ async def create_template_from_conversation(
 
     # Get the first message as the initial message
     from src.models import Message
+    from src.services.message_history import visible_messages
     msg_result = await db.execute(
-        select(Message)
-        .where(Message.conversation_id == conversation_id)
+        visible_messages(conversation_id)
         .where(Message.role == "user")
         .order_by(Message.created_at.asc())
         .limit(1)
@@ -1,91 +1,154 @@
-"""Usage tracking endpoints."""
+"""Usage tracking endpoints.
 
-from fastapi import APIRouter
+All figures come from the daily/monthly usage rollups (see
+``src.services.usage_service``).
+"""
+
+from datetime import date, datetime
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.core.database import get_db
+from src.services.usage_service import (
+    TOKEN_COLUMNS,
+    TOKENS_PER_PRICE_UNIT,
+    day_period,
+    days_ago,
+    get_model_price,
+    month_period,
+    usage_service,
+)
 
 router = APIRouter()
 
 
+def _tokens(usage: dict) -> dict:
+    return {
+        "total_tokens": usage["total_tokens"],
+        **{column: usage[column] for column in TOKEN_COLUMNS},
+    }
+
+
 @router.get("/daily")
-async def get_daily_usage() -> dict:
+async def get_daily_usage(
+    day: Optional[date] = Query(None, alias="date", description="Day to report, defaults to today (UTC)"),
+    db: AsyncSession = Depends(get_db),
+) -> dict:
     """Get daily usage statistics."""
+    period = day_period(day or datetime.utcnow().date())
+    usage = await usage_service.totals(db, "day", start=period, end=period)
     return {
-        "date": "2025-01-01",
-        "total_tokens": 0,
-        "input_tokens": 0,
-        "output_tokens": 0,
-        "cache_read_tokens": 0,
-        "cache_write_tokens": 0,
-        "conversations": 0,
-        "messages": 0,
-        "estimated_cost": 0.0,
+        "date": period,
+        **_tokens(usage),
+        "conversations": usage["conversations"],
+        "messages": usage["requests"],
+        "estimated_cost": usage["estimated_cost"],
     }
 
 
 @router.get("/monthly")
-async def get_monthly_usage() -> dict:
+async def get_monthly_usage(
+    month: Optional[str] = Query(None, pattern=r"^\d{4}-\d{2}$", description="YYYY-MM, defaults to this month"),
+    db: AsyncSession = Depends(get_db),
+) -> dict:
     """Get monthly usage statistics."""
+    period = month or month_period(datetime.utcnow().date())
+    usage = await usage_service.totals(db, "month", start=period, end=period)
+    daily = await usage_service.series(db, "day", start=f"{period}-01", end=f"{period}-31")
     return {
-        "month": "2025-01",
-        "total_tokens": 0,
-        "input_tokens": 0,
-        "output_tokens": 0,
-        "cache_read_tokens": 0,
-        "cache_write_tokens": 0,
-        "conversations": 0,
-        "messages": 0,
-        "estimated_cost": 0.0,
-        "daily_breakdown": [],
+        "month": period,
+        **_tokens(usage),
+        "conversations": usage["conversations"],
+        "messages": usage["requests"],
+        "estimated_cost": usage["estimated_cost"],
+        "daily_breakdown": [
+            {
+                "date": row["period"],
+                "total_tokens": row["total_tokens"],
+                "input_tokens": row["input_tokens"],
+                "output_tokens": row["output_tokens"],
+                "messages": row["requests"],
+                "estimated_cost": row["estimated_cost"],
+            }
+            for row in daily
+        ],
     }
 
 
 @router.get("/by-model")
-async def get_usage_by_model() -> list[dict]:
+async def get_usage_by_model(
+    days: int = Query(30, ge=1, le=3660),
+    db: AsyncSession = Depends(get_db),
+) -> list[dict]:
     """Get usage breakdown by model."""
+    start, end = days_ago(days)
     return [
         {
-            "model": "claude-sonnet-4-5-20250929",
-            "total_tokens": 0,
-            "input_tokens": 0,
-            "output_tokens": 0,
-            "messages": 0,
-            "estimated_cost": 0.0,
+            "model": row["model"],
+            **_tokens(row),
+            "messages": row["requests"],
+            "estimated_cost": row["estimated_cost"],
         }
+        for row in await usage_service.by_model(db, "day", start=start, end=end)
     ]
 
 
 @router.get("/cache-stats")
-async def get_cache_stats() -> dict:
-    """Get prompt caching statistics."""
+async def get_cache_stats(
+    days: int = Query(30, ge=1, le=3660),
+    db: AsyncSession = Depends(get_db),
+) -> dict:
+    """Get prompt caching statistics.
+
+    Counted in prompt tokens: hits are tokens read from the cache, misses are
+    tokens sent uncached or written to the cache.
+    """
+    start, end = days_ago(days)
+    hits = misses = 0
+    cost_saved = 0.0
+    for row in await usage_service.by_model(db, "day", start=start, end=end):
+        price = get_model_price(row["model"])
+        hits += row["cache_read_tokens"]
+        misses += row["input_tokens"] + row["cache_write_tokens"]
+        cost_saved += row["cache_read_tokens"] * (price.input - price.cache_read_price)
+    prompt_tokens = hits + misses
     return {
-        "cache_hits": 0,
-        "cache_misses": 0,
-        "hit_rate": 0.0,
-        "tokens_saved": 0,
-        "cost_saved": 0.0,
+        "cache_hits": hits,
+        "cache_misses": misses,
+        "hit_rate": round(hits / prompt_tokens, 4) if prompt_tokens else 0.0,
+        "tokens_saved": hits,
+        "cost_saved": round(cost_saved / TOKENS_PER_PRICE_UNIT, 6),
     }
 
 
 @router.get("/conversations/{conversation_id}")
-async def get_conversation_usage(conversation_id: str) -> dict:
+async def get_conversation_usage(
+    conversation_id: str,
+    db: AsyncSession = Depends(get_db),
+) -> dict:
     """Get usage for a specific conversation."""
+    usage = await usage_service.totals(db, "month", conversation_id=conversation_id)
     return {
         "conversation_id": conversation_id,
-        "total_tokens": 0,
-        "input_tokens": 0,
-        "output_tokens": 0,
-        "messages": 0,
-        "estimated_cost": 0.0,
+        **_tokens(usage),
+        "messages": usage["requests"],
+        "estimated_cost": usage["estimated_cost"],
     }
 
 
 @router.get("/export")
-async def export_usage() -> dict:
+async def export_usage(db: AsyncSession = Depends(get_db)) -> dict:
     """Export usage data."""
+    daily = await usage_service.series(db, "day")
+    monthly = await usage_service.series(db, "month")
+    by_model = await usage_service.by_model(db, "month")
     return {
         "format": "json",
         "data": {
-            "daily": [],
-            "monthly": [],
-            "by_model": [],
+            "daily": [{"date": row.pop("period"), **row} for row in daily],
+            "monthly": [{"month": row.pop("period"), **row} for row in monthly],
+            "by_model": by_model,
         },
     }
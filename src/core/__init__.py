@@ -1,6 +1,6 @@
 """Core configuration and utilities."""
 
 from src.core.config import settings
-from src.core.database import get_db, init_db
+from src.core.database import get_db, get_read_db, init_db
 
-__all__ = ["settings", "get_db", "init_db"]
+__all__ = ["settings", "get_db", "get_read_db", "init_db"]
@@ -0,0 +1,121 @@
+"""Persistent LangGraph checkpointer and store for agent threads.
+
+Thread checkpoints and ``/memories/`` content live in a SQLite file next to
+the app database rather than in process memory. That way they survive
+restarts, and every uvicorn worker sees the same state. Connections are put
+in WAL mode with the pragmas from ``src.core.database``. With
+``synchronous=NORMAL``, each checkpoint commit goes to the WAL without an
+fsync, and SQLite writes the WAL back in batches.
+
+Old checkpoints are compacted periodically. Only the newest
+``checkpoint_keep_last`` checkpoints per thread and namespace are kept,
+together with their pending writes.
+"""
+
+import asyncio
+from pathlib import Path
+from typing import Optional
+
+import aiosqlite
+from langgraph.checkpoint.sqlite.aio import AsyncSqliteSaver
+from langgraph.store.sqlite.aio import AsyncSqliteStore
+
+from src.core.config import Settings, settings
+from src.core.database import sqlite_pragmas
+
+# checkpoint_id values are uuid6, so they sort in creation order
+COMPACT_CHECKPOINTS_SQL = """
+DELETE FROM checkpoints WHERE rowid IN (
+    SELECT rowid FROM (
+        SELECT rowid, ROW_NUMBER() OVER (
+            PARTITION BY thread_id, checkpoint_ns
+            ORDER BY checkpoint_id DESC
+        ) AS position
+        FROM checkpoints
+    )
+    WHERE position > ?
+)
+"""
+
+COMPACT_WRITES_SQL = """
+DELETE FROM writes WHERE NOT EXISTS (
+    SELECT 1 FROM checkpoints c
+    WHERE c.thread_id = writes.thread_id
+      AND c.checkpoint_ns = writes.checkpoint_ns
+      AND c.checkpoint_id = writes.checkpoint_id
+)
+"""
+
+
+async def connect(path: str, config: Settings = settings) -> aiosqlite.Connection:
+    """Open a tuned connection to the agent state database."""
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+    conn = await aiosqlite.connect(path)
+    await conn.execute(f"PRAGMA journal_mode = {config.sqlite_journal_mode}")
+    for pragma in sqlite_pragmas(config):
+        await conn.execute(pragma)
+    return conn
+
+
+class AgentStatePersistence:
+    """Owns the SQLite checkpointer and store for the lifetime of the app."""
+
+    def __init__(self, path: str, keep_last: int, config: Settings = settings):
+        self.path = path
+        self.keep_last = max(1, keep_last)
+        self.config = config
+        self.checkpointer: Optional[AsyncSqliteSaver] = None
+        self.store: Optional[AsyncSqliteStore] = None
+        self._connections: list[aiosqlite.Connection] = []
+
+    async def open(self) -> tuple[AsyncSqliteSaver, AsyncSqliteStore]:
+        """Open the connections and create the LangGraph tables if needed."""
+        # Separate connections so checkpoint and store transactions never interleave
+        checkpoint_conn = await connect(self.path, self.config)
+        store_conn = await connect(self.path, self.config)
+        self._connections = [checkpoint_conn, store_conn]
+
+        self.checkpointer = AsyncSqliteSaver(checkpoint_conn)
+        await self.checkpointer.setup()
+        self.store = AsyncSqliteStore(store_conn)
+        await self.store.setup()
+        # The store's setup leaves its migrations uncommitted, which would hold
+        # the write lock and block every checkpoint write
+        await store_conn.commit()
+        return self.checkpointer, self.store
+
+    async def compact(self) -> int:
+        """Delete all but the newest checkpoints of every thread.
+
+        Returns the number of checkpoints removed. Safe to run from several
+        workers at once; the statements are idempotent.
+        """
+        if self.checkpointer is None:
+            return 0
+        conn = self.checkpointer.conn
+        async with self.checkpointer.lock:
+            cursor = await conn.execute(COMPACT_CHECKPOINTS_SQL, (self.keep_last,))
+            removed = cursor.rowcount
+            await conn.execute(COMPACT_WRITES_SQL)
+            await conn.commit()
+        return removed
+
+    async def run_compaction(self, interval_seconds: float) -> None:
+        """Compact old checkpoints every ``interval_seconds`` until cancelled."""
+        while True:
+            await asyncio.sleep(interval_seconds)
+            try:
+                removed = await self.compact()
+                if removed:
+                    print(f"Compacted {removed} old agent checkpoints")
+            except Exception as e:
+                # Compaction is housekeeping, never take the app down for it
+                print(f"Agent checkpoint compaction failed: {e}")
+
+    async def close(self) -> None:
+        """Close the underlying connections."""
+        for conn in self._connections:
+            await conn.close()
+        self._connections = []
+        self.checkpointer = None
+        self.store = None
@@ -21,6 +21,28 @@ class Settings(BaseSettings):
 
     # Database
     database_url: str = "sqlite+aiosqlite:///./data/app.db"
+    # Optional separate URL for read-only sessions (defaults to database_url)
+    database_read_url: Optional[str] = None
+
+    # Connection pools (reader pool defaults to one connection per CPU core)
+    db_pool_size: int = 5
+    db_max_overflow: int = 10
+    db_pool_timeout: float = 30.0
+    db_read_pool_size: Optional[int] = None
+
+    # SQLite pragmas applied to every new connection
+    sqlite_journal_mode: str = "WAL"
+    sqlite_synchronous: str = "NORMAL"
+    sqlite_busy_timeout_ms: int = 5000
+    sqlite_cache_size_kib: int = 64 * 1024
+    sqlite_mmap_size: int = 256 * 1024 * 1024
+    sqlite_temp_store: str = "MEMORY"
+
+    # Shared state (approvals, thread state, sessions, presence, settings):
+    # "memory" is per process, "sqlite" is shared between worker processes
+    state_backend: str = "memory"
+    state_db_path: str = "./data/state.db"
+    state_max_entries: int = 10000
 
     # Security
     secret_key: str = "change-me-in-production"
@@ -31,15 +53,79 @@ class Settings(BaseSettings):
     rate_limit_per_minute: int = 60
     rate_limit_per_hour: int = 1000
     rate_limit_block_duration: int = 60
+    rate_limit_max_clients: int = 10000
+    # "memory" limits per worker, "shared" uses the state store across workers
+    rate_limit_backend: str = "memory"
 
     # Anthropic API
     anthropic_api_key: Optional[str] = None
 
+    # Suggested follow-ups (generated after the stream's done event)
+    followup_model: str = "claude-haiku-4-5-20251001"
+    followup_timeout_seconds: float = 10.0
+
     # DeepAgents Configuration
     deepagents_backend: str = "state"
     deepagents_memory_path: str = "/memories/"
     default_model: str = "claude-sonnet-4-5-20250929"
 
+    # Agent instance cache (least recently used agents are evicted)
+    agent_cache_max_size: int = 32
+    agent_cache_ttl_seconds: float = 3600.0
+
+    # Persistent agent thread state (empty path keeps it in process memory)
+    agent_state_db_path: str = "./data/agent_state.db"
+    checkpoint_keep_last: int = 20
+    checkpoint_compaction_interval_seconds: float = 900.0
+
+    # Rendered project-files / memory context blocks kept between agent turns
+    context_cache_max_entries: int = 256
+
+    # Conversation branch trees kept between requests, one per root
+    branch_graph_cache_max_entries: int = 256
+
+    # Batch operations: ids per set-based UPDATE/INSERT statement
+    batch_chunk_size: int = 1000
+    # Batches naming more than batch_async_threshold conversations run as
+    # background tasks on batch_job_workers workers
+    batch_async_threshold: int = 100
+    batch_job_workers: int = 2
+
+    # Generated export files, kept for download until the retention passes
+    export_dir: str = "./data/exports"
+    export_retention_seconds: float = 24 * 3600.0
+
+    # Project knowledge retrieval: files are chunked on upload, and projects
+    # larger than the token budget only get their most relevant chunks
+    retrieval_chunk_tokens: int = 300
+    retrieval_chunk_overlap_tokens: int = 30
+    retrieval_top_k: int = 8
+    retrieval_token_budget: int = 4000
+
+    # Long-term memory injection: the best-scoring memories for the message,
+    # capped by count and tokens
+    memory_top_k: int = 10
+    memory_token_budget: int = 800
+    memory_recent_candidates: int = 20
+    memory_recency_half_life_days: float = 30.0
+
+    # SSE token coalescing (clients opt in per request with "coalesce")
+    sse_coalesce_default: bool = False
+    sse_coalesce_window_ms: float = 30.0
+    sse_coalesce_max_bytes: int = 1024
+
+    # Agent runs: streamed events are logged so a dropped stream can resume.
+    # Older events spill to disk past run_buffer_max_events.
+    run_buffer_max_events: int = 2000
+    run_spill_dir: str = "./data/runs"
+    run_retention_seconds: float = 900.0
+    run_max_retained: int = 200
+    # Runs execute on run_workers workers; submissions beyond run_queue_size
+    # waiting runs or run_max_per_user active runs per user are rejected.
+    run_workers: int = 4
+    run_queue_size: int = 32
+    run_max_per_user: int = 4
+
     # Feature Flags
     extended_thinking_enabled: bool = True
     mcp_enabled: bool = True
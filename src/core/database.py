@@ -1,11 +1,17 @@
 """Database connection and session management."""
 
-from typing import AsyncGenerator
+import os
+from contextlib import asynccontextmanager
+from typing import Any, AsyncGenerator, AsyncIterator, Optional
 
+from sqlalchemy import event
+from sqlalchemy.engine import Connection, make_url
 from sqlalchemy.orm import DeclarativeBase
-from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
 
-from src.core.config import settings
+from src.core.config import Settings, settings
+from src.core.search_index import register_search_index
+from src.core.usage_rollups import register_usage_rollups
 
 
 # Create Base class directly to avoid circular import
@@ -13,12 +19,81 @@ class Base(DeclarativeBase):
     """Base class for SQLAlchemy models."""
     pass
 
-# Create async engine
-engine = create_async_engine(
-    settings.database_url,
-    echo=settings.debug,
-    future=True,
-)
+# Keep the FTS5 search index in sync with the regular schema
+register_search_index(Base.metadata)
+# Keep the daily/monthly usage rollups in sync with usage_tracking
+register_usage_rollups(Base.metadata)
+
+
+def is_memory_database(url: str) -> bool:
+    """Whether a SQLite URL points at a private in-memory database."""
+    parsed = make_url(url)
+    return parsed.get_backend_name() == "sqlite" and parsed.database in (None, "", ":memory:")
+
+
+def sqlite_pragmas(config: Settings, read_only: bool = False) -> list[str]:
+    """PRAGMA statements applied to every new SQLite connection."""
+    pragmas = [
+        f"PRAGMA busy_timeout = {int(config.sqlite_busy_timeout_ms)}",
+        f"PRAGMA synchronous = {config.sqlite_synchronous}",
+        # Negative cache_size is in KiB rather than pages
+        f"PRAGMA cache_size = -{int(config.sqlite_cache_size_kib)}",
+        f"PRAGMA mmap_size = {int(config.sqlite_mmap_size)}",
+        f"PRAGMA temp_store = {config.sqlite_temp_store}",
+    ]
+    if read_only:
+        pragmas.append("PRAGMA query_only = ON")
+    return pragmas
+
+
+def create_db_engine(
+    url: str,
+    config: Settings = settings,
+    read_only: bool = False,
+    pool_size: Optional[int] = None,
+) -> AsyncEngine:
+    """Create an async engine with pool settings and SQLite pragmas applied.
+
+    File-backed SQLite databases are switched to WAL so readers never block
+    the writer (and vice versa), and every pooled connection gets the pragmas
+    from ``sqlite_pragmas``. Read-only engines additionally set
+    ``query_only`` so a stray write fails loudly instead of contending for
+    the write lock.
+    """
+    is_sqlite = make_url(url).get_backend_name() == "sqlite"
+    in_memory = is_sqlite and is_memory_database(url)
+
+    kwargs: dict[str, Any] = {"echo": config.debug, "future": True}
+    if not in_memory:
+        # In-memory SQLite uses a single static connection, so no pool sizing
+        kwargs.update(
+            pool_size=pool_size or config.db_pool_size,
+            max_overflow=config.db_max_overflow,
+            pool_timeout=config.db_pool_timeout,
+        )
+    new_engine = create_async_engine(url, **kwargs)
+
+    if is_sqlite:
+        pragmas = sqlite_pragmas(config, read_only=read_only)
+        journal_mode = None if in_memory else config.sqlite_journal_mode
+
+        @event.listens_for(new_engine.sync_engine, "connect")
+        def _apply_pragmas(dbapi_connection, connection_record) -> None:
+            cursor = dbapi_connection.cursor()
+            try:
+                # journal_mode is persistent, so only the writer needs to set it
+                if journal_mode and not read_only:
+                    cursor.execute(f"PRAGMA journal_mode = {journal_mode}")
+                for pragma in pragmas:
+                    cursor.execute(pragma)
+            finally:
+                cursor.close()
+
+    return new_engine
+
+
+# Writer engine, used by every route that modifies data
+engine = create_db_engine(settings.database_url)
 
 # Create async session factory
 async_session_factory = async_sessionmaker(
@@ -27,11 +102,64 @@ async_session_factory = async_sessionmaker(
     expire_on_commit=False,
 )
 
+# Reader engine for GET routes. A private in-memory database cannot be shared
+# between engines, so it falls back to the writer.
+if is_memory_database(settings.database_read_url or settings.database_url):
+    read_engine = engine
+else:
+    read_engine = create_db_engine(
+        settings.database_read_url or settings.database_url,
+        read_only=True,
+        pool_size=settings.db_read_pool_size or os.cpu_count() or 1,
+    )
+
+read_session_factory = async_sessionmaker(
+    read_engine,
+    class_=AsyncSession,
+    expire_on_commit=False,
+)
+
+
+# Indexes replaced by a model index under a new name
+SUPERSEDED_INDEXES = (
+    # Replaced by ix_conversations_recent / ix_conversations_project_recent,
+    # which end in id for keyset pagination
+    "ix_conversations_listing",
+    "ix_conversations_project_listing",
+)
+
+
+def drop_superseded_indexes(conn: Connection) -> list[str]:
+    """Drop indexes listed in ``SUPERSEDED_INDEXES`` that still exist."""
+    dropped = []
+    for name in SUPERSEDED_INDEXES:
+        exists = conn.exec_driver_sql(
+            "SELECT 1 FROM sqlite_master WHERE type = 'index' AND name = ?", (name,)
+        ).first()
+        if exists:
+            conn.exec_driver_sql(f"DROP INDEX {name}")
+            dropped.append(name)
+    return dropped
+
+
+def create_missing_indexes(conn: Connection) -> None:
+    """Create model indexes that are missing from already existing tables.
+
+    ``create_all`` only emits ``CREATE INDEX`` together with ``CREATE TABLE``,
+    so indexes added to a model later would never reach an existing database.
+    """
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(conn, checkfirst=True)
+    if conn.dialect.name == "sqlite":
+        drop_superseded_indexes(conn)
+
 
 async def init_db() -> None:
-    """Initialize database tables."""
+    """Initialize database tables and indexes."""
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
+        await conn.run_sync(create_missing_indexes)
 
 
 async def get_db() -> AsyncGenerator[AsyncSession, None]:
@@ -45,3 +173,56 @@ async def get_db() -> AsyncGenerator[AsyncSession, None]:
             raise
         finally:
             await session.close()
+
+
+async def get_read_db() -> AsyncGenerator[AsyncSession, None]:
+    """Get a read-only database session dependency for GET routes.
+
+    Sessions come from the reader pool, so concurrent reads do not queue
+    behind writers. Nothing is committed; writes raise.
+    """
+    async with read_session_factory() as session:
+        try:
+            yield session
+        finally:
+            await session.rollback()
+
+
+def has_private_connection(db: AsyncSession) -> bool:
+    """Whether ``db`` is bound to a private in-memory database (one connection)."""
+    return db.bind is None or is_memory_database(str(db.bind.url))
+
+
+@asynccontextmanager
+async def sibling_session(db: AsyncSession) -> AsyncIterator[AsyncSession]:
+    """A new session on the same engine as ``db``.
+
+    Use it for work that runs beside the request's session or outlives it.
+    A private in-memory database only has one connection, so ``db`` itself
+    is handed out in that case.
+    """
+    if has_private_connection(db):
+        yield db
+        return
+    async with AsyncSession(db.bind, expire_on_commit=False) as session:
+        yield session
+
+
+def pool_status(target: AsyncEngine) -> dict[str, Any]:
+    """Connection pool metrics for an engine."""
+    pool = target.sync_engine.pool
+    status = {"class": type(pool).__name__}
+    for metric in ("size", "checkedin", "checkedout", "overflow"):
+        reader = getattr(pool, metric, None)
+        if callable(reader):
+            status[metric] = reader()
+    return status
+
+
+def get_pool_metrics() -> dict[str, Any]:
+    """Pool metrics for the writer and reader engines."""
+    return {
+        "writer": pool_status(engine),
+        "reader": pool_status(read_engine),
+        "shared": read_engine is engine,
+    }
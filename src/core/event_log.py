@@ -0,0 +1,100 @@
+"""Append-only SSE event log for one agent run, replayable by event id.
+
+Every event appended to a run gets the next integer id, which is sent as the
+SSE ``id:`` field. A client that loses its connection reconnects with
+``Last-Event-ID``. It is sent everything after that id, followed by live
+events until the run finishes.
+
+The newest ``max_memory_events`` events are kept in memory. Older events are
+spilled, in batches, to a JSON-lines file under ``spill_dir``. A long run
+therefore costs bounded memory and can still be replayed from the start.
+"""
+
+import asyncio
+import json
+from collections import deque
+from pathlib import Path
+from typing import AsyncIterator, Optional
+
+
+class RunEventLog:
+    """Bounded in-memory event buffer with spill to disk and live tailing."""
+
+    def __init__(self, run_id: str, max_memory_events: int, spill_dir: Optional[str] = None):
+        self.run_id = run_id
+        self.max_memory_events = max(1, max_memory_events)
+        self.spill_path = Path(spill_dir) / f"{run_id}.jsonl" if spill_dir else None
+        self.last_id = 0
+        self.closed = False
+        self._events: deque[dict] = deque()
+        self._spilled = 0
+        self._changed = asyncio.Condition()
+
+    @property
+    def first_memory_id(self) -> int:
+        """Id of the oldest event still held in memory."""
+        return self._events[0]["id"] if self._events else self.last_id + 1
+
+    async def append(self, event: dict) -> int:
+        """Add an event (``{"event": ..., "data": ...}``). Returns its id."""
+        if self.closed:
+            raise RuntimeError(f"Event log for run {self.run_id} is closed")
+        self.last_id += 1
+        self._events.append({**event, "id": self.last_id})
+        if len(self._events) > self.max_memory_events:
+            self._spill()
+        async with self._changed:
+            self._changed.notify_all()
+        return self.last_id
+
+    async def close(self) -> None:
+        """Mark the run as finished; tailing readers stop after the last event."""
+        self.closed = True
+        async with self._changed:
+            self._changed.notify_all()
+
+    def discard(self) -> None:
+        """Drop buffered events and the spill file."""
+        self._events.clear()
+        if self.spill_path is not None:
+            self.spill_path.unlink(missing_ok=True)
+
+    def read(self, after_id: int) -> list[dict]:
+        """Events with an id greater than ``after_id`` that exist right now."""
+        events = []
+        if after_id + 1 < self.first_memory_id and self._spilled:
+            events.extend(self._read_spilled(after_id))
+        events.extend(event for event in self._events if event["id"] > after_id)
+        return events
+
+    async def follow(self, after_id: int = 0) -> AsyncIterator[dict]:
+        """Replay events after ``after_id``, then tail new ones until the run closes."""
+        cursor = after_id
+        while True:
+            for event in self.read(cursor):
+                cursor = event["id"]
+                yield event
+            async with self._changed:
+                while cursor >= self.last_id and not self.closed:
+                    await self._changed.wait()
+                if cursor >= self.last_id and self.closed:
+                    return
+
+    def _spill(self) -> None:
+        """Move the older half of the in-memory buffer to disk."""
+        count = len(self._events) - self.max_memory_events // 2
+        batch = [self._events.popleft() for _ in range(count)]
+        if self.spill_path is None:
+            # Nowhere to spill: the oldest events are dropped
+            return
+        self.spill_path.parent.mkdir(parents=True, exist_ok=True)
+        with self.spill_path.open("a", encoding="utf-8") as spill:
+            spill.writelines(json.dumps(event) + "\n" for event in batch)
+        self._spilled += len(batch)
+
+    def _read_spilled(self, after_id: int) -> list[dict]:
+        if self.spill_path is None or not self.spill_path.exists():
+            return []
+        with self.spill_path.open(encoding="utf-8") as spill:
+            events = (json.loads(line) for line in spill)
+            return [event for event in events if event["id"] > after_id]
@@ -1,37 +1,152 @@
-"""Rate limiting middleware for API abuse prevention."""
+"""Rate limiting middleware for API abuse prevention.
+
+Each client has a per-minute and a per-hour sliding window. A window is
+approximated from two fixed buckets, the current one and the previous one:
+the previous bucket's count is weighted by how much of it still overlaps
+the window. That is Cloudflare's sliding window counter. A check costs O(1)
+in time and memory per client, however many requests the client has made.
+
+The client table is bounded. With the in-memory backend it is an LRU dict
+that evicts the least recently seen client past ``max_clients``. Idle
+clients and expired blocks are swept from its cold end at most once per
+``sweep_interval_seconds``. With ``backend="shared"`` the counters live in
+the shared state store (``src.core.state_store``), so all workers enforce
+one limit. Each check there is a single atomic ``StateStore.modify``, so
+concurrent requests from the same client cannot both spend the last of its
+budget.
+
+Costs are looked up by method and exact path, so only starting an agent run
+is expensive, not e.g. reattaching to one with ``GET /api/agent/stream/{id}``.
+"""
 
 import time
-from collections import defaultdict, deque
-from typing import Dict, Optional
-from fastapi import Request, Response
-from starlette.middleware.base import BaseHTTPMiddleware
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Dict, Optional
+from starlette.datastructures import MutableHeaders
+from starlette.requests import Request
 from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from src.core.state_store import StateStore, state_namespace
+
+MINUTE = 60
+HOUR = 3600
+
+# Requests that start an LLM run cost more than a plain read
+DEFAULT_ROUTE_COSTS: Dict[tuple[str, str], int] = {
+    ("POST", "/api/agent/stream"): 5,
+    ("POST", "/api/agent/invoke"): 5,
+}
+
+
+@dataclass
+class WindowCounter:
+    """Sliding window count approximated by the current and previous fixed buckets."""
+
+    window: int
+    start: float = 0.0
+    current: float = 0.0
+    previous: float = 0.0
+
+    def _roll(self, now: float) -> None:
+        bucket_start = now - (now % self.window)
+        if bucket_start != self.start:
+            # Only an adjacent bucket still overlaps the window
+            adjacent = bucket_start - self.start == self.window
+            self.previous = self.current if adjacent else 0.0
+            self.current = 0.0
+            self.start = bucket_start
+
+    def used(self, now: float) -> float:
+        """Estimated cost spent within the last ``window`` seconds."""
+        self._roll(now)
+        overlap = 1 - (now - self.start) / self.window
+        return self.previous * overlap + self.current
+
+    def add(self, cost: float) -> None:
+        self.current += cost
+
+    @property
+    def reset_at(self) -> int:
+        return int(self.start + self.window)
+
+
+@dataclass
+class ClientState:
+    """Rate limit counters for a single client."""
+
+    minute: WindowCounter = field(default_factory=lambda: WindowCounter(MINUTE))
+    hour: WindowCounter = field(default_factory=lambda: WindowCounter(HOUR))
+    blocked_until: float = 0.0
+    last_seen: float = 0.0
+
+    def is_idle(self, now: float) -> bool:
+        """Nothing left to remember: the hour window and any block have passed."""
+        return now - self.last_seen > HOUR and now >= self.blocked_until
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "minute": [self.minute.start, self.minute.current, self.minute.previous],
+            "hour": [self.hour.start, self.hour.current, self.hour.previous],
+            "blocked_until": self.blocked_until,
+            "last_seen": self.last_seen,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> "ClientState":
+        return cls(
+            minute=WindowCounter(MINUTE, *data["minute"]),
+            hour=WindowCounter(HOUR, *data["hour"]),
+            blocked_until=data["blocked_until"],
+            last_seen=data["last_seen"],
+        )
 
 
 class RateLimiter:
-    """In-memory rate limiter using sliding window algorithm."""
+    """Sliding window rate limiter with a bounded client table."""
 
     def __init__(
         self,
         requests_per_minute: int = 60,
         requests_per_hour: int = 1000,
-        block_duration_seconds: int = 60
+        block_duration_seconds: int = 60,
+        max_clients: int = 10000,
+        sweep_interval_seconds: float = 60.0,
+        backend: str = "memory",
+        store: Optional[StateStore] = None,
     ):
         """Initialize rate limiter.
 
         Args:
-            requests_per_minute: Max requests allowed per minute
-            requests_per_hour: Max requests allowed per hour
+            requests_per_minute: Max request cost allowed per minute
+            requests_per_hour: Max request cost allowed per hour
             block_duration_seconds: How long to block after limit exceeded
+            max_clients: Max clients tracked before the least recent is evicted
+            sweep_interval_seconds: Min time between sweeps of idle clients
+            backend: "memory" (per process) or "shared" (state store)
+            store: State store for the shared backend, instead of the global one
         """
         self.requests_per_minute = requests_per_minute
         self.requests_per_hour = requests_per_hour
         self.block_duration_seconds = block_duration_seconds
-
-        # {client_id: deque of timestamps}
-        self.request_history: Dict[str, deque] = defaultdict(deque)
-        # {client_id: block_until_timestamp}
-        self.blocked_clients: Dict[str, float] = {}
+        self.max_clients = max_clients
+        self.sweep_interval_seconds = sweep_interval_seconds
+        self.backend = backend
+
+        # {client_id: ClientState}, least recently seen first
+        self.clients: "OrderedDict[str, ClientState]" = OrderedDict()
+        self.shared_clients = None
+        if backend == "shared":
+            self.shared_clients = state_namespace(
+                "rate_limits",
+                ttl_seconds=HOUR + block_duration_seconds,
+                max_entries=max_clients,
+                store=store,
+            )
+        elif backend != "memory":
+            raise ValueError(f"Unknown rate limit backend: {backend}")
+        self._last_sweep = 0.0
 
     def get_client_id(self, request: Request) -> str:
         """Extract client identifier from request.
@@ -55,102 +170,148 @@ class RateLimiter:
         user_agent = request.headers.get("User-Agent", "unknown")
         return f"{client_ip}:{user_agent[:100]}"  # Limit user agent length
 
-    def is_allowed(self, client_id: str) -> tuple[bool, Optional[Dict]]:
+    def _load(self, client_id: str) -> ClientState:
+        state = self.clients.get(client_id)
+        if state is None:
+            state = ClientState()
+            self.clients[client_id] = state
+            if len(self.clients) > self.max_clients:
+                self.clients.popitem(last=False)
+        else:
+            self.clients.move_to_end(client_id)
+        return state
+
+    def sweep(self, now: Optional[float] = None) -> int:
+        """Drop idle clients and expired blocks. Returns how many were removed."""
+        if self.shared_clients is not None:
+            # The state store expires shared entries through their TTL
+            return 0
+        now = now if now is not None else time.time()
+        removed = 0
+        # Least recently seen first, so stop at the first client still in use
+        while self.clients:
+            client_id, state = next(iter(self.clients.items()))
+            if not state.is_idle(now):
+                break
+            del self.clients[client_id]
+            removed += 1
+        return removed
+
+    def _blocked_headers(self, block_until: float) -> Dict[str, str]:
+        return {
+            "X-RateLimit-Limit-Minute": str(self.requests_per_minute),
+            "X-RateLimit-Remaining-Minute": "0",
+            "X-RateLimit-Reset-Minute": str(int(block_until)),
+            "X-RateLimit-Limit-Hour": str(self.requests_per_hour),
+            "X-RateLimit-Remaining-Hour": "0",
+            "X-RateLimit-Reset-Hour": str(int(block_until)),
+            "X-RateLimit-Blocked-Until": str(int(block_until)),
+        }
+
+    def is_allowed(self, client_id: str, cost: int = 1) -> tuple[bool, Optional[Dict]]:
         """Check if request is allowed and return rate limit info.
 
+        Args:
+            client_id: Client identifier from ``get_client_id``
+            cost: How much of the budget this request uses
+
         Returns:
             tuple: (is_allowed, rate_limit_headers)
         """
         current_time = time.time()
+        if self.shared_clients is not None:
+            return self._check_shared(client_id, current_time, cost)
+
+        if current_time - self._last_sweep >= self.sweep_interval_seconds:
+            self._last_sweep = current_time
+            self.sweep(current_time)
+        # In-memory states are updated in place
+        return self._check(self._load(client_id), current_time, cost)
+
+    async def check(self, client_id: str, cost: int = 1) -> tuple[bool, Optional[Dict]]:
+        """``is_allowed`` for async callers, keeping a blocking shared store off the loop."""
+        if self.shared_clients is None:
+            return self.is_allowed(client_id, cost)
+        return await self.shared_clients.store.run(self.is_allowed, client_id, cost)
+
+    def _check_shared(
+        self, client_id: str, current_time: float, cost: int
+    ) -> tuple[bool, Optional[Dict]]:
+        outcome = []
+
+        def step(data: Optional[dict[str, Any]]) -> dict[str, Any]:
+            state = ClientState.from_dict(data) if data else ClientState()
+            outcome.append(self._check(state, current_time, cost))
+            return state.to_dict()
+
+        # Read, check and count in one atomic step of the store
+        self.shared_clients.modify(client_id, step)
+        return outcome[0]
+
+    def _check(
+        self, state: ClientState, current_time: float, cost: int
+    ) -> tuple[bool, Optional[Dict]]:
+        """Check a request against ``state`` and count it if allowed."""
+        state.last_seen = current_time
 
         # Check if client is currently blocked
-        if client_id in self.blocked_clients:
-            block_until = self.blocked_clients[client_id]
-            if current_time < block_until:
-                # Still blocked
-                return False, {
-                    "X-RateLimit-Limit-Minute": str(self.requests_per_minute),
-                    "X-RateLimit-Remaining-Minute": "0",
-                    "X-RateLimit-Reset-Minute": str(int(block_until)),
-                    "X-RateLimit-Limit-Hour": str(self.requests_per_hour),
-                    "X-RateLimit-Remaining-Hour": "0",
-                    "X-RateLimit-Reset-Hour": str(int(block_until)),
-                    "X-RateLimit-Blocked-Until": str(int(block_until)),
-                }
-            else:
-                # Block expired, remove from blocked list
-                del self.blocked_clients[client_id]
-
-        # Clean up old requests (cleanup only when needed)
-        history = self.request_history[client_id]
-        cutoff_minute = current_time - 60
-        cutoff_hour = current_time - 3600
-
-        # Remove requests older than 1 hour (keeps memory bounded)
-        while history and history[0] < cutoff_hour:
-            history.popleft()
-
-        # Count requests in current window
-        recent_minute_requests = sum(1 for t in history if t >= cutoff_minute)
-        recent_hour_requests = len(history)
+        if current_time < state.blocked_until:
+            return False, self._blocked_headers(state.blocked_until)
+
+        minute_used = state.minute.used(current_time)
+        hour_used = state.hour.used(current_time)
 
         # Check limits
-        minute_limit_exceeded = recent_minute_requests >= self.requests_per_minute
-        hour_limit_exceeded = recent_hour_requests >= self.requests_per_hour
+        minute_limit_exceeded = minute_used + cost > self.requests_per_minute
+        hour_limit_exceeded = hour_used + cost > self.requests_per_hour
 
         if minute_limit_exceeded or hour_limit_exceeded:
             # Block the client
-            block_until = current_time + self.block_duration_seconds
-            self.blocked_clients[client_id] = block_until
-
-            return False, {
-                "X-RateLimit-Limit-Minute": str(self.requests_per_minute),
-                "X-RateLimit-Remaining-Minute": "0",
-                "X-RateLimit-Reset-Minute": str(int(block_until)),
-                "X-RateLimit-Limit-Hour": str(self.requests_per_hour),
-                "X-RateLimit-Remaining-Hour": "0",
-                "X-RateLimit-Reset-Hour": str(int(block_until)),
-                "X-RateLimit-Blocked-Until": str(int(block_until)),
-            }
-
-        # Add current request to history
-        history.append(current_time)
-
-        # Calculate remaining requests
-        remaining_minute = max(0, self.requests_per_minute - recent_minute_requests - 1)
-        remaining_hour = max(0, self.requests_per_hour - recent_hour_requests - 1)
-
-        # Calculate reset times
-        next_minute_reset = int(current_time + 60)
-        next_hour_reset = int(current_time + 3600)
+            state.blocked_until = current_time + self.block_duration_seconds
+            return False, self._blocked_headers(state.blocked_until)
+
+        # Count the current request
+        state.minute.add(cost)
+        state.hour.add(cost)
+
+        # Calculate remaining budget
+        remaining_minute = max(0, int(self.requests_per_minute - minute_used - cost))
+        remaining_hour = max(0, int(self.requests_per_hour - hour_used - cost))
 
         return True, {
             "X-RateLimit-Limit-Minute": str(self.requests_per_minute),
             "X-RateLimit-Remaining-Minute": str(remaining_minute),
-            "X-RateLimit-Reset-Minute": str(next_minute_reset),
+            "X-RateLimit-Reset-Minute": str(state.minute.reset_at),
             "X-RateLimit-Limit-Hour": str(self.requests_per_hour),
             "X-RateLimit-Remaining-Hour": str(remaining_hour),
-            "X-RateLimit-Reset-Hour": str(next_hour_reset),
+            "X-RateLimit-Reset-Hour": str(state.hour.reset_at),
         }
 
     def reset_client(self, client_id: str):
         """Reset rate limit for a specific client (for testing)."""
-        if client_id in self.request_history:
-            del self.request_history[client_id]
-        if client_id in self.blocked_clients:
-            del self.blocked_clients[client_id]
+        self.clients.pop(client_id, None)
+        if self.shared_clients is not None:
+            self.shared_clients.pop(client_id, None)
+
 
+class RateLimitMiddleware:
+    """ASGI middleware for rate limiting.
 
-class RateLimitMiddleware(BaseHTTPMiddleware):
-    """FastAPI middleware for rate limiting."""
+    A plain ASGI middleware rather than a ``BaseHTTPMiddleware``, so allowed
+    responses, SSE streams included, are passed through untouched apart from
+    the rate limit headers.
+    """
 
     def __init__(
         self,
-        app,
+        app: ASGIApp,
         requests_per_minute: int = 60,
         requests_per_hour: int = 1000,
         block_duration_seconds: int = 60,
-        skip_paths: Optional[list] = None
+        skip_paths: Optional[list] = None,
+        route_costs: Optional[Dict[tuple[str, str], int]] = None,
+        max_clients: int = 10000,
+        backend: str = "memory",
     ):
         """Initialize rate limiting middleware.
 
@@ -160,27 +321,41 @@ class RateLimitMiddleware(BaseHTTPMiddleware):
             requests_per_hour: Max requests per hour per client
             block_duration_seconds: Block duration in seconds after limit exceeded
             skip_paths: List of paths to skip rate limiting (e.g., health checks)
+            route_costs: Cost per (method, path); other requests cost 1
+            max_clients: Max clients tracked by the limiter
+            backend: "memory" (per process) or "shared" (state store)
         """
-        super().__init__(app)
+        self.app = app
         self.rate_limiter = RateLimiter(
             requests_per_minute=requests_per_minute,
             requests_per_hour=requests_per_hour,
-            block_duration_seconds=block_duration_seconds
+            block_duration_seconds=block_duration_seconds,
+            max_clients=max_clients,
+            backend=backend,
         )
-        self.skip_paths = skip_paths or ["/health", "/docs", "/openapi.json"]
+        self.skip_paths = tuple(skip_paths or ["/health", "/docs", "/openapi.json"])
+        self.route_costs = DEFAULT_ROUTE_COSTS if route_costs is None else route_costs
 
-    async def dispatch(self, request: Request, call_next):
+    def request_cost(self, method: str, path: str) -> int:
+        """Cost of a ``method`` request to exactly ``path``."""
+        return self.route_costs.get((method, path), 1)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
         """Process request through rate limiter."""
-        # Skip rate limiting for certain paths
-        if any(request.url.path.startswith(path) for path in self.skip_paths):
-            return await call_next(request)
+        # Skip rate limiting for non-HTTP traffic and certain paths
+        if scope["type"] != "http" or scope["path"].startswith(self.skip_paths):
+            await self.app(scope, receive, send)
+            return
 
         # Check rate limit
-        client_id = self.rate_limiter.get_client_id(request)
-        is_allowed, headers = self.rate_limiter.is_allowed(client_id)
+        client_id = self.rate_limiter.get_client_id(Request(scope))
+        is_allowed, headers = await self.rate_limiter.check(
+            client_id,
+            cost=self.request_cost(scope["method"], scope["path"]),
+        )
 
         if not is_allowed:
-            return JSONResponse(
+            response = JSONResponse(
                 status_code=429,
                 content={
                     "error": "Too Many Requests",
@@ -189,16 +364,18 @@ class RateLimitMiddleware(BaseHTTPMiddleware):
                 },
                 headers=headers
             )
-
-        # Process request
-        response = await call_next(request)
-
-        # Add rate limit headers to response
-        if headers:
-            for key, value in headers.items():
-                response.headers[key] = value
-
-        return response
+            await response(scope, receive, send)
+            return
+
+        async def send_with_headers(message: Message) -> None:
+            # Add rate limit headers to response
+            if message["type"] == "http.response.start":
+                response_headers = MutableHeaders(scope=message)
+                for key, value in headers.items():
+                    response_headers[key] = value
+            await send(message)
+
+        await self.app(scope, receive, send_with_headers)
 
 
 # Global rate limiter instance
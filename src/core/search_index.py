@@ -0,0 +1,158 @@
+"""SQLite FTS5 full-text index for messages, conversations, files and memories.
+
+Project file chunks get an index too; it backs knowledge-base retrieval for
+agent requests rather than the search API.
+
+Each indexed table gets an external-content FTS5 virtual table (the text lives
+only in the base table) plus insert/update/delete triggers that keep the index
+in sync with every write, including writes that bypass the ORM.
+
+The DDL is attached to ``Base.metadata`` so ``init_db()`` and every
+``create_all`` in the test suite build the index alongside the regular schema.
+Indexes created on an existing database are backfilled automatically, and
+``python migrate_db.py --reindex`` rebuilds all of them from the base tables.
+
+Note: the index is keyed on SQLite's implicit ``rowid``. ``VACUUM`` may
+renumber implicit rowids, so run a rebuild after vacuuming the database.
+"""
+
+import logging
+from dataclasses import dataclass
+
+from sqlalchemy import MetaData, event
+from sqlalchemy.engine import Connection
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class FTSIndex:
+    """An FTS5 index over one base table."""
+
+    table: str
+    columns: tuple[str, ...]
+
+    @property
+    def name(self) -> str:
+        """Name of the FTS5 virtual table."""
+        return f"{self.table}_fts"
+
+
+MESSAGES_FTS = FTSIndex("messages", ("content",))
+CONVERSATIONS_FTS = FTSIndex("conversations", ("title",))
+PROJECT_FILES_FTS = FTSIndex("project_files", ("filename", "content"))
+MEMORIES_FTS = FTSIndex("memories", ("content",))
+PROJECT_FILE_CHUNKS_FTS = FTSIndex("project_file_chunks", ("content",))
+
+SEARCH_INDEXES: tuple[FTSIndex, ...] = (
+    MESSAGES_FTS,
+    CONVERSATIONS_FTS,
+    PROJECT_FILES_FTS,
+    MEMORIES_FTS,
+    PROJECT_FILE_CHUNKS_FTS,
+)
+
+
+def _create_statements(index: FTSIndex) -> list[str]:
+    """Build the virtual table and trigger DDL for an index."""
+    cols = ", ".join(index.columns)
+    new_vals = ", ".join(f"new.{c}" for c in index.columns)
+    old_vals = ", ".join(f"old.{c}" for c in index.columns)
+    fts = index.name
+
+    return [
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5("
+        f"{cols}, content='{index.table}', content_rowid='rowid', "
+        f"tokenize='porter unicode61', prefix='2 3')",
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_ai AFTER INSERT ON {index.table} BEGIN "
+        f"INSERT INTO {fts}(rowid, {cols}) VALUES (new.rowid, {new_vals}); END",
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_ad AFTER DELETE ON {index.table} BEGIN "
+        f"INSERT INTO {fts}({fts}, rowid, {cols}) VALUES ('delete', old.rowid, {old_vals}); END",
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_au AFTER UPDATE OF {cols} ON {index.table} BEGIN "
+        f"INSERT INTO {fts}({fts}, rowid, {cols}) VALUES ('delete', old.rowid, {old_vals}); "
+        f"INSERT INTO {fts}(rowid, {cols}) VALUES (new.rowid, {new_vals}); END",
+    ]
+
+
+def _drop_statements(index: FTSIndex) -> list[str]:
+    """Build the DDL that removes an index and its triggers."""
+    fts = index.name
+    return [
+        f"DROP TRIGGER IF EXISTS {fts}_ai",
+        f"DROP TRIGGER IF EXISTS {fts}_ad",
+        f"DROP TRIGGER IF EXISTS {fts}_au",
+        f"DROP TABLE IF EXISTS {fts}",
+    ]
+
+
+def _table_exists(conn: Connection, name: str) -> bool:
+    """Check sqlite_master for a table or virtual table."""
+    row = conn.exec_driver_sql(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (name,)
+    ).first()
+    return row is not None
+
+
+def create_search_index(conn: Connection, backfill: bool = True) -> list[str]:
+    """Create any missing FTS tables and triggers.
+
+    Args:
+        conn: Synchronous SQLite connection
+        backfill: Rebuild newly created indexes from existing base table rows
+
+    Returns:
+        Names of the FTS tables that were newly created
+    """
+    created = []
+    for index in SEARCH_INDEXES:
+        if not _table_exists(conn, index.table):
+            continue
+        is_new = not _table_exists(conn, index.name)
+        for statement in _create_statements(index):
+            conn.exec_driver_sql(statement)
+        if is_new:
+            created.append(index.name)
+            if backfill:
+                conn.exec_driver_sql(f"INSERT INTO {index.name}({index.name}) VALUES ('rebuild')")
+    if created:
+        logger.info(f"Created search indexes: {', '.join(created)}")
+    return created
+
+
+def drop_search_index(conn: Connection) -> None:
+    """Drop every FTS table and trigger."""
+    for index in SEARCH_INDEXES:
+        for statement in _drop_statements(index):
+            conn.exec_driver_sql(statement)
+
+
+def rebuild_search_index(conn: Connection) -> dict[str, int]:
+    """Recreate missing indexes and rebuild all of them from the base tables.
+
+    Returns:
+        Mapping of FTS table name to number of indexed rows
+    """
+    create_search_index(conn, backfill=False)
+    counts = {}
+    for index in SEARCH_INDEXES:
+        if not _table_exists(conn, index.name):
+            continue
+        conn.exec_driver_sql(f"INSERT INTO {index.name}({index.name}) VALUES ('rebuild')")
+        conn.exec_driver_sql(f"INSERT INTO {index.name}({index.name}) VALUES ('optimize')")
+        counts[index.name] = conn.exec_driver_sql(f"SELECT count(*) FROM {index.table}").scalar()
+    return counts
+
+
+def register_search_index(metadata: MetaData) -> None:
+    """Attach FTS DDL to ``create_all``/``drop_all`` for SQLite databases."""
+
+    @event.listens_for(metadata, "after_create")
+    def _after_create(target: MetaData, connection: Connection, **kw) -> None:
+        if connection.dialect.name == "sqlite":
+            create_search_index(connection)
+
+    @event.listens_for(metadata, "before_drop")
+    def _before_drop(target: MetaData, connection: Connection, **kw) -> None:
+        if connection.dialect.name == "sqlite":
+            drop_search_index(connection)
+
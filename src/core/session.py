@@ -11,6 +11,7 @@ from passlib.context import CryptContext
 from pydantic import BaseModel
 
 from src.core.config import settings
+from src.core.state_store import MemoryStateStore, StateStore, get_state_store, state_namespace
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
@@ -26,13 +27,34 @@ class TokenData(BaseModel):
 class SessionManager:
     """Session management with timeout handling."""
 
-    def __init__(self):
-        """Initialize session manager."""
-        self.sessions: Dict[str, Dict[str, Any]] = {}  # session_id -> session_data
+    def __init__(self, store: Optional[StateStore] = None):
+        """Initialize session manager.
+
+        Sessions live in ``store``, or in a private in-process store when
+        none is given.
+        """
+        self.store = store or MemoryStateStore()
         self.timeout_minutes = settings.access_token_expire_minutes
         self.refresh_buffer_minutes = 5  # Refresh tokens 5 minutes before expiry
         self.refresh_token_expiry_days = 7  # Refresh token valid for 7 days
 
+        # Nothing outlives its refresh token
+        refresh_ttl = self.refresh_token_expiry_days * 24 * 60 * 60
+        self.sessions = state_namespace(  # session_id -> session_data
+            "auth_sessions", ttl_seconds=refresh_ttl, store=self.store
+        )
+        self.refresh_tokens = state_namespace(  # refresh_token -> session_id
+            "auth_refresh_tokens", ttl_seconds=refresh_ttl, store=self.store
+        )
+
+    async def run(self, method, *args):
+        """Call a session method, off the event loop if the store blocks on I/O."""
+        return await self.store.run(method, *args)
+
+    def _update_session(self, session_id: str, **fields) -> None:
+        """Merge fields into a stored session if it exists."""
+        self.sessions.merge(session_id, fields, create=False)
+
     def create_access_token(self, data: dict, expires_delta: Optional[timedelta] = None) -> str:
         """Create a JWT access token."""
         to_encode = data.copy()
@@ -52,10 +74,14 @@ class SessionManager:
 
         # Store refresh token in session data
         if session_id in self.sessions:
-            self.sessions[session_id]["refresh_token"] = refresh_token
-            self.sessions[session_id]["refresh_token_expires"] = int(time.time()) + (
-                self.refresh_token_expiry_days * 24 * 60 * 60
+            self._update_session(
+                session_id,
+                refresh_token=refresh_token,
+                refresh_token_expires=int(time.time()) + (
+                    self.refresh_token_expiry_days * 24 * 60 * 60
+                ),
             )
+            self.refresh_tokens[refresh_token] = session_id
 
         return refresh_token
 
@@ -109,29 +135,30 @@ class SessionManager:
     def refresh_with_refresh_token(self, refresh_token: str) -> Optional[str]:
         """Refresh access token using refresh token."""
         # Find session with matching refresh token
-        for session_id, session_data in self.sessions.items():
-            if session_data.get("refresh_token") == refresh_token:
-                # Check if refresh token is expired
-                refresh_expiry = session_data.get("refresh_token_expires", 0)
-                if int(time.time()) > refresh_expiry:
-                    return None
-
-                # Check if session is still active
-                if not session_data.get("is_active", False):
-                    return None
-
-                # Update activity
-                self._update_session_activity(session_id)
-
-                # Create new access token
-                data = {
-                    "sub": session_data["username"],
-                    "session_id": session_id,
-                    "last_activity": int(time.time())
-                }
-                return self.create_access_token(data)
+        session_id = self.refresh_tokens.get(refresh_token)
+        session_data = self.sessions.get(session_id) if session_id else None
+        if session_data is None or session_data.get("refresh_token") != refresh_token:
+            return None
 
-        return None
+        # Check if refresh token is expired
+        refresh_expiry = session_data.get("refresh_token_expires", 0)
+        if int(time.time()) > refresh_expiry:
+            return None
+
+        # Check if session is still active
+        if not session_data.get("is_active", False):
+            return None
+
+        # Update activity
+        self._update_session_activity(session_id)
+
+        # Create new access token
+        data = {
+            "sub": session_data["username"],
+            "session_id": session_id,
+            "last_activity": int(time.time())
+        }
+        return self.create_access_token(data)
 
     def create_session(self, username: str) -> str:
         """Create a new session for a user."""
@@ -189,11 +216,10 @@ class SessionManager:
 
     def _is_session_active(self, session_id: str, last_activity: int) -> bool:
         """Check if session is still active and not timed out."""
-        if session_id not in self.sessions:
+        session_data = self.sessions.get(session_id)
+        if session_data is None:
             return False
 
-        session_data = self.sessions[session_id]
-
         if not session_data.get("is_active", False):
             return False
 
@@ -203,25 +229,23 @@ class SessionManager:
         # Check if session has timed out
         if current_time - last_activity > timeout_seconds:
             # Mark session as inactive
-            session_data["is_active"] = False
+            self._update_session(session_id, is_active=False)
             return False
 
         return True
 
     def _update_session_activity(self, session_id: str):
         """Update session last activity time."""
-        if session_id in self.sessions:
-            self.sessions[session_id]["last_activity"] = int(time.time())
+        self._update_session(session_id, last_activity=int(time.time()))
 
     def end_session(self, session_id: str):
         """End a session."""
-        if session_id in self.sessions:
-            self.sessions[session_id]["is_active"] = False
+        self._update_session(session_id, is_active=False)
 
     def get_session_info(self, session_id: str) -> Optional[Dict[str, Any]]:
         """Get session information."""
-        if session_id in self.sessions:
-            session_data = self.sessions[session_id].copy()
+        session_data = self.sessions.get(session_id)
+        if session_data is not None:
             # Calculate remaining time
             last_activity = session_data.get("last_activity", 0)
             timeout_seconds = self.timeout_minutes * 60
@@ -260,10 +284,10 @@ class SessionManager:
 
     def get_session_status(self, session_id: str) -> Optional[Dict[str, Any]]:
         """Get detailed session status including timeout info."""
-        if session_id not in self.sessions:
+        session_data = self.sessions.get(session_id)
+        if session_data is None:
             return None
 
-        session_data = self.sessions[session_id]
         if not session_data.get("is_active", False):
             return None
 
@@ -302,10 +326,19 @@ class JWTBearer(HTTPBearer):
                     headers={"WWW-Authenticate": "Bearer"},
                 )
 
-            token_data = session_manager.verify_token(credentials.credentials)
+            # Reuse the token already decoded by SessionTimeoutMiddleware
+            state = request.scope.get("state", {})
+            if state.get("bearer_token") == credentials.credentials:
+                token_data = state["token_data"]
+            else:
+                token_data = await session_manager.run(
+                    session_manager.verify_token, credentials.credentials
+                )
             if token_data:
                 # Update session activity on each request
-                session_manager._update_session_activity(token_data.session_id)
+                await session_manager.run(
+                    session_manager._update_session_activity, token_data.session_id
+                )
                 return token_data
 
         raise HTTPException(
@@ -315,5 +348,5 @@ class JWTBearer(HTTPBearer):
         )
 
 
-# Global session manager instance
-session_manager = SessionManager()
\ No newline at end of file
+# Global session manager instance, backed by the shared state store
+session_manager = SessionManager(store=get_state_store())
\ No newline at end of file
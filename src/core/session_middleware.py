@@ -1,85 +1,115 @@
-"""Session timeout middleware for automatic handling of expired sessions."""
+"""Session timeout middleware for automatic handling of expired sessions.
+
+Written as a plain ASGI middleware rather than a ``BaseHTTPMiddleware``, so
+responses (including long-lived SSE streams) pass straight through without
+an extra task and memory stream per request. The decoded bearer token is
+left in ``scope["state"]`` for ``JWTBearer``, so it is only decoded once
+per request.
+"""
 
 import time
-from typing import Callable
-from fastapi import Request, Response
-from starlette.middleware.base import BaseHTTPMiddleware
+
+from starlette.datastructures import Headers, MutableHeaders
 from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from src.core.session import session_manager
+
+# Auth endpoints are skipped to avoid infinite loops
+SKIP_PATHS = frozenset({
+    "/api/auth/login",
+    "/api/auth/register",
+    "/api/auth/refresh",
+    "/api/auth/logout",
+    "/api/auth/health",
+})
 
-from src.core.session import session_manager, TokenData, JWTBearer
-from src.core.config import settings
+# Warn clients when the token expires within this many seconds
+EXPIRY_WARNING_SECONDS = 5 * 60
 
 
-class SessionTimeoutMiddleware(BaseHTTPMiddleware):
+class SessionTimeoutMiddleware:
     """Middleware to handle session timeouts and automatic refresh prompts."""
 
-    def __init__(self, app, refresh_endpoint: str = "/api/auth/refresh"):
+    def __init__(self, app: ASGIApp, refresh_endpoint: str = "/api/auth/refresh"):
         """Initialize session timeout middleware."""
-        super().__init__(app)
+        self.app = app
         self.refresh_endpoint = refresh_endpoint
 
-    async def dispatch(self, request: Request, call_next: Callable) -> Response:
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
         """Process request through session timeout handler."""
-        # Skip middleware for auth endpoints to avoid infinite loops
-        if request.url.path in [
-            "/api/auth/login",
-            "/api/auth/register",
-            "/api/auth/refresh",
-            "/api/auth/logout",
-            "/api/auth/health"
-        ]:
-            return await call_next(request)
+        if scope["type"] != "http" or scope["path"] in SKIP_PATHS:
+            await self.app(scope, receive, send)
+            return
 
         # Try to get token from Authorization header
-        auth_header = request.headers.get("Authorization")
-        if auth_header and auth_header.startswith("Bearer "):
-            token = auth_header[7:]  # Remove "Bearer " prefix
-
-            try:
-                # Verify token without dependency injection to avoid conflicts
-                token_data = session_manager.verify_token(token)
-
-                if token_data:
-                    # Check if session is about to expire (within 5 minutes)
-                    current_time = int(time.time())
-                    exp_time = token_data.exp
-                    buffer_seconds = 5 * 60  # 5 minutes
-
-                    if exp_time - current_time <= buffer_seconds:
-                        # Add session warning headers
-                        response = await call_next(request)
-                        response.headers["X-Session-Warning"] = "token_expiring_soon"
-                        response.headers["X-Session-Expires-In"] = str(exp_time - current_time)
-                        response.headers["X-Session-Refresh-Endpoint"] = self.refresh_endpoint
-                        return response
-
-                    # Check if session has timed out based on last activity
-                    session_info = session_manager.get_session_info(token_data.session_id)
-                    if session_info and not session_manager._is_session_active(
-                        token_data.session_id,
-                        session_info.get("last_activity", 0)
-                    ):
-                        # Session has timed out - return 401 with timeout info
-                        return JSONResponse(
-                            status_code=401,
-                            content={
-                                "error": "Session Timeout",
-                                "message": "Your session has timed out due to inactivity. Please refresh your token or log in again.",
-                                "code": "SESSION_TIMEOUT",
-                                "session_id": token_data.session_id
-                            },
-                            headers={
-                                "X-Session-Status": "timeout",
-                                "X-Session-Expired": "true"
-                            }
-                        )
-
-            except Exception:
-                # Token verification failed, let the next middleware handle it
-                pass
-
-        # Process request normally
-        return await call_next(request)
+        auth_header = Headers(scope=scope).get("authorization")
+        if not auth_header or not auth_header.startswith("Bearer "):
+            await self.app(scope, receive, send)
+            return
+
+        token = auth_header[7:]  # Remove "Bearer " prefix
+        try:
+            token_data = await session_manager.run(session_manager.verify_token, token)
+        except Exception:
+            # Token verification failed, let the next handler deal with it
+            token_data = None
+
+        if token_data is None:
+            await self.app(scope, receive, send)
+            return
+
+        # Share the decoded token with JWTBearer further down
+        state = scope.setdefault("state", {})
+        state["bearer_token"] = token
+        state["token_data"] = token_data
+
+        # Check if session is about to expire (within 5 minutes)
+        expires_in = (token_data.exp or 0) - int(time.time())
+        if token_data.exp is not None and expires_in <= EXPIRY_WARNING_SECONDS:
+            await self.app(scope, receive, self._with_warning_headers(send, expires_in))
+            return
+
+        # Check if session has timed out based on last activity
+        session_info = await session_manager.run(
+            session_manager.get_session_info, token_data.session_id
+        )
+        if session_info and not await session_manager.run(
+            session_manager._is_session_active,
+            token_data.session_id,
+            session_info.get("last_activity", 0)
+        ):
+            # Session has timed out - return 401 with timeout info
+            response = JSONResponse(
+                status_code=401,
+                content={
+                    "error": "Session Timeout",
+                    "message": "Your session has timed out due to inactivity. Please refresh your token or log in again.",
+                    "code": "SESSION_TIMEOUT",
+                    "session_id": token_data.session_id
+                },
+                headers={
+                    "X-Session-Status": "timeout",
+                    "X-Session-Expired": "true"
+                }
+            )
+            await response(scope, receive, send)
+            return
+
+        await self.app(scope, receive, send)
+
+    def _with_warning_headers(self, send: Send, expires_in: int) -> Send:
+        """Wrap ``send`` to add session expiry warning headers to the response."""
+
+        async def send_with_headers(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                headers = MutableHeaders(scope=message)
+                headers["X-Session-Warning"] = "token_expiring_soon"
+                headers["X-Session-Expires-In"] = str(expires_in)
+                headers["X-Session-Refresh-Endpoint"] = self.refresh_endpoint
+            await send(message)
+
+        return send_with_headers
 
 
 def create_session_timeout_middleware(app):
@@ -88,4 +118,4 @@ def create_session_timeout_middleware(app):
         SessionTimeoutMiddleware,
         refresh_endpoint="/api/auth/refresh"
     )
-    return app
\ No newline at end of file
+    return app
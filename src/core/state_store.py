@@ -0,0 +1,812 @@
+"""Shared, bounded key/value state for data that used to live in module dicts.
+
+Thread state, pending approvals, collaboration presence, login sessions and
+user settings are kept in named namespaces. Each namespace can have a TTL,
+which slides forward on every write, and a cap on the number of entries.
+When the cap is reached, the least recently written entries are evicted
+first.
+
+Two backends are available, selected with ``settings.state_backend``:
+
+- ``memory``: process-local and lock-protected. This is the default and is
+  fine for a single worker.
+- ``sqlite``: a small WAL-mode SQLite file at ``settings.state_db_path``.
+  Every worker process behind a load balancer sees the same approvals and
+  sessions.
+
+Values must be JSON-serializable. A value read from the store is a snapshot.
+To change it, write it back with ``namespace[key] = value``. Changing the
+returned object in place is not persisted by the shared backend. Fields of a
+stored object can be changed atomically with ``merge`` and ``remove_field``,
+which the SQLite backend runs as single ``json_set``/``json_remove``
+statements, and any value with ``modify``, which runs a Python function
+inside a single ``UPDATE``. Concurrent workers never lose each other's
+updates.
+
+The SQLite backend blocks on file I/O. Async code goes through the ``a*``
+methods of ``StateNamespace`` (or ``StateStore.run``), which run its calls in
+a worker thread instead of on the event loop.
+"""
+
+import asyncio
+import json
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from collections.abc import Iterator, MutableMapping
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Callable, Optional
+
+from src.core.config import Settings, settings
+
+# Expired SQLite rows are deleted on every Nth write, so entries that are
+# never read again do not pile up
+PURGE_EVERY_WRITES = 256
+
+
+def _field_path(*fields: str) -> str:
+    """SQLite JSON path of nested object fields."""
+    for name in fields:
+        if '"' in name:
+            raise ValueError(f"Unsupported state field name: {name!r}")
+    return "$" + "".join(f'."{name}"' for name in fields)
+
+
+class StateStore(ABC):
+    """Namespaced key/value store with per-write TTL and size caps."""
+
+    # Whether calls block on I/O and should be kept off the event loop
+    blocking = False
+
+    async def run(self, func: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+        """Call ``func``, in a worker thread if this store blocks."""
+        if self.blocking:
+            return await asyncio.to_thread(func, *args, **kwargs)
+        return func(*args, **kwargs)
+
+    @abstractmethod
+    def get(self, namespace: str, key: str) -> Optional[Any]:
+        """Return the live value for a key, or None if missing or expired."""
+
+    @abstractmethod
+    def set(
+        self,
+        namespace: str,
+        key: str,
+        value: Any,
+        ttl_seconds: Optional[float] = None,
+        max_entries: Optional[int] = None,
+    ) -> None:
+        """Store a value, evicting the oldest entries beyond ``max_entries``."""
+
+    @abstractmethod
+    def add(
+        self,
+        namespace: str,
+        key: str,
+        value: Any,
+        ttl_seconds: Optional[float] = None,
+        max_entries: Optional[int] = None,
+    ) -> bool:
+        """Store a value only if the key has no live value. Returns whether it did."""
+
+    @abstractmethod
+    def merge(
+        self,
+        namespace: str,
+        key: str,
+        fields: dict[str, Any],
+        ttl_seconds: Optional[float] = None,
+        max_entries: Optional[int] = None,
+        create: bool = True,
+        within: Optional[str] = None,
+    ) -> bool:
+        """Set fields of a stored JSON object in one atomic step.
+
+        Args:
+            fields: Field values to set; other fields are kept
+            create: Start from ``{}`` if the key has no live value. Otherwise
+                missing keys are left missing.
+            within: Set the fields on the object stored under this field
+                instead, and only if it exists (implies ``create=False``)
+
+        Returns whether a value was written.
+        """
+
+    @abstractmethod
+    def modify(
+        self,
+        namespace: str,
+        key: str,
+        func: Callable[[Optional[Any]], Any],
+        ttl_seconds: Optional[float] = None,
+        max_entries: Optional[int] = None,
+    ) -> Any:
+        """Replace a value with ``func(current)`` in one atomic step.
+
+        ``current`` is None if the key has no live value. ``func`` is called
+        exactly once, while the store is locked, so it must be quick and must
+        not use the store itself. Returns the new value.
+        """
+
+    @abstractmethod
+    def remove_field(
+        self,
+        namespace: str,
+        key: str,
+        name: str,
+        only_if: Optional[tuple[str, Any]] = None,
+    ) -> bool:
+        """Remove a field of a stored JSON object in one atomic step.
+
+        ``only_if=(field, value)`` only removes it if its own ``field`` has that
+        value. The entry is deleted once its object is empty. Returns whether
+        the field was removed.
+        """
+
+    @abstractmethod
+    def delete(self, namespace: str, key: str) -> bool:
+        """Remove a key. Returns whether it existed."""
+
+    @abstractmethod
+    def items(self, namespace: str) -> list[tuple[str, Any]]:
+        """All live entries of a namespace, oldest write first."""
+
+    @abstractmethod
+    def clear(self, namespace: str) -> None:
+        """Remove every entry of a namespace."""
+
+    @abstractmethod
+    def purge_expired(self) -> int:
+        """Delete expired entries in all namespaces. Returns how many."""
+
+
+class MemoryStateStore(StateStore):
+    """Process-local state store."""
+
+    def __init__(self, clock: Callable[[], float] = time.time):
+        self._clock = clock
+        self._lock = threading.Lock()
+        # namespace -> key -> (value, expires_at), ordered by last write
+        self._data: dict[str, OrderedDict[str, tuple[Any, Optional[float]]]] = {}
+
+    def _live(self, entry: tuple[Any, Optional[float]], now: float) -> bool:
+        return entry[1] is None or entry[1] > now
+
+    def get(self, namespace: str, key: str) -> Optional[Any]:
+        with self._lock:
+            entries = self._data.get(namespace)
+            entry = entries.get(key) if entries else None
+            if entry is None:
+                return None
+            if not self._live(entry, self._clock()):
+                del entries[key]
+                return None
+            return entry[0]
+
+    def set(
+        self,
+        namespace: str,
+        key: str,
+        value: Any,
+        ttl_seconds: Optional[float] = None,
+        max_entries: Optional[int] = None,
+    ) -> None:
+        now = self._clock()
+        with self._lock:
+            entries = self._data.setdefault(namespace, OrderedDict())
+            self._write(entries, key, value, now, ttl_seconds, max_entries)
+
+    def _write(
+        self,
+        entries: OrderedDict,
+        key: str,
+        value: Any,
+        now: float,
+        ttl_seconds: Optional[float],
+        max_entries: Optional[int],
+    ) -> None:
+        # Caller holds the lock
+        entries[key] = (value, now + ttl_seconds if ttl_seconds else None)
+        entries.move_to_end(key)
+
+        # With a namespace-wide TTL the oldest write expires first
+        while entries:
+            oldest_key, oldest = next(iter(entries.items()))
+            over_cap = max_entries is not None and len(entries) > max_entries
+            if not over_cap and self._live(oldest, now):
+                break
+            del entries[oldest_key]
+
+    def _current(self, entries: OrderedDict, key: str, now: float) -> Optional[Any]:
+        entry = entries.get(key)
+        return entry[0] if entry is not None and self._live(entry, now) else None
+
+    def add(
+        self,
+        namespace: str,
+        key: str,
+        value: Any,
+        ttl_seconds: Optional[float] = None,
+        max_entries: Optional[int] = None,
+    ) -> bool:
+        now = self._clock()
+        with self._lock:
+            entries = self._data.setdefault(namespace, OrderedDict())
+            if self._current(entries, key, now) is not None:
+                return False
+            self._write(entries, key, value, now, ttl_seconds, max_entries)
+            return True
+
+    def merge(
+        self,
+        namespace: str,
+        key: str,
+        fields: dict[str, Any],
+        ttl_seconds: Optional[float] = None,
+        max_entries: Optional[int] = None,
+        create: bool = True,
+        within: Optional[str] = None,
+    ) -> bool:
+        now = self._clock()
+        with self._lock:
+            entries = self._data.setdefault(namespace, OrderedDict())
+            current = self._current(entries, key, now)
+            if within is not None:
+                if current is None or not isinstance(current.get(within), dict):
+                    return False
+                value = {**current, within: {**current[within], **fields}}
+            elif current is None:
+                if not create:
+                    return False
+                value = dict(fields)
+            else:
+                value = {**current, **fields}
+            # A new object, so snapshots handed out earlier do not change
+            self._write(entries, key, value, now, ttl_seconds, max_entries)
+            return True
+
+    def modify(
+        self,
+        namespace: str,
+        key: str,
+        func: Callable[[Optional[Any]], Any],
+        ttl_seconds: Optional[float] = None,
+        max_entries: Optional[int] = None,
+    ) -> Any:
+        now = self._clock()
+        with self._lock:
+            entries = self._data.setdefault(namespace, OrderedDict())
+            value = func(self._current(entries, key, now))
+            self._write(entries, key, value, now, ttl_seconds, max_entries)
+            return value
+
+    def remove_field(
+        self,
+        namespace: str,
+        key: str,
+        name: str,
+        only_if: Optional[tuple[str, Any]] = None,
+    ) -> bool:
+        now = self._clock()
+        with self._lock:
+            entries = self._data.get(namespace)
+            current = self._current(entries, key, now) if entries else None
+            if current is None or name not in current:
+                return False
+            if only_if is not None:
+                field, expected = only_if
+                if not isinstance(current[name], dict) or current[name].get(field) != expected:
+                    return False
+            value = {k: v for k, v in current.items() if k != name}
+            if value:
+                entries[key] = (value, entries[key][1])
+            else:
+                del entries[key]
+            return True
+
+    def delete(self, namespace: str, key: str) -> bool:
+        with self._lock:
+            entries = self._data.get(namespace)
+            if entries is None or key not in entries:
+                return False
+            del entries[key]
+            return True
+
+    def items(self, namespace: str) -> list[tuple[str, Any]]:
+        now = self._clock()
+        with self._lock:
+            entries = self._data.get(namespace, {})
+            return [(key, entry[0]) for key, entry in entries.items() if self._live(entry, now)]
+
+    def clear(self, namespace: str) -> None:
+        with self._lock:
+            self._data.pop(namespace, None)
+
+    def purge_expired(self) -> int:
+        now = self._clock()
+        removed = 0
+        with self._lock:
+            for entries in self._data.values():
+                expired = [key for key, entry in entries.items() if not self._live(entry, now)]
+                for key in expired:
+                    del entries[key]
+                removed += len(expired)
+        return removed
+
+
+class SQLiteStateStore(StateStore):
+    """State store shared between worker processes through a SQLite file."""
+
+    blocking = True
+
+    def __init__(
+        self,
+        path: str,
+        config: Settings = settings,
+        clock: Callable[[], float] = time.time,
+    ):
+        from src.core.database import sqlite_pragmas
+
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._writes = 0
+        if path != ":memory:":
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+        # Autocommit: every statement is its own short transaction
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute(f"PRAGMA journal_mode = {config.sqlite_journal_mode}")
+        for pragma in sqlite_pragmas(config):
+            self._conn.execute(pragma)
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS state_entries (
+                namespace TEXT NOT NULL,
+                key TEXT NOT NULL,
+                value TEXT NOT NULL,
+                expires_at REAL,
+                updated_at REAL NOT NULL,
+                PRIMARY KEY (namespace, key)
+            )
+            """
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS ix_state_entries_namespace_updated "
+            "ON state_entries (namespace, updated_at)"
+        )
+        # modify() runs its Python function inside the UPDATE statement
+        self._modify_func: Optional[Callable[[Optional[Any]], Any]] = None
+        self._modify_error: Optional[Exception] = None
+        self._conn.create_function("state_modify", 1, self._call_modify_func)
+
+    def _call_modify_func(self, payload: Optional[str]) -> str:
+        try:
+            current = json.loads(payload) if payload is not None else None
+            return json.dumps(self._modify_func(current))
+        except Exception as e:
+            # SQLite replaces it with a generic error, so keep it to re-raise
+            self._modify_error = e
+            raise
+
+    def get(self, namespace: str, key: str) -> Optional[Any]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value FROM state_entries WHERE namespace = ? AND key = ? "
+                "AND (expires_at IS NULL OR expires_at > ?)",
+                (namespace, key, self._clock()),
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def set(
+        self,
+        namespace: str,
+        key: str,
+        value: Any,
+        ttl_seconds: Optional[float] = None,
+        max_entries: Optional[int] = None,
+    ) -> None:
+        now = self._clock()
+        payload = json.dumps(value)
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO state_entries (namespace, key, value, expires_at, updated_at) "
+                "VALUES (?, ?, ?, ?, ?) "
+                "ON CONFLICT (namespace, key) DO UPDATE SET "
+                "value = excluded.value, expires_at = excluded.expires_at, "
+                "updated_at = excluded.updated_at",
+                (namespace, key, payload, now + ttl_seconds if ttl_seconds else None, now),
+            )
+            self._after_write(namespace, max_entries, now)
+
+    def _after_write(self, namespace: str, max_entries: Optional[int], now: float) -> None:
+        # Caller holds the lock
+        if max_entries is not None:
+            self._conn.execute(
+                "DELETE FROM state_entries WHERE namespace = ? AND key IN ("
+                "SELECT key FROM state_entries WHERE namespace = ? "
+                "ORDER BY updated_at DESC LIMIT -1 OFFSET ?)",
+                (namespace, namespace, max_entries),
+            )
+        self._writes += 1
+        if self._writes % PURGE_EVERY_WRITES == 0:
+            self._purge(now)
+
+    def add(
+        self,
+        namespace: str,
+        key: str,
+        value: Any,
+        ttl_seconds: Optional[float] = None,
+        max_entries: Optional[int] = None,
+    ) -> bool:
+        now = self._clock()
+        payload = json.dumps(value)
+        with self._lock:
+            # INSERT OR IGNORE, except that an expired row is replaced
+            cursor = self._conn.execute(
+                "INSERT INTO state_entries (namespace, key, value, expires_at, updated_at) "
+                "VALUES (?, ?, ?, ?, ?) "
+                "ON CONFLICT (namespace, key) DO UPDATE SET "
+                "value = excluded.value, expires_at = excluded.expires_at, "
+                "updated_at = excluded.updated_at "
+                "WHERE state_entries.expires_at IS NOT NULL "
+                "AND state_entries.expires_at <= excluded.updated_at",
+                (namespace, key, payload, now + ttl_seconds if ttl_seconds else None, now),
+            )
+            added = cursor.rowcount > 0
+            if added:
+                self._after_write(namespace, max_entries, now)
+        return added
+
+    def merge(
+        self,
+        namespace: str,
+        key: str,
+        fields: dict[str, Any],
+        ttl_seconds: Optional[float] = None,
+        max_entries: Optional[int] = None,
+        create: bool = True,
+        within: Optional[str] = None,
+    ) -> bool:
+        if not fields:
+            return False
+        now = self._clock()
+        expires_at = now + ttl_seconds if ttl_seconds else None
+        prefix = () if within is None else (within,)
+        placeholders = ", ".join("?, json(?)" for _ in fields)
+        args: list[Any] = []
+        for name, value in fields.items():
+            args += [_field_path(*prefix, name), json.dumps(value)]
+
+        with self._lock:
+            if create and within is None:
+                cursor = self._conn.execute(
+                    "INSERT INTO state_entries (namespace, key, value, expires_at, updated_at) "
+                    f"VALUES (?, ?, json_set('{{}}', {placeholders}), ?, ?) "
+                    "ON CONFLICT (namespace, key) DO UPDATE SET "
+                    "value = json_set(CASE WHEN state_entries.expires_at IS NULL "
+                    "OR state_entries.expires_at > excluded.updated_at "
+                    f"THEN state_entries.value ELSE '{{}}' END, {placeholders}), "
+                    "expires_at = excluded.expires_at, updated_at = excluded.updated_at",
+                    (namespace, key, *args, expires_at, now, *args),
+                )
+            else:
+                condition, where_args = "", ()
+                if within is not None:
+                    condition = "AND json_type(value, ?) = 'object'"
+                    where_args = (_field_path(within),)
+                cursor = self._conn.execute(
+                    f"UPDATE state_entries SET value = json_set(value, {placeholders}), "
+                    "expires_at = ?, updated_at = ? "
+                    "WHERE namespace = ? AND key = ? "
+                    f"AND (expires_at IS NULL OR expires_at > ?) {condition}",
+                    (*args, expires_at, now, namespace, key, now, *where_args),
+                )
+            written = cursor.rowcount > 0
+            if written:
+                self._after_write(namespace, max_entries, now)
+        return written
+
+    def modify(
+        self,
+        namespace: str,
+        key: str,
+        func: Callable[[Optional[Any]], Any],
+        ttl_seconds: Optional[float] = None,
+        max_entries: Optional[int] = None,
+    ) -> Any:
+        now = self._clock()
+        expires_at = now + ttl_seconds if ttl_seconds else None
+        with self._lock:
+            # A missing key gets a null placeholder, which func sees as None
+            self._conn.execute(
+                "INSERT INTO state_entries (namespace, key, value, expires_at, updated_at) "
+                "VALUES (?, ?, 'null', ?, ?) ON CONFLICT (namespace, key) DO NOTHING",
+                (namespace, key, expires_at, now),
+            )
+            self._modify_func, self._modify_error = func, None
+            try:
+                # One statement, so concurrent workers are serialized by SQLite
+                row = self._conn.execute(
+                    "UPDATE state_entries SET value = state_modify(CASE WHEN "
+                    "expires_at IS NULL OR expires_at > ? THEN value END), "
+                    "expires_at = ?, updated_at = ? "
+                    "WHERE namespace = ? AND key = ? RETURNING value",
+                    (now, expires_at, now, namespace, key),
+                ).fetchone()
+            except sqlite3.Error:
+                self._conn.execute(
+                    "DELETE FROM state_entries WHERE namespace = ? AND key = ? AND value = 'null'",
+                    (namespace, key),
+                )
+                if self._modify_error is not None:
+                    # The function's own exception, not sqlite's wrapper of it
+                    raise self._modify_error from None
+                raise
+            finally:
+                self._modify_func = None
+            self._after_write(namespace, max_entries, now)
+        return json.loads(row[0])
+
+    def remove_field(
+        self,
+        namespace: str,
+        key: str,
+        name: str,
+        only_if: Optional[tuple[str, Any]] = None,
+    ) -> bool:
+        now = self._clock()
+        path = _field_path(name)
+        condition, args = "", ()
+        if only_if is not None:
+            condition = "AND json_extract(value, ?) = ?"
+            args = (_field_path(name, only_if[0]), only_if[1])
+        with self._lock:
+            cursor = self._conn.execute(
+                "UPDATE state_entries SET value = json_remove(value, ?), updated_at = ? "
+                "WHERE namespace = ? AND key = ? AND (expires_at IS NULL OR expires_at > ?) "
+                f"AND json_type(value, ?) IS NOT NULL {condition}",
+                (path, now, namespace, key, now, path, *args),
+            )
+            removed = cursor.rowcount > 0
+            if removed:
+                # A concurrent merge in between leaves the object non-empty
+                self._conn.execute(
+                    "DELETE FROM state_entries WHERE namespace = ? AND key = ? AND value = '{}'",
+                    (namespace, key),
+                )
+        return removed
+
+    def delete(self, namespace: str, key: str) -> bool:
+        with self._lock:
+            cursor = self._conn.execute(
+                "DELETE FROM state_entries WHERE namespace = ? AND key = ?",
+                (namespace, key),
+            )
+        return cursor.rowcount > 0
+
+    def items(self, namespace: str) -> list[tuple[str, Any]]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT key, value FROM state_entries WHERE namespace = ? "
+                "AND (expires_at IS NULL OR expires_at > ?) ORDER BY updated_at",
+                (namespace, self._clock()),
+            ).fetchall()
+        return [(key, json.loads(value)) for key, value in rows]
+
+    def clear(self, namespace: str) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM state_entries WHERE namespace = ?", (namespace,))
+
+    def _purge(self, now: float) -> int:
+        cursor = self._conn.execute(
+            "DELETE FROM state_entries WHERE expires_at IS NOT NULL AND expires_at <= ?",
+            (now,),
+        )
+        return cursor.rowcount
+
+    def purge_expired(self) -> int:
+        with self._lock:
+            return self._purge(self._clock())
+
+
+class StateNamespace(MutableMapping):
+    """Dict-like view of one namespace of a state store.
+
+    ``defaults`` are inserted where missing on the first read, not when the
+    namespace is declared, so declaring one never touches the store.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        ttl_seconds: Optional[float] = None,
+        max_entries: Optional[int] = None,
+        store: Optional[StateStore] = None,
+        defaults: Optional[dict[str, Any]] = None,
+    ):
+        self.name = name
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.defaults = dict(defaults or {})
+        self._store = store
+        self._seeded: Optional[StateStore] = None
+
+    @property
+    def store(self) -> StateStore:
+        return self._store or get_state_store()
+
+    def _seed(self) -> None:
+        """Insert the missing defaults, once per store."""
+        store = self.store
+        if not self.defaults or self._seeded is store:
+            return
+        for key, value in self.defaults.items():
+            store.add(
+                self.name, key, value, ttl_seconds=self.ttl_seconds, max_entries=self.max_entries
+            )
+        self._seeded = store
+
+    def __getitem__(self, key: str) -> Any:
+        self._seed()
+        value = self.store.get(self.name, key)
+        if value is None:
+            raise KeyError(key)
+        return value
+
+    def __setitem__(self, key: str, value: Any) -> None:
+        self.store.set(
+            self.name,
+            key,
+            value,
+            ttl_seconds=self.ttl_seconds,
+            max_entries=self.max_entries,
+        )
+
+    def __delitem__(self, key: str) -> None:
+        if not self.store.delete(self.name, key):
+            raise KeyError(key)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter([key for key, _ in self.items()])
+
+    def __len__(self) -> int:
+        return len(self.items())
+
+    def items(self) -> list[tuple[str, Any]]:
+        # One round trip instead of a lookup per key
+        self._seed()
+        return self.store.items(self.name)
+
+    def values(self) -> list[Any]:
+        return [value for _, value in self.items()]
+
+    def clear(self) -> None:
+        self.store.clear(self.name)
+
+    def copy(self) -> dict[str, Any]:
+        """Plain dict snapshot of the namespace."""
+        return dict(self.items())
+
+    def add(self, key: str, value: Any) -> bool:
+        """Store ``value`` unless ``key`` already has one. Returns whether it did."""
+        return self.store.add(
+            self.name,
+            key,
+            value,
+            ttl_seconds=self.ttl_seconds,
+            max_entries=self.max_entries,
+        )
+
+    def setdefault(self, key: str, default: Any = None) -> Any:
+        # One conditional insert, so a concurrent writer is never overwritten
+        self.add(key, default)
+        return self.get(key, default)
+
+    def merge(
+        self,
+        key: str,
+        fields: dict[str, Any],
+        create: bool = True,
+        within: Optional[str] = None,
+    ) -> bool:
+        """Atomically set fields of the object under ``key`` (see ``StateStore.merge``)."""
+        self._seed()
+        return self.store.merge(
+            self.name,
+            key,
+            fields,
+            ttl_seconds=self.ttl_seconds,
+            max_entries=self.max_entries,
+            create=create,
+            within=within,
+        )
+
+    def modify(self, key: str, func: Callable[[Optional[Any]], Any]) -> Any:
+        """Atomically replace the value under ``key`` with ``func(current)``.
+
+        See ``StateStore.modify``.
+        """
+        self._seed()
+        return self.store.modify(
+            self.name,
+            key,
+            func,
+            ttl_seconds=self.ttl_seconds,
+            max_entries=self.max_entries,
+        )
+
+    def remove_field(self, key: str, name: str, only_if: Optional[tuple[str, Any]] = None) -> bool:
+        """Atomically remove a field of the object under ``key``.
+
+        See ``StateStore.remove_field``.
+        """
+        self._seed()
+        return self.store.remove_field(self.name, key, name, only_if=only_if)
+
+    # Async variants, which keep a blocking store off the event loop
+
+    async def aget(self, key: str, default: Any = None) -> Any:
+        return await self.store.run(self.get, key, default)
+
+    async def aset(self, key: str, value: Any) -> None:
+        await self.store.run(self.__setitem__, key, value)
+
+    async def apop(self, key: str, default: Any = None) -> Any:
+        return await self.store.run(self.pop, key, default)
+
+    async def aupdate(self, values: dict[str, Any]) -> None:
+        await self.store.run(self.update, values)
+
+    async def acopy(self) -> dict[str, Any]:
+        return dict(await self.store.run(self.items))
+
+    async def amerge(
+        self,
+        key: str,
+        fields: dict[str, Any],
+        create: bool = True,
+        within: Optional[str] = None,
+    ) -> bool:
+        return await self.store.run(self.merge, key, fields, create, within)
+
+    async def aremove_field(
+        self, key: str, name: str, only_if: Optional[tuple[str, Any]] = None
+    ) -> bool:
+        return await self.store.run(self.remove_field, key, name, only_if)
+
+
+@lru_cache
+def get_state_store() -> StateStore:
+    """The process-wide state store for the configured backend."""
+    if settings.state_backend == "sqlite":
+        return SQLiteStateStore(settings.state_db_path)
+    if settings.state_backend != "memory":
+        raise ValueError(f"Unknown state backend: {settings.state_backend}")
+    return MemoryStateStore()
+
+
+def state_namespace(
+    name: str,
+    ttl_seconds: Optional[float] = None,
+    max_entries: Optional[int] = None,
+    store: Optional[StateStore] = None,
+    defaults: Optional[dict[str, Any]] = None,
+) -> StateNamespace:
+    """Declare a namespace of the shared state store (or of ``store``).
+
+    ``max_entries`` defaults to ``settings.state_max_entries``. Pass 0 for
+    no cap. ``defaults`` are stored lazily where missing, see ``StateNamespace``.
+    """
+    if max_entries is None:
+        max_entries = settings.state_max_entries
+    return StateNamespace(
+        name,
+        ttl_seconds=ttl_seconds,
+        max_entries=max_entries or None,
+        store=store,
+        defaults=defaults,
+    )
@@ -0,0 +1,186 @@
+"""Daily and monthly usage rollups maintained by SQLite triggers.
+
+Every row written to ``usage_tracking`` is added to two ``usage_rollups``
+rows, its day and its month, keyed by user, model, project and conversation.
+Triggers on insert, delete and update keep the rollups exact for every write,
+including writes that bypass the ORM, so ``/api/usage`` and
+``/api/analytics`` read a handful of pre-aggregated rows instead of scanning
+the raw usage history.
+
+The DDL is attached to ``Base.metadata`` the same way as the search index.
+Rollups that are empty while usage rows exist (a database created before the
+rollups existed) are backfilled automatically, and
+``python migrate_db.py --rebuild-rollups`` recomputes them from scratch.
+"""
+
+import logging
+
+from sqlalchemy import MetaData, event
+from sqlalchemy.engine import Connection
+
+logger = logging.getLogger(__name__)
+
+ROLLUP_TABLE = "usage_rollups"
+USAGE_TABLE = "usage_tracking"
+
+# Granularity -> strftime format of the period
+GRANULARITIES = {
+    "day": "%Y-%m-%d",
+    "month": "%Y-%m",
+}
+
+KEY_COLUMNS = ("granularity", "period", "user_id", "model", "project_id", "conversation_id")
+SUM_COLUMNS = (
+    "input_tokens",
+    "output_tokens",
+    "cache_read_tokens",
+    "cache_write_tokens",
+    "thinking_tokens",
+)
+
+_INSERT_COLUMNS = ", ".join(KEY_COLUMNS + ("requests",) + SUM_COLUMNS + ("cost",))
+_TRIGGERS = ("usage_rollups_ai", "usage_rollups_ad", "usage_rollups_au")
+
+
+def _period(row: str, fmt: str) -> str:
+    return f"strftime('{fmt}', coalesce({row}.created_at, CURRENT_TIMESTAMP))"
+
+
+def _upsert(row: str, granularity: str, sign: str) -> str:
+    """Add (sign '+') or subtract (sign '-') one usage row from one rollup row."""
+    values = ", ".join(
+        [
+            f"'{granularity}'",
+            _period(row, GRANULARITIES[granularity]),
+            f"{row}.user_id",
+            f"{row}.model",
+            f"coalesce({row}.project_id, '')",
+            f"coalesce({row}.conversation_id, '')",
+            f"{sign}1",
+        ]
+        + [f"{sign}coalesce({row}.{column}, 0)" for column in SUM_COLUMNS]
+        + [f"{sign}coalesce({row}.cost_estimate, 0)"]
+    )
+    updates = ", ".join(
+        f"{column} = {column} + excluded.{column}"
+        for column in ("requests",) + SUM_COLUMNS + ("cost",)
+    )
+    return (
+        f"INSERT INTO {ROLLUP_TABLE} ({_INSERT_COLUMNS}) VALUES ({values}) "
+        f"ON CONFLICT ({', '.join(KEY_COLUMNS)}) DO UPDATE SET {updates};"
+    )
+
+
+def _prune(row: str, granularity: str) -> str:
+    """Remove a rollup row once its last usage row is gone."""
+    return (
+        f"DELETE FROM {ROLLUP_TABLE} WHERE granularity = '{granularity}' "
+        f"AND period = {_period(row, GRANULARITIES[granularity])} "
+        f"AND user_id = {row}.user_id AND model = {row}.model "
+        f"AND project_id = coalesce({row}.project_id, '') "
+        f"AND conversation_id = coalesce({row}.conversation_id, '') "
+        f"AND requests <= 0;"
+    )
+
+
+def _apply(row: str, sign: str) -> str:
+    statements = []
+    for granularity in GRANULARITIES:
+        statements.append(_upsert(row, granularity, sign))
+        if sign == "-":
+            statements.append(_prune(row, granularity))
+    return " ".join(statements)
+
+
+def _create_statements() -> list[str]:
+    """Build the trigger DDL."""
+    return [
+        f"CREATE TRIGGER IF NOT EXISTS usage_rollups_ai AFTER INSERT ON {USAGE_TABLE} BEGIN "
+        f"{_apply('new', '')} END",
+        f"CREATE TRIGGER IF NOT EXISTS usage_rollups_ad AFTER DELETE ON {USAGE_TABLE} BEGIN "
+        f"{_apply('old', '-')} END",
+        f"CREATE TRIGGER IF NOT EXISTS usage_rollups_au AFTER UPDATE ON {USAGE_TABLE} BEGIN "
+        f"{_apply('old', '-')} {_apply('new', '')} END",
+    ]
+
+
+def _rebuild_statement(granularity: str) -> str:
+    """Aggregate the whole usage table into one granularity of rollups."""
+    period = _period(USAGE_TABLE, GRANULARITIES[granularity])
+    sums = ", ".join(f"sum(coalesce({column}, 0))" for column in SUM_COLUMNS)
+    return (
+        f"INSERT INTO {ROLLUP_TABLE} ({_INSERT_COLUMNS}) "
+        f"SELECT '{granularity}', {period}, user_id, model, "
+        f"coalesce(project_id, ''), coalesce(conversation_id, ''), count(*), {sums}, "
+        f"sum(coalesce(cost_estimate, 0)) "
+        f"FROM {USAGE_TABLE} GROUP BY 2, 3, 4, 5, 6"
+    )
+
+
+def _table_exists(conn: Connection, name: str) -> bool:
+    row = conn.exec_driver_sql(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (name,)
+    ).first()
+    return row is not None
+
+
+def _has_rows(conn: Connection, table: str) -> bool:
+    return conn.exec_driver_sql(f"SELECT EXISTS (SELECT 1 FROM {table})").scalar() == 1
+
+
+def create_usage_rollups(conn: Connection, backfill: bool = True) -> bool:
+    """Create the rollup triggers if they are missing.
+
+    Args:
+        conn: Synchronous SQLite connection
+        backfill: Rebuild the rollups when they are empty but usage rows exist
+
+    Returns:
+        True if the rollups were backfilled
+    """
+    if not (_table_exists(conn, USAGE_TABLE) and _table_exists(conn, ROLLUP_TABLE)):
+        return False
+    for statement in _create_statements():
+        conn.exec_driver_sql(statement)
+    if backfill and not _has_rows(conn, ROLLUP_TABLE) and _has_rows(conn, USAGE_TABLE):
+        rebuild_usage_rollups(conn)
+        logger.info("Backfilled usage rollups")
+        return True
+    return False
+
+
+def drop_usage_rollups(conn: Connection) -> None:
+    """Drop the rollup triggers."""
+    for trigger in _TRIGGERS:
+        conn.exec_driver_sql(f"DROP TRIGGER IF EXISTS {trigger}")
+
+
+def rebuild_usage_rollups(conn: Connection) -> dict[str, int]:
+    """Recompute every rollup row from ``usage_tracking``.
+
+    Returns:
+        Mapping of granularity to number of rollup rows
+    """
+    create_usage_rollups(conn, backfill=False)
+    conn.exec_driver_sql(f"DELETE FROM {ROLLUP_TABLE}")
+    counts = {}
+    for granularity in GRANULARITIES:
+        conn.exec_driver_sql(_rebuild_statement(granularity))
+        counts[granularity] = conn.exec_driver_sql(
+            f"SELECT count(*) FROM {ROLLUP_TABLE} WHERE granularity = ?", (granularity,)
+        ).scalar()
+    return counts
+
+
+def register_usage_rollups(metadata: MetaData) -> None:
+    """Attach the rollup triggers to ``create_all``/``drop_all`` for SQLite databases."""
+
+    @event.listens_for(metadata, "after_create")
+    def _after_create(target: MetaData, connection: Connection, **kw) -> None:
+        if connection.dialect.name == "sqlite":
+            create_usage_rollups(connection)
+
+    @event.listens_for(metadata, "before_drop")
+    def _before_drop(target: MetaData, connection: Connection, **kw) -> None:
+        if connection.dialect.name == "sqlite":
+            drop_usage_rollups(connection)
@@ -1,5 +1,6 @@
 """FastAPI application entry point."""
 
+import asyncio
 import logging
 from contextlib import asynccontextmanager
 from typing import AsyncGenerator
@@ -12,11 +13,16 @@ from fastapi.staticfiles import StaticFiles
 from starlette.exceptions import HTTPException as StarletteHTTPException
 import os
 
+from src.core.agent_state import AgentStatePersistence
 from src.core.config import settings
-from src.core.database import init_db
+from src.core.database import async_session_factory, init_db
 from src.core.rate_limiter import RateLimitMiddleware
 from src.core.session_middleware import SessionTimeoutMiddleware
 from src.api import router as api_router
+from src.services.agent_service import agent_service
+from src.services.batch_jobs import batch_jobs
+from src.services.retrieval_service import retrieval_service
+from src.services.run_manager import run_manager
 
 # Configure logging
 logger = logging.getLogger(__name__)
@@ -27,9 +33,34 @@ async def lifespan(app: FastAPI) -> AsyncGenerator[None, None]:
     """Application lifespan events."""
     # Startup
     await init_db()
+
+    # Chunk project files uploaded before knowledge retrieval existed
+    async with async_session_factory() as session:
+        await retrieval_service.index_missing(session)
+
+    persistence = None
+    compaction_task = None
+    if settings.agent_state_db_path:
+        persistence = AgentStatePersistence(
+            settings.agent_state_db_path,
+            keep_last=settings.checkpoint_keep_last,
+        )
+        checkpointer, store = await persistence.open()
+        agent_service.use_persistence(checkpointer, store)
+        await persistence.compact()
+        compaction_task = asyncio.create_task(
+            persistence.run_compaction(settings.checkpoint_compaction_interval_seconds)
+        )
+
     yield
+
     # Shutdown
-    pass
+    await run_manager.shutdown()
+    await batch_jobs.shutdown()
+    if compaction_task is not None:
+        compaction_task.cancel()
+    if persistence is not None:
+        await persistence.close()
 
 
 app = FastAPI(
@@ -63,6 +94,8 @@ app.add_middleware(
     requests_per_minute=settings.rate_limit_per_minute,
     requests_per_hour=settings.rate_limit_per_hour,
     block_duration_seconds=settings.rate_limit_block_duration,
+    max_clients=settings.rate_limit_max_clients,
+    backend=settings.rate_limit_backend,
     skip_paths=["/health", "/docs", "/openapi.json", "/redoc"],
 )
 
@@ -1,11 +1,7 @@
 """SQLAlchemy database models."""
 
-from sqlalchemy.orm import DeclarativeBase
-
-# Create Base class here to avoid circular import
-class Base(DeclarativeBase):
-    """Base class for SQLAlchemy models."""
-    pass
+# Every model is declared on the one Base in src.core.database
+from src.core.database import Base
 
 # Import tag models first (needed for the conversation_tags association table used by Conversation)
 from src.models.tag import Tag, conversation_tags
@@ -19,6 +15,7 @@ from src.models.conversation import Conversation
 from src.models.message import Message
 from src.models.project import Project
 from src.models.project_file import ProjectFile
+from src.models.project_file_chunk import ProjectFileChunk
 from src.models.artifact import Artifact
 from src.models.checkpoint import Checkpoint
 from src.models.memory import Memory
@@ -32,13 +29,14 @@ from src.models.template import Template
 from src.models.saved_search import SavedSearch
 from src.models.activity import ActivityLog
 from src.models.usage_tracking import UsageTracking
+from src.models.usage_rollup import UsageRollup
 
 __all__ = [
-    "Base", "Conversation", "Message", "Comment", "Project", "ProjectFile", "Artifact",
+    "Base", "Conversation", "Message", "Comment", "Project", "ProjectFile", "ProjectFileChunk", "Artifact",
     "Checkpoint", "Memory", "SharedConversation", "Prompt", "MCPServer",
     "Folder", "FolderItem", "BackgroundTask", "TaskStatus", "AuditLog",
     "AuditActionType", "AuditAction", "User", "Session", "PasswordResetToken",
     "APIKey", "UserStatus", "Tag", "conversation_tags", "Template", "SavedSearch",
     "CollaborationSession", "CollaborationParticipant", "CollaborationEvent",
-    "ActivityLog", "UsageTracking"
+    "ActivityLog", "UsageTracking", "UsageRollup"
 ]
@@ -4,7 +4,7 @@ import uuid
 from datetime import datetime
 from typing import Optional
 
-from sqlalchemy import String, DateTime, JSON, Boolean, ForeignKey
+from sqlalchemy import String, DateTime, JSON, Boolean, ForeignKey, Index
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from src.core.database import Base
@@ -14,6 +14,10 @@ class ActivityLog(Base):
     """Model for tracking user activities across the workspace."""
 
     __tablename__ = "activity_logs"
+    __table_args__ = (
+        # Activity feed, newest first (keyset paginated)
+        Index("ix_activity_logs_feed", "is_deleted", "created_at", "id"),
+    )
 
     id: Mapped[str] = mapped_column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
 
@@ -3,7 +3,7 @@
 import uuid
 from datetime import datetime
 
-from sqlalchemy import DateTime, String, Text, ForeignKey
+from sqlalchemy import DateTime, Index, String, Text, ForeignKey
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from src.core.database import Base
@@ -13,6 +13,12 @@ class Artifact(Base):
     """Artifact model for storing code artifacts from AI responses."""
 
     __tablename__ = "artifacts"
+    __table_args__ = (
+        # list_artifacts: visible artifacts of a conversation, newest first
+        Index("ix_artifacts_conversation_listing", "conversation_id", "is_deleted", "is_archived", "created_at"),
+        # Version history of an artifact
+        Index("ix_artifacts_parent_version", "parent_artifact_id", "version"),
+    )
 
     id: Mapped[str] = mapped_column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
     conversation_id: Mapped[str] = mapped_column(String(36), ForeignKey("conversations.id"), nullable=False)
@@ -4,7 +4,7 @@ from datetime import datetime
 from typing import Optional
 from uuid import UUID, uuid4
 
-from sqlalchemy import String, DateTime, JSON, Enum as SQLEnum
+from sqlalchemy import String, DateTime, Index, JSON, Enum as SQLEnum
 from sqlalchemy.orm import Mapped, mapped_column
 import enum
 
@@ -140,6 +140,12 @@ class AuditLog(Base):
     """Model for auditing user actions and security events."""
 
     __tablename__ = "audit_logs"
+    __table_args__ = (
+        # Audit trail listings, newest first (keyset paginated)
+        Index("ix_audit_logs_created", "created_at", "id"),
+        Index("ix_audit_logs_user_created", "user_id", "created_at", "id"),
+        Index("ix_audit_logs_resource_created", "resource_type", "resource_id", "created_at", "id"),
+    )
 
     id: Mapped[UUID] = mapped_column(primary_key=True, default=uuid4)
 
@@ -4,7 +4,7 @@ from datetime import datetime
 from typing import Optional
 from uuid import UUID, uuid4
 
-from sqlalchemy import Column, String, Integer, DateTime, JSON, ForeignKey, Enum as SQLEnum
+from sqlalchemy import Column, String, Integer, DateTime, JSON, ForeignKey, Index, Enum as SQLEnum
 from sqlalchemy.orm import Mapped, mapped_column
 
 from src.core.database import Base
@@ -24,6 +24,11 @@ class BackgroundTask(Base):
     """Model for tracking background task execution."""
 
     __tablename__ = "background_tasks"
+    __table_args__ = (
+        # list_tasks, newest first (keyset paginated), optionally by status
+        Index("ix_background_tasks_created", "created_at", "id"),
+        Index("ix_background_tasks_status_created", "status", "created_at", "id"),
+    )
 
     id: Mapped[UUID] = mapped_column(primary_key=True, default=uuid4)
     user_id: Mapped[str] = mapped_column(String, nullable=False, index=True)
@@ -3,7 +3,7 @@
 import uuid
 from datetime import datetime
 
-from sqlalchemy import Boolean, DateTime, Integer, String, Text, ForeignKey, JSON
+from sqlalchemy import Boolean, DateTime, Index, Integer, String, Text, ForeignKey, JSON
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from src.core.database import Base
@@ -13,6 +13,14 @@ class Conversation(Base):
     """Conversation model for storing chat conversations."""
 
     __tablename__ = "conversations"
+    __table_args__ = (
+        # list_conversations: live (archived or not) conversations, newest first,
+        # ending in id so keyset cursors seek straight to their page
+        Index("ix_conversations_recent", "is_deleted", "is_archived", "updated_at", "id"),
+        Index("ix_conversations_project_recent", "project_id", "is_deleted", "is_archived", "updated_at", "id"),
+        # Branch tree traversal: children of a conversation in creation order
+        Index("ix_conversations_parent_created", "parent_conversation_id", "created_at"),
+    )
 
     id: Mapped[str] = mapped_column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
     user_id: Mapped[str] = mapped_column(String(36), default="default-user")
@@ -41,6 +49,9 @@ class Conversation(Base):
     branch_point_message_id: Mapped[str | None] = mapped_column(String(36), nullable=True)
     branch_name: Mapped[str | None] = mapped_column(String(100), nullable=True)
     branch_color: Mapped[str | None] = mapped_column(String(20), nullable=True)
+    # Copy-on-write branch: shows the parent's messages up to the branch point
+    # instead of storing copies (see src.services.message_history)
+    inherits_parent_messages: Mapped[bool] = mapped_column(Boolean, default=False)
 
     # Relationships
     messages = relationship("Message", back_populates="conversation", cascade="all, delete-orphan")
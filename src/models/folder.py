@@ -3,7 +3,7 @@
 import uuid
 from datetime import datetime
 
-from sqlalchemy import Boolean, DateTime, Integer, String, ForeignKey
+from sqlalchemy import Boolean, DateTime, Index, Integer, String, ForeignKey
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from src.core.database import Base
@@ -13,6 +13,10 @@ class Folder(Base):
     """Folder model for organizing conversations hierarchically."""
 
     __tablename__ = "folders"
+    __table_args__ = (
+        # list_folders: children of one parent in position order (keyset paginated)
+        Index("ix_folders_listing", "is_deleted", "is_archived", "parent_folder_id", "position", "created_at", "id"),
+    )
 
     id: Mapped[str] = mapped_column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
     user_id: Mapped[str] = mapped_column(String(36), default="default-user")
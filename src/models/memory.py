@@ -3,7 +3,7 @@
 import uuid
 from datetime import datetime
 
-from sqlalchemy import Boolean, DateTime, String, Text, ForeignKey
+from sqlalchemy import Boolean, DateTime, Index, String, Text, ForeignKey
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from src.core.database import Base
@@ -13,6 +13,10 @@ class Memory(Base):
     """Long-term memory model for storing user preferences and facts across conversations."""
 
     __tablename__ = "memories"
+    __table_args__ = (
+        # Memory context injection: active memories in creation order
+        Index("ix_memories_active_created", "is_active", "created_at"),
+    )
 
     id: Mapped[str] = mapped_column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
     user_id: Mapped[str] = mapped_column(String(36), default="default-user")
@@ -3,7 +3,7 @@
 import uuid
 from datetime import datetime
 
-from sqlalchemy import DateTime, Integer, String, Text, ForeignKey, JSON, Boolean
+from sqlalchemy import DateTime, Index, Integer, String, Text, ForeignKey, JSON, Boolean
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from src.core.database import Base
@@ -13,6 +13,11 @@ class Message(Base):
     """Message model for storing chat messages."""
 
     __tablename__ = "messages"
+    __table_args__ = (
+        # list_messages, checkpoints and exports: messages of a conversation in order
+        Index("ix_messages_conversation_created", "conversation_id", "created_at", "id"),
+        Index("ix_messages_parent_message", "parent_message_id"),
+    )
 
     id: Mapped[str] = mapped_column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
     conversation_id: Mapped[str] = mapped_column(String(36), ForeignKey("conversations.id"), nullable=False)
@@ -3,7 +3,7 @@
 import uuid
 from datetime import datetime
 
-from sqlalchemy import Boolean, DateTime, ForeignKey, Integer, String, Text
+from sqlalchemy import Boolean, DateTime, ForeignKey, Index, Integer, String, Text
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from src.core.database import Base
@@ -13,6 +13,10 @@ class ProjectFile(Base):
     """File model for project knowledge base."""
 
     __tablename__ = "project_files"
+    __table_args__ = (
+        # Project file listings and knowledge-base context, newest first
+        Index("ix_project_files_listing", "project_id", "is_deleted", "is_archived", "created_at"),
+    )
 
     id: Mapped[str] = mapped_column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
     user_id: Mapped[str] = mapped_column(String(36), default="default-user")
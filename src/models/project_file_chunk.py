@@ -0,0 +1,32 @@
+"""Project file chunk model for knowledge-base retrieval."""
+
+import uuid
+from datetime import datetime
+
+from sqlalchemy import DateTime, ForeignKey, Index, Integer, String, Text
+from sqlalchemy.orm import Mapped, mapped_column
+
+from src.core.database import Base
+
+
+class ProjectFileChunk(Base):
+    """A passage of a project file, indexed for retrieval at request time."""
+
+    __tablename__ = "project_file_chunks"
+    __table_args__ = (
+        # Re-chunking and deleting a file's chunks
+        Index("ix_project_file_chunks_file", "file_id", "chunk_index"),
+        # Retrieval is always scoped to one project
+        Index("ix_project_file_chunks_project", "project_id"),
+    )
+
+    id: Mapped[str] = mapped_column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    project_id: Mapped[str] = mapped_column(String(36), ForeignKey("projects.id"), nullable=False)
+    file_id: Mapped[str] = mapped_column(String(36), ForeignKey("project_files.id"), nullable=False)
+
+    # Position of the passage within the file
+    chunk_index: Mapped[int] = mapped_column(Integer, nullable=False)
+    content: Mapped[str] = mapped_column(Text, nullable=False)
+    token_count: Mapped[int] = mapped_column(Integer, default=0)
+
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
@@ -3,7 +3,7 @@
 import uuid
 from datetime import datetime
 
-from sqlalchemy import String, Text, DateTime, Boolean
+from sqlalchemy import String, Text, DateTime, Boolean, Index
 from sqlalchemy.orm import Mapped, mapped_column
 
 from src.core.database import Base
@@ -13,6 +13,10 @@ class Prompt(Base):
     """Prompt template model for the prompt library."""
 
     __tablename__ = "prompts"
+    __table_args__ = (
+        # list_prompts: most used first (keyset paginated)
+        Index("ix_prompts_listing", "is_active", "usage_count", "created_at", "id"),
+    )
 
     id: Mapped[str] = mapped_column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
     user_id: Mapped[str] = mapped_column(String(36), default="default-user")
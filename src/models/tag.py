@@ -3,7 +3,7 @@
 import uuid
 from datetime import datetime
 
-from sqlalchemy import Boolean, DateTime, Integer, String, ForeignKey, Table, Column
+from sqlalchemy import Boolean, DateTime, Index, Integer, String, ForeignKey, Table, Column
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from src.core.database import Base
@@ -21,6 +21,10 @@ class Tag(Base):
     """Tag model for categorizing conversations."""
 
     __tablename__ = "tags"
+    __table_args__ = (
+        # list_tags, in creation order (keyset paginated)
+        Index("ix_tags_listing", "is_deleted", "created_at", "id"),
+    )
 
     id: Mapped[str] = mapped_column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
     name: Mapped[str] = mapped_column(String(50), unique=True, nullable=False)
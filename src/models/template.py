@@ -3,7 +3,7 @@
 import uuid
 from datetime import datetime
 
-from sqlalchemy import String, Text, DateTime, Boolean, JSON
+from sqlalchemy import String, Text, DateTime, Boolean, Index, JSON
 from sqlalchemy.orm import Mapped, mapped_column
 
 from src.core.database import Base
@@ -13,6 +13,10 @@ class Template(Base):
     """Conversation template model for quick starting points."""
 
     __tablename__ = "templates"
+    __table_args__ = (
+        # list_templates: most used first (keyset paginated)
+        Index("ix_templates_listing", "is_active", "usage_count", "created_at", "id"),
+    )
 
     id: Mapped[str] = mapped_column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
     user_id: Mapped[str] = mapped_column(String(36), default="default-user")
@@ -0,0 +1,48 @@
+"""Usage rollup model: pre-aggregated usage per day and per month."""
+
+from sqlalchemy import Float, Index, Integer, String, UniqueConstraint
+from sqlalchemy.orm import Mapped, mapped_column
+
+from src.core.database import Base
+
+
+class UsageRollup(Base):
+    """Usage totals for one period, user, model, project and conversation.
+
+    Rows are maintained by SQLite triggers on ``usage_tracking`` (see
+    ``src.core.usage_rollups``); the application never writes them directly.
+    Missing projects and conversations are stored as ``''`` rather than NULL
+    so they take part in the unique key.
+    """
+
+    __tablename__ = "usage_rollups"
+    __table_args__ = (
+        # Upsert target of the triggers, also serves period range scans
+        UniqueConstraint(
+            "granularity", "period", "user_id", "model", "project_id", "conversation_id",
+            name="uq_usage_rollups_key",
+        ),
+        # Per-project charts and totals
+        Index("ix_usage_rollups_project", "project_id", "granularity", "period"),
+        # Per-conversation totals
+        Index("ix_usage_rollups_conversation", "conversation_id", "granularity"),
+    )
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+
+    # 'day' (period 'YYYY-MM-DD') or 'month' (period 'YYYY-MM')
+    granularity: Mapped[str] = mapped_column(String(5), nullable=False)
+    period: Mapped[str] = mapped_column(String(10), nullable=False)
+
+    user_id: Mapped[str] = mapped_column(String(36), nullable=False)
+    model: Mapped[str] = mapped_column(String(100), nullable=False)
+    project_id: Mapped[str] = mapped_column(String(36), nullable=False, default="")
+    conversation_id: Mapped[str] = mapped_column(String(36), nullable=False, default="")
+
+    requests: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    input_tokens: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    output_tokens: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    cache_read_tokens: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    cache_write_tokens: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    thinking_tokens: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    cost: Mapped[float] = mapped_column(Float, nullable=False, default=0.0)
@@ -4,9 +4,8 @@ from datetime import datetime
 from uuid import uuid4
 
 from sqlalchemy import Column, String, DateTime, ForeignKey, Float, Integer
-from sqlalchemy.orm import relationship
 
-from src.models import Base
+from src.core.database import Base
 
 
 class UsageTracking(Base):
@@ -36,12 +35,6 @@ class UsageTracking(Base):
     # Timestamp
     created_at = Column(DateTime, default=datetime.utcnow, index=True)
 
-    # Relationships
-    user = relationship("User", back_populates="usage_tracking")
-    conversation = relationship("Conversation", back_populates="usage_tracking")
-    message = relationship("Message", back_populates="usage_tracking")
-    project = relationship("Project", back_populates="usage_tracking")
-
     def to_dict(self) -> dict:
         """Convert usage tracking to dictionary."""
         return {
@@ -16,7 +16,9 @@ It includes:
 """
 
 import os
-from typing import Optional, Any, Dict, List
+import time
+from collections import OrderedDict
+from typing import Callable, Optional, Any, Dict, List
 from uuid import uuid4
 
 # Core DeepAgents imports
@@ -35,6 +37,84 @@ from src.services.mock_agent import MockAgent
 from src.models.memory import Memory
 
 
+class AgentCache:
+    """LRU cache of agent instances with an idle TTL.
+
+    Agents are keyed by ``(user_id, permission_mode, model)``. Once
+    ``max_size`` agents are cached the least recently used one is evicted,
+    and an agent unused for ``ttl_seconds`` is dropped on its next lookup or
+    on the next insert. Hit, miss and eviction counters are kept for
+    monitoring.
+    """
+
+    def __init__(
+        self,
+        max_size: int,
+        ttl_seconds: float,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.max_size = max(1, max_size)
+        self.ttl_seconds = ttl_seconds
+        self._clock = clock
+        self._entries: OrderedDict[str, tuple[Any, float]] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._entries
+
+    def _expired(self, last_used: float, now: float) -> bool:
+        return self.ttl_seconds > 0 and now - last_used > self.ttl_seconds
+
+    def get(self, key: str) -> Optional[Any]:
+        """Return a cached agent and mark it as recently used."""
+        entry = self._entries.get(key)
+        now = self._clock()
+        if entry is None or self._expired(entry[1], now):
+            if entry is not None:
+                del self._entries[key]
+                self.evictions += 1
+            self.misses += 1
+            return None
+        self._entries[key] = (entry[0], now)
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry[0]
+
+    def put(self, key: str, agent: Any) -> None:
+        """Cache an agent, evicting expired and then least recently used entries."""
+        now = self._clock()
+        self._entries[key] = (agent, now)
+        self._entries.move_to_end(key)
+
+        # Entries are ordered by last use, so expired ones sit at the front
+        while self._entries:
+            oldest_key, (_, last_used) = next(iter(self._entries.items()))
+            if len(self._entries) <= self.max_size and not self._expired(last_used, now):
+                break
+            del self._entries[oldest_key]
+            self.evictions += 1
+
+    def clear(self) -> None:
+        """Drop every cached agent (counters are kept)."""
+        self._entries.clear()
+
+    def stats(self) -> dict[str, Any]:
+        """Cache size and hit/miss/eviction counters."""
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "ttl_seconds": self.ttl_seconds,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+
 class AgentService:
     """Service for managing DeepAgents instances."""
 
@@ -43,7 +123,14 @@ class AgentService:
         from src.core.config import settings
 
         self.memory_store = InMemoryStore()
-        self.agents: dict[str, Any] = {}
+        # One checkpointer per process, shared by every agent, so evicting an
+        # agent never drops thread state and state is not duplicated per agent.
+        # Replaced by the SQLite-backed ones at startup (see use_persistence).
+        self.checkpointer = MemorySaver()
+        self.agents = AgentCache(
+            max_size=settings.agent_cache_max_size,
+            ttl_seconds=settings.agent_cache_ttl_seconds,
+        )
         self.settings = settings
         api_key = settings.get_anthropic_api_key()
         # Ensure api_key is None if empty string
@@ -58,6 +145,16 @@ class AgentService:
         else:
             print(f"✓ Anthropic API key loaded (length: {len(self.api_key)})")
 
+    def use_persistence(self, checkpointer: Any, store: Any) -> None:
+        """Switch every agent to a persistent checkpointer and store.
+
+        Cached agents still reference the in-memory ones, so they are dropped
+        and rebuilt on next use.
+        """
+        self.checkpointer = checkpointer
+        self.memory_store = store
+        self.agents.clear()
+
     def create_agent(
         self,
         user_id: str = "default",
@@ -83,7 +180,7 @@ class AgentService:
         Backend Configuration:
         9. StateBackend - Ephemeral file storage in agent state
         10. CompositeBackend - Hybrid memory (ephemeral + persistent via StoreBackend)
-        11. StoreBackend - Long-term memory via InMemoryStore
+        11. StoreBackend - Long-term memory via the shared store (SQLite-backed at runtime)
 
         Args:
             user_id: User identifier for agent context
@@ -192,9 +289,8 @@ You are helping build a Claude.ai clone application. Be professional, friendly,
             )
 
             # Step 6: Create backend configuration
-            # StateBackend for ephemeral working files (uses MemorySaver as runtime)
-            runtime = MemorySaver()
-            state_backend = StateBackend(runtime=runtime)
+            # StateBackend for ephemeral working files (uses the shared checkpointer as runtime)
+            state_backend = StateBackend(runtime=self.checkpointer)
 
             # CompositeBackend for hybrid memory (ephemeral + persistent)
             # Routes /memories/ to StoreBackend for long-term memory
@@ -214,6 +310,7 @@ You are helping build a Claude.ai clone application. Be professional, friendly,
                 interrupt_on=interrupt_config if interrupt_config else None,
                 backend=composite_backend,  # Use composite backend for hybrid memory
                 store=self.memory_store,    # Long-term memory store
+                checkpointer=self.checkpointer,  # Shared thread state
                 tools=[
                     self.extract_and_store_memory,
                     self.search_memories,
@@ -251,10 +348,12 @@ You are helping build a Claude.ai clone application. Be professional, friendly,
         """
         cache_key = f"{user_id}_{permission_mode}_{model}"
 
-        if cache_key not in self.agents:
-            self.agents[cache_key] = self.create_agent(user_id, permission_mode, model)
+        agent = self.agents.get(cache_key)
+        if agent is None:
+            agent = self.create_agent(user_id, permission_mode, model)
+            self.agents.put(cache_key, agent)
 
-        return self.agents[cache_key]
+        return agent
 
 
     async def extract_and_store_memory(self, content: str, conversation_id: Optional[str] = None) -> str:
@@ -0,0 +1,320 @@
+"""Batch operations that run in the background.
+
+A batch naming more than ``settings.batch_async_threshold`` conversations is
+not run inside the request that asked for it. ``enqueue`` records it as a
+``BackgroundTask`` row and the request answers 202 with the task id; one of
+``settings.batch_job_workers`` workers then runs it. Clients follow it with
+``GET /api/batch/operations/{task_id}`` or the tasks SSE stream,
+``GET /api/tasks/{task_id}/stream``.
+
+A job works in bounded steps: chunks of ``settings.batch_chunk_size`` ids for
+flag updates, one conversation at a time for exports. After a step that moves
+the percentage it saves ``BackgroundTask.progress`` and commits. That update
+only matches a running task, so a task cancelled with
+``PUT /api/tasks/{task_id}/cancel`` stops at its next step:
+
+- updates keep the chunks already applied and report the rest as cancelled
+- exports delete their partial file
+
+Exports are written to the ``export_store``; the task result carries the
+download URL. Job parameters are only held in memory, so jobs still queued or
+running at shutdown are marked cancelled.
+"""
+
+import asyncio
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Optional, Sequence
+from uuid import UUID
+
+from sqlalchemy import update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.core.config import settings
+from src.core.database import sibling_session
+from src.models.audit_log import AuditActionType
+from src.models.background_task import BackgroundTask, TaskStatus
+from src.services import export_service
+from src.services.batch_service import NOT_FOUND, BatchService, batch_service, unique_ids
+from src.services.export_store import ExportStore, export_store
+from src.utils.audit import log_audit
+
+EXPORT = "export"
+SHUTDOWN = "Interrupted by server shutdown"
+
+
+class JobCancelled(Exception):
+    """The job's task was cancelled while it ran."""
+
+
+@dataclass
+class BatchJob:
+    """One queued batch and the task row that tracks it."""
+
+    task_id: UUID
+    operation: str
+    conversation_ids: list[str]
+    # The enqueuing request's session; the job runs on a sibling of it
+    db: AsyncSession = field(repr=False)
+    values: Optional[dict[str, Any]] = None
+    export_format: str = "json"
+    user_id: str = "default-user"
+    ip_address: Optional[str] = None
+    user_agent: Optional[str] = None
+    progress: int = 0
+
+
+class BatchJobService:
+    """Queues large batches as background tasks and runs them on a worker pool."""
+
+    def __init__(
+        self,
+        threshold: int = settings.batch_async_threshold,
+        workers: int = settings.batch_job_workers,
+        batches: BatchService = batch_service,
+        store: ExportStore = export_store,
+    ):
+        self.threshold = threshold
+        self.workers = max(1, workers)
+        self.batches = batches
+        self.store = store
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._queue: Optional[asyncio.Queue] = None
+        self._workers: list[asyncio.Task] = []
+        self._running = 0
+
+    def runs_in_background(self, count: int) -> bool:
+        """Whether a batch of ``count`` conversations should be enqueued."""
+        return count > self.threshold
+
+    async def enqueue(
+        self,
+        db: AsyncSession,
+        operation: str,
+        conversation_ids: Sequence[Any],
+        values: Optional[dict[str, Any]] = None,
+        export_format: str = "json",
+        user_id: str = "default-user",
+        ip_address: Optional[str] = None,
+        user_agent: Optional[str] = None,
+    ) -> BackgroundTask:
+        """Record a batch as a pending task and queue it for the workers.
+
+        Args:
+            db: Request session; the task row is committed on it
+            operation: ``"export"`` or a key of ``UPDATE_OPERATIONS``
+            conversation_ids: Conversations to process
+            values: Extra column values for updates, e.g. ``{"project_id": ...}``
+            export_format: Export format, for ``"export"`` only
+        """
+        task = BackgroundTask(
+            user_id=user_id,
+            task_type=f"batch_{operation}",
+            status=TaskStatus.PENDING,
+            progress=0,
+            # The job's parameters are not persisted, so it cannot be retried
+            max_retries=0,
+        )
+        db.add(task)
+        await db.commit()
+
+        self._ensure_workers()
+        self._queue.put_nowait(BatchJob(
+            task_id=task.id,
+            operation=operation,
+            conversation_ids=unique_ids(conversation_ids),
+            db=db,
+            values=values,
+            export_format=export_format,
+            user_id=user_id,
+            ip_address=ip_address,
+            user_agent=user_agent,
+        ))
+        return task
+
+    async def run(self, job: BatchJob) -> None:
+        """Execute one job and record its outcome on the task."""
+        async with sibling_session(job.db) as db:
+            started = await self._set_status(
+                db, job, TaskStatus.RUNNING, expected=TaskStatus.PENDING, started_at=datetime.utcnow()
+            )
+            if not started:
+                # Cancelled while queued
+                return
+            try:
+                if job.operation == EXPORT:
+                    result = await self._export(db, job)
+                else:
+                    result = await self._update(db, job)
+            except JobCancelled:
+                return
+            except asyncio.CancelledError:
+                await db.rollback()
+                await self._set_status(db, job, TaskStatus.CANCELLED, error_message=SHUTDOWN)
+                raise
+            except Exception as e:
+                await db.rollback()
+                await self._set_status(db, job, TaskStatus.FAILED, error_message=str(e))
+                return
+
+            await db.execute(
+                update(BackgroundTask).where(BackgroundTask.id == job.task_id).values(result=result)
+            )
+            await self._set_status(db, job, TaskStatus.COMPLETED, progress=100)
+
+    async def join(self) -> None:
+        """Wait until every queued job has finished."""
+        if self._queue is not None:
+            await self._queue.join()
+
+    def stats(self) -> dict:
+        return {
+            "workers": self.workers,
+            "threshold": self.threshold,
+            "queued": self._queue.qsize() if self._queue is not None else 0,
+            "running": self._running,
+        }
+
+    async def shutdown(self) -> None:
+        """Cancel queued and running jobs and stop the workers (application shutdown)."""
+        queue = self._queue
+        while queue is not None and not queue.empty():
+            job = queue.get_nowait()
+            queue.task_done()
+            async with sibling_session(job.db) as db:
+                await self._set_status(
+                    db, job, TaskStatus.CANCELLED, expected=TaskStatus.PENDING, error_message=SHUTDOWN
+                )
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+        self._queue = None
+        self._loop = None
+
+    async def _update(self, db: AsyncSession, job: BatchJob) -> dict:
+        result = await self.batches.update(
+            db,
+            job.operation,
+            job.conversation_ids,
+            values=job.values,
+            user_id=job.user_id,
+            ip_address=job.ip_address,
+            user_agent=job.user_agent,
+            on_chunk=lambda done: self._report(db, job, done),
+        )
+        return {
+            "operation": job.operation,
+            "total_requested": len(result.requested),
+            "total_processed": len(result.succeeded) + len(result.failed),
+            "successful": result.succeeded,
+            "failed": [list(failure) for failure in result.failed],
+        }
+
+    async def _export(self, db: AsyncSession, job: BatchJob) -> dict:
+        ids = job.conversation_ids
+        conversations = await export_service.load_conversations(db, ids, include_deleted=True)
+        filename, path = self.store.new_file(export_service.FILE_EXTENSIONS[job.export_format])
+
+        async def report(done: int) -> None:
+            if not await self._report(db, job, done):
+                raise JobCancelled()
+
+        chunks = export_service.stream_batch_export(
+            db, ids, conversations, job.export_format, on_progress=report
+        )
+        try:
+            size = await export_service.write_export_file(path, chunks)
+        except BaseException:
+            path.unlink(missing_ok=True)
+            raise
+
+        successful = [cid for cid in ids if cid in conversations]
+        failed = [[cid, NOT_FOUND] for cid in ids if cid not in conversations]
+        file_url = self.store.url(filename)
+        await log_audit(
+            db=db,
+            user_id=job.user_id,
+            action=AuditActionType.BATCH_EXPORT,
+            resource_type="conversations",
+            details={
+                "export_format": job.export_format,
+                "total_requested": len(ids),
+                "successful": len(successful),
+                "failed": len(failed),
+                "file_url": file_url,
+                "task_id": str(job.task_id),
+            },
+            ip_address=job.ip_address,
+            user_agent=job.user_agent,
+        )
+        return {
+            "operation": "batch_export",
+            "export_format": job.export_format,
+            "total_requested": len(ids),
+            "total_exported": len(successful),
+            "file_url": file_url,
+            "size_bytes": size,
+            "successful": successful,
+            "failed": failed,
+        }
+
+    async def _report(self, db: AsyncSession, job: BatchJob, done: int) -> bool:
+        """Save progress after ``done`` ids. Returns False once the task was cancelled."""
+        progress = min(99, done * 100 // max(1, len(job.conversation_ids)))
+        if progress == job.progress:
+            return True
+        job.progress = progress
+        return await self._set_status(db, job, TaskStatus.RUNNING, progress=progress)
+
+    @staticmethod
+    async def _set_status(
+        db: AsyncSession,
+        job: BatchJob,
+        status: TaskStatus,
+        expected: TaskStatus = TaskStatus.RUNNING,
+        **values: Any,
+    ) -> bool:
+        """Move the task from ``expected`` to ``status`` and commit.
+
+        Returns False, changing nothing, if the task is no longer ``expected``.
+        """
+        if status in (TaskStatus.COMPLETED, TaskStatus.FAILED, TaskStatus.CANCELLED):
+            values.setdefault("completed_at", datetime.utcnow())
+        rows = await db.execute(
+            update(BackgroundTask)
+            .where(BackgroundTask.id == job.task_id, BackgroundTask.status == expected)
+            .values(status=status, **values)
+            .returning(BackgroundTask.id)
+        )
+        matched = rows.first() is not None
+        await db.commit()
+        return matched
+
+    def _ensure_workers(self) -> None:
+        # Started lazily: the global instance is built before the event loop runs
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._loop = loop
+            self._queue = asyncio.Queue()
+            self._workers = [
+                asyncio.create_task(self._worker(), name=f"batch-job-worker-{n}")
+                for n in range(self.workers)
+            ]
+
+    async def _worker(self) -> None:
+        queue = self._queue
+        while True:
+            job = await queue.get()
+            self._running += 1
+            try:
+                await self.run(job)
+            except Exception as e:
+                print(f"Batch job worker error: {e}")
+            finally:
+                self._running -= 1
+                queue.task_done()
+
+
+# Global batch job service instance
+batch_jobs = BatchJobService()
@@ -0,0 +1,213 @@
+"""Set-based batch operations on conversations.
+
+Every batch runs as a handful of statements however many ids it names:
+
+- flag changes (delete, archive, pin, move...) are one
+  ``UPDATE conversations ... WHERE id IN (...) RETURNING id`` per chunk of
+  ``settings.batch_chunk_size`` ids
+- duplicates read the originals with one ``SELECT`` per chunk and write the
+  copies with one multi-row ``INSERT``
+
+Ids that the statement did not return (missing or already deleted) are the
+failures; they come from diffing the request against ``RETURNING`` rather
+than from a lookup per id. The whole batch is written in one transaction with
+one consolidated audit entry. Background batches (``batch_jobs``) commit chunk
+by chunk instead, as they save their progress.
+"""
+
+import uuid
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Iterator, Optional, Sequence
+
+from sqlalchemy import insert, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.core.config import settings
+from src.models.audit_log import AuditActionType
+from src.models.conversation import Conversation
+from src.services.branch_graph_service import branch_graph_service
+from src.utils.audit import log_audit
+
+NOT_FOUND = "Conversation not found"
+CANCELLED = "Batch cancelled"
+
+# Column values written by each flag operation; "move" takes its project_id
+# from the caller
+UPDATE_OPERATIONS: dict[str, dict[str, Any]] = {
+    "delete": {"is_deleted": True},
+    "archive": {"is_archived": True},
+    "unarchive": {"is_archived": False},
+    "pin": {"is_pinned": True},
+    "unpin": {"is_pinned": False},
+    "move": {},
+}
+
+
+def chunked(ids: Sequence[str], size: int) -> Iterator[Sequence[str]]:
+    """Split ``ids`` into slices of at most ``size``."""
+    for start in range(0, len(ids), size):
+        yield ids[start:start + size]
+
+
+def unique_ids(conversation_ids: Sequence[Any]) -> list[str]:
+    """Ids as strings, duplicates dropped, request order kept."""
+    return list(dict.fromkeys(str(conversation_id) for conversation_id in conversation_ids))
+
+
+@dataclass
+class BatchResult:
+    """Outcome of one batch: which ids succeeded and why the others failed."""
+
+    operation: str
+    requested: list[str] = field(default_factory=list)
+    succeeded: list[str] = field(default_factory=list)
+    failed: list[tuple[str, str]] = field(default_factory=list)
+    # Duplicates only: original id -> new conversation
+    created: dict[str, dict] = field(default_factory=dict)
+
+    def audit_details(self, **extra: Any) -> dict:
+        return {
+            "operation": self.operation,
+            "total_requested": len(self.requested),
+            "successful": len(self.succeeded),
+            "failed": len(self.failed),
+            "failed_ids": [conversation_id for conversation_id, _ in self.failed],
+            "batch_operation": True,
+            **extra,
+        }
+
+
+class BatchService:
+    """Runs batch operations as set-based statements."""
+
+    def __init__(self, chunk_size: int = settings.batch_chunk_size):
+        self.chunk_size = chunk_size
+
+    @staticmethod
+    def _settle(result: BatchResult, done: set[str], skipped: Sequence[str] = ()) -> None:
+        """Split the requested ids into successes and failures, in request order."""
+        skipped = set(skipped)
+        result.succeeded = [cid for cid in result.requested if cid in done]
+        result.failed = [
+            (cid, CANCELLED if cid in skipped else NOT_FOUND)
+            for cid in result.requested
+            if cid not in done
+        ]
+
+    async def update(
+        self,
+        db: AsyncSession,
+        operation: str,
+        conversation_ids: Sequence[Any],
+        values: Optional[dict[str, Any]] = None,
+        user_id: str = "default-user",
+        ip_address: Optional[str] = None,
+        user_agent: Optional[str] = None,
+        on_chunk: Optional[Callable[[int], Awaitable[bool]]] = None,
+    ) -> BatchResult:
+        """Apply a flag operation to every live conversation in ``conversation_ids``.
+
+        Args:
+            db: Database session; committed once at the end
+            operation: Key of ``UPDATE_OPERATIONS``
+            conversation_ids: Conversations to change
+            values: Extra column values, e.g. ``{"project_id": ...}`` for move
+            on_chunk: Awaited after each chunk with the number of ids done so
+                far; returning False stops the batch and the remaining ids
+                fail as cancelled. It may commit the chunks applied so far.
+
+        Raises:
+            ValueError: Unknown operation
+        """
+        if operation not in UPDATE_OPERATIONS:
+            raise ValueError(f"Unknown batch operation: {operation}")
+        result = BatchResult(operation=operation, requested=unique_ids(conversation_ids))
+        changes = {**UPDATE_OPERATIONS[operation], **(values or {}), "updated_at": datetime.utcnow()}
+
+        done: set[str] = set()
+        processed = 0
+        for chunk in chunked(result.requested, self.chunk_size):
+            rows = await db.execute(
+                update(Conversation)
+                .where(Conversation.id.in_(chunk), Conversation.is_deleted == False)
+                .values(**changes)
+                .returning(Conversation.id)
+            )
+            done.update(rows.scalars().all())
+            processed += len(chunk)
+            if on_chunk is not None and not await on_chunk(processed):
+                break
+        self._settle(result, done, skipped=result.requested[processed:])
+
+        await log_audit(
+            db=db,
+            user_id=user_id,
+            action=AuditActionType.BATCH_OPERATION,
+            resource_type="conversations",
+            details=result.audit_details(**(values or {})),
+            ip_address=ip_address,
+            user_agent=user_agent,
+        )
+        await db.commit()
+
+        if operation == "delete":
+            branch_graph_service.invalidate(*result.succeeded)
+        return result
+
+    async def duplicate(
+        self,
+        db: AsyncSession,
+        conversation_ids: Sequence[Any],
+        user_id: str = "default-user",
+        ip_address: Optional[str] = None,
+        user_agent: Optional[str] = None,
+    ) -> BatchResult:
+        """Copy every live conversation in ``conversation_ids`` (without messages)."""
+        result = BatchResult(operation="duplicate", requested=unique_ids(conversation_ids))
+        now = datetime.utcnow()
+
+        for chunk in chunked(result.requested, self.chunk_size):
+            originals = await db.execute(
+                select(Conversation.id, Conversation.title, Conversation.model, Conversation.project_id)
+                .where(Conversation.id.in_(chunk), Conversation.is_deleted == False)
+            )
+            rows = [
+                {
+                    "id": str(uuid.uuid4()),
+                    "title": f"{original.title} (Copy)",
+                    "model": original.model,
+                    "project_id": original.project_id,
+                    "created_at": now,
+                    "updated_at": now,
+                    "last_message_at": now,
+                    "original_id": original.id,
+                }
+                for original in originals
+            ]
+            if not rows:
+                continue
+            await db.execute(
+                insert(Conversation),
+                [{key: value for key, value in row.items() if key != "original_id"} for row in rows],
+            )
+            for row in rows:
+                result.created[row["original_id"]] = {"id": row["id"], "title": row["title"]}
+        self._settle(result, set(result.created))
+
+        await log_audit(
+            db=db,
+            user_id=user_id,
+            action=AuditActionType.BATCH_OPERATION,
+            resource_type="conversations",
+            details=result.audit_details(
+                created={original: new["id"] for original, new in result.created.items()}
+            ),
+            ip_address=ip_address,
+            user_agent=user_agent,
+        )
+        await db.commit()
+        return result
+
+
+batch_service = BatchService()
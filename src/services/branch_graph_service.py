@@ -0,0 +1,276 @@
+"""Conversation branch trees.
+
+A conversation's branch tree is its root (the topmost live ancestor) plus
+every live descendant of that root. The whole tree is fetched with a single
+statement: one recursive CTE climbs from the conversation to its root and a
+second one descends from the root through every level of branches. A corrupt
+``parent_conversation_id`` cycle cannot loop forever: the climb stops before
+revisiting a conversation (the repeated ancestor becomes the root) and the
+descent uses ``UNION`` rather than ``UNION ALL``.
+
+Trees are cached per root. A cached tree is checked with a cheap version
+probe over its members and their direct children (live row count and latest
+``updated_at``), so new branches, deletions and message count changes from
+any worker result in a fresh tree. Routes that create, delete or re-parent
+branches also drop the cached tree straight away with ``invalidate``.
+"""
+
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Hashable, Optional
+
+from sqlalchemy import case, func, literal, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import aliased
+
+from src.core.config import settings
+from src.models.conversation import Conversation
+
+NODE_COLUMNS = (
+    Conversation.id,
+    Conversation.title,
+    Conversation.model,
+    Conversation.parent_conversation_id,
+    Conversation.branch_point_message_id,
+    Conversation.branch_name,
+    Conversation.branch_color,
+    Conversation.is_archived,
+    Conversation.is_pinned,
+    Conversation.message_count,
+    Conversation.token_count,
+    Conversation.created_at,
+)
+
+
+def _isoformat(value: Optional[datetime]) -> Optional[str]:
+    return value.isoformat() if value else None
+
+
+@dataclass
+class BranchGraph:
+    """Every live conversation in one branch tree, in creation order."""
+
+    root_id: str
+    nodes: dict[str, dict] = field(default_factory=dict)
+    children: dict[str, list[str]] = field(default_factory=dict)
+    depths: dict[str, int] = field(default_factory=dict)
+    version: Hashable = None
+
+    @classmethod
+    def from_rows(cls, root_id: str, rows: list[Any]) -> "BranchGraph":
+        """Build the graph from tree rows ordered by ``created_at``."""
+        graph = cls(root_id=root_id)
+        latest = None
+        for row in rows:
+            graph.nodes[row.id] = {
+                column.key: getattr(row, column.key) for column in NODE_COLUMNS
+            }
+            graph.nodes[row.id]["created_at"] = _isoformat(row.created_at)
+            graph.children[row.id] = []
+            if row.updated_at and (latest is None or row.updated_at > latest):
+                latest = row.updated_at
+        for node_id, node in graph.nodes.items():
+            parent_id = node["parent_conversation_id"]
+            if node_id != root_id and parent_id in graph.children:
+                graph.children[parent_id].append(node_id)
+
+        # Breadth first from the root; every node is visited once even if the
+        # parent links are corrupt
+        graph.depths[root_id] = 0
+        queue = [root_id]
+        for node_id in queue:
+            for child_id in graph.children[node_id]:
+                if child_id not in graph.depths:
+                    graph.depths[child_id] = graph.depths[node_id] + 1
+                    queue.append(child_id)
+        graph.version = (len(rows), latest)
+        return graph
+
+    @property
+    def root(self) -> dict:
+        return self.nodes[self.root_id]
+
+    def branches(self) -> list[dict]:
+        """Every node below the root, in creation order."""
+        return [
+            {**node, "depth": self.depths.get(node_id, 0)}
+            for node_id, node in self.nodes.items()
+            if node_id != self.root_id
+        ]
+
+    def nested(self) -> dict:
+        """The tree as nested nodes, each with its ``children`` and ``depth``."""
+        built: dict[str, dict] = {}
+        # Children before parents, so each node can pick up its built children
+        for node_id in sorted(self.depths, key=self.depths.get, reverse=True):
+            built[node_id] = {
+                **self.nodes[node_id],
+                "depth": self.depths[node_id],
+                "children": [
+                    built[child_id]
+                    for child_id in self.children[node_id]
+                    if self.depths.get(child_id) == self.depths[node_id] + 1
+                ],
+            }
+        return built[self.root_id]
+
+    def totals(self) -> dict:
+        return {
+            "node_count": len(self.nodes),
+            "message_count": sum(node["message_count"] or 0 for node in self.nodes.values()),
+            "token_count": sum(node["token_count"] or 0 for node in self.nodes.values()),
+        }
+
+
+class BranchGraphService:
+    """Fetches and caches conversation branch trees."""
+
+    def __init__(self, max_entries: int = settings.branch_graph_cache_max_entries):
+        self.max_entries = max_entries
+        self._graphs: OrderedDict[str, BranchGraph] = OrderedDict()
+        # Conversation id -> root id of the cached tree it belongs to
+        self._roots: dict[str, str] = {}
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def tree_query(conversation_id: str):
+        """Select every live node of the tree containing ``conversation_id``.
+
+        Each row also carries the tree's ``root_id``. The climb records the
+        path it has taken and stops before revisiting a conversation, so on a
+        parent cycle the root is the first repeated ancestor; that is the
+        conversation itself when it lies on the cycle.
+        """
+        parent = aliased(Conversation)
+        ancestors = (
+            select(
+                Conversation.id,
+                Conversation.parent_conversation_id.label("parent_id"),
+                literal(0).label("depth"),
+                ("/" + Conversation.id + "/").label("path"),
+            )
+            .where(Conversation.id == conversation_id, Conversation.is_deleted == False)
+            .cte("ancestors", recursive=True)
+        )
+        ancestors = ancestors.union(
+            select(
+                parent.id,
+                parent.parent_conversation_id,
+                ancestors.c.depth + 1,
+                ancestors.c.path + parent.id + "/",
+            )
+            .join(ancestors, parent.id == ancestors.c.parent_id)
+            .where(
+                parent.is_deleted == False,
+                func.instr(ancestors.c.path, "/" + parent.id + "/") == 0,
+            )
+        )
+        # The climb ends at the topmost live ancestor, or just below the
+        # first ancestor it would visit twice
+        last = (
+            select(ancestors.c.id, ancestors.c.parent_id)
+            .order_by(ancestors.c.depth.desc())
+            .limit(1)
+            .subquery()
+        )
+        root_id = (
+            select(
+                case(
+                    (last.c.parent_id.in_(select(ancestors.c.id)), last.c.parent_id),
+                    else_=last.c.id,
+                )
+            )
+            .scalar_subquery()
+        )
+
+        child = aliased(Conversation)
+        tree = (
+            select(Conversation.id)
+            .where(Conversation.id == root_id, Conversation.is_deleted == False)
+            .cte("branch_tree", recursive=True)
+        )
+        tree = tree.union(
+            select(child.id)
+            .join(tree, child.parent_conversation_id == tree.c.id)
+            .where(child.is_deleted == False)
+        )
+        return (
+            select(*NODE_COLUMNS, Conversation.updated_at, root_id.label("root_id"))
+            .join(tree, tree.c.id == Conversation.id)
+            .order_by(Conversation.created_at, Conversation.id)
+        )
+
+    async def _probe(self, db: AsyncSession, graph: BranchGraph) -> Hashable:
+        """Live row count and latest update of the tree's members and their children."""
+        ids = list(graph.nodes)
+        row = (
+            await db.execute(
+                select(func.count(), func.max(Conversation.updated_at)).where(
+                    Conversation.is_deleted == False,
+                    or_(Conversation.id.in_(ids), Conversation.parent_conversation_id.in_(ids)),
+                )
+            )
+        ).first()
+        return (row[0], row[1])
+
+    async def get_graph(self, conversation_id: str, db: AsyncSession) -> Optional[BranchGraph]:
+        """Return the branch tree containing ``conversation_id``.
+
+        Returns:
+            The tree, or None if the conversation does not exist or is deleted
+        """
+        root_id = self._roots.get(conversation_id)
+        graph = self._graphs.get(root_id) if root_id else None
+        if graph is not None:
+            if await self._probe(db, graph) == graph.version:
+                self._graphs.move_to_end(root_id)
+                self.hits += 1
+                return graph
+            self.invalidate(conversation_id)
+
+        self.misses += 1
+        rows = (await db.execute(self.tree_query(conversation_id))).all()
+        if not rows:
+            return None
+        graph = BranchGraph.from_rows(rows[0].root_id, rows)
+        self._put(graph)
+        return graph
+
+    def _put(self, graph: BranchGraph) -> None:
+        self.invalidate(graph.root_id)
+        self._graphs[graph.root_id] = graph
+        for node_id in graph.nodes:
+            self._roots[node_id] = graph.root_id
+        while len(self._graphs) > self.max_entries:
+            _, evicted = self._graphs.popitem(last=False)
+            self._forget(evicted)
+
+    def _forget(self, graph: BranchGraph) -> None:
+        for node_id in graph.nodes:
+            if self._roots.get(node_id) == graph.root_id:
+                del self._roots[node_id]
+
+    def invalidate(self, *conversation_ids: Optional[str]) -> None:
+        """Drop the cached trees containing any of ``conversation_ids``."""
+        for conversation_id in conversation_ids:
+            root_id = self._roots.get(conversation_id) or conversation_id
+            graph = self._graphs.pop(root_id, None)
+            if graph is not None:
+                self._forget(graph)
+
+    def clear(self) -> None:
+        self._graphs.clear()
+        self._roots.clear()
+
+    def stats(self) -> dict:
+        return {
+            "size": len(self._graphs),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+
+branch_graph_service = BranchGraphService()
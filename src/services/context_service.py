@@ -0,0 +1,286 @@
+"""Context assembly for agent requests.
+
+Before a turn is sent to the agent, the conversation's project instructions,
+project files and long-term memories are rendered into the prompt. The
+conversation row is read once. The project-files and memory lookups do not
+depend on each other, so they run concurrently, each on its own session.
+(One ``AsyncSession`` cannot run two queries at the same time.)
+
+The rendered project-files block is cached. It is keyed by a cheap version
+probe (row count and latest ``updated_at``), so any upload, edit or delete,
+from any worker, results in a fresh render. Most turns do not change the
+knowledge base, so they only pay for the probe and not for re-reading and
+re-concatenating every file. Routes that change files also drop the cached
+entry straight away with ``invalidate_project``.
+
+A project whose files fit in ``settings.retrieval_token_budget`` is inlined
+whole. Larger projects only get the passages most relevant to the message,
+chosen by ``retrieval_service``. Either way, ``AgentContext.sources`` lists
+what was included.
+
+Memories are chosen per message by ``memory_retrieval_service``, capped at
+``settings.memory_top_k`` memories and ``settings.memory_token_budget``
+tokens.
+"""
+
+import asyncio
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Hashable, Optional
+
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.core.config import settings
+from src.core.database import has_private_connection, sibling_session
+from src.models.conversation import Conversation
+from src.models.project import Project
+from src.models.project_file import ProjectFile
+from src.services.memory_retrieval_service import memory_retrieval_service
+from src.services.retrieval_service import RetrievedChunk, retrieval_service
+from src.utils.chunking import estimate_tokens
+
+
+@dataclass
+class AgentContext:
+    """Everything the agent needs to know about a conversation's surroundings."""
+
+    project_id: Optional[str] = None
+    project_instructions: str = ""
+    global_instructions: str = ""
+    files_content: str = ""
+    memory_content: str = ""
+    # Project files or passages included in files_content
+    sources: list[dict] = field(default_factory=list)
+
+    def effective_instructions(self, explicit: Optional[str] = None) -> str:
+        """Explicit instructions win, then project, then global instructions."""
+        if explicit and explicit.strip():
+            return explicit
+        return self.project_instructions or self.global_instructions
+
+
+def render_project_files(files: list[tuple[str, str]]) -> str:
+    """Format (filename, content) pairs as the project files context block."""
+    if not files:
+        return ""
+    parts = [
+        "\n\n[PROJECT FILES CONTEXT]\n",
+        "The following files are available in this project:\n\n",
+    ]
+    for filename, content in files:
+        parts.append(f"--- File: {filename} ---\n")
+        parts.append(f"Content:\n{content}\n\n")
+    parts.append("[END PROJECT FILES CONTEXT]\n\n")
+    return "".join(parts)
+
+
+def render_retrieved_chunks(chunks: list[RetrievedChunk]) -> str:
+    """Format retrieved passages as the project files context block."""
+    if not chunks:
+        return ""
+    parts = [
+        "\n\n[PROJECT FILES CONTEXT]\n",
+        "The following excerpts from this project's files are relevant to the request:\n\n",
+    ]
+    for chunk in chunks:
+        parts.append(f"--- File: {chunk.filename} (excerpt {chunk.chunk_index + 1}) ---\n")
+        parts.append(f"Content:\n{chunk.content}\n\n")
+    parts.append("[END PROJECT FILES CONTEXT]\n\n")
+    return "".join(parts)
+
+
+def render_memories(memories: list[tuple[str, str]]) -> str:
+    """Format (category, content) pairs as the long-term memory context block."""
+    if not memories:
+        return ""
+    parts = [
+        "\n\n[LONG-TERM MEMORY CONTEXT]\n",
+        "The following are facts and preferences stored in your long-term memory:\n\n",
+    ]
+    parts.extend(f"- [{category.upper()}] {content}\n" for category, content in memories)
+    parts.append("[END LONG-TERM MEMORY CONTEXT]\n\n")
+    return "".join(parts)
+
+
+@dataclass
+class RenderedBlock:
+    """A rendered context block, its size and where its text came from."""
+
+    text: str = ""
+    tokens: int = 0
+    sources: list[dict] = field(default_factory=list)
+
+
+class RenderedBlockCache:
+    """Small LRU of rendered context blocks, each tagged with the version it was built from."""
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries: OrderedDict[Hashable, tuple[Hashable, RenderedBlock]] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable, version: Hashable) -> Optional[RenderedBlock]:
+        """Return the cached block if it was rendered from ``version``."""
+        entry = self._entries.get(key)
+        if entry is None or entry[0] != version:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry[1]
+
+    def put(self, key: Hashable, version: Hashable, block: RenderedBlock) -> None:
+        self._entries[key] = (version, block)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def pop(self, key: Hashable) -> None:
+        self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def stats(self) -> dict:
+        return {
+            "size": len(self._entries),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+
+class ContextService:
+    """Assembles instructions, project files and memories for an agent turn."""
+
+    def __init__(self, max_entries: int = settings.context_cache_max_entries):
+        self.cache = RenderedBlockCache(max_entries)
+
+    async def assemble(
+        self,
+        conversation_id: Optional[str],
+        db: AsyncSession,
+        query: str = "",
+    ) -> AgentContext:
+        """Build the context for a turn in ``conversation_id`` (which may be None).
+
+        ``query`` is the user's message. It selects the passages of projects
+        too large to inline.
+        """
+        from src.api.routes.settings import user_settings
+
+        instructions = await user_settings.aget("custom_instructions", "")
+        context = AgentContext(global_instructions=instructions or "")
+        memory_enabled = await user_settings.aget("memory_enabled", True)
+
+        if conversation_id:
+            # Conversation and project instructions in one round trip
+            result = await db.execute(
+                select(Conversation.project_id, Project.custom_instructions)
+                .outerjoin(Project, Project.id == Conversation.project_id)
+                .where(Conversation.id == conversation_id)
+            )
+            row = result.first()
+            if row is not None:
+                context.project_id = row.project_id
+                context.project_instructions = row.custom_instructions or ""
+
+        lookups: list[Callable[[AsyncSession], Awaitable[RenderedBlock]]] = []
+        if context.project_id:
+            project_id = context.project_id
+            lookups.append(lambda session: self.project_knowledge(project_id, query, session))
+        if memory_enabled:
+            lookups.append(lambda session: self.memory_block(query, session))
+
+        results = await self._run_concurrently(db, lookups)
+        if context.project_id:
+            knowledge = results.pop(0)
+            context.files_content = knowledge.text
+            context.sources = knowledge.sources
+        if memory_enabled:
+            context.memory_content = results.pop(0).text
+        return context
+
+    async def project_knowledge(self, project_id: str, query: str, db: AsyncSession) -> RenderedBlock:
+        """All of a project's files if they fit the budget, otherwise the best passages."""
+        block = await self.project_files_block(project_id, db)
+        if block.tokens <= settings.retrieval_token_budget:
+            return block
+
+        chunks = await retrieval_service.retrieve(db, project_id, query)
+        text = render_retrieved_chunks(chunks)
+        return RenderedBlock(
+            text=text,
+            tokens=estimate_tokens(text),
+            sources=[chunk.source() for chunk in chunks],
+        )
+
+    async def project_files_block(self, project_id: str, db: AsyncSession) -> RenderedBlock:
+        """Rendered contents of a project's files, from cache when unchanged."""
+        key = ("files", project_id)
+        version = await self._version(
+            db,
+            select(func.count(ProjectFile.id), func.max(ProjectFile.updated_at))
+            .where(ProjectFile.project_id == project_id),
+        )
+        cached = self.cache.get(key, version)
+        if cached is not None:
+            return cached
+
+        result = await db.execute(
+            select(ProjectFile.id, ProjectFile.original_filename, ProjectFile.content)
+            .where(ProjectFile.project_id == project_id)
+            .where(ProjectFile.is_deleted == False)
+            .where(ProjectFile.content != None)
+        )
+        files = result.all()
+        text = render_project_files([(name, content) for _, name, content in files])
+        block = RenderedBlock(
+            text=text,
+            tokens=estimate_tokens(text),
+            sources=[
+                {"file_id": file_id, "filename": name, "chunk_index": None, "tokens": estimate_tokens(content)}
+                for file_id, name, content in files
+            ],
+        )
+        self.cache.put(key, version, block)
+        return block
+
+    async def memory_block(self, query: str, db: AsyncSession) -> RenderedBlock:
+        """Rendered memories most relevant to the message, best first."""
+        memories = await memory_retrieval_service.for_context(db, query)
+        text = render_memories([(memory.category, memory.content) for memory in memories])
+        return RenderedBlock(text=text, tokens=estimate_tokens(text))
+
+    def invalidate_project(self, project_id: str) -> None:
+        """Forget the rendered files of a project after an upload, edit or delete."""
+        self.cache.pop(("files", project_id))
+
+    def stats(self) -> dict:
+        return self.cache.stats()
+
+    async def _version(self, db: AsyncSession, statement: Any) -> tuple:
+        result = await db.execute(statement)
+        return tuple(result.one())
+
+    async def _run_concurrently(
+        self,
+        db: AsyncSession,
+        lookups: list[Callable[[AsyncSession], Awaitable[Any]]],
+    ) -> list[Any]:
+        """Run lookups side by side, each on a fresh session bound to ``db``'s engine."""
+        if len(lookups) < 2 or has_private_connection(db):
+            # A private in-memory database has a single connection, so reuse the session
+            return [await lookup(db) for lookup in lookups]
+
+        async def run(lookup: Callable[[AsyncSession], Awaitable[Any]]) -> Any:
+            async with sibling_session(db) as session:
+                return await lookup(session)
+
+        return list(await asyncio.gather(*(run(lookup) for lookup in lookups)))
+
+
+# Global context service instance
+context_service = ContextService()
@@ -0,0 +1,454 @@
+"""Streaming conversation export.
+
+Exports are produced as async generators of text chunks so routes can hand
+them straight to ``StreamingResponse`` (or write them to a file) without ever
+materializing a whole conversation. Messages are read through a server-side
+cursor as plain rows, a partition at a time, so memory use stays constant no
+matter how long the history is.
+
+Supported formats:
+- ``json``: the same document shape as the original in-memory export
+- ``jsonl``: one ``conversation`` header line followed by one line per message
+- ``markdown``: the human-readable transcript
+- ``zip`` (batch only): one entry per conversation, written entry by entry
+- ``csv`` (batch only): one row per message
+"""
+
+import csv
+import io
+import json
+import zipfile
+from typing import Any, AsyncIterator, Awaitable, Callable, Optional
+
+from sqlalchemy import func, select
+from sqlalchemy.engine import Row
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.models.conversation import Conversation
+from src.models.message import Message
+from src.services.message_history import visible_messages
+
+EXPORT_BATCH_SIZE = 500
+EXPORT_CHUNK_SIZE = 64 * 1024
+
+EXPORT_FORMATS = ("json", "jsonl", "markdown")
+
+MEDIA_TYPES = {
+    "csv": "text/csv",
+    "json": "application/json",
+    "jsonl": "application/x-ndjson",
+    "markdown": "text/markdown",
+    "zip": "application/zip",
+}
+
+FILE_EXTENSIONS = {
+    "csv": "csv",
+    "json": "json",
+    "jsonl": "jsonl",
+    "markdown": "md",
+    "zip": "zip",
+}
+
+_MESSAGE_COLUMNS = (
+    Message.id,
+    Message.role,
+    Message.content,
+    Message.created_at,
+    Message.edited_at,
+    Message.tool_calls,
+    Message.tool_results,
+    Message.thinking_content,
+    Message.attachments,
+    Message.input_tokens,
+    Message.output_tokens,
+    Message.cache_read_tokens,
+    Message.cache_write_tokens,
+)
+
+# Called by the batch streams with the number of ids done so far
+ProgressCallback = Callable[[int], Awaitable[None]]
+
+_ROLE_HEADINGS = {
+    "user": "## 👤 User",
+    "assistant": "## 🤖 Assistant",
+    "system": "## ⚙️ System",
+}
+
+
+def export_filename(title: str, export_format: str) -> str:
+    """Build a download filename from a conversation title."""
+    safe_title = (title or "conversation").replace(" ", "_").replace("/", "_")
+    return f"{safe_title}_export.{FILE_EXTENSIONS[export_format]}"
+
+
+async def iter_message_rows(
+    db: AsyncSession,
+    conversation_id: str,
+    batch_size: int = EXPORT_BATCH_SIZE,
+) -> AsyncIterator[Row]:
+    """Yield a conversation's messages in order through a server-side cursor.
+
+    A branch yields the parent messages it shares, then its own.
+    Rows are plain column tuples rather than ORM instances, so nothing is
+    retained in the session identity map while the export runs.
+    """
+    result = await db.stream(
+        visible_messages(conversation_id, *_MESSAGE_COLUMNS)
+        .order_by(Message.created_at, Message.id)
+        .execution_options(yield_per=batch_size)
+    )
+    async for partition in result.partitions():
+        for row in partition:
+            yield row
+
+
+async def count_messages(db: AsyncSession, conversation_id: str) -> int:
+    """Count messages without loading them."""
+    result = await db.execute(visible_messages(conversation_id, func.count(Message.id)))
+    return result.scalar() or 0
+
+
+def message_to_dict(row: Row) -> dict[str, Any]:
+    """Serialize a message row in the export schema."""
+    return {
+        "id": row.id,
+        "role": row.role,
+        "content": row.content,
+        "created_at": row.created_at.isoformat(),
+        "edited_at": row.edited_at.isoformat() if row.edited_at else None,
+        "tool_calls": row.tool_calls,
+        "tool_results": row.tool_results,
+        "thinking_content": row.thinking_content,
+        "attachments": row.attachments,
+        "input_tokens": row.input_tokens,
+        "output_tokens": row.output_tokens,
+        "cache_read_tokens": row.cache_read_tokens,
+        "cache_write_tokens": row.cache_write_tokens,
+    }
+
+
+def conversation_to_dict(conversation: Conversation) -> dict[str, Any]:
+    """Serialize conversation-level fields in the export schema."""
+    return {
+        "id": conversation.id,
+        "title": conversation.title,
+        "model": conversation.model,
+        "created_at": conversation.created_at.isoformat(),
+        "updated_at": conversation.updated_at.isoformat(),
+    }
+
+
+def conversation_metadata(conversation: Conversation, message_count: int) -> dict[str, Any]:
+    """Trailing metadata block for JSON exports."""
+    return {
+        "message_count": message_count,
+        "token_count": conversation.token_count,
+        "is_archived": conversation.is_archived,
+        "is_pinned": conversation.is_pinned,
+    }
+
+
+def _dumps(data: Any) -> str:
+    return json.dumps(data, ensure_ascii=False)
+
+
+def render_message_markdown(row: Row) -> str:
+    """Render one message as a markdown section."""
+    if row.role == "tool":
+        tool_name = "unknown"
+        if row.tool_calls and "name" in row.tool_calls:
+            tool_name = row.tool_calls["name"]
+        heading = f"## 🔧 Tool: {tool_name}"
+    else:
+        heading = _ROLE_HEADINGS.get(row.role)
+
+    lines = [heading] if heading else []
+    lines.extend(["", row.content, ""])
+
+    if row.thinking_content:
+        lines.extend([
+            "<details>",
+            "<summary>Thinking Process</summary>",
+            "",
+            row.thinking_content,
+            "",
+            "</details>",
+            "",
+        ])
+
+    if row.tool_results:
+        lines.extend(["**Tool Results:**", "```json", json.dumps(row.tool_results, indent=2), "```", ""])
+
+    if row.tool_calls:
+        lines.extend(["**Tool Call:**", "```json", json.dumps(row.tool_calls, indent=2), "```", ""])
+
+    if row.input_tokens or row.output_tokens:
+        total = row.input_tokens + row.output_tokens
+        lines.append(f"*Tokens: {row.input_tokens} in, {row.output_tokens} out, {total} total*")
+        lines.append("")
+
+    lines.extend(["---", ""])
+    return "\n".join(lines) + "\n"
+
+
+async def stream_conversation_json(
+    db: AsyncSession, conversation: Conversation
+) -> AsyncIterator[str]:
+    """Stream a conversation as a single JSON document."""
+    header = _dumps(conversation_to_dict(conversation))
+    yield header[:-1] + ', "messages": ['
+
+    count = 0
+    async for row in iter_message_rows(db, conversation.id):
+        yield ("," if count else "") + _dumps(message_to_dict(row))
+        count += 1
+
+    yield '], "metadata": ' + _dumps(conversation_metadata(conversation, count)) + "}"
+
+
+async def stream_conversation_jsonl(
+    db: AsyncSession, conversation: Conversation
+) -> AsyncIterator[str]:
+    """Stream a conversation as JSON Lines."""
+    yield _dumps({"type": "conversation", **conversation_to_dict(conversation)}) + "\n"
+    async for row in iter_message_rows(db, conversation.id):
+        yield _dumps({"type": "message", "conversation_id": conversation.id, **message_to_dict(row)}) + "\n"
+
+
+async def stream_conversation_markdown(
+    db: AsyncSession, conversation: Conversation
+) -> AsyncIterator[str]:
+    """Stream a conversation as a markdown transcript."""
+    message_count = await count_messages(db, conversation.id)
+    yield "\n".join([
+        f"# {conversation.title}",
+        "",
+        f"**Model:** {conversation.model}",
+        f"**Created:** {conversation.created_at.strftime('%Y-%m-%d %H:%M:%S')}",
+        f"**Updated:** {conversation.updated_at.strftime('%Y-%m-%d %H:%M:%S')}",
+        f"**Message Count:** {message_count}",
+        "",
+        "---",
+        "",
+    ]) + "\n"
+    async for row in iter_message_rows(db, conversation.id):
+        yield render_message_markdown(row)
+
+
+def stream_conversation(
+    db: AsyncSession, conversation: Conversation, export_format: str
+) -> AsyncIterator[str]:
+    """Dispatch to the streaming exporter for a format."""
+    if export_format == "json":
+        return stream_conversation_json(db, conversation)
+    if export_format == "jsonl":
+        return stream_conversation_jsonl(db, conversation)
+    if export_format == "markdown":
+        return stream_conversation_markdown(db, conversation)
+    raise ValueError(f"Unsupported export format: {export_format}")
+
+
+async def stream_batch(
+    db: AsyncSession,
+    conversation_ids: list[str],
+    conversations: dict[str, Conversation],
+    export_format: str,
+    on_progress: Optional[ProgressCallback] = None,
+) -> AsyncIterator[str]:
+    """Stream several conversations as one document.
+
+    ``json`` keeps the ``{"results": [...], "success_count", "failure_count"}``
+    envelope (counts come last because they are only known at the end);
+    missing ids are reported inline as ``{"conversation_id", "error"}``.
+    """
+    success_count = 0
+    failure_count = 0
+
+    if export_format == "json":
+        yield '{"results": ['
+    for index, conversation_id in enumerate(conversation_ids):
+        if on_progress is not None and index:
+            await on_progress(index)
+        conversation = conversations.get(conversation_id)
+        if conversation is None:
+            failure_count += 1
+            if export_format == "json":
+                yield ("," if index else "") + _dumps({"conversation_id": conversation_id, "error": "Not found"})
+            elif export_format == "jsonl":
+                yield _dumps({"type": "error", "conversation_id": conversation_id, "error": "Not found"}) + "\n"
+            continue
+
+        if export_format == "json" and index:
+            yield ","
+        elif export_format == "markdown" and success_count:
+            yield "\n\n"
+        async for chunk in stream_conversation(db, conversation, export_format):
+            yield chunk
+        success_count += 1
+
+    if export_format == "json":
+        yield f'], "success_count": {success_count}, "failure_count": {failure_count}}}'
+    if on_progress is not None:
+        await on_progress(len(conversation_ids))
+
+
+CSV_FIELDS = ("conversation_id", "conversation_title", "message_id", "role", "content", "created_at")
+CSV_CONTENT_LIMIT = 1000
+
+
+async def stream_batch_csv(
+    db: AsyncSession,
+    conversation_ids: list[str],
+    conversations: dict[str, Conversation],
+    on_progress: Optional[ProgressCallback] = None,
+) -> AsyncIterator[str]:
+    """Stream one CSV row per message across several conversations."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(CSV_FIELDS)
+    for index, conversation_id in enumerate(conversation_ids):
+        if on_progress is not None and index:
+            await on_progress(index)
+        conversation = conversations.get(conversation_id)
+        if conversation is None:
+            continue
+        async for row in iter_message_rows(db, conversation.id):
+            writer.writerow((
+                conversation.id,
+                conversation.title,
+                row.id,
+                row.role,
+                (row.content or "")[:CSV_CONTENT_LIMIT],
+                row.created_at.isoformat(),
+            ))
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue()
+    if on_progress is not None:
+        await on_progress(len(conversation_ids))
+
+
+class _ChunkSink:
+    """Write-only file object that hands written bytes back to a generator."""
+
+    def __init__(self) -> None:
+        self._chunks: list[bytes] = []
+
+    def write(self, data: bytes) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self) -> None:
+        pass
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+async def stream_zip(
+    db: AsyncSession,
+    conversation_ids: list[str],
+    conversations: dict[str, Conversation],
+    entry_format: str = "json",
+    on_progress: Optional[ProgressCallback] = None,
+) -> AsyncIterator[bytes]:
+    """Stream a zip archive with one entry per conversation.
+
+    The archive is written to an unseekable sink, so ``zipfile`` emits data
+    descriptors and each entry is flushed as soon as it is produced.
+    """
+    sink = _ChunkSink()
+    extension = FILE_EXTENSIONS[entry_format]
+    with zipfile.ZipFile(sink, mode="w", compression=zipfile.ZIP_DEFLATED) as archive:
+        for index, conversation_id in enumerate(conversation_ids):
+            if on_progress is not None and index:
+                await on_progress(index)
+            conversation = conversations.get(conversation_id)
+            if conversation is None:
+                continue
+            name = f"{conversation.id}.{extension}"
+            with archive.open(name, mode="w", force_zip64=True) as entry:
+                async for chunk in stream_conversation(db, conversation, entry_format):
+                    entry.write(chunk.encode("utf-8"))
+                    data = sink.drain()
+                    if data:
+                        yield data
+            yield sink.drain()
+    yield sink.drain()
+    if on_progress is not None:
+        await on_progress(len(conversation_ids))
+
+
+def stream_batch_export(
+    db: AsyncSession,
+    conversation_ids: list[str],
+    conversations: dict[str, Conversation],
+    export_format: str,
+    on_progress: Optional[ProgressCallback] = None,
+) -> AsyncIterator[Any]:
+    """Pick the batch stream for ``export_format`` (``zip``, ``csv`` or a document format).
+
+    ``on_progress`` is awaited between conversations with the number of ids
+    done, and once more at the end.
+    """
+    if export_format == "zip":
+        return stream_zip(db, conversation_ids, conversations, on_progress=on_progress)
+    if export_format == "csv":
+        return stream_batch_csv(db, conversation_ids, conversations, on_progress=on_progress)
+    return stream_batch(db, conversation_ids, conversations, export_format, on_progress=on_progress)
+
+
+async def buffered(chunks: AsyncIterator[Any], size: int = EXPORT_CHUNK_SIZE) -> AsyncIterator[bytes]:
+    """Coalesce small chunks into ~``size`` byte writes."""
+    pending: list[bytes] = []
+    pending_size = 0
+    async for chunk in chunks:
+        data = chunk.encode("utf-8") if isinstance(chunk, str) else chunk
+        if not data:
+            continue
+        pending.append(data)
+        pending_size += len(data)
+        if pending_size >= size:
+            yield b"".join(pending)
+            pending.clear()
+            pending_size = 0
+    if pending:
+        yield b"".join(pending)
+
+
+async def write_export_file(path, chunks: AsyncIterator[Any]) -> int:
+    """Write streamed export chunks to ``path`` and return the byte count."""
+    written = 0
+    with open(path, "wb") as f:
+        async for data in buffered(chunks):
+            f.write(data)
+            written += len(data)
+    return written
+
+
+async def load_conversations(
+    db: AsyncSession,
+    conversation_ids: list[str],
+    include_deleted: bool = False,
+) -> dict[str, Conversation]:
+    """Fetch conversation headers (no messages) for a batch export."""
+    query = select(Conversation).where(Conversation.id.in_(conversation_ids))
+    if not include_deleted:
+        query = query.where(Conversation.is_deleted == False)
+    result = await db.execute(query)
+    return {conversation.id: conversation for conversation in result.scalars().all()}
+
+
+def content_disposition(filename: str) -> dict[str, str]:
+    """Attachment header for a download."""
+    return {"Content-Disposition": f'attachment; filename="{filename}"'}
+
+
+def normalize_format(export_format: Optional[str]) -> str:
+    """Lower-case a format name and map aliases."""
+    value = (export_format or "json").lower()
+    return "markdown" if value == "md" else value
@@ -0,0 +1,78 @@
+"""Export files waiting to be downloaded.
+
+Batch exports are written under ``settings.export_dir`` and served from
+``/api/batch/exports/{filename}``. Names are generated here, so a download
+only ever resolves to a plain file directly inside the directory. Files
+older than ``settings.export_retention_seconds`` are removed whenever a new
+one is created.
+"""
+
+import time
+import uuid
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Optional
+
+from src.core.config import settings
+
+
+class ExportStore:
+    """A directory of generated export files."""
+
+    def __init__(
+        self,
+        root: str = settings.export_dir,
+        retention_seconds: float = settings.export_retention_seconds,
+        clock: Callable[[], float] = time.time,
+    ):
+        self.root = Path(root)
+        self.retention_seconds = retention_seconds
+        self._clock = clock
+
+    @staticmethod
+    def filename(extension: str, prefix: str = "batch_export") -> str:
+        """A unique export filename; also used for downloads streamed without a file."""
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        return f"{prefix}_{timestamp}_{uuid.uuid4().hex[:8]}.{extension}"
+
+    def new_file(self, extension: str, prefix: str = "batch_export") -> tuple[str, Path]:
+        """Reserve a unique filename for a new export. Returns ``(filename, path)``."""
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.purge()
+        filename = self.filename(extension, prefix)
+        return filename, self.root / filename
+
+    def path(self, filename: str) -> Optional[Path]:
+        """Path of an existing export, or None for unknown or unsafe names."""
+        if not filename or Path(filename).name != filename or filename.startswith("."):
+            return None
+        path = self.root / filename
+        return path if path.is_file() else None
+
+    @staticmethod
+    def url(filename: str) -> str:
+        return f"/api/batch/exports/{filename}"
+
+    def discard(self, filename: str) -> None:
+        path = self.path(filename)
+        if path is not None:
+            path.unlink(missing_ok=True)
+
+    def purge(self) -> int:
+        """Remove exports past their retention. Returns how many."""
+        if not self.root.is_dir():
+            return 0
+        cutoff = self._clock() - self.retention_seconds
+        removed = 0
+        for path in self.root.iterdir():
+            try:
+                if path.is_file() and path.stat().st_mtime < cutoff:
+                    path.unlink()
+                    removed += 1
+            except FileNotFoundError:
+                continue
+        return removed
+
+
+# Global export store instance
+export_store = ExportStore()
@@ -0,0 +1,163 @@
+"""Suggested follow-up generation kept off the SSE critical path.
+
+Asking Claude for follow-up questions costs a full extra LLM round trip, so the
+streaming endpoint schedules it as a detached task on the async client and
+sends the ``done`` event straight away. The suggestions follow later as a
+separate ``suggested_follow_ups`` event and, when the assistant message id is
+known, are written onto ``Message.suggested_follow_ups``.
+
+Without an API key the rule-based generator from ``src.utils.suggestions`` is
+used instead. It is cheap enough to run inline.
+"""
+
+import asyncio
+from typing import Optional
+
+from anthropic import AsyncAnthropic
+from sqlalchemy import update
+
+from src.core.config import settings
+from src.core.database import async_session_factory
+from src.models.message import Message
+from src.utils.suggestions import generate_suggested_followups as rule_based_followups
+
+MAX_SUGGESTIONS = 5
+
+# Only the start of a long answer is needed to suggest where to go next
+RESPONSE_EXCERPT_CHARS = 2000
+
+FOLLOWUP_PROMPT = """Based on this conversation, suggest 3-5 relevant follow-up questions the user might want to ask.
+
+User's question: {user_message}
+
+Assistant's response: {response_content}
+
+Guidelines:
+- Generate questions that naturally continue the conversation
+- Questions should be specific and actionable
+- Avoid generic questions like "Can you tell me more?"
+- Each question should be on its own line
+- Return ONLY the questions, no numbering or prefixes
+
+Example format:
+What is the specific implementation detail?
+How does this compare to alternative approaches?
+What are the potential edge cases?
+"""
+
+
+class FollowupService:
+    """Generates suggested follow-ups without blocking the event loop."""
+
+    def __init__(self):
+        self._client: Optional[AsyncAnthropic] = None
+        self._client_key: Optional[str] = None
+        # Strong references so detached tasks are not garbage collected mid-flight
+        self._tasks: set[asyncio.Task] = set()
+
+    def get_client(self) -> Optional[AsyncAnthropic]:
+        """Get the async Anthropic client, or None when no API key is configured."""
+        api_key = settings.anthropic_api_key
+        if not api_key:
+            return None
+        if self._client is None or self._client_key != api_key:
+            self._client = AsyncAnthropic(
+                api_key=api_key,
+                timeout=settings.followup_timeout_seconds,
+            )
+            self._client_key = api_key
+        return self._client
+
+    @property
+    def uses_model(self) -> bool:
+        """Whether suggestions come from the model (slow) or the local rules (fast)."""
+        return self.get_client() is not None
+
+    def local_followups(self, response_content: str, user_message: str) -> list[str]:
+        """Rule-based suggestions, cheap enough to compute on the request path."""
+        return rule_based_followups(
+            user_message,
+            response_content,
+            max_suggestions=MAX_SUGGESTIONS,
+        )
+
+    async def generate(self, response_content: str, user_message: str) -> list[str]:
+        """Generate 3-5 follow-up questions, falling back to the local rules on failure."""
+        client = self.get_client()
+        if client is None:
+            return self.local_followups(response_content, user_message)
+
+        try:
+            response = await client.messages.create(
+                model=settings.followup_model,
+                max_tokens=300,
+                temperature=0.7,
+                messages=[{
+                    "role": "user",
+                    "content": FOLLOWUP_PROMPT.format(
+                        user_message=user_message,
+                        response_content=response_content[:RESPONSE_EXCERPT_CHARS],
+                    ),
+                }],
+            )
+            content = response.content[0].text
+            questions = [q.strip() for q in content.split("\n") if q.strip()]
+            return questions[:MAX_SUGGESTIONS]
+        except Exception as e:
+            # Don't lose the suggestions entirely if the model call fails
+            print(f"Failed to generate suggested follow-ups: {e}")
+            return self.local_followups(response_content, user_message)
+
+    def schedule(
+        self,
+        response_content: str,
+        user_message: str,
+        message_id: Optional[str] = None,
+    ) -> asyncio.Task:
+        """Start generation as a detached task.
+
+        The task keeps running if the client disconnects, so the suggestions
+        still reach the database when ``message_id`` is given.
+        """
+        task = asyncio.create_task(self._run(response_content, user_message, message_id))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return task
+
+    async def _run(
+        self,
+        response_content: str,
+        user_message: str,
+        message_id: Optional[str],
+    ) -> list[str]:
+        suggestions = await self.generate(response_content, user_message)
+        if suggestions and message_id:
+            try:
+                await self.persist(message_id, suggestions)
+            except Exception as e:
+                print(f"Failed to persist suggested follow-ups: {e}")
+        return suggestions
+
+    async def persist(self, message_id: str, suggestions: list[str]) -> None:
+        """Store suggestions on an existing message using a session of its own."""
+        async with async_session_factory() as session:
+            await session.execute(
+                update(Message)
+                .where(Message.id == message_id)
+                .values(suggested_follow_ups=suggestions)
+            )
+            await session.commit()
+
+    async def wait_for(self, task: asyncio.Task) -> list[str]:
+        """Wait for a scheduled task without letting a cancelled caller cancel it."""
+        try:
+            return await asyncio.wait_for(
+                asyncio.shield(task),
+                timeout=settings.followup_timeout_seconds,
+            )
+        except asyncio.TimeoutError:
+            return []
+
+
+# Global follow-up service instance
+followup_service = FollowupService()
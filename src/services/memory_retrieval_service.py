@@ -0,0 +1,176 @@
+"""Relevance-ranked retrieval of long-term memories.
+
+Memories are looked up through the ``memories_fts`` inverted index, so the
+cost grows with the number of matches, not the number of memories. Any
+of the message's terms may match, instead of the whole message as one
+substring. Each candidate is scored on three things:
+
+- term overlap: the BM25 score, relative to the best match
+- recency: halves every ``settings.memory_recency_half_life_days``
+- category: preferences outrank facts, and facts outrank context
+
+The results are capped at ``top_k`` memories and, optionally, a token
+budget. Three callers share this engine: context injection, the memory
+search endpoint and the agent's ``memory_retrieve`` event. Only context
+injection also considers the most recent memories that match no term, so a
+standing preference can still be included.
+"""
+
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import func, literal_column, select, table
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.core.config import settings
+from src.core.search_index import MEMORIES_FTS
+from src.models.memory import Memory
+from src.services.retrieval_service import CANDIDATES_PER_SLOT, build_retrieval_query
+from src.utils.chunking import estimate_tokens
+
+RELEVANCE_WEIGHT = 0.6
+RECENCY_WEIGHT = 0.25
+CATEGORY_WEIGHT = 0.15
+
+CATEGORY_SCORES = {
+    "preference": 1.0,
+    "fact": 0.8,
+    "context": 0.6,
+}
+DEFAULT_CATEGORY_SCORE = 0.5
+
+
+@dataclass
+class ScoredMemory:
+    """A memory and how well it fits the query."""
+
+    memory: Memory
+    score: float
+    relevance: float
+
+    @property
+    def tokens(self) -> int:
+        return estimate_tokens(self.memory.content)
+
+
+class MemoryRetrievalService:
+    """Ranks memories by term overlap, recency and category."""
+
+    def recency(self, memory: Memory, now: datetime) -> float:
+        """1.0 for a memory touched just now, halving every half-life."""
+        touched = memory.updated_at or memory.created_at
+        if touched is None:
+            return 0.0
+        age_days = max(0.0, (now - touched).total_seconds() / 86400)
+        half_life = settings.memory_recency_half_life_days
+        return 0.5 ** (age_days / half_life) if half_life > 0 else 0.0
+
+    def score(self, memory: Memory, relevance: float, now: datetime) -> float:
+        category = CATEGORY_SCORES.get((memory.category or "").lower(), DEFAULT_CATEGORY_SCORE)
+        return (
+            RELEVANCE_WEIGHT * relevance
+            + RECENCY_WEIGHT * self.recency(memory, now)
+            + CATEGORY_WEIGHT * category
+        )
+
+    async def rank(
+        self,
+        db: AsyncSession,
+        query: str,
+        top_k: int,
+        token_budget: Optional[int] = None,
+        active_only: bool = True,
+        include_recent: bool = False,
+        prefix: bool = False,
+    ) -> list[ScoredMemory]:
+        """The best memories for ``query``, highest score first.
+
+        Args:
+            db: Database session
+            query: Free text, usually the user's message
+            top_k: Maximum number of memories
+            token_budget: Maximum estimated tokens of memory content, if any
+            active_only: Skip memories that were switched off
+            include_recent: Also consider the most recent memories that match
+                no term of the query
+            prefix: Match query terms as word prefixes (search-as-you-type)
+        """
+        if top_k <= 0:
+            return []
+
+        # memory id -> (memory, bm25 score or None)
+        candidates: dict[str, tuple[Memory, Optional[float]]] = {}
+
+        match = build_retrieval_query(query, prefix=prefix)
+        if match:
+            fts = literal_column(MEMORIES_FTS.name)
+            hits = (
+                select(
+                    literal_column(f"{MEMORIES_FTS.name}.rowid").label("rowid"),
+                    func.bm25(fts).label("score"),
+                )
+                .select_from(table(MEMORIES_FTS.name))
+                .where(fts.match(match))
+                .subquery()
+            )
+            statement = (
+                select(Memory, hits.c.score)
+                .join(hits, hits.c.rowid == literal_column("memories.rowid"))
+                .order_by(hits.c.score, Memory.id)
+                .limit(top_k * CANDIDATES_PER_SLOT)
+            )
+            if active_only:
+                statement = statement.where(Memory.is_active == True)
+            for memory, bm25 in (await db.execute(statement)).all():
+                candidates[memory.id] = (memory, bm25)
+
+        if include_recent and settings.memory_recent_candidates > 0:
+            statement = (
+                select(Memory)
+                .order_by(Memory.created_at.desc())
+                .limit(settings.memory_recent_candidates)
+            )
+            if active_only:
+                statement = statement.where(Memory.is_active == True)
+            for memory in (await db.execute(statement)).scalars():
+                candidates.setdefault(memory.id, (memory, None))
+
+        if not candidates:
+            return []
+
+        # BM25 is negative in SQLite, lower is better. Scale it to 0..1
+        # against the best match so it can be mixed with the other signals.
+        best = min((bm25 for _, bm25 in candidates.values() if bm25 is not None), default=None)
+        now = datetime.utcnow()
+        scored = []
+        for memory, bm25 in candidates.values():
+            relevance = bm25 / best if bm25 is not None and best else 0.0
+            scored.append(ScoredMemory(memory, self.score(memory, relevance, now), relevance))
+        scored.sort(key=lambda item: (-item.score, item.memory.id))
+
+        selected = []
+        used = 0
+        for item in scored:
+            if token_budget is not None and used + item.tokens > token_budget:
+                continue
+            selected.append(item)
+            used += item.tokens
+            if len(selected) >= top_k:
+                break
+        return selected
+
+    async def for_context(self, db: AsyncSession, message: str) -> list[Memory]:
+        """Memories to inject into the prompt for ``message``."""
+        ranked = await self.rank(
+            db,
+            message,
+            top_k=settings.memory_top_k,
+            token_budget=settings.memory_token_budget,
+            include_recent=True,
+        )
+        return [item.memory for item in ranked]
+
+
+# Global memory retrieval service instance
+memory_retrieval_service = MemoryRetrievalService()
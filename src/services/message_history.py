@@ -0,0 +1,202 @@
+"""Conversation histories with copy-on-write branches.
+
+A branch does not copy its parent's messages. It stores only the messages
+written after the branch point, and ``inherits_parent_messages`` marks it as
+showing the parent's history up to and including
+``branch_point_message_id``. The parent may itself be such a branch, so a
+history is stitched together from a chain of conversations:
+
+- the conversation's own messages, all of them
+- each ancestor's own messages up to a cutoff, the earliest branch point
+  met on the way up (compared by ``(created_at, id)``, the message order)
+
+``lineage`` resolves that chain with one recursive CTE and ``visible_messages``
+joins it to ``messages``. Any history read (listing, export, checkpoints,
+sharing) is then a single query, and every ancestor is read through
+``ix_messages_conversation_created``. Branches created before this existed
+have ``inherits_parent_messages`` false and keep their copied rows.
+
+Shared messages are copied on write. Before a message that inheriting branches
+show is edited or deleted, ``detach_branches`` gives those branches their own
+copies of the prefix they inherit, so the change only affects the
+conversation it was made in.
+"""
+
+from typing import Any, Optional
+
+from sqlalchemy import DateTime, String, and_, case, func, literal, or_, select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import aliased
+from sqlalchemy.sql import Select
+
+from src.models.conversation import Conversation
+from src.models.message import Message
+
+# Columns copied when a branch gets its own copy of a shared message
+COPIED_COLUMNS = (
+    "role",
+    "content",
+    "input_tokens",
+    "output_tokens",
+    "cache_read_tokens",
+    "cache_write_tokens",
+    "attachments",
+    "tool_calls",
+    "tool_results",
+    "thinking_content",
+    "suggested_follow_ups",
+    "created_at",
+    "edited_at",
+)
+
+
+def lineage(conversation_id: str):
+    """CTE of the conversations whose messages ``conversation_id`` shows.
+
+    Each row has the conversation and the ``(cutoff_at, cutoff_id)`` key of
+    its last visible message, NULL for the conversation itself.
+    """
+    branch_point = aliased(Message)
+    chain = (
+        select(
+            Conversation.id.label("conversation_id"),
+            Conversation.parent_conversation_id.label("parent_id"),
+            Conversation.inherits_parent_messages.label("inherits"),
+            literal(None, DateTime).label("cutoff_at"),
+            literal(None, String).label("cutoff_id"),
+            branch_point.created_at.label("branch_at"),
+            branch_point.id.label("branch_id"),
+        )
+        .outerjoin(branch_point, branch_point.id == Conversation.branch_point_message_id)
+        .where(Conversation.id == conversation_id)
+        .cte("message_lineage", recursive=True)
+    )
+
+    parent = aliased(Conversation)
+    parent_branch_point = aliased(Message)
+    # The parent is cut at this conversation's branch point, or earlier if a
+    # descendant branched off before it
+    earlier = or_(
+        chain.c.cutoff_at.is_(None),
+        tuple_(chain.c.branch_at, chain.c.branch_id) < tuple_(chain.c.cutoff_at, chain.c.cutoff_id),
+    )
+    return chain.union(
+        select(
+            parent.id,
+            parent.parent_conversation_id,
+            parent.inherits_parent_messages,
+            case((earlier, chain.c.branch_at), else_=chain.c.cutoff_at),
+            case((earlier, chain.c.branch_id), else_=chain.c.cutoff_id),
+            parent_branch_point.created_at,
+            parent_branch_point.id,
+        )
+        .join(chain, parent.id == chain.c.parent_id)
+        .outerjoin(parent_branch_point, parent_branch_point.id == parent.branch_point_message_id)
+        .where(chain.c.inherits == True, chain.c.branch_id.isnot(None))
+    )
+
+
+def visible_messages(conversation_id: str, *entities: Any) -> Select:
+    """Select the messages shown in ``conversation_id``, own and inherited.
+
+    Args:
+        conversation_id: Conversation whose history to read
+        entities: What to select, ``Message`` by default
+
+    Returns:
+        An unordered select; order by ``Message.created_at, Message.id``
+    """
+    chain = lineage(conversation_id)
+    return select(*(entities or (Message,))).join(
+        chain,
+        and_(
+            Message.conversation_id == chain.c.conversation_id,
+            or_(
+                chain.c.cutoff_at.is_(None),
+                tuple_(Message.created_at, Message.id)
+                <= tuple_(chain.c.cutoff_at, chain.c.cutoff_id),
+            ),
+        ),
+    )
+
+
+async def get_visible_message(
+    db: AsyncSession, conversation_id: str, message_id: str
+) -> Optional[Message]:
+    """Return ``message_id`` if it is part of ``conversation_id``'s history."""
+    result = await db.execute(visible_messages(conversation_id).where(Message.id == message_id))
+    return result.scalar_one_or_none()
+
+
+async def history_totals(db: AsyncSession, conversation_id: str) -> tuple[int, int]:
+    """Number of messages and input + output tokens in a conversation's history."""
+    row = (
+        await db.execute(
+            visible_messages(
+                conversation_id,
+                func.count(Message.id),
+                func.coalesce(func.sum(Message.input_tokens + Message.output_tokens), 0),
+            )
+        )
+    ).first()
+    return row[0], row[1]
+
+
+async def detach_branches(db: AsyncSession, message: Message) -> int:
+    """Copy ``message``'s shared history into the branches that show it.
+
+    Call before editing or deleting ``message``. Every inheriting direct
+    branch of its conversation that branched at or after it gets its own
+    copies of the history it inherits and stops inheriting. Branches of
+    those branches keep inheriting, now from the copies. The caller commits.
+
+    Returns:
+        The number of branches detached
+    """
+    branch_point = aliased(Message)
+    result = await db.execute(
+        select(Conversation)
+        .join(branch_point, branch_point.id == Conversation.branch_point_message_id)
+        .where(
+            Conversation.parent_conversation_id == message.conversation_id,
+            Conversation.inherits_parent_messages == True,
+            tuple_(branch_point.created_at, branch_point.id)
+            >= tuple_(literal(message.created_at, DateTime), literal(message.id, String)),
+        )
+    )
+    branches = result.scalars().all()
+    for branch in branches:
+        await _detach(db, branch)
+    return len(branches)
+
+
+async def _detach(db: AsyncSession, branch: Conversation) -> None:
+    """Give ``branch`` its own copy of every message it inherits."""
+    result = await db.execute(
+        visible_messages(branch.id)
+        .where(Message.conversation_id != branch.id)
+        .order_by(Message.created_at, Message.id)
+    )
+    copies = {}
+    for message in result.scalars():
+        copy = Message(
+            conversation_id=branch.id,
+            **{column: getattr(message, column) for column in COPIED_COLUMNS},
+        )
+        copies[message.id] = copy
+        db.add(copy)
+    await db.flush()
+
+    branch.inherits_parent_messages = False
+    if not copies:
+        return
+    # Branches of this branch that branched inside the copied prefix now
+    # point at the copy of their branch point
+    result = await db.execute(
+        select(Conversation).where(
+            Conversation.parent_conversation_id == branch.id,
+            Conversation.branch_point_message_id.in_(list(copies)),
+        )
+    )
+    for child in result.scalars():
+        child.branch_point_message_id = copies[child.branch_point_message_id].id
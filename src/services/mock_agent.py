@@ -88,6 +88,12 @@ class MockAgent:
             "todos": self._thread_state.get("todos", []),
         }
 
+    async def ainvoke(
+        self, input_data: Dict[str, Any], config: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
+        """Async invoke, as used by the API routes."""
+        return self.invoke(input_data, config)
+
     def _extract_custom_instructions(self, message: str) -> tuple[str, str]:
         """Extract custom instructions from message.
 
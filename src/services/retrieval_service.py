@@ -0,0 +1,206 @@
+"""Token-budgeted retrieval over project knowledge-base files.
+
+Project files are split into overlapping passages when they are uploaded
+(``ProjectFileChunk``), and the passages are indexed with SQLite FTS5. When
+a project's files no longer fit in the context budget, only the passages
+most relevant to the current message are included. The relevance is the
+BM25 score of the message's terms. Passages are taken in score order until
+``top_k`` passages or ``token_budget`` tokens have been used.
+
+Files uploaded before chunking existed are chunked once at startup by
+``index_missing``.
+"""
+
+import re
+from dataclasses import dataclass
+from typing import Optional
+
+from sqlalchemy import Integer, column, delete, func, literal_column, select, table
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.core.config import settings
+from src.core.search_index import PROJECT_FILE_CHUNKS_FTS
+from src.models.project_file import ProjectFile
+from src.models.project_file_chunk import ProjectFileChunk
+from src.utils.chunking import chunk_text, estimate_tokens
+
+# More candidates than needed are fetched, because some will not fit the budget
+CANDIDATES_PER_SLOT = 4
+
+# Long messages are cut down to their first distinct terms
+MAX_QUERY_TERMS = 32
+
+STOPWORDS = frozenset({
+    "a", "about", "an", "and", "are", "as", "at", "be", "but", "by", "can", "could",
+    "do", "does", "for", "from", "how", "i", "if", "in", "into", "is", "it", "its",
+    "me", "my", "of", "on", "or", "our", "please", "should", "so", "that", "the",
+    "their", "them", "then", "there", "these", "this", "to", "us", "was", "we",
+    "what", "when", "where", "which", "who", "why", "will", "with", "would", "you",
+    "your",
+})
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+
+@dataclass
+class RetrievedChunk:
+    """A passage selected for the agent context."""
+
+    file_id: str
+    filename: str
+    chunk_index: int
+    content: str
+    token_count: int
+    score: float
+
+    def source(self) -> dict:
+        """Description of the passage for the ``context_sources`` event."""
+        return {
+            "file_id": self.file_id,
+            "filename": self.filename,
+            "chunk_index": self.chunk_index,
+            "tokens": self.token_count,
+            "score": round(self.score, 4),
+        }
+
+
+def build_retrieval_query(text: str, prefix: bool = False) -> Optional[str]:
+    """Turn a chat message into an FTS5 MATCH expression.
+
+    Unlike the search box, which requires every word, any of the message's
+    terms may match. BM25 ranks passages that match more of them higher.
+    With ``prefix``, terms also match longer words ("pref" finds "prefers").
+    """
+    terms = []
+    seen = set()
+    for token in _TOKEN_RE.findall((text or "").lower()):
+        if len(token) < 2 or token in STOPWORDS or token in seen:
+            continue
+        seen.add(token)
+        terms.append(f'"{token}"*' if prefix else f'"{token}"')
+        if len(terms) >= MAX_QUERY_TERMS:
+            break
+    return " OR ".join(terms) or None
+
+
+class RetrievalService:
+    """Chunks project files and retrieves the passages relevant to a message."""
+
+    def __init__(
+        self,
+        chunk_tokens: int = settings.retrieval_chunk_tokens,
+        overlap_tokens: int = settings.retrieval_chunk_overlap_tokens,
+    ):
+        self.chunk_tokens = chunk_tokens
+        self.overlap_tokens = overlap_tokens
+
+    def chunk_file(self, project_file: ProjectFile) -> list[ProjectFileChunk]:
+        """Build (unsaved) chunks for a file's extracted text."""
+        passages = chunk_text(project_file.content or "", self.chunk_tokens, self.overlap_tokens)
+        return [
+            ProjectFileChunk(
+                project_id=project_file.project_id,
+                file_id=project_file.id,
+                chunk_index=index,
+                content=passage,
+                token_count=estimate_tokens(passage),
+            )
+            for index, passage in enumerate(passages)
+        ]
+
+    async def index_file(self, db: AsyncSession, project_file: ProjectFile) -> int:
+        """Replace a file's chunks. The caller commits. Returns the chunk count."""
+        await self.delete_file_chunks(db, project_file.id)
+        chunks = self.chunk_file(project_file)
+        db.add_all(chunks)
+        return len(chunks)
+
+    async def delete_file_chunks(self, db: AsyncSession, file_id: str) -> None:
+        await db.execute(delete(ProjectFileChunk).where(ProjectFileChunk.file_id == file_id))
+
+    async def delete_project_chunks(self, db: AsyncSession, project_id: str) -> None:
+        await db.execute(delete(ProjectFileChunk).where(ProjectFileChunk.project_id == project_id))
+
+    async def index_missing(self, db: AsyncSession) -> int:
+        """Chunk every live file that has text but no chunks yet. Returns how many."""
+        has_chunks = select(ProjectFileChunk.id).where(ProjectFileChunk.file_id == ProjectFile.id).exists()
+        result = await db.execute(
+            select(ProjectFile)
+            .where(ProjectFile.is_deleted == False)
+            .where(ProjectFile.content != None)
+            .where(~has_chunks)
+        )
+        files = result.scalars().all()
+        for project_file in files:
+            db.add_all(self.chunk_file(project_file))
+        if files:
+            await db.commit()
+        return len(files)
+
+    async def retrieve(
+        self,
+        db: AsyncSession,
+        project_id: str,
+        query: str,
+        token_budget: Optional[int] = None,
+        top_k: Optional[int] = None,
+    ) -> list[RetrievedChunk]:
+        """Best-matching passages of a project that fit in ``token_budget``.
+
+        The budget and ``top_k`` default to the current settings.
+        """
+        if token_budget is None:
+            token_budget = settings.retrieval_token_budget
+        if top_k is None:
+            top_k = settings.retrieval_top_k
+        match = build_retrieval_query(query)
+        if not match or top_k <= 0:
+            return []
+
+        fts = literal_column(PROJECT_FILE_CHUNKS_FTS.name)
+        hits = (
+            select(
+                literal_column(f"{PROJECT_FILE_CHUNKS_FTS.name}.rowid").label("rowid"),
+                func.bm25(fts).label("score"),
+            )
+            .select_from(table(PROJECT_FILE_CHUNKS_FTS.name))
+            .where(fts.match(match))
+            .subquery()
+        )
+        # The implicit rowid the FTS index is keyed on, bound to the chunks table
+        chunk_rowid = column("rowid", Integer, _selectable=ProjectFileChunk.__table__)
+        result = await db.execute(
+            select(ProjectFileChunk, ProjectFile.original_filename, hits.c.score)
+            .select_from(ProjectFileChunk)
+            .join(hits, hits.c.rowid == chunk_rowid)
+            .join(ProjectFile, ProjectFile.id == ProjectFileChunk.file_id)
+            .where(ProjectFileChunk.project_id == project_id)
+            .where(ProjectFile.is_deleted == False)
+            .order_by(hits.c.score, ProjectFileChunk.id)
+            .limit(top_k * CANDIDATES_PER_SLOT)
+        )
+
+        selected = []
+        used = 0
+        for chunk, filename, score in result.all():
+            if used + chunk.token_count > token_budget:
+                # A smaller passage further down may still fit
+                continue
+            selected.append(
+                RetrievedChunk(
+                    file_id=chunk.file_id,
+                    filename=filename,
+                    chunk_index=chunk.chunk_index,
+                    content=chunk.content,
+                    token_count=chunk.token_count,
+                    score=score,
+                )
+            )
+            used += chunk.token_count
+            if len(selected) >= top_k:
+                break
+        return selected
+
+
+# Global retrieval service instance
+retrieval_service = RetrievalService()
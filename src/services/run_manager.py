@@ -0,0 +1,273 @@
+"""Agent runs that outlive the HTTP connection that started them.
+
+``POST /api/agent/stream`` submits a run. The run waits on a bounded queue
+until one of ``settings.run_workers`` workers picks it up. The worker then
+drives the agent's event stream and appends every SSE event to the run's
+``RunEventLog``. HTTP responses only subscribe to that log. When the client
+disconnects, the generation still finishes, and the client can pick it up
+again from ``GET /api/agent/stream/{run_id}`` with ``Last-Event-ID``.
+
+Admission is where backpressure applies. A submission is rejected with
+``RunRejected`` in two cases: the user already has
+``settings.run_max_per_user`` runs queued or running, or the queue already
+holds ``settings.run_queue_size`` runs. Nothing is dropped silently, and a
+traffic spike cannot start more concurrent generations than there are
+workers.
+
+Finished runs are kept for ``settings.run_retention_seconds`` (and at most
+``settings.run_max_retained`` of them) so a late reconnect can still replay
+the whole response.
+"""
+
+import asyncio
+import time
+from dataclasses import dataclass, field
+from typing import AsyncIterator, Callable, Optional
+from uuid import uuid4
+
+from src.core.config import settings
+from src.core.event_log import RunEventLog
+from src.utils.sse import sse_json
+
+
+class RunRejected(Exception):
+    """A run was not admitted. ``status_code`` is 429 (per user) or 503 (queue full)."""
+
+    def __init__(self, detail: str, status_code: int, retry_after: int = 1):
+        super().__init__(detail)
+        self.detail = detail
+        self.status_code = status_code
+        self.retry_after = retry_after
+
+
+@dataclass
+class AgentRun:
+    """One agent generation and its event log."""
+
+    run_id: str
+    log: RunEventLog
+    thread_id: Optional[str] = None
+    user_id: str = "default"
+    status: str = "queued"  # queued, running, completed, failed, cancelled
+    created_at: float = field(default_factory=time.time)
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    task: Optional[asyncio.Task] = None
+    events: Optional[AsyncIterator[dict]] = field(default=None, repr=False)
+    finished: asyncio.Event = field(default_factory=asyncio.Event, repr=False)
+
+    @property
+    def is_finished(self) -> bool:
+        return self.finished_at is not None
+
+    async def wait(self) -> None:
+        """Wait until the run has completed, failed or been cancelled."""
+        await self.finished.wait()
+
+    def to_dict(self) -> dict:
+        return {
+            "run_id": self.run_id,
+            "thread_id": self.thread_id,
+            "user_id": self.user_id,
+            "status": self.status,
+            "last_event_id": self.log.last_id,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+        }
+
+
+class AgentRunManager:
+    """Queues agent runs, executes them on a worker pool and keeps their event logs."""
+
+    def __init__(
+        self,
+        max_memory_events: int = settings.run_buffer_max_events,
+        spill_dir: Optional[str] = settings.run_spill_dir,
+        retention_seconds: float = settings.run_retention_seconds,
+        max_retained: int = settings.run_max_retained,
+        workers: int = settings.run_workers,
+        queue_size: int = settings.run_queue_size,
+        max_per_user: int = settings.run_max_per_user,
+        clock: Callable[[], float] = time.time,
+    ):
+        self.max_memory_events = max_memory_events
+        self.spill_dir = spill_dir
+        self.retention_seconds = retention_seconds
+        self.max_retained = max_retained
+        self.workers = max(1, workers)
+        self.queue_size = max(1, queue_size)
+        self.max_per_user = max(1, max_per_user)
+        self._clock = clock
+        self._runs: dict[str, AgentRun] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._queue: Optional[asyncio.Queue] = None
+        self._workers: list[asyncio.Task] = []
+        self._rejected = 0
+
+    def start(
+        self,
+        events: AsyncIterator[dict],
+        thread_id: Optional[str] = None,
+        run_id: Optional[str] = None,
+        user_id: str = "default",
+    ) -> AgentRun:
+        """Queue ``events`` to be run to completion by a worker, logging each event.
+
+        Raises ``RunRejected`` when the user is at their concurrency limit or
+        the queue is full; ``events`` is then never iterated.
+        """
+        self.purge()
+        self._ensure_workers()
+
+        rejection = None
+        if self.active_count(user_id) >= self.max_per_user:
+            rejection = RunRejected(
+                f"Too many concurrent runs (limit {self.max_per_user})", status_code=429
+            )
+        elif self._queue.full():
+            rejection = RunRejected("Agent run queue is full, try again shortly", status_code=503)
+        if rejection is not None:
+            self._rejected += 1
+            raise rejection
+
+        run_id = run_id or str(uuid4())
+        run = AgentRun(
+            run_id=run_id,
+            log=RunEventLog(run_id, self.max_memory_events, self.spill_dir),
+            thread_id=thread_id,
+            user_id=user_id,
+            created_at=self._clock(),
+            events=events,
+        )
+        self._runs[run_id] = run
+        self._queue.put_nowait(run)
+        return run
+
+    def get(self, run_id: str) -> Optional[AgentRun]:
+        return self._runs.get(run_id)
+
+    def active_runs(self) -> list[AgentRun]:
+        """Queued and running runs, oldest first."""
+        return [run for run in self._runs.values() if not run.is_finished]
+
+    def active_count(self, user_id: Optional[str] = None) -> int:
+        """Queued and running runs, for one user or for everyone."""
+        return sum(
+            1
+            for run in self._runs.values()
+            if not run.is_finished and (user_id is None or run.user_id == user_id)
+        )
+
+    async def cancel(self, run_id: str) -> bool:
+        """Stop a queued or running generation. Returns False if it is unknown or already done."""
+        run = self._runs.get(run_id)
+        if run is None or run.is_finished:
+            return False
+        if run.task is None:
+            # Still queued: the worker skips it when it comes up
+            run.status = "cancelled"
+            await run.log.append({"event": "cancelled", "data": sse_json({"run_id": run.run_id})})
+            await self._finish(run)
+            return True
+        run.task.cancel()
+        await run.wait()
+        return True
+
+    def purge(self) -> int:
+        """Forget finished runs past their retention, oldest first. Returns how many."""
+        now = self._clock()
+        finished = sorted(
+            (run for run in self._runs.values() if run.is_finished),
+            key=lambda run: run.finished_at,
+        )
+        excess = len(finished) - self.max_retained
+        removed = 0
+        for run in finished:
+            if removed < excess or now - run.finished_at > self.retention_seconds:
+                run.log.discard()
+                del self._runs[run.run_id]
+                removed += 1
+        return removed
+
+    def stats(self) -> dict:
+        runs = list(self._runs.values())
+        return {
+            "workers": self.workers,
+            "queue_size": self.queue_size,
+            "max_per_user": self.max_per_user,
+            "queued": sum(1 for run in runs if run.status == "queued"),
+            "running": sum(1 for run in runs if run.status == "running"),
+            "retained": sum(1 for run in runs if run.is_finished),
+            "rejected": self._rejected,
+        }
+
+    async def shutdown(self) -> None:
+        """Cancel unfinished runs and stop the workers (application shutdown)."""
+        for run in list(self._runs.values()):
+            await self.cancel(run.run_id)
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+        self._queue = None
+        self._loop = None
+
+    def _ensure_workers(self) -> None:
+        # Started lazily: the global instance is built before the event loop runs
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._loop = loop
+            self._queue = asyncio.Queue(maxsize=self.queue_size)
+            self._workers = [
+                asyncio.create_task(self._worker(), name=f"agent-run-worker-{n}")
+                for n in range(self.workers)
+            ]
+
+    async def _worker(self) -> None:
+        queue = self._queue
+        while True:
+            run = await queue.get()
+            try:
+                if run.is_finished:
+                    continue
+                run.task = asyncio.create_task(self._drive(run))
+                # Wait without propagating the run's cancellation to the worker
+                await asyncio.wait({run.task})
+                if not run.is_finished:
+                    # Cancelled before its first step, so _drive never ran
+                    run.status = "cancelled"
+                    await run.log.append({"event": "cancelled", "data": sse_json({"run_id": run.run_id})})
+                    await self._finish(run)
+            except Exception as e:
+                print(f"Agent run worker error: {e}")
+            finally:
+                queue.task_done()
+
+    async def _drive(self, run: AgentRun) -> None:
+        run.status = "running"
+        run.started_at = self._clock()
+        events, run.events = run.events, None
+        try:
+            async for event in events:
+                await run.log.append(event)
+            run.status = "completed"
+        except asyncio.CancelledError:
+            run.status = "cancelled"
+            await run.log.append({"event": "cancelled", "data": sse_json({"run_id": run.run_id})})
+            raise
+        except Exception as e:
+            run.status = "failed"
+            print(f"Agent run {run.run_id} failed: {e}")
+            await run.log.append({"event": "error", "data": sse_json({"error": str(e)})})
+        finally:
+            await self._finish(run)
+
+    async def _finish(self, run: AgentRun) -> None:
+        run.finished_at = self._clock()
+        await run.log.close()
+        run.finished.set()
+
+
+# Global run manager instance
+run_manager = AgentRunManager()
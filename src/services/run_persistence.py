@@ -0,0 +1,206 @@
+"""Everything an agent turn writes, stored in one transaction.
+
+While the agent streams, ``RunPersistence`` collects the turn's writes:
+- the assistant message
+- the artifacts detected in it
+- the memories the agent saved or that were extracted from the answer
+- the token usage
+- the conversation's counters
+
+``flush`` adds them all and commits once at the end of the stream. Before
+this, memory saves committed once per event and artifacts committed
+separately, while the assistant message and the usage were never stored at
+all.
+
+A stream that fails before it finishes writes nothing.
+"""
+
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Optional
+from uuid import uuid4
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.models.artifact import Artifact
+from src.models.conversation import Conversation
+from src.models.memory import Memory
+from src.models.message import Message
+from src.models.usage_tracking import UsageTracking
+from src.services.usage_service import calculate_cost
+
+
+@dataclass
+class TokenUsage:
+    """Token counts reported by the model for one turn."""
+
+    input_tokens: int = 0
+    output_tokens: int = 0
+    cache_read_tokens: int = 0
+    cache_write_tokens: int = 0
+    thinking_tokens: int = 0
+
+    @property
+    def total(self) -> int:
+        return (
+            self.input_tokens
+            + self.output_tokens
+            + self.cache_read_tokens
+            + self.cache_write_tokens
+            + self.thinking_tokens
+        )
+
+    def to_dict(self) -> dict:
+        return {
+            "input_tokens": self.input_tokens,
+            "output_tokens": self.output_tokens,
+            "cache_read_tokens": self.cache_read_tokens,
+            "cache_write_tokens": self.cache_write_tokens,
+        }
+
+
+@dataclass
+class RunPersistence:
+    """Pending writes of one agent turn, flushed together."""
+
+    conversation_id: Optional[str]
+    model: str
+    user_id: str = "default-user"
+    message_id: str = field(default_factory=lambda: str(uuid4()))
+    usage: Optional[TokenUsage] = None
+    _message: Optional[dict] = None
+    _artifacts: list[Artifact] = field(default_factory=list)
+    _memories: list[Memory] = field(default_factory=list)
+
+    def set_assistant_message(
+        self,
+        content: str,
+        thinking_content: Optional[str] = None,
+        suggested_follow_ups: Optional[list[str]] = None,
+    ) -> None:
+        self._message = {
+            "content": content,
+            "thinking_content": thinking_content or None,
+            "suggested_follow_ups": suggested_follow_ups or None,
+        }
+
+    def set_usage(self, usage: TokenUsage) -> None:
+        self.usage = usage
+
+    def add_memory(
+        self,
+        content: str,
+        category: str = "fact",
+        source_conversation_id: Optional[str] = None,
+    ) -> Memory:
+        memory = Memory(
+            id=str(uuid4()),
+            content=content,
+            category=category,
+            source_conversation_id=source_conversation_id,
+        )
+        self._memories.append(memory)
+        return memory
+
+    def add_artifacts(self, artifacts_data: list[dict]) -> list[Artifact]:
+        """Queue detected code blocks (see ``build_artifact``) as artifacts."""
+        if not self.conversation_id:
+            return []
+        artifacts = [
+            Artifact(
+                # Set up front so streamed artifact_end events can reference it
+                id=artifact_data.get("id") or str(uuid4()),
+                conversation_id=self.conversation_id,
+                content=artifact_data["content"],
+                title=artifact_data["title"],
+                language=artifact_data["language"],
+                artifact_type=artifact_data["artifact_type"],
+            )
+            for artifact_data in artifacts_data
+        ]
+        self._artifacts.extend(artifacts)
+        return artifacts
+
+    async def flush(self, db: AsyncSession) -> dict:
+        """Write everything collected and commit once.
+
+        Returns what was stored: ``message_id`` (None when no message was
+        stored), plus ``artifacts`` and ``memories`` as dicts.
+        """
+        conversation = None
+        if self.conversation_id:
+            conversation = await db.get(Conversation, self.conversation_id)
+
+        now = datetime.utcnow()
+        message = None
+        if conversation is not None and self._message and self._message["content"]:
+            usage = self.usage or TokenUsage()
+            message = Message(
+                id=self.message_id,
+                conversation_id=conversation.id,
+                role="assistant",
+                input_tokens=usage.input_tokens,
+                output_tokens=usage.output_tokens,
+                cache_read_tokens=usage.cache_read_tokens,
+                cache_write_tokens=usage.cache_write_tokens,
+                created_at=now,
+                **self._message,
+            )
+            db.add(message)
+            conversation.message_count = (conversation.message_count or 0) + 1
+            conversation.unread_count = (conversation.unread_count or 0) + 1
+            conversation.last_message_at = now
+
+        if conversation is None:
+            # The conversation is gone (or was never given): no artifacts for it
+            self._artifacts = []
+        db.add_all(self._artifacts)
+        db.add_all(self._memories)
+
+        if self.usage is not None and self.usage.total:
+            db.add(UsageTracking(
+                user_id=conversation.user_id if conversation is not None else self.user_id,
+                conversation_id=conversation.id if conversation is not None else None,
+                message_id=message.id if message is not None else None,
+                project_id=conversation.project_id if conversation is not None else None,
+                model=self.model,
+                input_tokens=self.usage.input_tokens,
+                output_tokens=self.usage.output_tokens,
+                cache_read_tokens=self.usage.cache_read_tokens,
+                cache_write_tokens=self.usage.cache_write_tokens,
+                thinking_tokens=self.usage.thinking_tokens,
+                cost_estimate=calculate_cost(
+                    self.model,
+                    input_tokens=self.usage.input_tokens,
+                    output_tokens=self.usage.output_tokens,
+                    cache_read_tokens=self.usage.cache_read_tokens,
+                    cache_write_tokens=self.usage.cache_write_tokens,
+                    thinking_tokens=self.usage.thinking_tokens,
+                ),
+                created_at=now,
+            ))
+            if conversation is not None:
+                conversation.token_count = (
+                    (conversation.token_count or 0)
+                    + self.usage.input_tokens
+                    + self.usage.output_tokens
+                )
+
+        await db.commit()
+        return {
+            "message_id": message.id if message is not None else None,
+            "artifacts": [_artifact_dict(artifact) for artifact in self._artifacts],
+            "memories": [memory.to_dict() for memory in self._memories],
+        }
+
+
+def _artifact_dict(artifact: Artifact) -> dict:
+    return {
+        "id": artifact.id,
+        "title": artifact.title,
+        "content": artifact.content,
+        "language": artifact.language,
+        "artifact_type": artifact.artifact_type,
+        "version": artifact.version,
+        "created_at": artifact.created_at.isoformat() if artifact.created_at else None,
+    }
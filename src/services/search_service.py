@@ -0,0 +1,273 @@
+"""Full-text search service backed by the SQLite FTS5 index.
+
+Queries run against the FTS tables maintained by ``src.core.search_index`` and
+join back to the base tables for filtering, so lookups cost O(matches) instead
+of a full ``LIKE '%q%'`` scan. Results are ordered by BM25 score (lower is
+better in SQLite) with the primary key as tie-breaker, which gives stable keyset
+cursors.
+"""
+
+import re
+from dataclasses import dataclass, field
+from typing import Any, Optional
+
+from sqlalchemy import Select, and_, func, literal_column, or_, select, table, union_all
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.core.search_index import (
+    CONVERSATIONS_FTS,
+    MEMORIES_FTS,
+    MESSAGES_FTS,
+    PROJECT_FILES_FTS,
+    FTSIndex,
+)
+from src.models.conversation import Conversation
+from src.models.memory import Memory
+from src.models.message import Message
+from src.models.project_file import ProjectFile
+from src.utils.pagination import decode_cursor, encode_cursor
+
+HIGHLIGHT_OPEN = "<mark>"
+HIGHLIGHT_CLOSE = "</mark>"
+SNIPPET_ELLIPSIS = "…"
+SNIPPET_TOKENS = 24
+
+# Title matches are a stronger signal than a match somewhere in the history
+TITLE_WEIGHT = 2.0
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+
+@dataclass
+class SearchHit:
+    """A single ranked search result."""
+
+    item: Any
+    score: float
+    snippet: Optional[str]
+
+
+@dataclass
+class SearchPage:
+    """A page of ranked results plus the cursor for the next page."""
+
+    hits: list[SearchHit] = field(default_factory=list)
+    next_cursor: Optional[str] = None
+
+
+def build_match_query(q: str) -> Optional[str]:
+    """Turn free text into a safe FTS5 MATCH expression.
+
+    Every word is quoted so FTS syntax characters in user input cannot break
+    the query, terms are ANDed together, and the last term is matched as a
+    prefix so results update while the user is still typing.
+    """
+    tokens = _TOKEN_RE.findall(q or "")
+    if not tokens:
+        return None
+    terms = [f'"{token}"' for token in tokens]
+    terms[-1] += "*"
+    return " ".join(terms)
+
+
+def _rowid(table_name: str):
+    return literal_column(f"{table_name}.rowid")
+
+
+def _hits(index: FTSIndex, match: str, weight: float = 1.0) -> Select:
+    """Select rowid, BM25 score and highlighted snippet for an FTS match."""
+    fts = literal_column(index.name)
+    score = func.bm25(fts)
+    if weight != 1.0:
+        score = score * weight
+    return (
+        select(
+            _rowid(index.name).label("rowid"),
+            score.label("score"),
+            func.snippet(
+                fts, -1, HIGHLIGHT_OPEN, HIGHLIGHT_CLOSE, SNIPPET_ELLIPSIS, SNIPPET_TOKENS
+            ).label("snippet"),
+        )
+        .select_from(table(index.name))
+        .where(fts.match(match))
+    )
+
+
+def _after_cursor(score_col, key_col, cursor: Optional[str]):
+    """Keyset predicate for rows strictly after the cursor position."""
+    if not cursor:
+        return None
+    score, key = decode_cursor(cursor, 2)
+    return or_(score_col > score, and_(score_col == score, key_col > key))
+
+
+def _page(rows: list, limit: int) -> SearchPage:
+    """Trim the look-ahead row and build the next cursor."""
+    hits = [SearchHit(item=row[0], score=row[1], snippet=row[2]) for row in rows[:limit]]
+    next_cursor = None
+    if len(rows) > limit and hits:
+        last = hits[-1]
+        next_cursor = encode_cursor(last.score, last.item.id)
+    return SearchPage(hits=hits, next_cursor=next_cursor)
+
+
+class SearchService:
+    """Ranked full-text search over conversations, messages, files and memories."""
+
+    async def search_messages(
+        self,
+        db: AsyncSession,
+        q: str,
+        conversation_id: Optional[str] = None,
+        limit: int = 50,
+        cursor: Optional[str] = None,
+    ) -> SearchPage:
+        """Search message content."""
+        match = build_match_query(q)
+        if not match:
+            return SearchPage()
+
+        hits = _hits(MESSAGES_FTS, match).subquery()
+        query = (
+            select(Message, hits.c.score, hits.c.snippet)
+            .join(hits, hits.c.rowid == _rowid("messages"))
+            .order_by(hits.c.score, Message.id)
+            .limit(limit + 1)
+        )
+        if conversation_id:
+            query = query.where(Message.conversation_id == conversation_id)
+        after = _after_cursor(hits.c.score, Message.id, cursor)
+        if after is not None:
+            query = query.where(after)
+
+        rows = (await db.execute(query)).all()
+        return _page(rows, limit)
+
+    async def search_conversations(
+        self,
+        db: AsyncSession,
+        q: str,
+        project_id: Optional[str] = None,
+        limit: int = 20,
+        cursor: Optional[str] = None,
+    ) -> SearchPage:
+        """Search conversation titles and message history.
+
+        Each conversation is ranked by its best title or message match.
+        """
+        match = build_match_query(q)
+        if not match:
+            return SearchPage()
+
+        title_hits = _hits(CONVERSATIONS_FTS, match, weight=TITLE_WEIGHT).subquery()
+        message_hits = _hits(MESSAGES_FTS, match).subquery()
+        candidates = union_all(
+            select(Conversation.id.label("conversation_id"), title_hits.c.score, title_hits.c.snippet)
+            .join(title_hits, title_hits.c.rowid == _rowid("conversations")),
+            select(Message.conversation_id, message_hits.c.score, message_hits.c.snippet)
+            .join(message_hits, message_hits.c.rowid == _rowid("messages")),
+        ).subquery()
+        # SQLite returns the bare snippet column from the row holding min(score)
+        best = (
+            select(
+                candidates.c.conversation_id,
+                func.min(candidates.c.score).label("score"),
+                candidates.c.snippet,
+            )
+            .group_by(candidates.c.conversation_id)
+            .subquery()
+        )
+
+        query = (
+            select(Conversation, best.c.score, best.c.snippet)
+            .join(best, best.c.conversation_id == Conversation.id)
+            .where(Conversation.is_deleted == False)
+            .order_by(best.c.score, Conversation.id)
+            .limit(limit + 1)
+        )
+        if project_id:
+            query = query.where(Conversation.project_id == project_id)
+        after = _after_cursor(best.c.score, Conversation.id, cursor)
+        if after is not None:
+            query = query.where(after)
+
+        rows = (await db.execute(query)).all()
+        return _page(rows, limit)
+
+    def _file_query(self, match: str, project_id: Optional[str]):
+        hits = _hits(PROJECT_FILES_FTS, match).subquery()
+        query = (
+            select(ProjectFile, hits.c.score, hits.c.snippet)
+            .join(hits, hits.c.rowid == _rowid("project_files"))
+            .where(ProjectFile.is_deleted == False)
+        )
+        if project_id:
+            query = query.where(ProjectFile.project_id == project_id)
+        return query, hits
+
+    async def search_files(
+        self,
+        db: AsyncSession,
+        q: str,
+        project_id: Optional[str] = None,
+        limit: int = 20,
+        cursor: Optional[str] = None,
+    ) -> SearchPage:
+        """Search project file names and extracted content."""
+        match = build_match_query(q)
+        if not match:
+            return SearchPage()
+
+        query, hits = self._file_query(match, project_id)
+        query = query.order_by(hits.c.score, ProjectFile.id).limit(limit + 1)
+        after = _after_cursor(hits.c.score, ProjectFile.id, cursor)
+        if after is not None:
+            query = query.where(after)
+
+        rows = (await db.execute(query)).all()
+        return _page(rows, limit)
+
+    async def count_files(
+        self,
+        db: AsyncSession,
+        q: str,
+        project_id: Optional[str] = None,
+    ) -> int:
+        """Count project files matching a query."""
+        match = build_match_query(q)
+        if not match:
+            return 0
+        query, _ = self._file_query(match, project_id)
+        result = await db.execute(select(func.count()).select_from(query.subquery()))
+        return result.scalar() or 0
+
+    async def search_memories(
+        self,
+        db: AsyncSession,
+        q: str,
+        limit: int = 20,
+        cursor: Optional[str] = None,
+    ) -> SearchPage:
+        """Search active memories."""
+        match = build_match_query(q)
+        if not match:
+            return SearchPage()
+
+        hits = _hits(MEMORIES_FTS, match).subquery()
+        query = (
+            select(Memory, hits.c.score, hits.c.snippet)
+            .join(hits, hits.c.rowid == _rowid("memories"))
+            .where(Memory.is_active == True)
+            .order_by(hits.c.score, Memory.id)
+            .limit(limit + 1)
+        )
+        after = _after_cursor(hits.c.score, Memory.id, cursor)
+        if after is not None:
+            query = query.where(after)
+
+        rows = (await db.execute(query)).all()
+        return _page(rows, limit)
+
+
+# Global service instance
+search_service = SearchService()
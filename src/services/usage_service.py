@@ -0,0 +1,245 @@
+"""Usage aggregation and cost estimation.
+
+Costs are computed once, when a usage row is written (see ``calculate_cost``),
+and summed into the daily/monthly rollups by the triggers in
+``src.core.usage_rollups``. Every query here reads ``usage_rollups``, so a
+report over a month touches one row per user/model/project/conversation per
+day rather than every request in that month.
+
+Periods are ISO strings: ``'YYYY-MM-DD'`` for days, ``'YYYY-MM'`` for months.
+They sort lexicographically, so ranges are plain string comparisons.
+"""
+
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+from typing import Optional
+
+from sqlalchemy import Select, case, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.models.project import Project
+from src.models.usage_rollup import UsageRollup
+
+TOKENS_PER_PRICE_UNIT = 1_000_000
+
+
+@dataclass(frozen=True)
+class ModelPrice:
+    """USD per million tokens for one model."""
+
+    input: float
+    output: float
+    # Prompt caching: writes cost 1.25x input, reads 0.1x input
+    cache_write: Optional[float] = None
+    cache_read: Optional[float] = None
+
+    @property
+    def cache_write_price(self) -> float:
+        return self.cache_write if self.cache_write is not None else self.input * 1.25
+
+    @property
+    def cache_read_price(self) -> float:
+        return self.cache_read if self.cache_read is not None else self.input * 0.1
+
+
+# Matched by longest prefix of the model id, so dated snapshots
+# ("claude-sonnet-4-5-20250929") resolve to their family.
+MODEL_PRICES: dict[str, ModelPrice] = {
+    "claude-opus-4-5": ModelPrice(input=5.0, output=25.0),
+    "claude-opus-4": ModelPrice(input=15.0, output=75.0),
+    "claude-sonnet-4": ModelPrice(input=3.0, output=15.0),
+    "claude-haiku-4-5": ModelPrice(input=1.0, output=5.0),
+    "claude-3-7-sonnet": ModelPrice(input=3.0, output=15.0),
+    "claude-3-5-sonnet": ModelPrice(input=3.0, output=15.0),
+    "claude-3-5-haiku": ModelPrice(input=0.8, output=4.0),
+    "claude-3-opus": ModelPrice(input=15.0, output=75.0),
+    "claude-3-haiku": ModelPrice(input=0.25, output=1.25),
+}
+
+# Unknown models that still name their family
+FAMILY_PRICES: dict[str, ModelPrice] = {
+    "opus": MODEL_PRICES["claude-opus-4"],
+    "sonnet": MODEL_PRICES["claude-sonnet-4"],
+    "haiku": MODEL_PRICES["claude-haiku-4-5"],
+}
+
+DEFAULT_PRICE = MODEL_PRICES["claude-sonnet-4"]
+
+_PREFIXES = sorted(MODEL_PRICES, key=len, reverse=True)
+
+
+def get_model_price(model: str) -> ModelPrice:
+    """Price table entry for a model id."""
+    model = (model or "").lower()
+    for prefix in _PREFIXES:
+        if model.startswith(prefix):
+            return MODEL_PRICES[prefix]
+    for family, price in FAMILY_PRICES.items():
+        if family in model:
+            return price
+    return DEFAULT_PRICE
+
+
+def calculate_cost(
+    model: str,
+    input_tokens: int = 0,
+    output_tokens: int = 0,
+    cache_read_tokens: int = 0,
+    cache_write_tokens: int = 0,
+    thinking_tokens: int = 0,
+) -> float:
+    """Estimated cost in USD of one request.
+
+    Thinking tokens are billed as output tokens.
+    """
+    price = get_model_price(model)
+    cost = (
+        (input_tokens or 0) * price.input
+        + ((output_tokens or 0) + (thinking_tokens or 0)) * price.output
+        + (cache_write_tokens or 0) * price.cache_write_price
+        + (cache_read_tokens or 0) * price.cache_read_price
+    ) / TOKENS_PER_PRICE_UNIT
+    return round(cost, 6)
+
+
+def day_period(day: date) -> str:
+    return day.strftime("%Y-%m-%d")
+
+
+def month_period(day: date) -> str:
+    return day.strftime("%Y-%m")
+
+
+def days_ago(days: int) -> tuple[str, str]:
+    """Day periods covering the last ``days`` days, today included."""
+    today = datetime.utcnow().date()
+    return day_period(today - timedelta(days=max(days, 0))), day_period(today)
+
+
+TOKEN_COLUMNS = (
+    "input_tokens",
+    "output_tokens",
+    "cache_read_tokens",
+    "cache_write_tokens",
+    "thinking_tokens",
+)
+
+
+def _sums() -> list:
+    columns = [func.coalesce(func.sum(UsageRollup.requests), 0).label("requests")]
+    columns += [
+        func.coalesce(func.sum(getattr(UsageRollup, column)), 0).label(column)
+        for column in TOKEN_COLUMNS
+    ]
+    columns.append(func.coalesce(func.sum(UsageRollup.cost), 0.0).label("cost"))
+    return columns
+
+
+def _distinct_nonempty(column):
+    """count(DISTINCT column) ignoring the '' placeholder for NULL."""
+    return func.count(func.distinct(case((column != "", column))))
+
+
+def _total_tokens_order():
+    return func.sum(
+        UsageRollup.input_tokens
+        + UsageRollup.output_tokens
+        + UsageRollup.cache_read_tokens
+        + UsageRollup.cache_write_tokens
+        + UsageRollup.thinking_tokens
+    ).desc()
+
+
+def _usage_dict(row) -> dict:
+    usage = {"requests": row.requests}
+    usage.update({column: getattr(row, column) for column in TOKEN_COLUMNS})
+    usage["total_tokens"] = sum(usage[column] for column in TOKEN_COLUMNS)
+    usage["estimated_cost"] = round(row.cost, 6)
+    return usage
+
+
+class UsageService:
+    """Read-side queries over the usage rollups."""
+
+    def _filtered(
+        self,
+        query: Select,
+        granularity: str,
+        start: Optional[str] = None,
+        end: Optional[str] = None,
+        user_id: Optional[str] = None,
+        project_id: Optional[str] = None,
+        conversation_id: Optional[str] = None,
+    ) -> Select:
+        query = query.where(UsageRollup.granularity == granularity)
+        if start is not None:
+            query = query.where(UsageRollup.period >= start)
+        if end is not None:
+            query = query.where(UsageRollup.period <= end)
+        if user_id is not None:
+            query = query.where(UsageRollup.user_id == user_id)
+        if project_id is not None:
+            query = query.where(UsageRollup.project_id == project_id)
+        if conversation_id is not None:
+            query = query.where(UsageRollup.conversation_id == conversation_id)
+        return query
+
+    async def totals(self, db: AsyncSession, granularity: str, **filters) -> dict:
+        """Summed usage, plus distinct conversations and projects, for a range."""
+        query = select(
+            *_sums(),
+            _distinct_nonempty(UsageRollup.conversation_id).label("conversations"),
+            _distinct_nonempty(UsageRollup.project_id).label("projects"),
+        )
+        row = (await db.execute(self._filtered(query, granularity, **filters))).one()
+        totals = _usage_dict(row)
+        totals["conversations"] = row.conversations
+        totals["projects"] = row.projects
+        return totals
+
+    async def series(self, db: AsyncSession, granularity: str, **filters) -> list[dict]:
+        """Usage per period, oldest first. Periods without usage are omitted."""
+        query = select(
+            UsageRollup.period,
+            *_sums(),
+            _distinct_nonempty(UsageRollup.conversation_id).label("conversations"),
+        )
+        query = self._filtered(query, granularity, **filters)
+        query = query.group_by(UsageRollup.period).order_by(UsageRollup.period)
+        return [
+            {"period": row.period, **_usage_dict(row), "conversations": row.conversations}
+            for row in await db.execute(query)
+        ]
+
+    async def by_model(self, db: AsyncSession, granularity: str, **filters) -> list[dict]:
+        """Usage per model, heaviest first."""
+        query = select(UsageRollup.model, *_sums())
+        query = self._filtered(query, granularity, **filters)
+        query = query.group_by(UsageRollup.model).order_by(_total_tokens_order())
+        return [
+            {"model": row.model, **_usage_dict(row)}
+            for row in await db.execute(query)
+        ]
+
+    async def by_project(
+        self, db: AsyncSession, granularity: str, limit: int = 10, **filters
+    ) -> list[dict]:
+        """Usage per existing project, heaviest first."""
+        query = (
+            select(UsageRollup.project_id, Project.name, *_sums())
+            .join(Project, Project.id == UsageRollup.project_id)
+        )
+        query = self._filtered(query, granularity, **filters)
+        query = (
+            query.group_by(UsageRollup.project_id, Project.name)
+            .order_by(_total_tokens_order())
+            .limit(limit)
+        )
+        return [
+            {"project_id": row.project_id, "project_name": row.name, **_usage_dict(row)}
+            for row in await db.execute(query)
+        ]
+
+
+# Global service instance
+usage_service = UsageService()
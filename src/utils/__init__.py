@@ -4,6 +4,7 @@ from .functions import generate_thread_id, get_current_timestamp
 from .audit import (
     log_audit,
     get_audit_logs,
+    get_audit_log_page,
     log_tool_decision,
     log_conversation_action,
     log_project_action,
@@ -18,6 +19,7 @@ __all__ = [
     "get_current_timestamp",
     "log_audit",
     "get_audit_logs",
+    "get_audit_log_page",
     "log_tool_decision",
     "log_conversation_action",
     "log_project_action",
@@ -0,0 +1,323 @@
+"""Code artifact detection for markdown responses.
+
+Code blocks are found by ``CodeFenceParser``, which tracks ``` fences
+incrementally. The agent stream feeds it every chunk as it arrives, so a code
+block becomes an artifact as soon as its closing fence is streamed, not after
+the whole answer has been generated. ``extract_code_blocks`` runs the same
+parser over a complete document. A block is what the pattern
+``\\`\\`\\`(\\w+)?\\n(.*?)\\n\\`\\`\\``` (DOTALL) would match, and blocks
+whose code is only whitespace are skipped. ``detect_many`` runs detection
+over a batch of documents. This module is the only detection implementation;
+the agent stream and the artifacts API both use it.
+
+Language detection runs in time linear in the size of the code. All patterns
+are compiled once and use possessive quantifiers. The React/JSX checks, which
+were regexes such as ``function\\s+\\w+\\([^)]*\\)\\s*{[^}]*return[^}]*<``, are
+scanned so that each ``)`` and ``}`` is searched for at most once, however
+many function headers share it.
+"""
+
+import re
+from typing import Iterable
+
+# Language detection mapping
+LANGUAGE_ALIASES = {
+    "javascript": "js",
+    "typescript": "ts",
+    "python": "py",
+    "java": "java",
+    "cpp": "cpp",
+    "c++": "cpp",
+    "csharp": "cs",
+    "c#": "cs",
+    "go": "go",
+    "rust": "rs",
+    "ruby": "rb",
+    "php": "php",
+    "swift": "swift",
+    "kotlin": "kt",
+    "html": "html",
+    "css": "css",
+    "json": "json",
+    "yaml": "yaml",
+    "markdown": "md",
+    "bash": "bash",
+    "shell": "bash",
+    "sql": "sql",
+    "graphql": "graphql",
+    "xml": "xml",
+}
+
+# Artifact type by detected language; anything else is "code"
+ARTIFACT_TYPES = {
+    "html": "html",
+    "htm": "html",
+    "svg": "svg",
+    "mermaid": "mermaid",
+    "latex": "latex",
+    "tex": "latex",
+}
+
+# React/JSX markers (matched case-insensitively, on lowercased code):
+#   import\s+.*React
+#   (export default) function\s+\w+\([^)]*\)\s*{[^}]*return[^}]*<
+#   const\s+\w+\s*=\s*\([^)]*\)\s*=>\s*{[^}]*return[^}]*<
+#   jsx, tsx
+_IMPORT = re.compile(r"import\s++")
+_COMPONENT_HEAD = re.compile(r"(?:(function)\s++\w++|const\s++\w++\s*+=\s*+)\(")
+_FUNCTION_BODY = re.compile(r"\s*+\{")
+_ARROW_BODY = re.compile(r"\s*+=>\s*+\{")
+
+# Title candidates, in order of preference
+_TITLE_PATTERNS = [
+    re.compile(r"function\s++(\w++)"),
+    re.compile(r"const\s++(\w++)\s*+=\s*+\("),
+    re.compile(r"export\s++default\s++function\s++(\w++)"),
+    re.compile(r"class\s++(\w++)"),
+    re.compile(r"def\s++(\w++)"),
+]
+
+_FENCE_OPEN = re.compile(r"```(\w*+)")
+
+
+def _imports_react(lower: str) -> bool:
+    line_end = -1
+    last_react = -1
+    for match in _IMPORT.finditer(lower):
+        start = match.end()
+        if start > line_end:
+            line_end = lower.find("\n", start)
+            if line_end == -1:
+                line_end = len(lower)
+            last_react = lower.rfind("react", start, line_end)
+        if last_react >= start:
+            return True
+    return False
+
+
+def _returns_jsx(lower: str) -> bool:
+    """Whether a function or arrow component's body returns markup."""
+    end = len(lower)
+    paren = brace = -1
+    bodies: dict[tuple[int, bool], int] = {}
+    last_return = -1
+    for match in _COMPONENT_HEAD.finditer(lower):
+        if paren < match.end():
+            paren = lower.find(")", match.end())
+            if paren == -1:
+                return False
+        is_function = match.group(1) is not None
+        key = (paren, is_function)
+        if key not in bodies:
+            body = (_FUNCTION_BODY if is_function else _ARROW_BODY).match(lower, paren + 1)
+            bodies[key] = body.end() if body else -1
+        start = bodies[key]
+        if start == -1:
+            continue
+        if brace < start:
+            # First body ending at this brace: find its last "return ... <"
+            brace = lower.find("}", start)
+            if brace == -1:
+                brace = end
+            last_lt = lower.rfind("<", start, brace)
+            last_return = lower.rfind("return", start, last_lt) if last_lt != -1 else -1
+        if last_return >= start:
+            return True
+    return False
+
+
+def is_react(code: str) -> bool:
+    """Whether code looks like a React/JSX component."""
+    lower = code.lower()
+    return "jsx" in lower or "tsx" in lower or _imports_react(lower) or _returns_jsx(lower)
+
+
+def detect_language(code: str, language_hint: str = "") -> str:
+    """Detect the programming language of a code block."""
+    # Check for React/JSX patterns first (highest priority)
+    if is_react(code):
+        return "React/JSX"
+
+    # If language hint is provided, use it
+    if language_hint:
+        normalized = language_hint.lower().strip()
+        return LANGUAGE_ALIASES.get(normalized, normalized)
+
+    # Simple heuristics
+    if "def " in code and ":" in code and "import " not in code:
+        return "python"
+    if "function " in code or "=> " in code or "let " in code or "const " in code:
+        return "javascript"
+    if "public class " in code or "System.out.println" in code:
+        return "java"
+    if "#include " in code or "std::" in code:
+        return "cpp"
+    if "package " in code and "func " in code:
+        return "go"
+
+    return "code"
+
+
+def extract_title_from_code(code: str, language: str) -> str:
+    """Extract a meaningful title from code content."""
+    for pattern in _TITLE_PATTERNS:
+        match = pattern.search(code)
+        if match:
+            name = match.group(1)
+            # Capitalize for components
+            if language == "React/JSX" and name[0].islower():
+                name = name[0].upper() + name[1:]
+            return name
+
+    # Fallback: extract first line or use generic name
+    first_line = code.strip().partition("\n")[0]
+    if len(first_line) < 50:
+        return first_line.strip().strip('/*#').strip()
+
+    return "Code Artifact"
+
+
+def build_artifact(code: str, language_hint: str = "") -> dict:
+    """Artifact fields (content, language, title, type) for one code block."""
+    language = detect_language(code, language_hint)
+    return {
+        "content": code,
+        "language": language,
+        "title": extract_title_from_code(code, language),
+        "artifact_type": ARTIFACT_TYPES.get(language.lower(), "code"),
+    }
+
+
+class CodeFenceParser:
+    """Finds code blocks in markdown that arrives in chunks.
+
+    ``feed`` returns ``(event, payload)`` pairs as blocks are found:
+
+    - ``artifact_start`` ``{"index", "language_hint"}`` when a block has its
+      first non-blank line
+    - ``artifact_delta`` ``{"index", "content"}`` with the complete lines of
+      code that arrived since the last one (joining the deltas gives the
+      block's code)
+    - ``artifact_end`` ``{"index", **build_artifact(...)}`` when it closes
+
+    ``finish`` ends the document. A started block that never closed produces
+    ``artifact_end`` ``{"index", "discarded": True}``.
+    """
+
+    def __init__(self):
+        self.blocks: list[dict] = []
+        self._buffer = ""
+        self._in_block = False
+        self._at_code_start = False
+        self._hint = ""
+        self._code: list[str] = []
+        self._started = False
+
+    def feed(self, text: str) -> list[tuple[str, dict]]:
+        self._buffer += text
+        events: list[tuple[str, dict]] = []
+        pos = 0
+        while True:
+            if self._in_block:
+                pos = self._scan_block(pos, events)
+            else:
+                pos = self._scan_text(pos)
+            if pos < 0:
+                break
+        return events
+
+    def finish(self) -> list[tuple[str, dict]]:
+        events = []
+        if self._in_block and self._started:
+            events.append(("artifact_end", {"index": len(self.blocks), "discarded": True}))
+        self._buffer = ""
+        self._in_block = False
+        return events
+
+    def _scan_text(self, pos: int) -> int:
+        """Look for an opening fence. Returns where to continue, or -1 to wait."""
+        buffer = self._buffer
+        while True:
+            match = _FENCE_OPEN.search(buffer, pos)
+            if match is None:
+                # Keep a possible partial fence for the next chunk
+                self._buffer = buffer[max(pos, len(buffer) - 2):]
+                return -1
+            after = match.end()
+            if after == len(buffer):
+                self._buffer = buffer[match.start():]
+                return -1
+            if buffer[after] == "\n":
+                self._in_block = True
+                self._at_code_start = True
+                self._hint = match.group(1)
+                self._code = []
+                self._started = False
+                return after + 1
+            pos = match.start() + 1
+
+    def _scan_block(self, pos: int, events: list) -> int:
+        """Consume complete code lines up to the closing fence. Returns -1 to wait."""
+        buffer = self._buffer
+        if not self._at_code_start and buffer.startswith("```", pos):
+            self._close_block(events)
+            return pos + 3
+        close = buffer.find("\n```", pos)
+        if close != -1:
+            self._add_code(buffer[pos:close], events)
+            self._close_block(events)
+            return close + 4
+        # No closing fence yet: take the complete lines, keep the partial one
+        newline = buffer.rfind("\n", pos)
+        if newline != -1:
+            self._add_code(buffer[pos:newline], events)
+            pos = newline + 1
+        self._buffer = buffer[pos:]
+        return -1
+
+    def _add_code(self, lines: str, events: list) -> None:
+        """Append complete lines (without their final newline) to the open block."""
+        piece = "\n" + lines if not self._at_code_start else lines
+        self._at_code_start = False
+        self._code.append(piece)
+        index = len(self.blocks)
+        if self._started:
+            events.append(("artifact_delta", {"index": index, "content": piece}))
+        elif piece.strip():
+            self._started = True
+            events.append(("artifact_start", {"index": index, "language_hint": self._hint}))
+            events.append(("artifact_delta", {"index": index, "content": "".join(self._code)}))
+
+    def _close_block(self, events: list) -> None:
+        self._in_block = False
+        code = "".join(self._code)
+        self._code = []
+        if not code.strip():
+            return
+        index = len(self.blocks)
+        artifact = build_artifact(code, self._hint)
+        self.blocks.append(artifact)
+        events.append(("artifact_end", {"index": index, **artifact}))
+
+
+def extract_code_blocks(content: str) -> list[dict]:
+    """Extract code blocks from markdown content."""
+    parser = CodeFenceParser()
+    parser.feed(content)
+    parser.finish()
+    return parser.blocks
+
+
+def detect_many(contents: Iterable[str]) -> list[list[dict]]:
+    """Code blocks of each document, in order.
+
+    Identical documents (regenerated or re-sent responses) are detected once.
+    Each result is a fresh list, so callers may modify it.
+    """
+    seen: dict[str, list[dict]] = {}
+    results = []
+    for content in contents:
+        if content not in seen:
+            seen[content] = extract_code_blocks(content)
+        results.append([dict(block) for block in seen[content]])
+    return results
@@ -6,10 +6,11 @@ from uuid import UUID
 
 from fastapi import Request
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import Select, select
 
 from src.models.audit_log import AuditLog, AuditActionType
 from src.core.database import async_session_factory
+from src.utils.pagination import Page, SortKey, paginate
 
 logger = logging.getLogger(__name__)
 
@@ -72,6 +73,79 @@ async def log_audit(
     return audit_log
 
 
+# Newest first; id breaks ties so cursors are stable
+AUDIT_LOG_ORDER = (
+    SortKey(AuditLog.created_at, descending=True),
+    SortKey(AuditLog.id, descending=True),
+)
+
+
+def _audit_log_query(
+    user_id: Optional[str] = None,
+    action: Optional[AuditActionType | str] = None,
+    resource_type: Optional[str] = None,
+    resource_id: Optional[str | UUID] = None,
+    tool_name: Optional[str] = None,
+) -> Select:
+    """Select audit logs matching the filters, unordered."""
+    stmt = select(AuditLog)
+
+    if user_id:
+        stmt = stmt.where(AuditLog.user_id == user_id)
+
+    if action:
+        action_enum = action if isinstance(action, AuditActionType) else AuditActionType(action)
+        stmt = stmt.where(AuditLog.action == action_enum)
+
+    if resource_type:
+        stmt = stmt.where(AuditLog.resource_type == resource_type)
+
+    if resource_id:
+        resource_id_str = str(resource_id)
+        stmt = stmt.where(AuditLog.resource_id == resource_id_str)
+
+    if tool_name:
+        stmt = stmt.where(AuditLog.tool_name == tool_name)
+
+    return stmt
+
+
+async def get_audit_log_page(
+    db: AsyncSession,
+    user_id: Optional[str] = None,
+    action: Optional[AuditActionType | str] = None,
+    resource_type: Optional[str] = None,
+    resource_id: Optional[str | UUID] = None,
+    tool_name: Optional[str] = None,
+    limit: int = 100,
+    cursor: Optional[str] = None,
+    include_total: bool = False,
+    offset: int = 0,
+) -> Page:
+    """Query one keyset-paginated page of audit logs, newest first.
+
+    Args:
+        db: Database session
+        user_id: Filter by user ID
+        action: Filter by action type
+        resource_type: Filter by resource type
+        resource_id: Filter by resource ID
+        tool_name: Filter by tool name
+        limit: Maximum number of results
+        cursor: ``next_cursor``/``prev_cursor`` of a previous page
+        include_total: Also count every matching log
+        offset: Number of results to skip (deprecated, use ``cursor``)
+
+    Returns:
+        Page of matching audit logs
+    """
+    stmt = _audit_log_query(user_id, action, resource_type, resource_id, tool_name)
+    return await paginate(
+        db, stmt, AUDIT_LOG_ORDER, limit=limit, cursor=cursor,
+        include_total=include_total, offset=offset,
+    )
+
+
 async def get_audit_logs(
     db: AsyncSession,
     user_id: Optional[str] = None,
@@ -97,29 +171,17 @@ async def get_audit_logs(
     Returns:
         List of matching audit logs
     """
-    stmt = select(AuditLog).order_by(AuditLog.created_at.desc())
-
-    if user_id:
-        stmt = stmt.where(AuditLog.user_id == user_id)
-
-    if action:
-        action_enum = action if isinstance(action, AuditActionType) else AuditActionType(action)
-        stmt = stmt.where(AuditLog.action == action_enum)
-
-    if resource_type:
-        stmt = stmt.where(AuditLog.resource_type == resource_type)
-
-    if resource_id:
-        resource_id_str = str(resource_id)
-        stmt = stmt.where(AuditLog.resource_id == resource_id_str)
-
-    if tool_name:
-        stmt = stmt.where(AuditLog.tool_name == tool_name)
-
-    stmt = stmt.limit(limit).offset(offset)
-
-    result = await db.execute(stmt)
-    return list(result.scalars().all())
+    page = await get_audit_log_page(
+        db,
+        user_id=user_id,
+        action=action,
+        resource_type=resource_type,
+        resource_id=resource_id,
+        tool_name=tool_name,
+        limit=limit,
+        offset=offset,
+    )
+    return page.items
 
 
 async def log_tool_decision(
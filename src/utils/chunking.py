@@ -0,0 +1,53 @@
+"""Text chunking and token estimates for knowledge-base retrieval."""
+
+# Rough estimate: 1 token ≈ 4 characters
+CHARS_PER_TOKEN = 4
+
+# Preferred break points, strongest first
+_SEPARATORS = ("\n\n", "\n", ". ", " ")
+
+
+def estimate_tokens(text: str) -> int:
+    """Approximate token count of a piece of text."""
+    if not text:
+        return 0
+    return max(1, -(-len(text) // CHARS_PER_TOKEN))
+
+
+def chunk_text(text: str, max_tokens: int, overlap_tokens: int = 0) -> list[str]:
+    """Split text into passages of at most ``max_tokens`` (estimated) each.
+
+    Passages end on a paragraph, line, sentence or word boundary when one
+    falls in the second half of the window. Consecutive passages share about
+    ``overlap_tokens`` of text, so a sentence cut at a boundary is still
+    whole in one of them.
+    """
+    max_chars = max(1, max_tokens) * CHARS_PER_TOKEN
+    overlap_chars = min(max(0, overlap_tokens) * CHARS_PER_TOKEN, max_chars // 2)
+
+    chunks = []
+    start = 0
+    length = len(text)
+    while start < length:
+        end = min(start + max_chars, length)
+        if end < length:
+            for separator in _SEPARATORS:
+                cut = text.rfind(separator, start + max_chars // 2, end)
+                if cut != -1:
+                    end = cut + len(separator)
+                    break
+
+        passage = text[start:end].strip()
+        if passage:
+            chunks.append(passage)
+        if end >= length:
+            break
+
+        # Step back for the overlap, but start on a word boundary
+        next_start = end - overlap_chars
+        if overlap_chars:
+            space = text.find(" ", next_start, end)
+            if space != -1:
+                next_start = space + 1
+        start = max(next_start, start + 1)
+    return chunks
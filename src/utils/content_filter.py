@@ -4,14 +4,14 @@ from typing import Optional
 from src.api.routes.settings import user_settings
 
 
-def get_content_filter_instructions() -> str:
+async def get_content_filter_instructions() -> str:
     """
     Generate content filtering instructions based on user settings.
 
     Returns instructions to prepend to system messages based on filter level and categories.
     """
-    filter_level = user_settings.get("content_filter_level", "low")
-    filter_categories = user_settings.get("content_filter_categories", [])
+    filter_level = await user_settings.aget("content_filter_level", "low")
+    filter_categories = await user_settings.aget("content_filter_categories", [])
 
     # If filtering is off, return empty string
     if filter_level == "off" or not filter_categories:
@@ -61,7 +61,7 @@ def get_content_filter_instructions() -> str:
     return filter_instruction
 
 
-def apply_content_filtering_to_message(message: str) -> str:
+async def apply_content_filtering_to_message(message: str) -> str:
     """
     Apply content filtering to a user message.
 
@@ -73,7 +73,7 @@ def apply_content_filtering_to_message(message: str) -> str:
     Returns:
         Message with content filtering instructions prepended
     """
-    filter_instruction = get_content_filter_instructions()
+    filter_instruction = await get_content_filter_instructions()
 
     if not filter_instruction:
         return message
@@ -81,7 +81,7 @@ def apply_content_filtering_to_message(message: str) -> str:
     return f"{filter_instruction}{message}"
 
 
-def should_filter_response(response_content: str) -> tuple[bool, Optional[str]]:
+async def should_filter_response(response_content: str) -> tuple[bool, Optional[str]]:
     """
     Check if a response should be filtered based on content filter settings.
 
@@ -94,8 +94,8 @@ def should_filter_response(response_content: str) -> tuple[bool, Optional[str]]:
     Returns:
         Tuple of (should_filter, filter_reason)
     """
-    filter_level = user_settings.get("content_filter_level", "low")
-    filter_categories = user_settings.get("content_filter_categories", [])
+    filter_level = await user_settings.aget("content_filter_level", "low")
+    filter_categories = await user_settings.aget("content_filter_categories", [])
 
     if filter_level == "off" or not filter_categories:
         return False, None
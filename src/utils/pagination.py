@@ -0,0 +1,206 @@
+"""Opaque cursor helpers for keyset pagination.
+
+``paginate`` pages through a query by its sort key instead of an ``OFFSET``:
+each page is fetched with ``WHERE (sort_key, id) < (last_sort_key, last_id)``
+so, given an index on ``(sort_key, id)``, SQLite seeks straight to the page
+and every page costs the same however deep it is. Cursors encode the
+direction and the sort key of the row they point at:
+
+- ``next_cursor`` continues after the last row of the page
+- ``prev_cursor`` goes back to the rows before the first one
+
+The sort must end with a unique column (the primary key) so ties are broken
+the same way on every page. Sort columns are assumed to be non-NULL.
+"""
+
+import base64
+import json
+import uuid
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Optional, Sequence
+
+from fastapi import HTTPException, Response, status
+from sqlalchemy import Select, and_, bindparam, func, or_, select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+PREV_CURSOR_HEADER = "X-Prev-Cursor"
+TOTAL_COUNT_HEADER = "X-Total-Count"
+
+_FORWARD = "next"
+_BACKWARD = "prev"
+
+
+def encode_cursor(*values: Any) -> str:
+    """Encode the sort key of the last returned row as an opaque cursor."""
+    raw = json.dumps(list(values), separators=(",", ":"), default=str)
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, size: int) -> list[Any]:
+    """Decode a cursor produced by ``encode_cursor``.
+
+    Raises:
+        HTTPException: 400 if the cursor is malformed
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (ValueError, TypeError):
+        values = None
+    if not isinstance(values, list) or len(values) != size:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+    return values
+
+
+@dataclass(frozen=True)
+class SortKey:
+    """One column of a keyset sort."""
+
+    column: Any
+    descending: bool = False
+
+    def value(self, item: Any) -> Any:
+        return getattr(item, self.column.key)
+
+    def coerce(self, value: Any) -> Any:
+        """Turn a JSON-decoded cursor value back into the column's Python type."""
+        try:
+            python_type = self.column.type.python_type
+        except NotImplementedError:
+            return value
+        if value is None or isinstance(value, python_type):
+            return value
+        try:
+            if python_type is datetime:
+                return datetime.fromisoformat(value)
+            if python_type is uuid.UUID:
+                return uuid.UUID(value)
+            return python_type(value)
+        except (TypeError, ValueError):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor"
+            ) from None
+
+
+@dataclass
+class Page:
+    """A page of rows plus the cursors around it."""
+
+    items: list[Any] = field(default_factory=list)
+    next_cursor: Optional[str] = None
+    prev_cursor: Optional[str] = None
+    # Only counted when asked for, it costs a scan of the filtered rows
+    total: Optional[int] = None
+
+    @property
+    def has_more(self) -> bool:
+        return self.next_cursor is not None
+
+    def cursors(self) -> dict:
+        """Cursor fields for dict response bodies."""
+        return {"next_cursor": self.next_cursor, "prev_cursor": self.prev_cursor}
+
+
+def set_page_headers(response: Response, page: Page) -> None:
+    """Expose the page cursors and total without changing list response bodies."""
+    if page.next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = page.next_cursor
+    if page.prev_cursor:
+        response.headers[PREV_CURSOR_HEADER] = page.prev_cursor
+    if page.total is not None:
+        response.headers[TOTAL_COUNT_HEADER] = str(page.total)
+
+
+def _keyset_predicate(order: Sequence[SortKey], values: list[Any], backward: bool):
+    """Rows strictly after (or, going backward, before) the cursor position."""
+    binds = [
+        bindparam(None, value, type_=key.column.type)
+        for key, value in zip(order, values, strict=True)
+    ]
+    directions = {key.descending for key in order}
+    if len(directions) == 1:
+        # A row value comparison lets SQLite seek straight to the cursor in the index
+        columns = tuple_(*(key.column for key in order))
+        past = order[0].descending != backward
+        return columns < tuple_(*binds) if past else columns > tuple_(*binds)
+
+    clauses = []
+    for index, key in enumerate(order):
+        past = key.descending != backward
+        comparison = key.column < binds[index] if past else key.column > binds[index]
+        equal = [order[i].column == binds[i] for i in range(index)]
+        clauses.append(and_(*equal, comparison))
+    return or_(*clauses)
+
+
+def _cursor(direction: str, order: Sequence[SortKey], item: Any) -> str:
+    return encode_cursor(direction, *(key.value(item) for key in order))
+
+
+async def paginate(
+    db: AsyncSession,
+    query: Select,
+    order: Sequence[SortKey],
+    limit: Optional[int],
+    cursor: Optional[str] = None,
+    include_total: bool = False,
+    offset: int = 0,
+) -> Page:
+    """Fetch one page of ``query`` ordered by ``order``.
+
+    Args:
+        db: Database session
+        query: Filtered select of ORM entities, without ORDER BY/LIMIT
+        order: Sort keys, ending with a unique column
+        limit: Page size; None returns every row (in keyset order)
+        cursor: ``next_cursor``/``prev_cursor`` of a previous page
+        include_total: Also count all rows matching the filters
+        offset: Legacy offset paging, ignored when a cursor is given
+
+    Raises:
+        HTTPException: 400 if the cursor is malformed
+    """
+    total = None
+    if include_total:
+        total = await db.scalar(select(func.count()).select_from(query.order_by(None).subquery()))
+
+    backward = False
+    if cursor:
+        direction, *values = decode_cursor(cursor, len(order) + 1)
+        if direction not in (_FORWARD, _BACKWARD):
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+        backward = direction == _BACKWARD
+        values = [key.coerce(value) for key, value in zip(order, values, strict=True)]
+        query = query.where(_keyset_predicate(order, values, backward))
+    elif offset:
+        query = query.offset(offset)
+
+    query = query.order_by(*(
+        key.column.desc() if key.descending != backward else key.column.asc()
+        for key in order
+    ))
+
+    if limit is None:
+        items = list((await db.execute(query)).scalars().all())
+        if backward:
+            items.reverse()
+        return Page(items=items, total=total)
+
+    items = list((await db.execute(query.limit(limit + 1))).scalars().all())
+    more = len(items) > limit
+    items = items[:limit]
+    if backward:
+        items.reverse()
+
+    # Going backward, the page we came from is always after this one
+    has_next = backward or more
+    has_prev = more if backward else bool(cursor or offset)
+
+    page = Page(items=items, total=total)
+    if items and has_next:
+        page.next_cursor = _cursor(_FORWARD, order, items[-1])
+    if items and has_prev:
+        page.prev_cursor = _cursor(_BACKWARD, order, items[0])
+    return page
@@ -0,0 +1 @@
+"""Benchmark suites (run with ``pytest tests/benchmarks --benchmark-only``)."""
@@ -0,0 +1,97 @@
+"""Throughput of artifact detection over large synthetic markdown.
+
+Run with ``pytest tests/benchmarks --benchmark-only``. Each benchmark records
+its throughput in MB/s under ``extra_info["mb_per_s"]``, which shows up with
+``--benchmark-json`` and can be compared across runs.
+"""
+
+import random
+
+import pytest
+
+from src.utils.artifact_detection import (
+    CodeFenceParser,
+    detect_language,
+    detect_many,
+    extract_code_blocks,
+)
+
+pytest.importorskip("pytest_benchmark")
+
+PROSE = (
+    "The function below handles the request and returns the rendered view. "
+    "Note that the const declarations are hoisted, so order matters here.\n"
+)
+
+SNIPPETS = [
+    ("python", "def handler(request):\n    data = request.json()\n    return {'ok': True, 'data': data}\n"),
+    ("jsx", "import React from 'react';\n\nexport default function Card({ title }) {\n  return <div className=\"card\">{title}</div>;\n}\n"),
+    ("javascript", "const add = (a, b) => {\n  let total = a + b;\n  return total;\n};\n"),
+    ("", "#include <stdio.h>\nint main() {\n  std::cout << 1;\n  return 0;\n}\n"),
+    ("html", "<!doctype html>\n<html><body><h1>Hello</h1></body></html>\n"),
+]
+
+
+def _document(size: int, seed: int = 7) -> str:
+    """Markdown of roughly ``size`` characters, mixing prose and code blocks."""
+    rng = random.Random(seed)
+    parts = []
+    length = 0
+    while length < size:
+        hint, code = rng.choice(SNIPPETS)
+        part = PROSE * rng.randint(1, 4) + f"```{hint}\n" + code * rng.randint(1, 20) + "```\n\n"
+        parts.append(part)
+        length += len(part)
+    return "".join(parts)
+
+
+def _fence_count(document: str) -> int:
+    """Code blocks in a ``_document``: every block opens and closes a fence."""
+    return document.count("```") // 2
+
+
+def _record_throughput(benchmark, size: int) -> None:
+    # No timings with --benchmark-disable; the assertions still run
+    if benchmark.stats is None:
+        return
+    benchmark.extra_info["mb_per_s"] = size / benchmark.stats.stats.mean / 1_000_000
+
+
+@pytest.fixture(scope="module")
+def large_document() -> str:
+    return _document(2_000_000)
+
+
+def test_extract_code_blocks_throughput(benchmark, large_document):
+    blocks = benchmark(extract_code_blocks, large_document)
+    assert len(blocks) == _fence_count(large_document)
+    assert all(block["content"] and block["language"] for block in blocks)
+    _record_throughput(benchmark, len(large_document))
+
+
+def test_streaming_parser_throughput(benchmark, large_document):
+    chunks = [large_document[i:i + 16] for i in range(0, len(large_document), 16)]
+
+    def stream():
+        parser = CodeFenceParser()
+        for chunk in chunks:
+            parser.feed(chunk)
+        parser.finish()
+        return parser.blocks
+
+    assert benchmark(stream) == extract_code_blocks(large_document)
+    _record_throughput(benchmark, len(large_document))
+
+
+def test_detect_many_throughput(benchmark):
+    responses = [_document(10_000, seed=n) for n in range(200)]
+    results = benchmark(detect_many, responses)
+    assert [len(blocks) for blocks in results] == [_fence_count(r) for r in responses]
+    _record_throughput(benchmark, sum(len(response) for response in responses))
+
+
+def test_language_detection_on_adversarial_code(benchmark):
+    # Many headers sharing one brace: quadratic for the old backtracking regexes
+    code = "function render(props) {" + " return props.value;" * 50_000
+    assert benchmark(detect_language, code) == "javascript"
+    _record_throughput(benchmark, len(code))
@@ -12,7 +12,8 @@ from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine, async_sess
 from playwright.sync_api import Page, BrowserContext
 
 from src.main import app
-from src.core.database import Base, get_db
+from src.core.rate_limiter import RateLimitMiddleware
+from src.core.database import Base, get_db, get_read_db
 
 
 # Test database URL - use in-memory database for tests
@@ -67,6 +68,21 @@ def use_mock_agent() -> Generator[None, None, None]:
     get_settings.cache_clear()
 
 
+@pytest.fixture(autouse=True)
+def reset_rate_limits() -> Generator[None, None, None]:
+    """Start every test with a fresh rate limit budget.
+
+    All test clients share one client id, and agent runs cost more than one
+    request, so without this a module's worth of streams gets 429s.
+    """
+    yield
+    layer = app.middleware_stack
+    while layer is not None:
+        if isinstance(layer, RateLimitMiddleware):
+            layer.rate_limiter.clients.clear()
+        layer = getattr(layer, "app", None)
+
+
 @pytest.fixture(scope="session")
 def event_loop() -> Generator[asyncio.AbstractEventLoop, None, None]:
     """Create an event loop for the test session."""
@@ -101,6 +117,7 @@ async def client(test_db: AsyncSession) -> AsyncGenerator[AsyncClient, None]:
         yield test_db
 
     app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_read_db] = override_get_db
 
     async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
         yield ac
@@ -116,6 +133,7 @@ async def async_client(test_db: AsyncSession) -> AsyncGenerator[AsyncClient, Non
         yield test_db
 
     app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_read_db] = override_get_db
 
     async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
         yield ac
@@ -0,0 +1,61 @@
+"""Tests for the bounded agent instance cache."""
+
+from src.services.agent_service import AgentCache, agent_service
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_lru_eviction_and_counters():
+    cache = AgentCache(max_size=2, ttl_seconds=0)
+    cache.put("a", "agent-a")
+    cache.put("b", "agent-b")
+
+    assert cache.get("a") == "agent-a"  # "b" is now least recently used
+    cache.put("c", "agent-c")
+
+    assert "b" not in cache
+    assert cache.get("b") is None
+    assert len(cache) == 2
+    assert cache.stats() == {
+        "size": 2,
+        "max_size": 2,
+        "ttl_seconds": 0,
+        "hits": 1,
+        "misses": 1,
+        "evictions": 1,
+    }
+
+
+def test_idle_entries_expire():
+    clock = FakeClock()
+    cache = AgentCache(max_size=10, ttl_seconds=60, clock=clock)
+    cache.put("a", "agent-a")
+    cache.put("b", "agent-b")
+
+    clock.now = 30
+    assert cache.get("a") == "agent-a"  # refreshes "a"
+
+    clock.now = 75
+    assert cache.get("b") is None
+    assert cache.get("a") == "agent-a"
+    assert cache.evictions == 1
+
+    clock.now = 200
+    cache.put("c", "agent-c")
+    assert "a" not in cache
+    assert len(cache) == 1
+
+
+def test_service_reuses_cached_agent():
+    agent_service.agents.clear()
+    first = agent_service.get_or_create_agent(user_id="cache-test")
+    second = agent_service.get_or_create_agent(user_id="cache-test")
+
+    assert first is second
+    assert len(agent_service.agents) == 1
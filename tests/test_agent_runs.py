@@ -0,0 +1,172 @@
+"""Tests for resumable agent runs and their event logs."""
+
+import asyncio
+
+import pytest
+
+from src.core.event_log import RunEventLog
+from src.services.run_manager import AgentRunManager, RunRejected
+
+
+def _event(n: int) -> dict:
+    return {"event": "message", "data": f'{{"content": "{n}"}}'}
+
+
+async def test_event_log_spills_to_disk_and_replays_everything(tmp_path):
+    log = RunEventLog("run-1", max_memory_events=4, spill_dir=str(tmp_path))
+    for n in range(10):
+        await log.append(_event(n))
+
+    assert log.spill_path.exists()
+    assert len(log._events) <= 4
+    assert [event["id"] for event in log.read(0)] == list(range(1, 11))
+    assert [event["id"] for event in log.read(7)] == [8, 9, 10]
+
+    log.discard()
+    assert not log.spill_path.exists()
+
+
+async def test_follow_replays_then_tails_until_closed():
+    log = RunEventLog("run-2", max_memory_events=100)
+    await log.append(_event(1))
+    await log.append(_event(2))
+
+    async def consume():
+        return [event["id"] async for event in log.follow(after_id=1)]
+
+    reader = asyncio.create_task(consume())
+    await asyncio.sleep(0)
+    await log.append(_event(3))
+    await log.close()
+
+    assert await reader == [2, 3]
+
+
+async def test_run_finishes_without_a_listener():
+    manager = AgentRunManager(max_memory_events=100, spill_dir=None)
+    finished = asyncio.Event()
+
+    async def events():
+        for n in range(3):
+            await asyncio.sleep(0)
+            yield _event(n)
+        finished.set()
+
+    run = manager.start(events(), thread_id="thread-1")
+    await asyncio.wait_for(finished.wait(), timeout=1)
+    await run.task
+
+    assert run.status == "completed"
+    assert [event["id"] async for event in run.log.follow(0)] == [1, 2, 3]
+
+
+async def test_cancel_and_purge():
+    clock_now = [1000.0]
+    manager = AgentRunManager(
+        max_memory_events=100,
+        spill_dir=None,
+        retention_seconds=60,
+        max_retained=10,
+        clock=lambda: clock_now[0],
+    )
+
+    async def forever():
+        while True:
+            await asyncio.sleep(0.01)
+            yield _event(0)
+
+    run = manager.start(forever())
+    await asyncio.sleep(0.03)
+
+    assert await manager.cancel(run.run_id)
+    assert run.status == "cancelled"
+    assert run.log.read(0)[-1]["event"] == "cancelled"
+
+    clock_now[0] += 61
+    assert manager.purge() == 1
+    assert manager.get(run.run_id) is None
+
+
+async def test_workers_bound_concurrency():
+    manager = AgentRunManager(max_memory_events=100, spill_dir=None, workers=2, queue_size=10)
+    running = 0
+    peak = 0
+
+    async def events():
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0.01)
+        yield _event(0)
+        running -= 1
+
+    runs = [manager.start(events(), user_id=f"user-{n}") for n in range(5)]
+    assert manager.stats()["queued"] == 5
+
+    await asyncio.wait_for(asyncio.gather(*(run.wait() for run in runs)), timeout=1)
+
+    assert peak == 2
+    assert all(run.status == "completed" for run in runs)
+    await manager.shutdown()
+
+
+async def test_admission_limits_and_cancelling_a_queued_run():
+    manager = AgentRunManager(
+        max_memory_events=100, spill_dir=None, workers=1, queue_size=2, max_per_user=2
+    )
+    release = asyncio.Event()
+
+    async def blocked():
+        await release.wait()
+        yield _event(0)
+
+    first = manager.start(blocked(), user_id="alice")
+    await asyncio.sleep(0)  # The worker takes the first run off the queue
+    queued = manager.start(blocked(), user_id="alice")
+
+    with pytest.raises(RunRejected) as per_user:
+        manager.start(blocked(), user_id="alice")
+    assert per_user.value.status_code == 429
+
+    manager.start(blocked(), user_id="bob")
+    with pytest.raises(RunRejected) as queue_full:
+        manager.start(blocked(), user_id="carol")
+    assert queue_full.value.status_code == 503
+    assert manager.stats()["rejected"] == 2
+
+    assert await manager.cancel(queued.run_id)
+    assert queued.status == "cancelled"
+    assert queued.task is None
+
+    release.set()
+    await asyncio.wait_for(first.wait(), timeout=1)
+    assert first.status == "completed"
+    await manager.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_resume_stream_endpoint_replays_after_last_event_id(async_client):
+    response = await async_client.post("/api/agent/stream", json={"message": "Hello there"})
+    assert response.status_code == 200
+    run_id = response.headers["x-run-id"]
+    ids = [line[4:] for line in response.text.splitlines() if line.startswith("id: ")]
+    assert ids[0] == "1"
+
+    resumed = await async_client.get(
+        f"/api/agent/stream/{run_id}", headers={"Last-Event-ID": ids[-2]}
+    )
+    resumed_ids = [line[4:] for line in resumed.text.splitlines() if line.startswith("id: ")]
+    assert resumed_ids == [ids[-1]]
+
+    missing = await async_client.get("/api/agent/stream/unknown-run")
+    assert missing.status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_cancel_run_endpoint(async_client):
+    response = await async_client.post("/api/agent/runs/unknown-run/cancel")
+    assert response.status_code == 404
+
+    runs = await async_client.get("/api/agent/runs")
+    assert runs.status_code == 200
+    assert "workers" in runs.json()["stats"]
@@ -0,0 +1,94 @@
+"""Tests for the persistent agent checkpointer and its compaction."""
+
+import pytest
+from langchain_core.messages import AIMessage
+from langgraph.graph import START, MessagesState, StateGraph
+
+from src.core.agent_state import AgentStatePersistence
+from src.services.agent_service import agent_service
+
+
+async def _insert_checkpoints(conn, thread_id: str, count: int) -> None:
+    for i in range(count):
+        checkpoint_id = f"{i:04d}"
+        await conn.execute(
+            "INSERT INTO checkpoints (thread_id, checkpoint_ns, checkpoint_id) VALUES (?, '', ?)",
+            (thread_id, checkpoint_id),
+        )
+        await conn.execute(
+            "INSERT INTO writes (thread_id, checkpoint_ns, checkpoint_id, task_id, idx, channel) "
+            "VALUES (?, '', ?, 'task', 0, 'messages')",
+            (thread_id, checkpoint_id),
+        )
+    await conn.commit()
+
+
+async def _count(conn, table: str, thread_id: str) -> int:
+    cursor = await conn.execute(f"SELECT COUNT(*) FROM {table} WHERE thread_id = ?", (thread_id,))
+    return (await cursor.fetchone())[0]
+
+
+@pytest.fixture
+async def persistence(tmp_path):
+    state = AgentStatePersistence(str(tmp_path / "agent_state.db"), keep_last=3)
+    await state.open()
+    yield state
+    await state.close()
+
+
+async def test_open_uses_wal(persistence):
+    cursor = await persistence.checkpointer.conn.execute("PRAGMA journal_mode")
+    assert (await cursor.fetchone())[0] == "wal"
+
+
+async def test_compact_keeps_newest_checkpoints_per_thread(persistence):
+    conn = persistence.checkpointer.conn
+    await _insert_checkpoints(conn, "thread-a", 5)
+    await _insert_checkpoints(conn, "thread-b", 2)
+
+    assert await persistence.compact() == 2
+
+    assert await _count(conn, "checkpoints", "thread-a") == 3
+    assert await _count(conn, "writes", "thread-a") == 3
+    assert await _count(conn, "checkpoints", "thread-b") == 2
+
+    cursor = await conn.execute(
+        "SELECT MIN(checkpoint_id) FROM checkpoints WHERE thread_id = 'thread-a'"
+    )
+    assert (await cursor.fetchone())[0] == "0002"
+
+
+async def test_state_survives_reopen(tmp_path):
+    path = str(tmp_path / "agent_state.db")
+    first = AgentStatePersistence(path, keep_last=3)
+    await first.open()
+    await _insert_checkpoints(first.checkpointer.conn, "thread-a", 1)
+    await first.close()
+
+    second = AgentStatePersistence(path, keep_last=3)
+    await second.open()
+    try:
+        assert await _count(second.checkpointer.conn, "checkpoints", "thread-a") == 1
+    finally:
+        await second.close()
+
+
+async def test_invoke_route_runs_with_persistent_checkpointer(async_client, persistence, monkeypatch):
+    def reply(state: MessagesState) -> dict:
+        return {"messages": [AIMessage(content=f"echo: {state['messages'][-1].content}")]}
+
+    builder = StateGraph(MessagesState)
+    builder.add_node("reply", reply)
+    builder.add_edge(START, "reply")
+    # The async-only SQLite saver raises if the graph is driven synchronously
+    graph = builder.compile(checkpointer=persistence.checkpointer)
+    monkeypatch.setattr(agent_service, "get_or_create_agent", lambda **kwargs: graph)
+
+    response = await async_client.post(
+        "/api/agent/invoke", json={"message": "hello", "thread_id": "thread-invoke"}
+    )
+
+    body = response.json()
+    assert body["status"] == "completed", body
+    assert body["response"].endswith("hello")
+    assert await _count(persistence.checkpointer.conn, "checkpoints", "thread-invoke") > 0
@@ -211,6 +211,18 @@ def hello():
         assert artifacts[0]["language"] == "py"
         assert artifacts[0]["title"] == "hello"
 
+    @pytest.mark.asyncio
+    async def test_detect_artifacts_batch_endpoint(self, client: AsyncClient):
+        """Test the /api/artifacts/detect/batch endpoint."""
+        python = "```python\ndef hello():\n    pass\n```"
+        contents = [python, "No code here.", python]
+        response = await client.post("/api/artifacts/detect/batch", json={"contents": contents})
+        assert response.status_code == 200
+        results = response.json()["results"]
+        assert [len(result) for result in results] == [1, 0, 1]
+        assert results[0][0]["title"] == "hello"
+        assert results[0] == results[2]
+
     @pytest.mark.asyncio
     async def test_create_artifact_endpoint(self, client: AsyncClient):
         """Test the /api/artifacts/create endpoint."""
@@ -0,0 +1,114 @@
+"""Tests for batch operations that run as background tasks."""
+
+import pytest
+from sqlalchemy import select, update
+
+from src.models import Conversation as ConversationModel
+from src.models.background_task import BackgroundTask, TaskStatus
+from src.models.message import Message as MessageModel
+from src.services.batch_jobs import BatchJob, BatchJobService, batch_jobs
+from src.services.batch_service import BatchService
+from src.services.export_store import export_store
+
+MISSING = "00000000-0000-0000-0000-000000000009"
+
+
+@pytest.fixture
+async def conversations(test_db):
+    convs = [ConversationModel(title=f"Conv {n}", model="claude-sonnet-4-5-20250929") for n in range(3)]
+    test_db.add_all(convs)
+    await test_db.flush()
+    for conv in convs:
+        test_db.add(MessageModel(conversation_id=conv.id, role="user", content=f"Hello from {conv.title}"))
+    await test_db.commit()
+    return convs
+
+
+async def test_large_batch_runs_in_the_background(async_client, test_db, conversations, monkeypatch):
+    monkeypatch.setattr(batch_jobs, "threshold", 2)
+    ids = [conv.id for conv in conversations] + [MISSING]
+
+    response = await async_client.post(
+        "/api/batch/conversations", json={"conversation_ids": ids, "operation": "archive"}
+    )
+    assert response.status_code == 202
+    task_id = response.json()["task_id"]
+    await batch_jobs.join()
+
+    body = (await async_client.get(f"/api/batch/operations/{task_id}")).json()
+    assert body["status"] == "completed"
+    assert body["progress"] == 100
+    assert body["result"]["successful"] == ids[:3]
+    assert body["result"]["failed"] == [[MISSING, "Conversation not found"]]
+
+    result = await test_db.execute(
+        select(ConversationModel.is_archived).where(ConversationModel.id.in_(ids))
+    )
+    assert all(result.scalars())
+
+    # Small batches still run inline
+    response = await async_client.post(
+        "/api/batch/conversations", json={"conversation_ids": ids[:2], "operation": "pin"}
+    )
+    assert response.status_code == 200
+
+
+async def test_background_export_is_downloadable_with_ranges(
+    async_client, conversations, monkeypatch, tmp_path
+):
+    monkeypatch.setattr(batch_jobs, "threshold", 2)
+    monkeypatch.setattr(export_store, "root", tmp_path)
+    ids = [conv.id for conv in conversations]
+
+    response = await async_client.post(
+        "/api/batch/conversations/export", params={"export_format": "jsonl"}, json={"conversation_ids": ids}
+    )
+    assert response.status_code == 202
+    await batch_jobs.join()
+
+    task = (await async_client.get(f"/api/tasks/{response.json()['task_id']}")).json()
+    assert task["status"] == "completed"
+    assert task["result"]["total_exported"] == 3
+    file_url = task["result"]["file_url"]
+
+    full = await async_client.get(file_url)
+    assert full.status_code == 200
+    assert b"Hello from Conv 2" in full.content
+    assert len(full.content) == task["result"]["size_bytes"]
+
+    partial = await async_client.get(file_url, headers={"Range": "bytes=0-9"})
+    assert partial.status_code == 206
+    assert partial.content == full.content[:10]
+    assert partial.headers["content-range"] == f"bytes 0-9/{len(full.content)}"
+
+    assert export_store.path("../app.db") is None
+    assert (await async_client.get("/api/batch/exports/missing.json")).status_code == 404
+
+
+async def test_cancelled_job_stops_at_the_next_chunk(test_db, conversations):
+    service = BatchJobService(threshold=0, batches=BatchService(chunk_size=1))
+    task = BackgroundTask(user_id="default-user", task_type="batch_archive", status=TaskStatus.PENDING)
+    test_db.add(task)
+    await test_db.commit()
+    ids = [conv.id for conv in conversations]
+    job = BatchJob(task_id=task.id, operation="archive", conversation_ids=ids, db=test_db)
+
+    report = service._report
+
+    async def cancel_after_first_chunk(db, job, done):
+        if done == 1:
+            # What PUT /api/tasks/{id}/cancel does from another request
+            await db.execute(
+                update(BackgroundTask)
+                .where(BackgroundTask.id == job.task_id)
+                .values(status=TaskStatus.CANCELLED)
+            )
+        return await report(db, job, done)
+
+    service._report = cancel_after_first_chunk
+    await service.run(job)
+
+    await test_db.refresh(task)
+    assert task.status == TaskStatus.CANCELLED
+    assert task.result["successful"] == ids[:1]
+    assert task.result["failed"] == [[ids[1], "Batch cancelled"], [ids[2], "Batch cancelled"]]
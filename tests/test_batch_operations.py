@@ -201,3 +201,195 @@ async def test_batch_export_markdown_format(async_client: AsyncClient, test_db:
     assert "Markdown Test" in response.text
     assert "## 👤 User" in response.text
     assert "Test message" in response.text
+
+
+async def _create_conversation_with_messages(test_db: AsyncSession, title: str, count: int) -> str:
+    """Create a conversation with ``count`` alternating user/assistant messages."""
+    conv = ConversationModel(title=title, model="claude-sonnet-4-5-20250929")
+    test_db.add(conv)
+    await test_db.flush()
+    for i in range(count):
+        test_db.add(MessageModel(
+            conversation_id=conv.id,
+            role="user" if i % 2 == 0 else "assistant",
+            content=f"{title} message {i}",
+        ))
+    await test_db.commit()
+    return str(conv.id)
+
+
+@pytest.mark.asyncio
+async def test_batch_export_jsonl_and_missing_ids(async_client: AsyncClient, test_db: AsyncSession):
+    """JSON Lines batch export streams one line per record and reports missing ids."""
+    import json
+
+    conv_id = await _create_conversation_with_messages(test_db, "Lines", 3)
+
+    response = await async_client.post(
+        "/api/conversations/batch/export",
+        json={"conversation_ids": [conv_id, "missing-id"]},
+        params={"format": "jsonl"},
+    )
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    records = [json.loads(line) for line in response.text.splitlines()]
+    assert [r["type"] for r in records] == ["conversation", "message", "message", "message", "error"]
+    assert records[0]["title"] == "Lines"
+    assert [r["content"] for r in records[1:4]] == [f"Lines message {i}" for i in range(3)]
+    assert records[4]["conversation_id"] == "missing-id"
+
+
+@pytest.mark.asyncio
+async def test_batch_export_zip_archive(async_client: AsyncClient, test_db: AsyncSession):
+    """Zip batch export contains one JSON entry per conversation."""
+    import io
+    import json
+    import zipfile
+
+    ids = [
+        await _create_conversation_with_messages(test_db, f"Zip {i}", 2)
+        for i in range(2)
+    ]
+
+    response = await async_client.post(
+        "/api/conversations/batch/export",
+        json={"conversation_ids": ids},
+        params={"format": "zip"},
+    )
+
+    assert response.status_code == 200
+    with zipfile.ZipFile(io.BytesIO(response.content)) as archive:
+        assert sorted(archive.namelist()) == sorted(f"{cid}.json" for cid in ids)
+        for cid in ids:
+            document = json.loads(archive.read(f"{cid}.json"))
+            assert document["id"] == cid
+            assert document["metadata"]["message_count"] == 2
+
+    response = await async_client.post(
+        "/api/conversations/batch/export",
+        json={"conversation_ids": ids},
+        params={"format": "zip", "entry_format": "md"},
+    )
+    assert response.status_code == 200
+    with zipfile.ZipFile(io.BytesIO(response.content)) as archive:
+        assert sorted(archive.namelist()) == sorted(f"{cid}.md" for cid in ids)
+
+    again = await async_client.post(
+        "/api/conversations/batch/export",
+        json={"conversation_ids": ids},
+        params={"format": "zip", "entry_format": "md"},
+    )
+    assert again.headers["content-disposition"] != response.headers["content-disposition"]
+
+    response = await async_client.post(
+        "/api/conversations/batch/export",
+        json={"conversation_ids": ids},
+        params={"format": "zip", "entry_format": "zip"},
+    )
+    assert response.status_code == 400
+
+
+@pytest.mark.asyncio
+async def test_single_export_streams_large_conversation(async_client: AsyncClient, test_db: AsyncSession):
+    """Single conversation export pages through more messages than one cursor batch."""
+    import json
+    from src.services import export_service
+
+    count = export_service.EXPORT_BATCH_SIZE + 7
+    conv_id = await _create_conversation_with_messages(test_db, "Large", count)
+
+    response = await async_client.post(f"/api/conversations/{conv_id}/export", params={"format": "json"})
+    assert response.status_code == 200
+    document = json.loads(response.text)
+    assert len(document["messages"]) == count
+    assert document["metadata"]["message_count"] == count
+
+    response = await async_client.post(f"/api/conversations/{conv_id}/export", params={"format": "markdown"})
+    assert response.status_code == 200
+    assert f"**Message Count:** {count}" in response.text
+    assert response.text.count("## 👤 User") == (count + 1) // 2
+
+    response = await async_client.post(f"/api/conversations/{conv_id}/export", params={"format": "xml"})
+    assert response.status_code == 400
+
+
+@pytest.mark.asyncio
+async def test_batch_update_is_set_based_with_one_audit_entry(async_client: AsyncClient, test_db: AsyncSession):
+    """A batch writes one consolidated audit entry and reports missing ids."""
+    from src.models.audit_log import AuditActionType, AuditLog
+
+    ids = []
+    for i in range(5):
+        conv = ConversationModel(title=f"Move {i}", model="claude-sonnet-4-5-20250929")
+        test_db.add(conv)
+        await test_db.flush()
+        ids.append(str(conv.id))
+    await test_db.commit()
+
+    response = await async_client.post(
+        "/api/conversations/batch/move",
+        json={"conversation_ids": ids + ["missing-id", ids[0]]},
+        params={"project_id": "project-1"},
+    )
+    assert response.status_code == 200
+    data = response.json()
+    assert data["success_count"] == 5
+    assert data["failure_count"] == 1
+    assert [r["conversation_id"] for r in data["results"]] == ids + ["missing-id"]
+
+    result = await test_db.execute(select(ConversationModel).where(ConversationModel.id.in_(ids)))
+    assert {conv.project_id for conv in result.scalars()} == {"project-1"}
+
+    result = await test_db.execute(
+        select(AuditLog).where(AuditLog.action == AuditActionType.BATCH_OPERATION)
+    )
+    entries = result.scalars().all()
+    assert len(entries) == 1
+    assert entries[0].details["operation"] == "move"
+    assert entries[0].details["failed_ids"] == ["missing-id"]
+
+
+@pytest.mark.asyncio
+async def test_batch_duplicate_inserts_in_bulk(async_client: AsyncClient, test_db: AsyncSession):
+    """Duplicates are created for live conversations only, in request order."""
+    ids = []
+    for i in range(3):
+        conv = ConversationModel(title=f"Dup {i}", model="claude-sonnet-4-5-20250929", is_deleted=i == 2)
+        test_db.add(conv)
+        await test_db.flush()
+        ids.append(str(conv.id))
+    await test_db.commit()
+
+    response = await async_client.post("/api/conversations/batch/duplicate", json={"conversation_ids": ids})
+    assert response.status_code == 201
+    data = response.json()
+    assert data["success_count"] == 2
+    assert data["failure_count"] == 1
+    assert [r.get("title") for r in data["results"][:2]] == ["Dup 0 (Copy)", "Dup 1 (Copy)"]
+    assert data["results"][2] == {"conversation_id": ids[2], "error": "Not found"}
+
+    new_ids = [r["new_id"] for r in data["results"][:2]]
+    result = await test_db.execute(select(ConversationModel).where(ConversationModel.id.in_(new_ids)))
+    assert sorted(conv.title for conv in result.scalars()) == ["Dup 0 (Copy)", "Dup 1 (Copy)"]
+
+
+@pytest.mark.asyncio
+async def test_batch_router_operations(async_client: AsyncClient, test_db: AsyncSession):
+    """The generic batch endpoint pins and reports unknown ids as failures."""
+    conv = ConversationModel(title="Pin me", model="claude-sonnet-4-5-20250929")
+    test_db.add(conv)
+    await test_db.commit()
+    missing = "00000000-0000-0000-0000-000000000009"
+
+    response = await async_client.post(
+        "/api/batch/conversations",
+        json={"conversation_ids": [conv.id, missing], "operation": "pin"},
+    )
+    assert response.status_code == 200
+    data = response.json()
+    assert data["successful"] == [conv.id]
+    assert data["failed"] == [[missing, "Conversation not found"]]
+
+    await test_db.refresh(conv)
+    assert conv.is_pinned is True
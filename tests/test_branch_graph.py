@@ -0,0 +1,118 @@
+"""Tests for the branch tree service and the branch-tree endpoint."""
+
+from datetime import datetime, timedelta
+
+import pytest
+
+from src.models.conversation import Conversation
+from src.models.message import Message
+from src.services.branch_graph_service import BranchGraphService
+
+
+@pytest.fixture
+async def tree(test_db):
+    """root -> (a -> (a1 -> a11, a2), b [deleted])."""
+    start = datetime(2025, 1, 1)
+    root = Conversation(title="Root", message_count=2, token_count=30, created_at=start)
+    test_db.add(root)
+    await test_db.flush()
+    a = Conversation(title="A", parent_conversation_id=root.id, message_count=3, created_at=start + timedelta(minutes=1))
+    b = Conversation(title="B", parent_conversation_id=root.id, is_deleted=True, created_at=start + timedelta(minutes=2))
+    test_db.add_all([a, b])
+    await test_db.flush()
+    a1 = Conversation(title="A1", parent_conversation_id=a.id, token_count=12, created_at=start + timedelta(minutes=3))
+    a2 = Conversation(title="A2", parent_conversation_id=a.id, created_at=start + timedelta(minutes=4))
+    test_db.add_all([a1, a2])
+    await test_db.flush()
+    a11 = Conversation(title="A11", parent_conversation_id=a1.id, created_at=start + timedelta(minutes=5))
+    test_db.add(a11)
+    await test_db.commit()
+    return {c.title: c for c in (root, a, b, a1, a2, a11)}
+
+
+def _titles(node: dict) -> list:
+    return [node["title"], [_titles(child) for child in node["children"]]]
+
+
+async def test_whole_tree_from_any_member(test_db, tree):
+    service = BranchGraphService(max_entries=8)
+    graph = await service.get_graph(tree["A11"].id, test_db)
+
+    assert graph.root_id == tree["Root"].id
+    nested = graph.nested()
+    assert _titles(nested) == ["Root", [["A", [["A1", [["A11", []]]], ["A2", []]]]]]
+    assert nested["children"][0]["children"][0]["children"][0]["depth"] == 3
+    assert [node["title"] for node in graph.branches()] == ["A", "A1", "A2", "A11"]
+    assert graph.totals() == {"node_count": 5, "message_count": 5, "token_count": 42}
+
+    # Another member of the same tree is served from the cache
+    assert await service.get_graph(tree["A2"].id, test_db) is graph
+    assert service.stats()["hits"] == 1
+
+    assert await service.get_graph(tree["B"].id, test_db) is None
+
+
+async def test_cached_tree_is_refreshed_when_it_changes(test_db, tree):
+    service = BranchGraphService(max_entries=8)
+    graph = await service.get_graph(tree["Root"].id, test_db)
+
+    # A new branch from another worker is caught by the version probe
+    test_db.add(Conversation(title="A3", parent_conversation_id=tree["A"].id))
+    await test_db.commit()
+    graph = await service.get_graph(tree["Root"].id, test_db)
+    assert graph.totals()["node_count"] == 6
+
+    tree["A2"].message_count = 10
+    await test_db.commit()
+    graph = await service.get_graph(tree["Root"].id, test_db)
+    assert graph.nodes[tree["A2"].id]["message_count"] == 10
+
+    service.invalidate(tree["A11"].id)
+    assert service.stats()["size"] == 0
+
+
+async def test_parent_cycles_terminate(test_db):
+    first = Conversation(title="First")
+    test_db.add(first)
+    await test_db.flush()
+    second = Conversation(title="Second", parent_conversation_id=first.id)
+    test_db.add(second)
+    await test_db.flush()
+    third = Conversation(title="Third", parent_conversation_id=second.id)
+    test_db.add(third)
+    first.parent_conversation_id = second.id
+    await test_db.commit()
+
+    # A conversation on the cycle is its own root
+    graph = await BranchGraphService(max_entries=8).get_graph(first.id, test_db)
+    assert graph.root_id == first.id
+    assert _titles(graph.nested()) == ["First", [["Second", [["Third", []]]]]]
+    graph = await BranchGraphService(max_entries=8).get_graph(second.id, test_db)
+    assert graph.root_id == second.id
+
+    # Below the cycle, the root is the first ancestor the climb meets twice
+    graph = await BranchGraphService(max_entries=8).get_graph(third.id, test_db)
+    assert graph.root_id == second.id
+    assert _titles(graph.nested()) == ["Second", [["First", []], ["Third", []]]]
+
+
+async def test_branch_tree_endpoint_sees_new_branches(client, test_db, tree):
+    response = await client.get(f"/api/conversations/{tree['A1'].id}/branch-tree")
+    assert response.status_code == 200
+    body = response.json()
+    assert body["root"]["id"] == tree["Root"].id
+    assert body["current_conversation"]["id"] == tree["A1"].id
+    assert body["current_conversation"]["depth"] == 2
+    assert len(body["branches"]) == 4
+
+    message = Message(conversation_id=tree["A11"].id, role="user", content="Hello")
+    test_db.add(message)
+    await test_db.commit()
+    response = await client.post(
+        f"/api/conversations/{tree['A11'].id}/branch", json={"message_id": message.id}
+    )
+    assert response.status_code == 200
+
+    body = (await client.get(f"/api/conversations/{tree['A1'].id}/branch-tree")).json()
+    assert len(body["branches"]) == 5
+    assert body["tree"]["children"][0]["children"][0]["children"][0]["children"][0]["depth"] == 4
@@ -53,76 +53,76 @@ def reset_settings():
 class TestContentFilteringUtility:
     """Test content filtering utility functions."""
 
-    def test_get_filter_instructions_off(self):
+    async def test_get_filter_instructions_off(self):
         """Test filter instructions when level is off."""
         user_settings["content_filter_level"] = "off"
         user_settings["content_filter_categories"] = ["violence", "hate"]
 
-        instructions = get_content_filter_instructions()
+        instructions = await get_content_filter_instructions()
         assert instructions == ""
 
-    def test_get_filter_instructions_low(self):
+    async def test_get_filter_instructions_low(self):
         """Test filter instructions at low level."""
         user_settings["content_filter_level"] = "low"
         user_settings["content_filter_categories"] = ["violence"]
 
-        instructions = get_content_filter_instructions()
+        instructions = await get_content_filter_instructions()
         assert "[CONTENT FILTERING: LOW LEVEL]" in instructions
         assert "basic content filtering" in instructions.lower()
 
-    def test_get_filter_instructions_medium(self):
+    async def test_get_filter_instructions_medium(self):
         """Test filter instructions at medium level."""
         user_settings["content_filter_level"] = "medium"
         user_settings["content_filter_categories"] = ["violence", "hate"]
 
-        instructions = get_content_filter_instructions()
+        instructions = await get_content_filter_instructions()
         assert "[CONTENT FILTERING: MEDIUM LEVEL]" in instructions
         assert "standard content filtering" in instructions.lower()
 
-    def test_get_filter_instructions_high(self):
+    async def test_get_filter_instructions_high(self):
         """Test filter instructions at high level."""
         user_settings["content_filter_level"] = "high"
         user_settings["content_filter_categories"] = ["sexual"]
 
-        instructions = get_content_filter_instructions()
+        instructions = await get_content_filter_instructions()
         assert "[CONTENT FILTERING: HIGH LEVEL]" in instructions
         assert "strict content filtering" in instructions.lower()
 
-    def test_get_filter_instructions_no_categories(self):
+    async def test_get_filter_instructions_no_categories(self):
         """Test filter instructions with no categories selected."""
         user_settings["content_filter_level"] = "medium"
         user_settings["content_filter_categories"] = []
 
-        instructions = get_content_filter_instructions()
+        instructions = await get_content_filter_instructions()
         assert instructions == ""
 
-    def test_apply_filtering_to_message(self):
+    async def test_apply_filtering_to_message(self):
         """Test that filtering is applied to message."""
         user_settings["content_filter_level"] = "high"
         user_settings["content_filter_categories"] = ["violence"]
 
         original_message = "Tell me a story"
-        filtered_message = apply_content_filtering_to_message(original_message)
+        filtered_message = await apply_content_filtering_to_message(original_message)
 
         assert "[CONTENT FILTERING" in filtered_message
         assert original_message in filtered_message
 
-    def test_apply_filtering_off_no_change(self):
+    async def test_apply_filtering_off_no_change(self):
         """Test that message is unchanged when filtering is off."""
         user_settings["content_filter_level"] = "off"
         user_settings["content_filter_categories"] = ["violence"]
 
         original_message = "Tell me a story"
-        filtered_message = apply_content_filtering_to_message(original_message)
+        filtered_message = await apply_content_filtering_to_message(original_message)
 
         assert filtered_message == original_message
 
-    def test_should_filter_response_off(self):
+    async def test_should_filter_response_off(self):
         """Test response filtering when level is off."""
         user_settings["content_filter_level"] = "off"
         user_settings["content_filter_categories"] = ["violence"]
 
-        should_filter, reason = should_filter_response("This is violent content")
+        should_filter, reason = await should_filter_response("This is violent content")
         assert should_filter is False
         assert reason is None
 
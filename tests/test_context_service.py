@@ -0,0 +1,82 @@
+"""Tests for agent context assembly and its rendered-block cache."""
+
+import pytest
+
+from src.models.conversation import Conversation
+from src.models.memory import Memory
+from src.models.project import Project
+from src.models.project_file import ProjectFile
+from src.services.context_service import ContextService, RenderedBlockCache
+
+
+def _file(project_id: str, name: str, content: str) -> ProjectFile:
+    return ProjectFile(
+        project_id=project_id,
+        filename=name,
+        original_filename=name,
+        file_path=f"/tmp/{name}",
+        file_url=f"/files/{name}",
+        content=content,
+    )
+
+
+@pytest.fixture
+async def project_conversation(test_db):
+    project = Project(name="Docs", custom_instructions="Answer briefly.")
+    test_db.add(project)
+    await test_db.flush()
+    conversation = Conversation(title="Chat", project_id=project.id)
+    test_db.add_all([conversation, _file(project.id, "a.md", "alpha")])
+    await test_db.commit()
+    return project, conversation
+
+
+async def test_assemble_reads_instructions_files_and_memories(test_db, project_conversation):
+    project, conversation = project_conversation
+    test_db.add(Memory(content="Prefers Python", category="preference"))
+    await test_db.commit()
+
+    context = await ContextService(max_entries=8).assemble(conversation.id, test_db)
+
+    assert context.project_id == project.id
+    assert context.effective_instructions() == "Answer briefly."
+    assert context.effective_instructions("Be verbose.") == "Be verbose."
+    assert "--- File: a.md ---\nContent:\nalpha\n" in context.files_content
+    assert "- [PREFERENCE] Prefers Python" in context.memory_content
+
+
+async def test_unknown_conversation_gets_global_context_only(test_db):
+    context = await ContextService(max_entries=8).assemble("missing", test_db)
+
+    assert context.project_id is None
+    assert context.files_content == ""
+
+
+async def test_blocks_are_cached_until_files_change(test_db, project_conversation):
+    project, conversation = project_conversation
+    service = ContextService(max_entries=8)
+
+    first = await service.assemble(conversation.id, test_db)
+    second = await service.assemble(conversation.id, test_db)
+    assert second.files_content == first.files_content
+    assert service.stats()["hits"] >= 1
+
+    # A new upload changes the version, even without explicit invalidation
+    test_db.add(_file(project.id, "b.md", "beta"))
+    await test_db.commit()
+    third = await service.assemble(conversation.id, test_db)
+    assert "--- File: b.md ---" in third.files_content
+
+    service.invalidate_project(project.id)
+    assert service.stats()["size"] == 0
+
+
+def test_rendered_block_cache_is_bounded():
+    cache = RenderedBlockCache(max_entries=2)
+    cache.put("a", 1, "A")
+    cache.put("b", 1, "B")
+    cache.put("c", 1, "C")
+
+    assert cache.get("a", 1) is None
+    assert cache.get("b", 1) == "B"
+    assert cache.get("b", 2) is None
@@ -31,11 +31,11 @@ async def test_create_branch_from_conversation(client, test_db):
     ]
 
     for msg_data in messages_data:
-        msg_response = await client.post(f"/api/messages/conversations/{conversation_id}/messages", json=msg_data)
+        msg_response = await client.post(f"/api/conversations/{conversation_id}/messages", json=msg_data)
         assert msg_response.status_code == 201
 
     # Get the messages to find the branch point
-    response = await client.get(f"/api/messages/conversations/{conversation_id}/messages")
+    response = await client.get(f"/api/conversations/{conversation_id}/messages")
     assert response.status_code == 200
     messages = response.json()
 
@@ -67,8 +67,8 @@ async def test_create_branch_from_conversation(client, test_db):
     assert branch.branch_point_message_id == branch_point_message_id
     assert branch.branch_name == "Alternative Response"
 
-    # Verify messages were copied
-    assert branch_data_response["message_count"] == 2  # First two messages should be copied
+    # The branch shows the first two messages, shared with the parent
+    assert branch_data_response["message_count"] == 2
 
 
 @pytest.mark.asyncio
@@ -82,7 +82,7 @@ async def test_list_branches(client, test_db):
     # Create some messages
     for i in range(3):
         msg_data = {"role": "user", "content": f"Message {i+1}"}
-        await client.post(f"/api/messages/conversations/{conversation_id}/messages", json=msg_data)
+        await client.post(f"/api/conversations/{conversation_id}/messages", json=msg_data)
 
     # Create multiple branches
     branches_data = [
@@ -91,7 +91,7 @@ async def test_list_branches(client, test_db):
         {"branch_name": "Branch 3", "branch_color": "blue", "message_id": None},
     ]
 
-    messages_response = await client.get(f"/api/messages/conversations/{conversation_id}/messages")
+    messages_response = await client.get(f"/api/conversations/{conversation_id}/messages")
     messages = messages_response.json()
 
     for i, branch_data in enumerate(branches_data):
@@ -104,10 +104,10 @@ async def test_list_branches(client, test_db):
     assert response.status_code == 200
 
     branches = response.json()
-    assert len(branches["branches"]) == 3
+    assert len(branches) == 3
 
     # Verify branch details
-    for i, branch in enumerate(branches["branches"]):
+    for i, branch in enumerate(branches):
         assert branch["branch_name"] == f"Branch {i+1}"
         assert branch["parent_conversation_id"] == conversation_id
         assert branch["model"] == "claude-sonnet-4-5-20250929"
@@ -124,10 +124,10 @@ async def test_branch_path(client, test_db):
     # Create messages
     for i in range(3):
         msg_data = {"role": "user", "content": f"Message {i+1}"}
-        await client.post(f"/api/messages/conversations/{root_id}/messages", json=msg_data)
+        await client.post(f"/api/conversations/{root_id}/messages", json=msg_data)
 
     # Create a branch
-    messages_response = await client.get(f"/api/messages/conversations/{root_id}/messages")
+    messages_response = await client.get(f"/api/conversations/{root_id}/messages")
     messages = messages_response.json()
 
     branch_data = {
@@ -168,10 +168,10 @@ async def test_switch_branch(client, test_db):
     # Create messages
     for i in range(3):
         msg_data = {"role": "user", "content": f"Message {i+1}"}
-        await client.post(f"/api/messages/conversations/{root_id}/messages", json=msg_data)
+        await client.post(f"/api/conversations/{root_id}/messages", json=msg_data)
 
     # Get messages for branching
-    messages_response = await client.get(f"/api/messages/conversations/{root_id}/messages")
+    messages_response = await client.get(f"/api/conversations/{root_id}/messages")
     messages = messages_response.json()
 
     # Create two branches
@@ -207,10 +207,10 @@ async def test_branch_tree(client, test_db):
     # Create messages
     for i in range(3):
         msg_data = {"role": "user", "content": f"Message {i+1}"}
-        await client.post(f"/api/messages/conversations/{root_id}/messages", json=msg_data)
+        await client.post(f"/api/conversations/{root_id}/messages", json=msg_data)
 
     # Create a branch
-    messages_response = await client.get(f"/api/messages/conversations/{root_id}/messages")
+    messages_response = await client.get(f"/api/conversations/{root_id}/messages")
     messages = messages_response.json()
 
     branch_data = {
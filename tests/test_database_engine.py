@@ -0,0 +1,65 @@
+"""Tests for the tuned SQLite engine factory and the reader/writer split."""
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+
+from src.core.config import Settings
+from src.core.database import create_db_engine, is_memory_database, pool_status
+
+
+@pytest.fixture
+def config():
+    return Settings(sqlite_busy_timeout_ms=1234, db_pool_size=2, db_max_overflow=1)
+
+
+async def _pragma(engine, name):
+    async with engine.connect() as conn:
+        return (await conn.execute(text(f"PRAGMA {name}"))).scalar()
+
+
+async def test_writer_applies_pragmas(tmp_path, config):
+    engine = create_db_engine(f"sqlite+aiosqlite:///{tmp_path / 'app.db'}", config)
+    try:
+        assert await _pragma(engine, "journal_mode") == "wal"
+        assert await _pragma(engine, "busy_timeout") == 1234
+        assert await _pragma(engine, "synchronous") == 1  # NORMAL
+        assert await _pragma(engine, "cache_size") == -config.sqlite_cache_size_kib
+        assert await _pragma(engine, "query_only") == 0
+    finally:
+        await engine.dispose()
+
+
+async def test_reader_is_query_only(tmp_path, config):
+    url = f"sqlite+aiosqlite:///{tmp_path / 'app.db'}"
+    writer = create_db_engine(url, config)
+    reader = create_db_engine(url, config, read_only=True, pool_size=4)
+    try:
+        async with writer.begin() as conn:
+            await conn.execute(text("CREATE TABLE items (id INTEGER PRIMARY KEY)"))
+            await conn.execute(text("INSERT INTO items (id) VALUES (1)"))
+
+        async with reader.connect() as conn:
+            assert (await conn.execute(text("SELECT count(*) FROM items"))).scalar() == 1
+            with pytest.raises(OperationalError):
+                await conn.execute(text("INSERT INTO items (id) VALUES (2)"))
+
+        status = pool_status(reader)
+        assert status["size"] == 4
+        assert status["checkedout"] == 0
+    finally:
+        await reader.dispose()
+        await writer.dispose()
+
+
+async def test_memory_database_skips_pool_sizing(config):
+    url = "sqlite+aiosqlite:///:memory:"
+    assert is_memory_database(url)
+    assert not is_memory_database("sqlite+aiosqlite:///./data/app.db")
+
+    engine = create_db_engine(url, config)
+    try:
+        assert await _pragma(engine, "busy_timeout") == 1234
+        assert pool_status(engine)["class"] == "StaticPool"
+    finally:
+        await engine.dispose()
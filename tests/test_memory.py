@@ -136,6 +136,9 @@ class TestMemoryAPI:
         data = response.json()
         assert len(data) == 2
 
+        # The scoring pass is bounded like the other list routes
+        assert client.get("/api/memory/search?q=python&limit=1000").status_code == 400
+
     @pytest.mark.asyncio
     async def test_extract_memory(self, client: TestClient, db_session: AsyncSession):
         """Test extracting memory from conversation."""
@@ -0,0 +1,60 @@
+"""Tests for relevance-ranked memory retrieval."""
+
+from datetime import datetime, timedelta
+
+from src.core.config import settings
+from src.models.memory import Memory
+from src.services.memory_retrieval_service import memory_retrieval_service
+
+
+async def test_rank_matches_any_term_of_the_message(test_db):
+    test_db.add_all([
+        Memory(content="User's favorite color is blue", category="preference"),
+        Memory(content="User works at a bakery", category="fact"),
+    ])
+    await test_db.commit()
+
+    ranked = await memory_retrieval_service.rank(test_db, "What is my favorite color?", top_k=5)
+
+    assert [item.memory.content for item in ranked] == ["User's favorite color is blue"]
+    assert ranked[0].relevance == 1.0
+
+
+async def test_rank_prefers_recent_memories_and_skips_inactive(test_db):
+    old = datetime.utcnow() - timedelta(days=365)
+    test_db.add_all([
+        Memory(content="Deploys with Docker", category="fact", created_at=old, updated_at=old),
+        Memory(content="Deploys with Docker and Kubernetes", category="fact"),
+        Memory(content="Deploys with Docker on Fridays", category="fact", is_active=False),
+    ])
+    await test_db.commit()
+
+    ranked = await memory_retrieval_service.rank(test_db, "docker deploys", top_k=5)
+
+    assert [item.memory.content for item in ranked] == [
+        "Deploys with Docker and Kubernetes",
+        "Deploys with Docker",
+    ]
+
+
+async def test_context_memories_are_capped(test_db, monkeypatch):
+    test_db.add_all([Memory(content=f"Fact number {i} about testing", category="fact") for i in range(30)])
+    await test_db.commit()
+    test_db.add(Memory(content="Prefers short answers", category="preference"))
+    await test_db.commit()
+    monkeypatch.setattr(settings, "memory_top_k", 4)
+
+    memories = await memory_retrieval_service.for_context(test_db, "unrelated question")
+
+    assert len(memories) == 4
+    # Nothing matches, so the recent preference wins on category
+    assert memories[0].content == "Prefers short answers"
+
+
+async def test_token_budget_limits_injected_memories(test_db):
+    test_db.add_all([Memory(content="python " * 40, category="fact") for _ in range(3)])
+    await test_db.commit()
+
+    ranked = await memory_retrieval_service.rank(test_db, "python", top_k=10, token_budget=100)
+
+    assert len(ranked) == 1
@@ -0,0 +1,167 @@
+"""Tests for copy-on-write branch histories."""
+
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import func, select
+
+from src.models.conversation import Conversation
+from src.models.message import Message
+from src.services import message_history
+from src.services.export_service import count_messages
+
+START = datetime(2025, 1, 1)
+
+
+def _message(conversation: Conversation, minute: int, content: str) -> Message:
+    return Message(
+        conversation_id=conversation.id,
+        role="user" if minute % 2 else "assistant",
+        content=content,
+        input_tokens=10,
+        output_tokens=5,
+        created_at=START + timedelta(minutes=minute),
+    )
+
+
+async def _contents(db, conversation_id: str) -> list[str]:
+    result = await db.execute(
+        message_history.visible_messages(conversation_id)
+        .order_by(Message.created_at, Message.id)
+    )
+    return [message.content for message in result.scalars()]
+
+
+async def _stored(db, conversation_id: str) -> int:
+    return await db.scalar(
+        select(func.count()).select_from(Message).where(Message.conversation_id == conversation_id)
+    )
+
+
+@pytest.fixture
+async def parent(test_db):
+    conversation = Conversation(title="Parent")
+    test_db.add(conversation)
+    await test_db.flush()
+    messages = [_message(conversation, minute, f"p{minute}") for minute in range(1, 5)]
+    test_db.add_all(messages)
+    await test_db.commit()
+    return conversation, messages
+
+
+async def test_branch_shares_the_parent_prefix(client, test_db, parent):
+    conversation, messages = parent
+    response = await client.post(
+        f"/api/conversations/{conversation.id}/branch", json={"message_id": messages[1].id}
+    )
+    assert response.status_code == 200
+    branch = response.json()
+    assert branch["message_count"] == 2
+    assert branch["token_count"] == 30
+
+    # Nothing was copied
+    assert await _stored(test_db, branch["id"]) == 0
+
+    response = await client.post(
+        f"/api/conversations/{branch['id']}/messages", json={"role": "user", "content": "b1"}
+    )
+    assert response.status_code == 201
+    response = await client.get(f"/api/conversations/{branch['id']}/messages")
+    assert [message["content"] for message in response.json()] == ["p1", "p2", "b1"]
+
+    # Keyset pages run across the inherited prefix and the branch's own messages
+    first = await client.get(f"/api/conversations/{branch['id']}/messages", params={"limit": 2})
+    assert [message["content"] for message in first.json()] == ["p1", "p2"]
+    second = await client.get(
+        f"/api/conversations/{branch['id']}/messages",
+        params={"limit": 2, "cursor": first.headers["X-Next-Cursor"]},
+    )
+    assert [message["content"] for message in second.json()] == ["b1"]
+    assert await count_messages(test_db, branch["id"]) == 3
+
+    # The parent is unchanged
+    assert await _contents(test_db, conversation.id) == ["p1", "p2", "p3", "p4"]
+
+
+async def test_nested_branches_use_the_earliest_cutoff(test_db, parent):
+    conversation, messages = parent
+    child = Conversation(
+        title="Child",
+        parent_conversation_id=conversation.id,
+        branch_point_message_id=messages[2].id,
+        inherits_parent_messages=True,
+    )
+    test_db.add(child)
+    await test_db.flush()
+    test_db.add(_message(child, 10, "c10"))
+    # A branch of the child at a message the child inherits
+    grandchild = Conversation(
+        title="Grandchild",
+        parent_conversation_id=child.id,
+        branch_point_message_id=messages[0].id,
+        inherits_parent_messages=True,
+    )
+    test_db.add(grandchild)
+    await test_db.flush()
+    test_db.add(_message(grandchild, 20, "g20"))
+    await test_db.commit()
+
+    assert await _contents(test_db, child.id) == ["p1", "p2", "p3", "c10"]
+    assert await _contents(test_db, grandchild.id) == ["p1", "g20"]
+    assert await message_history.history_totals(test_db, child.id) == (4, 60)
+    assert await message_history.get_visible_message(test_db, grandchild.id, messages[0].id)
+    assert await message_history.get_visible_message(test_db, grandchild.id, messages[1].id) is None
+
+
+async def test_editing_a_shared_message_detaches_the_branch(client, test_db, parent):
+    conversation, messages = parent
+    child = Conversation(
+        title="Child",
+        parent_conversation_id=conversation.id,
+        branch_point_message_id=messages[2].id,
+        inherits_parent_messages=True,
+    )
+    test_db.add(child)
+    await test_db.flush()
+    grandchild = Conversation(
+        title="Grandchild",
+        parent_conversation_id=child.id,
+        branch_point_message_id=messages[1].id,
+        inherits_parent_messages=True,
+    )
+    test_db.add(grandchild)
+    await test_db.commit()
+
+    response = await client.put(f"/api/messages/{messages[0].id}", json={"content": "edited"})
+    assert response.status_code == 200
+
+    assert await _contents(test_db, conversation.id) == ["edited", "p2", "p3", "p4"]
+    # The branch got its own copies of the original prefix...
+    await test_db.refresh(child)
+    assert child.inherits_parent_messages is False
+    assert await _stored(test_db, child.id) == 3
+    assert await _contents(test_db, child.id) == ["p1", "p2", "p3"]
+    # ...and its own branch now points at the copy of its branch point
+    await test_db.refresh(grandchild)
+    assert grandchild.branch_point_message_id != messages[1].id
+    assert await _contents(test_db, grandchild.id) == ["p1", "p2"]
+
+
+async def test_deleting_after_the_branch_point_keeps_sharing(client, test_db, parent):
+    conversation, messages = parent
+    child = Conversation(
+        title="Child",
+        parent_conversation_id=conversation.id,
+        branch_point_message_id=messages[1].id,
+        inherits_parent_messages=True,
+    )
+    test_db.add(child)
+    await test_db.commit()
+
+    response = await client.delete(f"/api/messages/{messages[3].id}")
+    assert response.status_code == 204
+
+    await test_db.refresh(child)
+    assert child.inherits_parent_messages is True
+    assert await _stored(test_db, child.id) == 0
+    assert await _contents(test_db, child.id) == ["p1", "p2"]
@@ -0,0 +1,122 @@
+"""ASGI-level tests for the rate limit and session timeout middlewares."""
+
+import time
+from datetime import timedelta
+
+from fastapi import Depends, FastAPI, Request
+from fastapi.responses import StreamingResponse
+from httpx import ASGITransport, AsyncClient
+
+from src.core.rate_limiter import RateLimitMiddleware
+from src.core.session import JWTBearer, TokenData, session_manager
+from src.core.session_middleware import SessionTimeoutMiddleware
+
+
+def build_app(**limits) -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/me")
+    async def me(request: Request, token: TokenData = Depends(JWTBearer())) -> dict:
+        return {
+            "user": token.username,
+            "handed_off": request.scope.get("state", {}).get("token_data") is token,
+        }
+
+    @app.get("/stream")
+    async def stream() -> StreamingResponse:
+        return StreamingResponse(iter([b"a", b"b"]), media_type="text/plain")
+
+    app.add_middleware(SessionTimeoutMiddleware)
+    app.add_middleware(RateLimitMiddleware, **limits)
+    return app
+
+
+def client_for(app: FastAPI) -> AsyncClient:
+    return AsyncClient(transport=ASGITransport(app=app), base_url="http://test")
+
+
+def login(username: str) -> tuple[str, str]:
+    tokens = session_manager.create_full_session(username)
+    return tokens["access_token"], tokens["session_id"]
+
+
+async def test_rate_limit_headers_and_429():
+    app = build_app(requests_per_minute=2, block_duration_seconds=30)
+
+    async with client_for(app) as client:
+        first = await client.get("/stream")
+        second = await client.get("/stream")
+        blocked = await client.get("/stream")
+
+    # Streamed responses pass through with the rate limit headers added
+    assert first.status_code == 200
+    assert first.text == "ab"
+    assert first.headers["X-RateLimit-Remaining-Minute"] == "1"
+    assert second.headers["X-RateLimit-Remaining-Minute"] == "0"
+
+    assert blocked.status_code == 429
+    body = blocked.json()
+    assert body["error"] == "Too Many Requests"
+    assert body["blocked_until"] == blocked.headers["X-RateLimit-Blocked-Until"]
+    assert int(body["blocked_until"]) >= int(time.time()) + 29
+
+
+async def test_skipped_paths_are_not_counted():
+    app = build_app(requests_per_minute=1)
+
+    async with client_for(app) as client:
+        responses = [await client.get("/health") for _ in range(3)]
+
+    assert [response.status_code for response in responses] == [404] * 3
+    assert "X-RateLimit-Remaining-Minute" not in responses[0].headers
+
+
+async def test_token_is_decoded_once_and_handed_to_jwt_bearer(monkeypatch):
+    token, _ = login("asgi-handoff")
+    calls = []
+    verify_token = session_manager.verify_token
+
+    def counting_verify(raw: str):
+        calls.append(raw)
+        return verify_token(raw)
+
+    monkeypatch.setattr(session_manager, "verify_token", counting_verify)
+
+    async with client_for(build_app()) as client:
+        response = await client.get("/me", headers={"Authorization": f"Bearer {token}"})
+
+    assert response.status_code == 200
+    assert response.json() == {"user": "asgi-handoff", "handed_off": True}
+    assert calls == [token]
+
+
+async def test_timed_out_session_gets_401():
+    token, session_id = login("asgi-timeout")
+    # The token is fresh, but the session saw no activity for too long
+    stale = int(time.time()) - session_manager.timeout_minutes * 60 - 1
+    session_manager.sessions.merge(session_id, {"last_activity": stale}, create=False)
+
+    async with client_for(build_app()) as client:
+        response = await client.get("/me", headers={"Authorization": f"Bearer {token}"})
+
+    assert response.status_code == 401
+    assert response.json()["code"] == "SESSION_TIMEOUT"
+    assert response.json()["session_id"] == session_id
+    assert response.headers["X-Session-Status"] == "timeout"
+    assert response.headers["X-Session-Expired"] == "true"
+
+
+async def test_expiring_token_gets_warning_headers():
+    _, session_id = login("asgi-expiring")
+    token = session_manager.create_access_token(
+        {"sub": "asgi-expiring", "session_id": session_id, "last_activity": int(time.time())},
+        expires_delta=timedelta(minutes=2),
+    )
+
+    async with client_for(build_app()) as client:
+        response = await client.get("/me", headers={"Authorization": f"Bearer {token}"})
+
+    assert response.status_code == 200
+    assert response.headers["X-Session-Warning"] == "token_expiring_soon"
+    assert 0 < int(response.headers["X-Session-Expires-In"]) <= 120
+    assert response.headers["X-Session-Refresh-Endpoint"] == "/api/auth/refresh"
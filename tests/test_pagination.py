@@ -0,0 +1,104 @@
+"""Tests for keyset (cursor) pagination of the list endpoints."""
+
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import select
+
+from src.models.conversation import Conversation
+from src.models.message import Message
+from src.utils.pagination import (
+    NEXT_CURSOR_HEADER,
+    PREV_CURSOR_HEADER,
+    TOTAL_COUNT_HEADER,
+    SortKey,
+    paginate,
+)
+
+MESSAGE_ORDER = (SortKey(Message.created_at), SortKey(Message.id))
+
+
+@pytest.fixture
+async def conversations(test_db):
+    start = datetime(2025, 1, 1)
+    rows = [
+        Conversation(title=f"Chat {index}", updated_at=start + timedelta(minutes=index))
+        for index in range(7)
+    ]
+    test_db.add_all(rows)
+    await test_db.commit()
+    # Newest first, as listed
+    return [row.id for row in reversed(rows)]
+
+
+@pytest.mark.asyncio
+async def test_walk_forward_and_back(async_client, conversations):
+    first = await async_client.get("/api/conversations", params={"limit": 3})
+    assert [c["id"] for c in first.json()] == conversations[:3]
+    assert PREV_CURSOR_HEADER not in first.headers
+
+    second = await async_client.get(
+        "/api/conversations", params={"limit": 3, "cursor": first.headers[NEXT_CURSOR_HEADER]}
+    )
+    assert [c["id"] for c in second.json()] == conversations[3:6]
+
+    last = await async_client.get(
+        "/api/conversations", params={"limit": 3, "cursor": second.headers[NEXT_CURSOR_HEADER]}
+    )
+    assert [c["id"] for c in last.json()] == conversations[6:]
+    assert NEXT_CURSOR_HEADER not in last.headers
+
+    back = await async_client.get(
+        "/api/conversations", params={"limit": 3, "cursor": last.headers[PREV_CURSOR_HEADER]}
+    )
+    assert [c["id"] for c in back.json()] == conversations[3:6]
+
+    start = await async_client.get(
+        "/api/conversations", params={"limit": 3, "cursor": back.headers[PREV_CURSOR_HEADER]}
+    )
+    assert [c["id"] for c in start.json()] == conversations[:3]
+    assert PREV_CURSOR_HEADER not in start.headers
+    assert start.headers[NEXT_CURSOR_HEADER]
+
+
+@pytest.mark.asyncio
+async def test_total_is_counted_on_demand(async_client, conversations):
+    response = await async_client.get("/api/conversations", params={"limit": 2})
+    assert TOTAL_COUNT_HEADER not in response.headers
+
+    response = await async_client.get(
+        "/api/conversations", params={"limit": 2, "include_total": True}
+    )
+    assert response.headers[TOTAL_COUNT_HEADER] == "7"
+
+
+@pytest.mark.asyncio
+async def test_invalid_cursor_is_rejected(async_client, conversations):
+    response = await async_client.get("/api/conversations", params={"cursor": "not-a-cursor"})
+    assert response.status_code == 400
+
+
+@pytest.mark.asyncio
+async def test_ties_on_the_sort_key_are_not_skipped(test_db):
+    conversation = Conversation(title="Chat")
+    test_db.add(conversation)
+    await test_db.flush()
+    same_time = datetime(2025, 1, 1)
+    test_db.add_all([
+        Message(conversation_id=conversation.id, role="user", content=str(index), created_at=same_time)
+        for index in range(5)
+    ])
+    await test_db.commit()
+
+    query = select(Message).where(Message.conversation_id == conversation.id)
+    seen = []
+    cursor = None
+    while True:
+        page = await paginate(test_db, query, MESSAGE_ORDER, limit=2, cursor=cursor)
+        seen.extend(message.id for message in page.items)
+        if not page.has_more:
+            break
+        cursor = page.next_cursor
+
+    assert len(seen) == 5
+    assert seen == sorted(seen)
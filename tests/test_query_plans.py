@@ -0,0 +1,207 @@
+"""EXPLAIN QUERY PLAN audit for the hot conversation/message access paths.
+
+Each case calls a list endpoint (or the agent context loader) against the test
+database and records every SELECT it issues, so the audit covers the queries
+the application actually builds. The test fails if SQLite would answer one of
+them with a full table scan, or would have to sort the rows itself when an
+index could deliver them in order.
+"""
+
+from contextlib import contextmanager
+
+import pytest
+from sqlalchemy import event
+
+from src.models.artifact import Artifact
+from src.models.checkpoint import Checkpoint
+from src.models.conversation import Conversation
+from src.models.message import Message
+from src.models.project import Project
+from src.models.project_file import ProjectFile
+from src.services.context_service import context_service
+
+# name -> (method, path, query params, cursors to follow before the audited request)
+HOT_REQUESTS = {
+    "list_conversations": ("GET", "/api/conversations", {"limit": 1}, ()),
+    "list_conversations_next_page": ("GET", "/api/conversations", {"limit": 1}, ("next",)),
+    "list_archived_conversations": ("GET", "/api/conversations", {"archived": True}, ()),
+    "list_project_conversations": (
+        "GET", "/api/conversations", {"project_id": "{project_id}", "limit": 1}, ()
+    ),
+    "list_tasks": ("GET", "/api/tasks", {}, ()),
+    "list_tasks_by_status": ("GET", "/api/tasks", {"status": "running"}, ()),
+    "list_audit_logs": ("GET", "/api/audit", {}, ()),
+    "list_user_audit_logs": ("GET", "/api/audit/user/default-user", {}, ()),
+    "list_resource_audit_logs": (
+        "GET", "/api/audit/resource/conversation/{conversation_id}", {}, ()
+    ),
+    "activity_feed": ("GET", "/api/activity", {}, ()),
+    "list_root_folders": ("GET", "/api/folders", {}, ()),
+    "list_tags": ("GET", "/api/tags", {}, ()),
+    "list_prompts": ("GET", "/api/prompts", {}, ()),
+    "list_templates": ("GET", "/api/templates", {}, ()),
+    "list_branches": ("GET", "/api/conversations/{conversation_id}/branches", {}, ()),
+    "list_artifacts": (
+        "GET", "/api/artifacts/conversations/{conversation_id}/artifacts", {}, ()
+    ),
+    "list_checkpoints": ("GET", "/api/conversations/{conversation_id}/checkpoints", {}, ()),
+    "list_project_files": ("GET", "/api/projects/{project_id}/files", {}, ()),
+    "list_memories": ("GET", "/api/memory", {}, ()),
+}
+
+# Requests whose predicate cannot also provide the sort order; only the
+# full-scan check applies to them. Message history joins the branch lineage
+# (message_history.visible_messages), so rows from several conversations are
+# merged and sorted; each conversation's rows still come from its index.
+UNORDERED_REQUESTS = {
+    "list_messages": ("GET", "/api/conversations/{conversation_id}/messages", {"limit": 1}, ()),
+    "list_messages_next_page": (
+        "GET", "/api/conversations/{conversation_id}/messages", {"limit": 1}, ("next",)
+    ),
+    "list_messages_prev_page": (
+        "GET", "/api/conversations/{conversation_id}/messages", {"limit": 1}, ("next", "prev")
+    ),
+    "list_branch_messages": ("GET", "/api/conversations/{branch_id}/messages", {}, ()),
+    "export_conversation": ("POST", "/api/conversations/{conversation_id}/export", {}, ()),
+    "artifact_versions": ("GET", "/api/artifacts/{artifact_id}/versions", {}, ()),
+}
+
+
+@pytest.fixture
+async def ids(test_db):
+    """A project with a conversation, two messages, a branch, an artifact and a file."""
+    project = Project(name="Plans")
+    test_db.add(project)
+    await test_db.flush()
+    conversation = Conversation(
+        title="Plans", model="claude-sonnet-4-5-20250929", project_id=project.id
+    )
+    test_db.add(conversation)
+    await test_db.flush()
+    messages = [
+        Message(conversation_id=conversation.id, role=role, content=role)
+        for role in ("user", "assistant")
+    ]
+    test_db.add_all(messages)
+    await test_db.flush()
+    branch = Conversation(
+        title="Branch",
+        model=conversation.model,
+        parent_conversation_id=conversation.id,
+        branch_point_message_id=messages[0].id,
+        inherits_parent_messages=True,
+    )
+    artifact = Artifact(conversation_id=conversation.id, title="Code", content="print()")
+    test_db.add_all([
+        branch,
+        artifact,
+        Conversation(title="Second", model=conversation.model, project_id=project.id),
+        Checkpoint(conversation_id=conversation.id, name="Start"),
+        ProjectFile(
+            project_id=project.id, filename="a.txt", original_filename="a.txt",
+            file_path="a.txt", file_url="/a.txt", content="notes", file_size=5,
+        ),
+    ])
+    await test_db.commit()
+    return {
+        "project_id": project.id,
+        "conversation_id": conversation.id,
+        "branch_id": branch.id,
+        "artifact_id": artifact.id,
+    }
+
+
+@contextmanager
+def recorded_selects(db):
+    """Collect ``(sql, parameters)`` for every SELECT run on ``db``'s engine."""
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith(("SELECT", "WITH")):
+            statements.append((statement, parameters))
+
+    engine = db.bind.sync_engine
+    event.listen(engine, "before_cursor_execute", record)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
+
+
+def page_cursor(response, direction: str) -> str:
+    """The ``next``/``prev`` cursor of a list response, from its headers or body."""
+    cursor = response.headers.get(f"x-{direction}-cursor")
+    if cursor is None:
+        cursor = response.json()[f"{direction}_cursor"]
+    assert cursor, f"no {direction} cursor in {response.request.url}"
+    return cursor
+
+
+async def request_selects(client, db, ids, spec) -> list[tuple]:
+    """Issue the request described by ``spec`` and return the SELECTs it ran."""
+    method, path, params, follow = spec
+    path = path.format(**ids)
+    params = {key: str(value).format(**ids) for key, value in params.items()}
+    for direction in follow:
+        response = await client.request(method, path, params=params)
+        params = {**params, "cursor": page_cursor(response, direction)}
+
+    with recorded_selects(db) as statements:
+        response = await client.request(method, path, params=params)
+    assert response.status_code == 200, response.text
+    assert statements, f"{path} ran no SELECT"
+    return statements
+
+
+async def explain(db, statement: str, parameters) -> list[str]:
+    """Return the detail column of ``EXPLAIN QUERY PLAN`` for a statement."""
+    conn = await db.connection()
+    result = await conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters)
+    return [row[-1] for row in result]
+
+
+def full_scans(plan: list[str]) -> list[str]:
+    """Plan steps that read a whole table without an index.
+
+    Scans of a materialized CTE (a handful of rows) and full-text index
+    lookups are not table scans.
+    """
+    ctes = {step.split()[-1] for step in plan if step.startswith("MATERIALIZE ")}
+    return [
+        step for step in plan
+        if step.startswith("SCAN ")
+        and "USING" not in step
+        and "VIRTUAL TABLE INDEX" not in step
+        and step.split()[1] not in ctes
+    ]
+
+
+async def audit(db, name: str, statements: list[tuple], ordered: bool = True) -> None:
+    for statement, parameters in statements:
+        plan = await explain(db, statement, parameters)
+        assert not full_scans(plan), f"{name} scans a table: {plan}\n{statement}"
+        if ordered:
+            assert not any("TEMP B-TREE" in step for step in plan), (
+                f"{name} sorts in memory: {plan}\n{statement}"
+            )
+
+
+@pytest.mark.parametrize("name", sorted(HOT_REQUESTS))
+async def test_hot_request_uses_index_order(async_client, test_db, ids, name):
+    statements = await request_selects(async_client, test_db, ids, HOT_REQUESTS[name])
+    await audit(test_db, name, statements)
+
+
+@pytest.mark.parametrize("name", sorted(UNORDERED_REQUESTS))
+async def test_request_avoids_full_scan(async_client, test_db, ids, name):
+    statements = await request_selects(async_client, test_db, ids, UNORDERED_REQUESTS[name])
+    await audit(test_db, name, statements, ordered=False)
+
+
+async def test_agent_context_uses_indexes(test_db, ids):
+    context_service.cache.clear()
+    with recorded_selects(test_db) as statements:
+        context = await context_service.assemble(ids["conversation_id"], test_db, "notes")
+    assert context.project_id == ids["project_id"]
+    # Memories are ranked by relevance, which no index can provide
+    await audit(test_db, "agent_context", statements, ordered=False)
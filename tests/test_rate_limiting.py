@@ -230,6 +230,89 @@ async def test_rate_limiting_skipped_paths():
             assert rate_limited_count == 0, f"Unexpected rate limiting on skipped path: {path}"
 
 
+
+def test_limiter_blocks_after_budget_and_recovers(monkeypatch):
+    """The sliding window blocks once the minute budget is spent."""
+    from src.core import rate_limiter as rl
+
+    now = [1_000_020.0]
+    monkeypatch.setattr(rl.time, "time", lambda: now[0])
+    limiter = rl.RateLimiter(requests_per_minute=10, requests_per_hour=100, block_duration_seconds=30)
+
+    for _ in range(10):
+        allowed, headers = limiter.is_allowed("client")
+        assert allowed
+    assert headers["X-RateLimit-Remaining-Minute"] == "0"
+
+    allowed, headers = limiter.is_allowed("client")
+    assert not allowed
+    assert headers["X-RateLimit-Blocked-Until"] == str(int(now[0] + 30))
+
+    # Two minutes later both the block and the window have passed
+    now[0] += 120
+    assert limiter.is_allowed("client")[0]
+
+
+def test_limiter_weights_route_cost(monkeypatch):
+    """Expensive routes spend more of the budget."""
+    from src.core import rate_limiter as rl
+
+    monkeypatch.setattr(rl.time, "time", lambda: 1_000_020.0)
+    limiter = rl.RateLimiter(requests_per_minute=10, requests_per_hour=100)
+
+    assert limiter.is_allowed("client", cost=5)[0]
+    assert limiter.is_allowed("client", cost=5)[0]
+    assert not limiter.is_allowed("client", cost=1)[0]
+
+    middleware = rl.RateLimitMiddleware(app)
+    assert middleware.request_cost("POST", "/api/agent/stream") == 5
+    assert middleware.request_cost("POST", "/api/agent/invoke") == 5
+    # Only starting a run is expensive, not reattaching to one
+    assert middleware.request_cost("GET", "/api/agent/stream/run-1") == 1
+    assert middleware.request_cost("GET", "/api/agent/stream") == 1
+    assert middleware.request_cost("GET", "/api/conversations") == 1
+
+
+def test_shared_limiter_counts_every_worker(monkeypatch, tmp_path):
+    """Limiters sharing a SQLite state store enforce one budget between them."""
+    from src.core import rate_limiter as rl
+    from src.core.state_store import SQLiteStateStore
+
+    monkeypatch.setattr(rl.time, "time", lambda: 1_000_020.0)
+    path = str(tmp_path / "state.db")
+    workers = [
+        rl.RateLimiter(
+            requests_per_minute=10,
+            requests_per_hour=100,
+            backend="shared",
+            store=SQLiteStateStore(path),
+        )
+        for _ in range(2)
+    ]
+
+    results = [workers[i % 2].is_allowed("client")[0] for i in range(11)]
+    assert results == [True] * 10 + [False]
+    # The block is shared too
+    assert not workers[0].is_allowed("client")[0]
+
+
+def test_limiter_client_table_is_bounded(monkeypatch):
+    """Clients beyond max_clients evict the least recently seen, idle ones are swept."""
+    from src.core import rate_limiter as rl
+
+    now = [1_000_020.0]
+    monkeypatch.setattr(rl.time, "time", lambda: now[0])
+    limiter = rl.RateLimiter(max_clients=3, sweep_interval_seconds=0)
+
+    for i in range(5):
+        limiter.is_allowed(f"client-{i}")
+    assert list(limiter.clients) == ["client-2", "client-3", "client-4"]
+
+    now[0] += rl.HOUR + 1
+    limiter.is_allowed("client-new")
+    assert list(limiter.clients) == ["client-new"]
+
+
 if __name__ == "__main__":
     import sys
     import asyncio
@@ -0,0 +1,102 @@
+"""Tests for project file chunking and token-budgeted retrieval."""
+
+import pytest
+
+from src.core.config import settings
+from src.models.conversation import Conversation
+from src.models.project import Project
+from src.models.project_file import ProjectFile
+from src.services.context_service import ContextService
+from src.services.retrieval_service import RetrievalService, build_retrieval_query
+from src.utils.chunking import chunk_text, estimate_tokens
+
+PARAGRAPHS = [
+    "Deployment uses Docker images pushed to the staging registry.",
+    "Billing invoices are generated on the first day of each month.",
+    "The database is backed up nightly to object storage.",
+]
+
+
+def test_chunk_text_respects_size_and_paragraphs():
+    text = "\n\n".join(PARAGRAPHS * 4)
+    chunks = chunk_text(text, max_tokens=40, overlap_tokens=5)
+
+    assert len(chunks) > 1
+    assert all(estimate_tokens(chunk) <= 40 for chunk in chunks)
+    assert chunks[0].startswith("Deployment")
+
+
+def test_build_retrieval_query_ors_distinct_terms():
+    assert build_retrieval_query("How is the database backed up? Database!") == (
+        '"database" OR "backed" OR "up"'
+    )
+    assert build_retrieval_query("what is the") is None
+
+
+@pytest.fixture
+async def project_with_manual(test_db):
+    service = RetrievalService(chunk_tokens=20, overlap_tokens=0)
+    project = Project(name="Ops")
+    test_db.add(project)
+    await test_db.flush()
+    manual = ProjectFile(
+        project_id=project.id,
+        filename="manual.md",
+        original_filename="manual.md",
+        file_path="/tmp/manual.md",
+        file_url="/files/manual.md",
+        content="\n\n".join(PARAGRAPHS),
+    )
+    test_db.add(manual)
+    await test_db.flush()
+    await service.index_file(test_db, manual)
+    await test_db.commit()
+    return service, project, manual
+
+
+async def test_retrieve_ranks_relevant_chunk_first(test_db, project_with_manual):
+    service, project, _ = project_with_manual
+
+    chunks = await service.retrieve(test_db, project.id, "When are billing invoices generated?")
+
+    assert chunks
+    assert "Billing invoices" in chunks[0].content
+    assert chunks[0].source()["filename"] == "manual.md"
+
+
+async def test_retrieve_stays_within_budget(test_db, project_with_manual):
+    service, project, _ = project_with_manual
+
+    chunks = await service.retrieve(
+        test_db, project.id, "deployment billing database", token_budget=20, top_k=5
+    )
+
+    assert sum(chunk.token_count for chunk in chunks) <= 20
+    assert len(chunks) == 1
+
+
+async def test_deleted_file_chunks_are_not_retrieved(test_db, project_with_manual):
+    service, project, manual = project_with_manual
+    await service.delete_file_chunks(test_db, manual.id)
+    await test_db.commit()
+
+    assert await service.retrieve(test_db, project.id, "billing") == []
+    assert await service.index_missing(test_db) == 1
+    assert await service.retrieve(test_db, project.id, "billing")
+
+
+async def test_large_projects_get_retrieved_passages(test_db, project_with_manual, monkeypatch):
+    _, project, _ = project_with_manual
+    conversation = Conversation(title="Ops chat", project_id=project.id)
+    test_db.add(conversation)
+    await test_db.commit()
+    monkeypatch.setattr(settings, "retrieval_token_budget", 20)
+
+    context = await ContextService(max_entries=8).assemble(
+        conversation.id, test_db, query="nightly database backup"
+    )
+
+    assert "(excerpt" in context.files_content
+    assert "backed up nightly" in context.files_content
+    assert "Billing" not in context.files_content
+    assert context.sources[0]["chunk_index"] is not None
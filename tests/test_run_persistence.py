@@ -0,0 +1,100 @@
+"""Tests for storing an agent turn in one transaction."""
+
+import json
+
+import pytest
+from sqlalchemy import func, select
+
+from src.models.artifact import Artifact
+from src.models.conversation import Conversation
+from src.models.memory import Memory
+from src.models.message import Message
+from src.models.usage_tracking import UsageTracking
+from src.services.run_persistence import RunPersistence, TokenUsage
+
+
+@pytest.fixture
+async def conversation(test_db):
+    conversation = Conversation(title="Chat")
+    test_db.add(conversation)
+    await test_db.commit()
+    return conversation
+
+
+async def test_flush_writes_the_turn_with_one_commit(test_db, conversation, monkeypatch):
+    persistence = RunPersistence(conversation_id=conversation.id, model="claude-sonnet-4-5-20250929")
+    persistence.add_memory("User prefers tabs", category="preference")
+    persistence.add_artifacts([
+        {"content": "x = 1", "title": "x", "language": "py", "artifact_type": "code"},
+    ])
+    persistence.set_usage(TokenUsage(input_tokens=12, output_tokens=30))
+    persistence.set_assistant_message("Here you go", thinking_content="hmm")
+
+    commits = []
+    original_commit = test_db.commit
+
+    async def counting_commit():
+        commits.append(1)
+        await original_commit()
+
+    monkeypatch.setattr(test_db, "commit", counting_commit)
+    stored = await persistence.flush(test_db)
+
+    assert len(commits) == 1
+    message = await test_db.get(Message, stored["message_id"])
+    assert message.role == "assistant"
+    assert message.content == "Here you go"
+    assert message.output_tokens == 30
+
+    usage = (await test_db.execute(select(UsageTracking))).scalar_one()
+    assert usage.message_id == message.id
+    assert usage.conversation_id == conversation.id
+    assert (usage.input_tokens, usage.output_tokens) == (12, 30)
+
+    assert len(stored["artifacts"]) == 1
+    assert await test_db.scalar(select(func.count(Artifact.id))) == 1
+    assert await test_db.scalar(select(func.count(Memory.id))) == 1
+
+    await test_db.refresh(conversation)
+    assert conversation.message_count == 1
+    assert conversation.token_count == 42
+
+
+async def test_without_a_conversation_only_usage_and_memories_are_stored(test_db):
+    persistence = RunPersistence(conversation_id=None, model="claude-haiku-4-5")
+    persistence.add_memory("Likes Python")
+    persistence.add_artifacts([
+        {"content": "x = 1", "title": "x", "language": "py", "artifact_type": "code"},
+    ])
+    persistence.set_usage(TokenUsage(input_tokens=1, output_tokens=2))
+    persistence.set_assistant_message("Hi")
+
+    stored = await persistence.flush(test_db)
+
+    assert stored["message_id"] is None
+    assert stored["artifacts"] == []
+    assert await test_db.scalar(select(func.count(Message.id))) == 0
+    assert await test_db.scalar(select(func.count(UsageTracking.id))) == 1
+    assert await test_db.scalar(select(func.count(Memory.id))) == 1
+
+
+@pytest.mark.asyncio
+async def test_stream_stores_the_assistant_message(async_client, test_db, conversation):
+    response = await async_client.post(
+        "/api/agent/stream",
+        json={"message": "Hello there", "conversation_id": conversation.id},
+    )
+    assert response.status_code == 200
+
+    done = None
+    lines = response.text.splitlines()
+    for index, line in enumerate(lines):
+        if line.startswith("event: done"):
+            done = json.loads(lines[index + 1][len("data: "):])
+    assert done is not None
+    assert done["message_id"]
+
+    message = await test_db.get(Message, done["message_id"])
+    assert message.role == "assistant"
+    assert message.content
+    assert await test_db.scalar(select(func.count(UsageTracking.id))) == 1
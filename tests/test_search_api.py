@@ -5,7 +5,7 @@ import pytest_asyncio
 from httpx import AsyncClient, ASGITransport
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine, async_sessionmaker
 
-from src.core.database import Base, get_db
+from src.core.database import Base, get_db, get_read_db
 from src.main import app
 
 
@@ -34,6 +34,7 @@ async def test_db():
 async def test_search_conversations_endpoint(test_db):
     """Test search conversations endpoint."""
     app.dependency_overrides[get_db] = lambda: test_db
+    app.dependency_overrides[get_read_db] = lambda: test_db
 
     async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
         # Test search conversations endpoint
@@ -53,6 +54,7 @@ async def test_search_conversations_endpoint(test_db):
 async def test_search_messages_endpoint(test_db):
     """Test search messages endpoint."""
     app.dependency_overrides[get_db] = lambda: test_db
+    app.dependency_overrides[get_read_db] = lambda: test_db
 
     async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
         # Test search messages endpoint
@@ -72,6 +74,7 @@ async def test_search_messages_endpoint(test_db):
 async def test_search_files_endpoint(test_db):
     """Test search files endpoint."""
     app.dependency_overrides[get_db] = lambda: test_db
+    app.dependency_overrides[get_read_db] = lambda: test_db
 
     async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
         # Test search files endpoint
@@ -87,6 +90,7 @@ async def test_search_files_endpoint(test_db):
 async def test_global_search_endpoint(test_db):
     """Test global search endpoint."""
     app.dependency_overrides[get_db] = lambda: test_db
+    app.dependency_overrides[get_read_db] = lambda: test_db
 
     async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
         # Test global search endpoint
@@ -99,3 +103,149 @@ async def test_global_search_endpoint(test_db):
         assert "memories" in result
 
     app.dependency_overrides.clear()
+
+
+@pytest_asyncio.fixture
+async def seeded_db(test_db):
+    """Seed conversations, messages, files and memories for ranking tests."""
+    from src.models.conversation import Conversation
+    from src.models.memory import Memory
+    from src.models.message import Message
+    from src.models.project import Project
+    from src.models.project_file import ProjectFile
+
+    test_db.add(Project(id="proj-1", name="Search Project"))
+    test_db.add(Conversation(id="conv-1", title="Kubernetes deployment notes"))
+    test_db.add(Conversation(id="conv-2", title="Weekend plans"))
+    test_db.add(Conversation(id="conv-3", title="Deleted kubernetes chat", is_deleted=True))
+    for i in range(5):
+        test_db.add(Message(
+            id=f"msg-{i}",
+            conversation_id="conv-2",
+            role="user",
+            content=f"message {i} mentions kubernetes " + "filler " * (i * 10),
+        ))
+    test_db.add(Message(id="msg-other", conversation_id="conv-2", role="user", content="hiking trip"))
+    test_db.add(ProjectFile(
+        id="file-1",
+        project_id="proj-1",
+        filename="cluster-guide.md",
+        original_filename="cluster-guide.md",
+        file_path="/tmp/cluster-guide.md",
+        file_url="/files/cluster-guide.md",
+        content="How to operate the kubernetes cluster",
+    ))
+    test_db.add(Memory(id="mem-1", content="User deploys with kubernetes"))
+    test_db.add(Memory(id="mem-2", content="User likes kubernetes", is_active=False))
+    await test_db.commit()
+    return test_db
+
+
+@pytest.mark.asyncio
+async def test_search_messages_ranked_with_snippets(seeded_db):
+    """Messages are BM25-ranked and carry highlighted snippets."""
+    app.dependency_overrides[get_db] = lambda: seeded_db
+    app.dependency_overrides[get_read_db] = lambda: seeded_db
+
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+        response = await client.get("/api/search/messages?q=kubernetes")
+        assert response.status_code == 200
+        result = response.json()
+        assert [m["id"] for m in result] == [f"msg-{i}" for i in range(5)]
+        assert "<mark>kubernetes</mark>" in result[0]["snippet"]
+        scores = [m["score"] for m in result]
+        assert scores == sorted(scores)
+
+    app.dependency_overrides.clear()
+
+
+@pytest.mark.asyncio
+async def test_search_messages_cursor_pagination(seeded_db):
+    """Following X-Next-Cursor walks every result exactly once."""
+    app.dependency_overrides[get_db] = lambda: seeded_db
+    app.dependency_overrides[get_read_db] = lambda: seeded_db
+
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+        seen = []
+        cursor = None
+        while True:
+            params = {"q": "kubernetes", "limit": 2}
+            if cursor:
+                params["cursor"] = cursor
+            response = await client.get("/api/search/messages", params=params)
+            assert response.status_code == 200
+            seen.extend(m["id"] for m in response.json())
+            cursor = response.headers.get("X-Next-Cursor")
+            if not cursor:
+                break
+        assert seen == [f"msg-{i}" for i in range(5)]
+
+        response = await client.get("/api/search/messages?q=kubernetes&cursor=garbage")
+        assert response.status_code == 400
+
+    app.dependency_overrides.clear()
+
+
+@pytest.mark.asyncio
+async def test_search_conversations_matches_title_and_history(seeded_db):
+    """Conversations match on title or message content, excluding deleted ones."""
+    app.dependency_overrides[get_db] = lambda: seeded_db
+    app.dependency_overrides[get_read_db] = lambda: seeded_db
+
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+        response = await client.get("/api/search/conversations?q=kubernetes")
+        ids = [c["id"] for c in response.json()]
+        assert set(ids) == {"conv-1", "conv-2"}
+
+        response = await client.get("/api/search/conversations?q=hiking")
+        assert [c["id"] for c in response.json()] == ["conv-2"]
+
+    app.dependency_overrides.clear()
+
+
+@pytest.mark.asyncio
+async def test_search_index_tracks_updates_and_deletes(seeded_db):
+    """Triggers keep the FTS index in sync with edits and deletes."""
+    from sqlalchemy import delete, update
+    from src.models.message import Message
+
+    await seeded_db.execute(
+        update(Message).where(Message.id == "msg-other").values(content="sailing trip")
+    )
+    await seeded_db.execute(delete(Message).where(Message.id == "msg-0"))
+    await seeded_db.commit()
+
+    app.dependency_overrides[get_db] = lambda: seeded_db
+    app.dependency_overrides[get_read_db] = lambda: seeded_db
+
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+        assert (await client.get("/api/search/messages?q=hiking")).json() == []
+        assert [m["id"] for m in (await client.get("/api/search/messages?q=sailing")).json()] == ["msg-other"]
+        ids = [m["id"] for m in (await client.get("/api/search/messages?q=kubernetes")).json()]
+        assert "msg-0" not in ids
+
+    app.dependency_overrides.clear()
+
+
+@pytest.mark.asyncio
+async def test_search_prefix_and_special_characters(seeded_db):
+    """Partial words match as prefixes and FTS syntax in input is neutralised."""
+    app.dependency_overrides[get_db] = lambda: seeded_db
+    app.dependency_overrides[get_read_db] = lambda: seeded_db
+
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+        response = await client.get("/api/search/files?q=kuber")
+        assert [f["id"] for f in response.json()] == ["file-1"]
+
+        response = await client.get('/api/search/messages?q="kubernetes" AND (NEAR')
+        assert response.status_code == 200
+
+        result = (await client.get("/api/search/knowledge?q=cluster&project_id=proj-1")).json()
+        assert result["total"] == 1
+        assert result["files"][0]["id"] == "file-1"
+
+        result = (await client.get("/api/search/global?q=kubernetes")).json()
+        assert [m["id"] for m in result["memories"]] == ["mem-1"]
+        assert {c["id"] for c in result["conversations"]} == {"conv-1", "conv-2"}
+
+    app.dependency_overrides.clear()
@@ -11,6 +11,7 @@ Tests for backend session timeout handling:
 import time
 import jwt
 import pytest
+from collections.abc import MutableMapping
 from datetime import timedelta
 
 from src.core.session import SessionManager, TokenData, session_manager
@@ -23,7 +24,7 @@ def test_session_manager_init():
     assert sm.timeout_minutes == settings.access_token_expire_minutes
     assert sm.refresh_buffer_minutes == 5
     assert sm.refresh_token_expiry_days == 7
-    assert isinstance(sm.sessions, dict)
+    assert isinstance(sm.sessions, MutableMapping)
     print("✓ Session manager initializes correctly")
 
 
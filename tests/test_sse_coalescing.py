@@ -0,0 +1,71 @@
+"""Tests for SSE token coalescing."""
+
+import asyncio
+import json
+
+from src.utils.sse import CoalesceOptions, TokenChunk, coalesce_tokens
+
+
+async def _source(pause: float = 0.0):
+    yield {"event": "start", "data": "{}"}
+    for word in ("one ", "two ", "three "):
+        yield TokenChunk("message", word)
+    if pause:
+        await asyncio.sleep(pause)
+    yield TokenChunk("message", "four ")
+    yield TokenChunk("thinking", "hmm")
+    yield {"event": "done", "data": "{}"}
+
+
+async def _collect(options):
+    return [event async for event in coalesce_tokens(_source(pause=0.05), options)]
+
+
+def _shape(events):
+    return [
+        (event["event"], json.loads(event["data"]).get("content"))
+        for event in events
+    ]
+
+
+async def test_without_options_every_chunk_is_an_event():
+    events = await _collect(None)
+
+    assert _shape(events) == [
+        ("start", None),
+        ("message", "one "),
+        ("message", "two "),
+        ("message", "three "),
+        ("message", "four "),
+        ("thinking", "hmm"),
+        ("done", None),
+    ]
+
+
+async def test_chunks_are_merged_within_the_window():
+    events = await _collect(CoalesceOptions(window_ms=20, max_bytes=1024))
+
+    # The pause flushes the first burst, and other events flush the buffer first
+    assert _shape(events) == [
+        ("start", None),
+        ("message", "one two three "),
+        ("message", "four "),
+        ("thinking", "hmm"),
+        ("done", None),
+    ]
+
+
+async def test_max_bytes_forces_a_flush():
+    events = await _collect(CoalesceOptions(window_ms=1000, max_bytes=8))
+
+    messages = [content for kind, content in _shape(events) if kind == "message"]
+    assert "".join(messages) == "one two three four "
+    assert messages[0] == "one two "
+
+
+def test_options_from_request():
+    assert CoalesceOptions.from_request(None, False, 30, 1024) is None
+    assert CoalesceOptions.from_request(True, False, 30, 1024) == CoalesceOptions(30, 1024)
+    assert CoalesceOptions.from_request(
+        {"window_ms": 5000, "max_bytes": 64}, False, 30, 1024
+    ) == CoalesceOptions(250.0, 64)
@@ -0,0 +1,207 @@
+"""Tests for the shared state store backends."""
+
+import pytest
+
+from src.core.state_store import MemoryStateStore, SQLiteStateStore, state_namespace
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def clock_and_store(request, tmp_path):
+    clock = FakeClock()
+    if request.param == "memory":
+        return clock, MemoryStateStore(clock=clock)
+    return clock, SQLiteStateStore(str(tmp_path / "state.db"), clock=clock)
+
+
+def test_mapping_interface(clock_and_store):
+    _, store = clock_and_store
+    ns = state_namespace("things", store=store)
+
+    ns["a"] = {"value": 1}
+    ns["b"] = [1, 2]
+
+    assert ns["a"] == {"value": 1}
+    assert ns.get("missing") is None
+    assert "b" in ns
+    assert sorted(ns) == ["a", "b"]
+    assert ns.copy() == {"a": {"value": 1}, "b": [1, 2]}
+
+    del ns["a"]
+    assert ns.pop("b") == [1, 2]
+    assert len(ns) == 0
+    with pytest.raises(KeyError):
+        ns["a"]
+
+
+def test_ttl_expiry(clock_and_store):
+    clock, store = clock_and_store
+    ns = state_namespace("approvals", ttl_seconds=60, store=store)
+
+    ns["old"] = 1
+    clock.now += 30
+    ns["new"] = 2
+    clock.now += 45
+
+    assert "old" not in ns
+    assert ns["new"] == 2
+    assert store.purge_expired() <= 1
+    assert ns.copy() == {"new": 2}
+
+
+def test_max_entries_evicts_oldest_write(clock_and_store):
+    clock, store = clock_and_store
+    ns = state_namespace("presence", max_entries=2, store=store)
+
+    for key in ("a", "b", "c"):
+        ns[key] = key
+        clock.now += 1
+
+    assert sorted(ns) == ["b", "c"]
+
+    # Rewriting a key makes it the newest
+    ns["b"] = "b2"
+    clock.now += 1
+    ns["d"] = "d"
+    assert sorted(ns) == ["b", "d"]
+
+
+def test_namespaces_are_isolated(clock_and_store):
+    _, store = clock_and_store
+    first = state_namespace("first", store=store)
+    second = state_namespace("second", store=store)
+
+    first["key"] = 1
+    second["key"] = 2
+    first.clear()
+
+    assert "key" not in first
+    assert second["key"] == 2
+
+
+def test_sqlite_state_is_shared_between_connections(tmp_path):
+    path = str(tmp_path / "state.db")
+    writer = state_namespace("sessions", store=SQLiteStateStore(path))
+    reader = state_namespace("sessions", store=SQLiteStateStore(path))
+
+    writer["session-1"] = {"is_active": True}
+
+    assert reader["session-1"] == {"is_active": True}
+
+
+def test_add_keeps_an_existing_value(clock_and_store):
+    clock, store = clock_and_store
+    ns = state_namespace("settings", ttl_seconds=60, store=store)
+
+    assert ns.add("theme", "dark")
+    assert not ns.add("theme", "light")
+    assert ns.setdefault("theme", "light") == "dark"
+    assert ns["theme"] == "dark"
+
+    # An expired value no longer counts
+    clock.now += 61
+    assert ns.add("theme", "light")
+    assert ns["theme"] == "light"
+
+
+def test_merge_sets_fields_in_place(clock_and_store):
+    _, store = clock_and_store
+    ns = state_namespace("threads", store=store)
+
+    assert ns.merge("t1", {"todos": [1], "tokens": None})
+    assert ns.merge("t1", {"files": ["a.py"]})
+    assert ns["t1"] == {"todos": [1], "tokens": None, "files": ["a.py"]}
+
+    assert not ns.merge("missing", {"a": 1}, create=False)
+    assert "missing" not in ns
+
+    ns.merge("presence", {"alice": {"client_id": "c1", "cursor": None}})
+    assert ns.merge("presence", {"cursor": {"x": 1}}, within="alice")
+    assert not ns.merge("presence", {"cursor": {"x": 1}}, within="bob")
+    assert ns["presence"] == {"alice": {"client_id": "c1", "cursor": {"x": 1}}}
+
+
+def test_remove_field_drops_the_empty_entry(clock_and_store):
+    _, store = clock_and_store
+    ns = state_namespace("presence", store=store)
+    ns.merge("conv", {"alice": {"client_id": "c1"}, "bob": {"client_id": "c2"}})
+
+    assert not ns.remove_field("conv", "alice", only_if=("client_id", "other"))
+    assert ns.remove_field("conv", "alice", only_if=("client_id", "c1"))
+    assert ns["conv"] == {"bob": {"client_id": "c2"}}
+
+    assert ns.remove_field("conv", "bob")
+    assert "conv" not in ns
+    assert not ns.remove_field("conv", "bob")
+
+
+async def test_async_variants(clock_and_store):
+    _, store = clock_and_store
+    ns = state_namespace("async", store=store)
+
+    await ns.aset("a", {"n": 1})
+    await ns.amerge("a", {"m": 2})
+    await ns.aupdate({"b": 2})
+
+    assert await ns.aget("a") == {"n": 1, "m": 2}
+    assert await ns.aget("missing", {}) == {}
+    assert await ns.acopy() == {"a": {"n": 1, "m": 2}, "b": 2}
+    assert await ns.apop("b") == 2
+    assert await ns.aremove_field("a", "n")
+    assert await ns.aget("a") == {"m": 2}
+
+
+async def test_defaults_are_seeded_on_first_read(clock_and_store):
+    _, store = clock_and_store
+    store.set("settings", "theme", "dark")
+    ns = state_namespace("settings", store=store, defaults={"theme": "auto", "font_size": 16})
+    # Declaring the namespace does not write
+    assert store.items("settings") == [("theme", "dark")]
+
+    # Saved settings win over the defaults
+    assert await ns.aget("theme") == "dark"
+    assert await ns.aget("font_size") == 16
+    assert await ns.acopy() == {"theme": "dark", "font_size": 16}
+
+
+def test_concurrent_merges_are_not_lost(tmp_path):
+    path = str(tmp_path / "state.db")
+    first = state_namespace("threads", store=SQLiteStateStore(path))
+    second = state_namespace("threads", store=SQLiteStateStore(path))
+
+    # Each worker only writes its own fields, neither overwrites the other
+    first.merge("t1", {"todos": [1]})
+    second.merge("t1", {"files": ["a.py"]})
+
+    assert first["t1"] == {"todos": [1], "files": ["a.py"]}
+
+
+def test_modify_replaces_the_value_atomically(clock_and_store):
+    clock, store = clock_and_store
+    ns = state_namespace("counters", ttl_seconds=60, store=store)
+    seen = []
+
+    def increment(current):
+        seen.append(current)
+        return {"count": (current or {"count": 0})["count"] + 1}
+
+    assert ns.modify("hits", increment) == {"count": 1}
+    assert ns.modify("hits", increment) == {"count": 2}
+    clock.now += 61
+    assert ns.modify("hits", increment) == {"count": 1}
+    assert seen == [None, {"count": 1}, None]
+
+    def fail(current):
+        raise RuntimeError("boom")
+
+    with pytest.raises(RuntimeError, match="boom"):
+        ns.modify("other", fail)
+    assert "other" not in ns
+    assert ns.copy() == {"hits": {"count": 1}}
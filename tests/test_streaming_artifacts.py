@@ -0,0 +1,105 @@
+"""Tests for incremental code block detection during streaming."""
+
+import re
+import time
+
+from src.utils.artifact_detection import CodeFenceParser, extract_code_blocks, is_react
+
+DOCUMENT = """Here is a component:
+
+```jsx
+import React from 'react';
+
+export default function button() {
+  return <button>Click</button>;
+}
+```
+
+And a helper:
+
+```python
+def add(a, b):
+    return a + b
+```
+
+```
+
+```
+Done.
+"""
+
+
+def _stream(text: str, size: int) -> tuple[CodeFenceParser, list]:
+    parser = CodeFenceParser()
+    events = []
+    for start in range(0, len(text), size):
+        events.extend(parser.feed(text[start:start + size]))
+    events.extend(parser.finish())
+    return parser, events
+
+
+def test_chunked_feeding_matches_whole_document():
+    expected = extract_code_blocks(DOCUMENT)
+    assert [block["language"] for block in expected] == ["React/JSX", "py"]
+    assert expected[0]["title"] == "Button"
+
+    for size in (1, 3, 7, 64):
+        parser, events = _stream(DOCUMENT, size)
+        assert parser.blocks == expected
+
+        names = [name for name, _ in events]
+        assert names.count("artifact_start") == 2
+        assert names.count("artifact_end") == 2
+        # Deltas join up to each block's code
+        for index, block in enumerate(expected):
+            code = "".join(
+                payload["content"]
+                for name, payload in events
+                if name == "artifact_delta" and payload["index"] == index
+            )
+            assert code == block["content"]
+
+
+def test_block_ends_before_the_document_does():
+    parser = CodeFenceParser()
+    events = parser.feed("Intro\n```python\nx = 1\n```")
+    assert [name for name, _ in events] == ["artifact_start", "artifact_delta", "artifact_end"]
+    assert events[-1][1]["content"] == "x = 1"
+    assert parser.feed(" and more prose") == []
+
+
+def test_unclosed_block_is_discarded():
+    parser = CodeFenceParser()
+    parser.feed("```js\nconst x = 1;\n")
+    assert parser.finish() == [("artifact_end", {"index": 0, "discarded": True})]
+    assert parser.blocks == []
+
+
+def test_matches_the_fence_regex():
+    samples = [
+        "```py\n```",
+        "```py\n\n```",
+        "````\nx\n```",
+        "```py x\ncode\n```",
+        "```py\n```x\n```",
+        "text ```a\nb\n```c\nd\n```",
+    ]
+    for sample in samples:
+        expected = [
+            code
+            for _, code in re.findall(r"```(\w+)?\n(.*?)\n```", sample, re.DOTALL)
+            if code.strip()
+        ]
+        assert [block["content"] for block in extract_code_blocks(sample)] == expected
+
+
+def test_react_detection_is_linear():
+    # Inputs that make the old backtracking patterns quadratic
+    headers = "function a(" * 50_000
+    returns = "function a() {" + " return" * 50_000
+
+    started = time.perf_counter()
+    assert not is_react(headers)
+    assert not is_react(returns)
+    assert is_react(returns + " <div/> }")
+    assert time.perf_counter() - started < 1.0
@@ -21,11 +21,14 @@ async def test_suggested_followups_generated(async_client: AsyncClient):
 
     assert response.status_code == 200
 
-    # Read the SSE stream
+    # Read the SSE stream; the event name comes on its own "event:" line
     suggestions_received = False
     suggestions = []
+    event = None
     async for line in response.aiter_lines():
-        if line.startswith("data: "):
+        if line.startswith("event: "):
+            event = line[7:]
+        elif line.startswith("data: "):
             data_str = line[6:]
             if not data_str:
                 continue
@@ -34,9 +37,8 @@ async def test_suggested_followups_generated(async_client: AsyncClient):
                 data = json.loads(data_str)
 
                 # Check for done event with suggestions
-                if data.get("event") == "done":
-                    event_data = json.loads(data.get("data", "{}"))
-                    suggestions = event_data.get("suggested_follow_ups", [])
+                if event == "done":
+                    suggestions = data.get("suggested_follow_ups", [])
                     if suggestions:
                         suggestions_received = True
                         print(f"✓ Received suggestions: {suggestions}")
@@ -136,5 +138,46 @@ async def test_suggestions_include_different_types(async_client: AsyncClient):
         assert isinstance(suggestions, list), f"Suggestions should be a list for {category}"
 
 
+
+@pytest.mark.asyncio
+async def test_local_followups_without_api_key():
+    """Without an API key suggestions come from the local rules, inline."""
+    from src.services.followup_service import followup_service
+
+    assert not followup_service.uses_model
+    suggestions = await followup_service.generate(
+        "Here is the code:\n```python\ndef f():\n    pass\n```",
+        "How do I write a function?",
+    )
+    assert suggestions
+    assert suggestions == followup_service.local_followups(
+        "Here is the code:\n```python\ndef f():\n    pass\n```",
+        "How do I write a function?",
+    )
+
+
+@pytest.mark.asyncio
+async def test_scheduled_followups_are_detached(monkeypatch):
+    """Scheduled generation runs as its own task and survives a cancelled waiter."""
+    from src.services.followup_service import followup_service
+
+    release = asyncio.Event()
+
+    async def slow_generate(response_content, user_message):
+        await release.wait()
+        return ["What next?"]
+
+    monkeypatch.setattr(followup_service, "generate", slow_generate)
+
+    task = followup_service.schedule("response", "question")
+    waiter = asyncio.create_task(followup_service.wait_for(task))
+    await asyncio.sleep(0)
+    waiter.cancel()
+    release.set()
+
+    assert await task == ["What next?"]
+    assert task not in followup_service._tasks
+
+
 if __name__ == "__main__":
     print("Run tests with: pytest tests/test_suggested_followups.py -v")
@@ -0,0 +1,181 @@
+"""Tests for the usage rollups and the cost calculator."""
+
+from datetime import datetime
+
+import pytest
+from sqlalchemy import delete, select, text, update
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from src.core import database
+from src.core.usage_rollups import rebuild_usage_rollups
+from src.models.project import Project
+from src.models.usage_rollup import UsageRollup
+from src.models.usage_tracking import UsageTracking
+from src.services.usage_service import calculate_cost, get_model_price, usage_service
+
+SONNET = "claude-sonnet-4-5-20250929"
+HAIKU = "claude-haiku-4-5-20251001"
+
+
+def _usage(created_at: datetime, model: str = SONNET, **kwargs) -> UsageTracking:
+    kwargs.setdefault("user_id", "default-user")
+    kwargs.setdefault("input_tokens", 100)
+    kwargs.setdefault("output_tokens", 50)
+    return UsageTracking(
+        model=model,
+        created_at=created_at,
+        cost_estimate=calculate_cost(
+            model,
+            input_tokens=kwargs["input_tokens"],
+            output_tokens=kwargs["output_tokens"],
+        ),
+        **kwargs,
+    )
+
+
+async def _rollups(db) -> list[tuple]:
+    result = await db.execute(
+        select(
+            UsageRollup.granularity,
+            UsageRollup.period,
+            UsageRollup.model,
+            UsageRollup.project_id,
+            UsageRollup.conversation_id,
+            UsageRollup.requests,
+            UsageRollup.input_tokens,
+            UsageRollup.output_tokens,
+        ).order_by(UsageRollup.granularity, UsageRollup.period, UsageRollup.model)
+    )
+    return [tuple(row) for row in result]
+
+
+def test_cost_calculator_uses_model_prices():
+    assert get_model_price(SONNET).input == 3.0
+    assert get_model_price("claude-opus-4-1-20250805").output == 75.0
+    assert get_model_price("claude-opus-4-5").output == 25.0
+    assert get_model_price("some-haiku-variant") == get_model_price(HAIKU)
+
+    # 1M input at $3 + 1M output at $15 + 1M cache reads at $0.30
+    assert calculate_cost(
+        SONNET, input_tokens=1_000_000, output_tokens=1_000_000, cache_read_tokens=1_000_000
+    ) == pytest.approx(18.3)
+    # Thinking is billed as output
+    assert calculate_cost(HAIKU, thinking_tokens=1_000_000) == pytest.approx(5.0)
+
+
+@pytest.mark.asyncio
+async def test_rollups_follow_inserts_updates_and_deletes(test_db):
+    first = _usage(datetime(2025, 1, 31, 23, 59), project_id="p1")
+    second = _usage(datetime(2025, 1, 15, 8, 0), project_id="p1")
+    third = _usage(datetime(2025, 2, 1, 0, 0), model=HAIKU, conversation_id="c1")
+    test_db.add_all([first, second, third])
+    await test_db.commit()
+
+    assert await _rollups(test_db) == [
+        ("day", "2025-01-15", SONNET, "p1", "", 1, 100, 50),
+        ("day", "2025-01-31", SONNET, "p1", "", 1, 100, 50),
+        ("day", "2025-02-01", HAIKU, "", "c1", 1, 100, 50),
+        ("month", "2025-01", SONNET, "p1", "", 2, 200, 100),
+        ("month", "2025-02", HAIKU, "", "c1", 1, 100, 50),
+    ]
+
+    await test_db.execute(
+        update(UsageTracking)
+        .where(UsageTracking.id == second.id)
+        .values(input_tokens=1000, created_at=datetime(2025, 2, 3))
+    )
+    await test_db.execute(delete(UsageTracking).where(UsageTracking.id == first.id))
+    await test_db.commit()
+
+    assert await _rollups(test_db) == [
+        ("day", "2025-02-01", HAIKU, "", "c1", 1, 100, 50),
+        ("day", "2025-02-03", SONNET, "p1", "", 1, 1000, 50),
+        ("month", "2025-02", HAIKU, "", "c1", 1, 100, 50),
+        ("month", "2025-02", SONNET, "p1", "", 1, 1000, 50),
+    ]
+
+    # A rebuild from the raw rows gives the same result
+    maintained = await _rollups(test_db)
+    counts = await (await test_db.connection()).run_sync(rebuild_usage_rollups)
+    assert counts == {"day": 2, "month": 2}
+    assert await _rollups(test_db) == maintained
+
+
+@pytest.mark.asyncio
+async def test_service_reads_rollups(test_db):
+    test_db.add(Project(id="p1", name="Alpha"))
+    test_db.add_all([
+        _usage(datetime(2025, 3, 1, 9), project_id="p1", conversation_id="c1"),
+        _usage(datetime(2025, 3, 1, 17), project_id="p1", conversation_id="c2"),
+        _usage(datetime(2025, 3, 2, 12), model=HAIKU, conversation_id="c3", input_tokens=10, output_tokens=10),
+    ])
+    await test_db.commit()
+
+    totals = await usage_service.totals(test_db, "month", start="2025-03", end="2025-03")
+    assert totals["requests"] == 3
+    assert totals["total_tokens"] == 320
+    assert totals["conversations"] == 3
+    assert totals["projects"] == 1
+    assert totals["estimated_cost"] == pytest.approx(
+        2 * calculate_cost(SONNET, input_tokens=100, output_tokens=50)
+        + calculate_cost(HAIKU, input_tokens=10, output_tokens=10)
+    )
+
+    series = await usage_service.series(test_db, "day", project_id="p1")
+    assert [(row["period"], row["requests"], row["conversations"]) for row in series] == [
+        ("2025-03-01", 2, 2),
+    ]
+
+    models = await usage_service.by_model(test_db, "day", start="2025-03-01", end="2025-03-31")
+    assert [row["model"] for row in models] == [SONNET, HAIKU]
+
+    projects = await usage_service.by_project(test_db, "day")
+    assert [(row["project_name"], row["requests"]) for row in projects] == [("Alpha", 2)]
+
+
+@pytest.mark.asyncio
+async def test_usage_endpoints_read_rollups(async_client, test_db):
+    test_db.add_all([
+        _usage(datetime(2025, 4, 10, 9), conversation_id="c1"),
+        _usage(datetime(2025, 4, 11, 9), conversation_id="c1", cache_read_tokens=1000),
+    ])
+    await test_db.commit()
+
+    daily = (await async_client.get("/api/usage/daily", params={"date": "2025-04-10"})).json()
+    assert daily["date"] == "2025-04-10"
+    assert daily["messages"] == 1
+    assert daily["input_tokens"] == 100
+
+    monthly = (await async_client.get("/api/usage/monthly", params={"month": "2025-04"})).json()
+    assert monthly["messages"] == 2
+    assert [day["date"] for day in monthly["daily_breakdown"]] == ["2025-04-10", "2025-04-11"]
+
+    conversation = (await async_client.get("/api/usage/conversations/c1")).json()
+    assert conversation["messages"] == 2
+    assert conversation["cache_read_tokens"] == 1000
+    assert conversation["estimated_cost"] > 0
+
+
+@pytest.mark.asyncio
+async def test_init_db_installs_the_rollup_triggers(monkeypatch):
+    """A fresh database gets usage_tracking and the triggers from init_db alone."""
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+    monkeypatch.setattr(database, "engine", engine)
+    try:
+        await database.init_db()
+        async with engine.begin() as conn:
+            names = set((await conn.execute(text(
+                "SELECT name FROM sqlite_master WHERE type IN ('table', 'trigger')"
+            ))).scalars())
+            assert {"usage_tracking", "usage_rollups", "usage_rollups_ai", "usage_rollups_ad", "usage_rollups_au"} <= names
+
+            await conn.execute(text(
+                "INSERT INTO usage_tracking (id, user_id, model, input_tokens, output_tokens, created_at) "
+                "VALUES ('u1', 'default-user', :model, 100, 50, '2025-05-01 10:00:00')"
+            ), {"model": SONNET})
+            rollups = (await conn.execute(text(
+                "SELECT granularity, period, requests, input_tokens FROM usage_rollups ORDER BY granularity"
+            ))).all()
+        assert [tuple(row) for row in rollups] == [("day", "2025-05-01", 1, 100), ("month", "2025-05", 1, 100)]
+    finally:
+        await engine.dispose()